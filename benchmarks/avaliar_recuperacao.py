@@ -0,0 +1,195 @@
+"""
+Avaliação offline da recuperação de produtos com os casos de testes_rag.txt
+
+Lê as perguntas "User: ..." de cada TESTE, recria o catálogo de
+chatbot_rag/sql.py (com índices FTS5 e vetorial) num diretório temporário e
+mede, para cada estratégia:
+- recall@k: fração dos produtos esperados (GABARITO) que aparecem no top-k
+- produtos e caracteres enviados ao prompt (custo de tokens de entrada)
+- falsos positivos nos produtos inexistentes (TESTE 3)
+- latência média por consulta
+
+Perguntas sem produto esperado definido (preço mínimo, histórico, comandos...)
+não entram no recall, só nas médias de contexto.
+
+Uso:
+    python benchmarks/avaliar_recuperacao.py
+    python benchmarks/avaliar_recuperacao.py --k 1 3 5 --detalhes
+    python benchmarks/avaliar_recuperacao.py --banco chatbot_rag/produtos.db
+"""
+import argparse
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_RAG = os.path.join(RAIZ, 'chatbot_rag')
+sys.path.insert(0, PASTA_RAG)
+
+from busca_textual import buscar_produtos
+from busca_vetorial import ARQUIVO_INDICE, buscar_linhas, carregar_indice
+from recuperacao_hibrida import RecuperadorHibrido, buscar_like
+
+ARQUIVO_TESTES = os.path.join(RAIZ, 'testes_rag.txt')
+
+# ============================================
+# GABARITO (produtos de chatbot_rag/sql.py)
+# ============================================
+SANDALIA = 'Sandália de Praia'
+OCULOS = 'Óculos de Sol'
+MOLETOM = 'Moletom de Lã Cinza'
+CACHECOL = 'Cachecol de Tricô'
+VESTIDO = 'Vestido de Verão'
+BERMUDA = 'Bermuda Cargo'
+CAMISETA = 'Camiseta Branca'
+JAQUETA = 'Jaqueta Jeans'
+
+GABARITO = {
+    # TESTE 1 / 2 / 10: nome completo, parcial e variações de escrita
+    **{nome: {nome} for nome in (SANDALIA, OCULOS, MOLETOM, CACHECOL, VESTIDO, BERMUDA, CAMISETA, JAQUETA)},
+    'sandália': {SANDALIA}, 'óculos': {OCULOS}, 'moletom': {MOLETOM}, 'cachecol': {CACHECOL},
+    'vestido': {VESTIDO}, 'bermuda': {BERMUDA}, 'camiseta': {CAMISETA}, 'jaqueta': {JAQUETA},
+    'SANDÁLIA': {SANDALIA}, 'sandalia (sem acento)': {SANDALIA}, 'SaNdÁlIa (misto)': {SANDALIA},
+    'oculos (sem acento)': {OCULOS}, 'MOLETOM': {MOLETOM},
+    # TESTE 4: perguntas naturais
+    'O que você tem para ir à praia?': {SANDALIA},
+    'Preciso de algo para o frio': {MOLETOM, CACHECOL},
+    'Tem roupa de verão?': {VESTIDO},
+    'O que é bom para o calor?': {VESTIDO, BERMUDA, SANDALIA},
+    'Tem acessórios?': {OCULOS, CACHECOL},
+    # TESTE 5 / 6: preço e estoque de um produto
+    'Quanto custa a sandália?': {SANDALIA}, 'Qual o preço do óculos?': {OCULOS},
+    'Quanto está o moletom?': {MOLETOM}, 'Tem sandália disponível?': {SANDALIA},
+    'Quantas camisetas você tem?': {CAMISETA}, 'Tem moletom em estoque?': {MOLETOM},
+    # TESTE 7: comparações
+    'Qual a diferença entre sandália e bermuda?': {SANDALIA, BERMUDA},
+    'O que é melhor para praia?': {SANDALIA},
+    'Compare moletom e cachecol': {MOLETOM, CACHECOL},
+    'Qual é mais caro, jaqueta ou vestido?': {JAQUETA, VESTIDO},
+    # TESTE 8: primeira mensagem da conversa
+    'Moletom de Lã': {MOLETOM},
+    # TESTE 9: palavras-chave múltiplas
+    'sandália praia': {SANDALIA}, 'roupa frio': {MOLETOM, CACHECOL}, 'acessório sol': {OCULOS},
+    'roupa verão': {VESTIDO}, 'calçado confortável': {SANDALIA},
+    # TESTE 12: atributos na descrição
+    'Qual roupa tem capuz?': {MOLETOM}, 'Tem produto com proteção UV?': {OCULOS},
+    'O que é de algodão?': {CAMISETA}, 'Tem roupa com bolsos?': {BERMUDA, MOLETOM},
+}
+
+# TESTE 3: não existem no catálogo (o ideal é não recuperar nada)
+INEXISTENTES = {'tênis de corrida', 'notebook', 'celular', 'sapato social', 'gravata', 'relógio',
+                'chinelo', 'bolsa', 'Tem algo de couro?'}
+
+_TESTE = re.compile(r'^##.*TESTE\s+(\d+):\s*(.*?)\**\s*$')
+
+# ============================================
+# CASOS
+# ============================================
+def ler_casos(caminho=ARQUIVO_TESTES):
+    """[(número do teste, título, pergunta)] na ordem do arquivo"""
+    casos, numero, titulo = [], 0, ''
+    with open(caminho, encoding='utf-8') as f:
+        for linha in f:
+            linha = linha.strip()
+            cabecalho = _TESTE.match(linha)
+            if cabecalho:
+                numero, titulo = int(cabecalho.group(1)), cabecalho.group(2).strip('* ')
+            elif linha.startswith('User:'):
+                # O arquivo começa sem cabeçalho (continuação do TESTE 1)
+                casos.append((numero or 1, titulo or 'Busca Exata', linha[len('User:'):].strip()))
+    return casos
+
+def preparar_catalogo(banco=None):
+    """Conexão com o catálogo; sem --banco, roda chatbot_rag/sql.py num diretório temporário"""
+    if banco:
+        pasta = os.path.dirname(os.path.abspath(banco))
+    else:
+        pasta = tempfile.mkdtemp()
+        subprocess.run([sys.executable, os.path.join(PASTA_RAG, 'sql.py')], cwd=pasta,
+                       check=True, stdout=subprocess.DEVNULL)
+        banco = os.path.join(pasta, 'produtos.db')
+    return sqlite3.connect(banco), carregar_indice(os.path.join(pasta, ARQUIVO_INDICE))
+
+def tamanho_contexto(produtos):
+    """Caracteres do bloco de produtos como montado em chat_rag_refinado.inv_modelo"""
+    return sum(len(f"Produto ID {p[0]}:\n- Nome: {p[1]}\n- Preço: R$ {p[2]:.2f}\n"
+                   f"- Estoque: {p[3]} unidades\n- Descrição: {p[4]}") + 2 for p in produtos)
+
+# ============================================
+# AVALIAÇÃO
+# ============================================
+def avaliar(nome, funcao, casos, k, detalhes=False):
+    acertos = esperados = falsos = inexistentes = 0
+    produtos_total = caracteres = 0
+    tempo = 0.0
+    for _, _, pergunta in casos:
+        inicio = time.perf_counter()
+        produtos = funcao(pergunta, k)
+        tempo += time.perf_counter() - inicio
+        produtos_total += len(produtos)
+        caracteres += tamanho_contexto(produtos)
+
+        nomes = [p[1] for p in produtos]
+        if pergunta in GABARITO:
+            relevantes = GABARITO[pergunta]
+            encontrados = len(relevantes & set(nomes[:k]))
+            acertos += encontrados
+            esperados += len(relevantes)
+            if detalhes and encontrados < len(relevantes):
+                print(f"   ✗ [{nome}] {pergunta!r} → {nomes[:k]}")
+        elif pergunta in INEXISTENTES:
+            inexistentes += 1
+            falsos += len(produtos)
+
+    n = len(casos)
+    return {
+        'recall': acertos / esperados * 100 if esperados else 0.0,
+        'produtos': produtos_total / n,
+        'caracteres': caracteres / n,
+        'falsos': falsos / inexistentes if inexistentes else 0.0,
+        'ms': tempo / n * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k das estratégias de recuperação (testes_rag.txt)")
+    parser.add_argument('--k', type=int, nargs='+', default=[3, 5])
+    parser.add_argument('--banco', help="produtos.db já indexado (padrão: recria via sql.py)")
+    parser.add_argument('--detalhes', action='store_true', help="Lista as perguntas com produto faltando")
+    args = parser.parse_args()
+
+    casos = ler_casos()
+    rotulados = sum(1 for _, _, p in casos if p in GABARITO)
+    print(f"\n📋 {len(casos)} perguntas em {os.path.basename(ARQUIVO_TESTES)} "
+          f"({rotulados} com gabarito, {len(INEXISTENTES)} inexistentes)")
+
+    conn, indice = preparar_catalogo(args.banco)
+    cursor = conn.cursor()
+    hibrido = RecuperadorHibrido(indice)
+
+    estrategias = [
+        ("like (antes, sem corte)", lambda p, k: buscar_like(cursor, p, limite=-1)),
+        ("fts5 bm25", lambda p, k: buscar_produtos(cursor, p, limite=k)),
+        ("vetorial", lambda p, k: buscar_linhas(cursor, [i for i, _ in indice.buscar(p, k=k)]) if p.strip() else []),
+        ("híbrido rrf", lambda p, k: hibrido.recuperar(cursor, p, top_k=k)),
+    ]
+
+    for k in args.k:
+        print(f"\n{'Estratégia':<26} {'recall@' + str(k):>10} {'prod/prompt':>12} {'chars/prompt':>13} "
+              f"{'falsos+':>8} {'ms/consulta':>12}")
+        print("-" * 86)
+        for nome, funcao in estrategias:
+            r = avaliar(nome, funcao, casos, k, args.detalhes)
+            print(f"{nome:<26} {r['recall']:>9.1f}% {r['produtos']:>12.1f} {r['caracteres']:>13.0f} "
+                  f"{r['falsos']:>8.1f} {r['ms']:>12.3f}")
+
+    print()
+    hibrido.mostrar_estatisticas()
+    conn.close()
+    print()
+
+if __name__ == "__main__":
+    main()
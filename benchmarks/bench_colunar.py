@@ -0,0 +1,137 @@
+"""
+Benchmark das consultas do assistente financeiro: SQLite x DuckDB sobre Parquet
+
+Para cada fator de escala, gera o banco (gera_dados.py --escala N), exporta
+o lake Parquet (comum/lago_colunar.py) e roda as consultas de cada intenção
+do roteador (montar_consulta, o mesmo SQL nos dois motores):
+- SQLite: pool somente leitura de comum/conexoes.py (índices ano/mes)
+- DuckDB: MotorDuckDB lendo o lake
+
+Mostra a mediana por consulta, o ganho e se os dois motores devolveram as
+mesmas linhas; mais o tamanho em disco e o tempo de exportação.
+
+Uso:
+    python benchmarks/bench_colunar.py
+    python benchmarks/bench_colunar.py --escalas 20 200 --repeticoes 5 --particionar sim
+"""
+import argparse
+import math
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_FINANCEIRO = os.path.join(RAIZ, 'chatbot_rag_financeiro')
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, PASTA_FINANCEIRO)
+
+import chat_langchain_rag_financeiro_v1 as assistente
+import roteador
+from comum.conexoes import PoolConexoesSQLite
+from comum.lago_colunar import MotorDuckDB, exportar_parquet
+
+# Uma pergunta por intenção do roteador (e os filtros que mudam o SQL)
+PERGUNTAS = [
+    "Receitas por empresa",
+    "Qual a receita da RSM Brasil?",
+    "Impostos por tipo",
+    "Quanto pagamos de IRPJ?",
+    "Custo da folha de pagamento",
+    "Quantos funcionários no TI?",
+    "Contas pendentes",
+    "Projetos mais lucrativos da Pollvo",
+    "Compare os últimos meses",
+    "Resumo geral",
+]
+
+PARTICIONAR = {'auto': None, 'sim': True, 'nao': False}
+
+# ============================================
+# MEDIÇÃO
+# ============================================
+def medir(motor, sql, parametros, repeticoes):
+    """(mediana em s, linhas); a primeira execução aquece caches e não conta"""
+    tempos = []
+    for _ in range(repeticoes + 1):
+        with motor.conexao() as cursor:
+            inicio = time.perf_counter()
+            cursor.execute(sql, parametros)
+            linhas = cursor.fetchall()
+            tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos[1:]), linhas
+
+def iguais(a, b):
+    """Mesmas linhas, com tolerância na soma de ponto flutuante (ordem de soma difere)"""
+    if len(a) != len(b):
+        return False
+    for linha_a, linha_b in zip(a, b):
+        for x, y in zip(linha_a, linha_b):
+            if isinstance(x, float) or isinstance(y, float):
+                if not math.isclose(x or 0.0, y or 0.0, rel_tol=1e-9, abs_tol=1e-6):
+                    return False
+            elif x != y:
+                return False
+    return True
+
+def rodar_escala(escala, args, pasta):
+    banco = os.path.join(pasta, f'financeiro_{escala}.db')
+    lago = os.path.join(pasta, f'lago_{escala}')
+    subprocess.run([sys.executable, os.path.join(PASTA_FINANCEIRO, 'gera_dados.py'), '--escala', str(escala),
+                    '--ate', args.ate, '--db', banco], check=True, stdout=subprocess.DEVNULL)
+    inicio = time.perf_counter()
+    exportado = exportar_parquet(banco, lago, particionar=PARTICIONAR[args.particionar])
+    exportacao = time.perf_counter() - inicio
+
+    linhas = sum(n for n, _, _ in exportado.values())
+    parquet_mb = sum(tamanho for _, tamanho, _ in exportado.values()) / (1024 * 1024)
+    particionadas = sum(1 for _, _, particionada in exportado.values() if particionada)
+    print(f"\n📦 Escala {escala}: {linhas:,} linhas | SQLite {os.path.getsize(banco) / (1024 * 1024):.1f} MB | "
+          f"Parquet {parquet_mb:.1f} MB ({particionadas} tabelas em ano=/mes=) | exportação {exportacao:.2f}s")
+    print(f"{'Pergunta':<38} | {'Intenção':<11} | {'SQLite':>9} | {'DuckDB':>9} | {'Ganho':>7} | Mesmas linhas")
+    print("-" * 100)
+
+    sqlite = PoolConexoesSQLite(banco)
+    duckdb = MotorDuckDB(lago)
+    totais = [0.0, 0.0]
+    for pergunta in PERGUNTAS:
+        rota = roteador.rotear(pergunta)
+        _, sql, parametros, _ = assistente.montar_consulta(rota)
+        t_sqlite, linhas_sqlite = medir(sqlite, sql, parametros, args.repeticoes)
+        t_duckdb, linhas_duckdb = medir(duckdb, sql, parametros, args.repeticoes)
+        totais[0] += t_sqlite
+        totais[1] += t_duckdb
+        print(f"{pergunta:<38} | {rota.intencao:<11} | {t_sqlite * 1000:>7.1f}ms | {t_duckdb * 1000:>7.1f}ms | "
+              f"{t_sqlite / t_duckdb:>6.1f}x | {'✅' if iguais(linhas_sqlite, linhas_duckdb) else '❌'}")
+    print("-" * 100)
+    print(f"{'Soma das medianas':<52} | {totais[0] * 1000:>7.1f}ms | {totais[1] * 1000:>7.1f}ms | "
+          f"{totais[0] / totais[1]:>6.1f}x")
+    sqlite.fechar()
+    duckdb.fechar()
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência das agregações: SQLite x DuckDB/Parquet")
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 20, 100])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--ate', default='2025-06', help="Último mês dos dados (AAAA-MM)")
+    parser.add_argument('--particionar', choices=sorted(PARTICIONAR), default='auto',
+                        help="Partições ano=/mes= no lake (auto: só tabelas grandes)")
+    args = parser.parse_args()
+
+    print("=" * 100)
+    print("🦆 CONSULTAS DO ASSISTENTE: SQLITE x DUCKDB (PARQUET)")
+    print("=" * 100)
+    print(f"Escalas: {args.escalas} | {args.repeticoes} repetições (mediana) | CPUs: {os.cpu_count()}")
+
+    pasta = tempfile.mkdtemp()
+    try:
+        for escala in args.escalas:
+            rodar_escala(escala, args, pasta)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
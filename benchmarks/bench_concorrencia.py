@@ -0,0 +1,85 @@
+"""
+Benchmark de throughput do caminho assíncrono (aobter_resposta / ainvoke)
+
+Sobe um endpoint Bedrock falso local (comum/bedrock_fake.py), aponta o cliente
+compartilhado (comum/clientes.py) para ele e mede quantos turnos por segundo o processo atende
+com N conversas simultâneas.
+
+Uso:
+    python benchmarks/bench_concorrencia.py
+    python benchmarks/bench_concorrencia.py --sessoes 1 8 32 --turnos 5 --latencia 0.3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'chatbot'))
+
+from comum.bedrock_fake import iniciar_servidor_fake, criar_cliente_fake
+from comum.clientes import definir_cliente
+from comum.concorrencia import LimitadorConcorrencia
+from comum.limitador_taxa import limitador_taxa_padrao
+import chat_v3_avancado
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+async def conversa(sessao, turnos, latencias, limitador):
+    """Uma conversa: várias perguntas sequenciais no mesmo ChatbotMeteora"""
+    chatbot = chat_v3_avancado.ChatbotMeteora(limitador=limitador)
+    for turno in range(turnos):
+        inicio = time.perf_counter()
+        resultado = await chatbot.aobter_resposta(f"Sessão {sessao}, pergunta {turno}: tem sandália?")
+        latencias.append(time.perf_counter() - inicio)
+        if resultado.get('erro'):
+            raise RuntimeError(resultado['texto'])
+
+async def rodar(n_sessoes, turnos, limitador):
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*[conversa(i, turnos, latencias, limitador) for i in range(n_sessoes)])
+    duracao = time.perf_counter() - inicio
+    return duracao, latencias
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput com N conversas concorrentes")
+    parser.add_argument('--sessoes', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--turnos', type=int, default=3)
+    parser.add_argument('--latencia', type=float, default=0.2, help="Latência simulada do Bedrock (s)")
+    parser.add_argument('--limite', type=int, default=16, help="Máximo de chamadas simultâneas")
+    args = parser.parse_args()
+    
+    servidor, url = iniciar_servidor_fake(latencia=args.latencia)
+    definir_cliente(criar_cliente_fake(url, max_pool_connections=args.limite))
+    limitador = LimitadorConcorrencia(args.limite)
+    limitador_taxa_padrao.escala = 1000   # cota do Bedrock fora da medição
+    
+    print("=" * 80)
+    print("⚡ BENCHMARK DE CONCORRÊNCIA (endpoint Bedrock falso)")
+    print("=" * 80)
+    print(f"Latência simulada: {args.latencia * 1000:.0f} ms | Limite simultâneo: {args.limite} | Turnos/sessão: {args.turnos}\n")
+    print(f"{'Sessões':>8} | {'Turnos':>7} | {'Duração':>9} | {'Turnos/s':>9} | {'p50':>8} | {'p95':>8} | {'p99':>8}")
+    print("-" * 80)
+    
+    for n in args.sessoes:
+        duracao, latencias = asyncio.run(rodar(n, args.turnos, limitador))
+        total = len(latencias)
+        print(f"{n:>8} | {total:>7} | {duracao:>8.2f}s | {total / duracao:>9.1f} | "
+              f"{percentil(latencias, 50) * 1000:>6.0f}ms | {percentil(latencias, 95) * 1000:>6.0f}ms | "
+              f"{percentil(latencias, 99) * 1000:>6.0f}ms")
+    
+    print("-" * 80)
+    print(f"Requisições atendidas pelo endpoint falso: {servidor.requisicoes}")
+    print(f"Limitador: {limitador.estatisticas()}")
+    servidor.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Benchmark do cubo mensal do assistente financeiro (gera_dados.py, CUBOS)
+
+Para cada fator de escala, gera o banco (gera_dados.py --escala N, com
+--estrela se pedido) e compara, para cada variante de montar_consulta:
+- Tabelas base: agregação com GROUP BY sobre as tabelas fato (cubo=False)
+- Cubo: leitura das agregações prontas (cubo=True)
+
+Depois simula um ETL: acrescenta um mês (cópia do último, valores +5%) e
+altera um mês antigo em todas as tabelas base (as fato_* no esquema estrela)
+e mede atualizar_cubos só dos meses pendentes contra o recálculo completo,
+conferindo que os dois deixam o cubo igual e que as consultas continuam
+devolvendo as mesmas linhas das tabelas base.
+
+Uso:
+    python benchmarks/bench_cubo.py
+    python benchmarks/bench_cubo.py --escalas 200 --estrela
+"""
+import argparse
+import math
+import os
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_FINANCEIRO = os.path.join(RAIZ, 'chatbot_rag_financeiro')
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, PASTA_FINANCEIRO)
+
+import chat_langchain_rag_financeiro_v1 as assistente
+import roteador
+from gera_dados import COLUNAS_CARGA, CUBOS, FATOS_ESTRELA, atualizar_cubos, eh_estrela
+
+# Uma pergunta por variante do SQL de montar_consulta que tem cubo
+PERGUNTAS = [
+    "Receitas por empresa",
+    "Qual a receita da RSM Brasil?",
+    "Qual a receita da Pollvo?",
+    "Impostos por tipo",
+    "Quanto pagamos de IRPJ?",
+    "Custo da folha de pagamento",
+    "Quantos funcionários no TI?",
+    "Contas pendentes",
+    "Projetos mais lucrativos da Pollvo",
+]
+
+# ============================================
+# MEDIÇÃO
+# ============================================
+def medir(conn, sql, parametros, repeticoes):
+    """(mediana em s, linhas); a primeira execução aquece caches e não conta"""
+    tempos = []
+    for _ in range(repeticoes + 1):
+        inicio = time.perf_counter()
+        linhas = conn.execute(sql, parametros).fetchall()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos[1:]), linhas
+
+def iguais(a, b):
+    """Mesmas linhas, com tolerância na soma de ponto flutuante (ordem de soma difere)"""
+    if len(a) != len(b):
+        return False
+    for linha_a, linha_b in zip(a, b):
+        for x, y in zip(linha_a, linha_b):
+            if isinstance(x, float) or isinstance(y, float):
+                if not math.isclose(x or 0.0, y or 0.0, rel_tol=1e-9, abs_tol=1e-6):
+                    return False
+            elif x != y:
+                return False
+    return True
+
+def comparar(conn, repeticoes):
+    """Uma linha por pergunta: tabelas base x cubo; retorna quantas divergiram"""
+    print(f"{'Pergunta':<38} | {'Tabelas base':>12} | {'Cubo':>9} | {'Ganho':>7} | Mesmas linhas")
+    print("-" * 92)
+    totais = [0.0, 0.0]
+    divergentes = 0
+    for pergunta in PERGUNTAS:
+        rota = roteador.rotear(pergunta)
+        _, sql, parametros, _ = assistente.montar_consulta(rota)
+        _, sql_cubo, parametros_cubo, _ = assistente.montar_consulta(rota, cubo=True)
+        t_base, linhas_base = medir(conn, sql, parametros, repeticoes)
+        t_cubo, linhas_cubo = medir(conn, sql_cubo, parametros_cubo, repeticoes)
+        totais[0] += t_base
+        totais[1] += t_cubo
+        ok = iguais(linhas_base, linhas_cubo)
+        divergentes += not ok
+        print(f"{pergunta:<38} | {t_base * 1000:>10.2f}ms | {t_cubo * 1000:>7.2f}ms | "
+              f"{t_base / t_cubo:>6.1f}x | {'✅' if ok else '❌'}")
+    print("-" * 92)
+    print(f"{'Soma das medianas':<38} | {totais[0] * 1000:>10.2f}ms | {totais[1] * 1000:>7.2f}ms | "
+          f"{totais[0] / totais[1]:>6.1f}x")
+    return divergentes
+
+# ============================================
+# ETL SIMULADO
+# ============================================
+def simular_etl(conn):
+    """
+    Acrescenta o mês seguinte ao último (cópia com valores +5%) e altera o
+    primeiro mês (valores +1%) em cada tabela base; retorna os dois (ano, mes)
+    """
+    (ano, mes), = conn.execute("SELECT ano, mes FROM rsm_contabil_consolidado ORDER BY ano DESC, mes DESC LIMIT 1")
+    (ano_antigo, mes_antigo), = conn.execute("SELECT ano, mes FROM rsm_contabil_consolidado "
+                                             "ORDER BY ano, mes LIMIT 1")
+    novo = (ano + mes // 12, mes % 12 + 1)
+    data = f"{novo[0]:04d}-{novo[1]:02d}-01"
+    estrela = eh_estrela(conn)
+    if estrela:
+        conn.execute("INSERT INTO dim_periodo VALUES (?, ?, ?, ?)", (novo[0] * 100 + novo[1], *novo, data))
+    for tabela, colunas in COLUNAS_CARGA.items():
+        fato = FATOS_ESTRELA[tabela]
+        if estrela:
+            colunas = [f"{c}_id" for c in fato.dimensoes] + fato.medidas
+            tabela, periodo, antigo = fato.nome, "periodo_id = ?", (ano_antigo * 100 + mes_antigo,)
+            conn.execute(f"INSERT INTO {tabela} (periodo_id, {', '.join(colunas)}) "
+                         f"SELECT ?, {', '.join(c + ' * 1.05' if c in fato.medidas else c for c in colunas)} "
+                         f"FROM {tabela} WHERE periodo_id = ?", (novo[0] * 100 + novo[1], ano * 100 + mes))
+        else:
+            periodo, antigo = "ano = ? AND mes = ?", (ano_antigo, mes_antigo)
+            valores = [{'ano': '?', 'mes': '?', fato.data: '?'}.get(c, c + ' * 1.05' if c in fato.medidas else c)
+                       for c in colunas]
+            conn.execute(f"INSERT INTO {tabela} ({', '.join(colunas)}) SELECT {', '.join(valores)} "
+                         f"FROM {tabela} WHERE ano = ? AND mes = ?", (*novo, data, ano, mes))
+        medida = fato.medidas[-1]
+        conn.execute(f"UPDATE {tabela} SET {medida} = {medida} * 1.01 WHERE {periodo}", antigo)
+    conn.commit()
+    return novo, (ano_antigo, mes_antigo)
+
+def conteudo_cubos(conn):
+    return {cubo.nome: conn.execute(f"SELECT * FROM {cubo.nome} ORDER BY ano, mes, {', '.join(cubo.grupo)}").fetchall()
+            for cubo in CUBOS}
+
+# ============================================
+# EXECUÇÃO
+# ============================================
+def rodar_escala(escala, args, pasta):
+    banco = os.path.join(pasta, f'financeiro_{escala}.db')
+    subprocess.run([sys.executable, os.path.join(PASTA_FINANCEIRO, 'gera_dados.py'), '--escala', str(escala),
+                    '--ate', args.ate, '--db', banco] + (['--estrela'] if args.estrela else []),
+                   check=True, stdout=subprocess.DEVNULL)
+    conn = sqlite3.connect(banco)
+    linhas_base = sum(conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0] for tabela in COLUNAS_CARGA)
+    linhas_cubo = sum(conn.execute(f"SELECT COUNT(*) FROM {cubo.nome}").fetchone()[0] for cubo in CUBOS)
+    print(f"\n📦 Escala {escala}{' (estrela)' if args.estrela else ''}: {linhas_base:,} linhas nas tabelas base | "
+          f"{linhas_cubo:,} no cubo ({len(CUBOS)} tabelas)\n")
+    divergentes = comparar(conn, args.repeticoes)
+
+    novo, antigo = simular_etl(conn)
+    pendentes = conn.execute("SELECT COUNT(*) FROM cubos_pendentes").fetchone()[0]
+    inicio = time.perf_counter()
+    atualizar_cubos(conn)
+    incremental = time.perf_counter() - inicio
+    depois_incremental = conteudo_cubos(conn)
+    inicio = time.perf_counter()
+    atualizar_cubos(conn, completo=True)
+    completo = time.perf_counter() - inicio
+    completo_cubos = conteudo_cubos(conn)
+    mesmo_cubo = all(iguais(completo_cubos[nome], linhas) for nome, linhas in depois_incremental.items())
+    print(f"\n🔄 ETL: +{novo[1]:02d}/{novo[0]} e {antigo[1]:02d}/{antigo[0]} alterado "
+          f"({pendentes} (origem, mês) pendentes)")
+    print(f"   • atualizar_cubos (pendentes): {incremental * 1000:>9.1f}ms")
+    print(f"   • atualizar_cubos (completo):  {completo * 1000:>9.1f}ms  → "
+          f"{completo / incremental:.0f}x | mesmo cubo: {'✅' if mesmo_cubo else '❌'}\n")
+    divergentes += comparar(conn, args.repeticoes) + (not mesmo_cubo)
+    conn.close()
+    return divergentes
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas do assistente: tabelas base x cubo mensal")
+    parser.add_argument('--escalas', type=int, nargs='+', default=[20, 200])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--ate', default='2025-06', help="Último mês dos dados (AAAA-MM)")
+    parser.add_argument('--estrela', action='store_true', help="Gera o banco em esquema estrela")
+    args = parser.parse_args()
+
+    print("=" * 92)
+    print("🧊 CONSULTAS DO ASSISTENTE: TABELAS BASE x CUBO MENSAL")
+    print("=" * 92)
+    print(f"Escalas: {args.escalas} | {args.repeticoes} repetições (mediana) | SQLite {sqlite3.sqlite_version}")
+
+    pasta = tempfile.mkdtemp()
+    try:
+        divergentes = sum(rodar_escala(escala, args, pasta) for escala in args.escalas)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+    if divergentes:
+        print(f"❌ {divergentes} divergência(s) entre cubo e tabelas base")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Benchmark do esquema estrela do banco financeiro: tamanho e varredura
+
+Para cada fator de escala, gera o banco normal (gera_dados.py --escala N),
+copia e converte a cópia para o esquema estrela (gera_dados.py --migrar
+--estrela) e compara os dois com o mesmo SQL (os nomes originais são views
+com joins no esquema estrela):
+- Tamanho do arquivo e, pelo dbstat, de tabelas fato, índices e dimensões
+- Agregações sobre todo o histórico (varrem a tabela fato inteira)
+- As consultas do assistente (montar_consulta), que leem só os meses recentes
+
+Mostra a mediana de cada consulta, o ganho e se os dois devolveram as mesmas
+linhas. Medição com o cache do sistema de arquivos quente.
+
+Uso:
+    python benchmarks/bench_estrela.py
+    python benchmarks/bench_estrela.py --escalas 200 1000 --repeticoes 3
+"""
+import argparse
+import math
+import os
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_FINANCEIRO = os.path.join(RAIZ, 'chatbot_rag_financeiro')
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, PASTA_FINANCEIRO)
+
+import chat_langchain_rag_financeiro_v1 as assistente
+import roteador
+from gera_dados import COLUNAS_CARGA, DIMENSOES, FATOS_ESTRELA
+
+# Agregações sobre todo o histórico: cada uma lê uma tabela fato inteira
+VARREDURAS = [
+    ("Receita RSM por empresa",
+     "SELECT empresa, SUM(receita) FROM rsm_contabil_consolidado GROUP BY empresa ORDER BY 1"),
+    ("Receita Pollvo por ano",
+     "SELECT ano, SUM(receita) FROM pollvo_contabil_consolidado GROUP BY ano ORDER BY 1"),
+    ("Financeiro por status",
+     "SELECT status, SUM(qtd), SUM(total) FROM rsm_financeiro_consolidado GROUP BY status ORDER BY 1"),
+    ("Impostos por tipo",
+     "SELECT tipo_imposto, SUM(imposto), SUM(base_calculo) FROM rsm_fiscal_consolidado GROUP BY tipo_imposto ORDER BY 1"),
+    ("Folha por departamento",
+     "SELECT departamento, SUM(funcionarios), SUM(folha) FROM rsm_folha_consolidada GROUP BY departamento ORDER BY 1"),
+    ("Receita por cliente",
+     "SELECT cliente, SUM(receita_projeto) FROM pollvo_timesheet GROUP BY cliente ORDER BY 1"),
+]
+
+# Uma pergunta por variante do SQL de montar_consulta
+PERGUNTAS = [
+    "Receitas por empresa",
+    "Qual a receita da RSM Brasil?",
+    "Impostos por tipo",
+    "Quanto pagamos de IRPJ?",
+    "Custo da folha de pagamento",
+    "Quantos funcionários no TI?",
+    "Contas pendentes",
+    "Projetos mais lucrativos da Pollvo",
+]
+
+# ============================================
+# MEDIÇÃO
+# ============================================
+def medir(conn, sql, parametros, repeticoes):
+    """(mediana em s, linhas); a primeira execução aquece caches e não conta"""
+    tempos = []
+    for _ in range(repeticoes + 1):
+        inicio = time.perf_counter()
+        linhas = conn.execute(sql, parametros).fetchall()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos[1:]), linhas
+
+def iguais(a, b):
+    """Mesmas linhas, com tolerância na soma de ponto flutuante (ordem de soma difere)"""
+    if len(a) != len(b):
+        return False
+    for linha_a, linha_b in zip(a, b):
+        for x, y in zip(linha_a, linha_b):
+            if isinstance(x, float) or isinstance(y, float):
+                if not math.isclose(x or 0.0, y or 0.0, rel_tol=1e-9, abs_tol=1e-6):
+                    return False
+            elif x != y:
+                return False
+    return True
+
+def tamanhos(conn):
+    """MB de tabelas fato, índices e dimensões pelo dbstat (None se o SQLite não tiver dbstat)"""
+    fatos = set(COLUNAS_CARGA) | {fato.nome for fato in FATOS_ESTRELA.values()}
+    dimensoes = set(DIMENSOES.values()) | {'dim_periodo'}
+    try:
+        objetos = conn.execute('''
+        SELECT m.type, m.name, m.tbl_name, SUM(s.pgsize) FROM dbstat s
+        JOIN sqlite_master m ON m.name = s.name GROUP BY m.name
+        ''').fetchall()
+    except sqlite3.OperationalError:
+        return None
+    grupos = {'fatos': 0, 'indices': 0, 'dimensoes': 0}
+    for tipo, nome, tabela, tamanho in objetos:
+        if tipo == 'index' and tabela in fatos:
+            grupos['indices'] += tamanho
+        elif nome in fatos:
+            grupos['fatos'] += tamanho
+        elif nome in dimensoes or tabela in dimensoes:
+            grupos['dimensoes'] += tamanho
+    return {grupo: tamanho / (1024 * 1024) for grupo, tamanho in grupos.items()}
+
+def comparar(rotulo, consultas, normal, estrela, repeticoes):
+    """Uma linha por consulta [(nome, sql, parametros)] e a soma das medianas"""
+    print(f"\n{rotulo:<38} | {'Normal':>9} | {'Estrela':>9} | {'Ganho':>7} | Mesmas linhas")
+    print("-" * 88)
+    totais = [0.0, 0.0]
+    for nome, sql, parametros in consultas:
+        t_normal, linhas_normal = medir(normal, sql, parametros, repeticoes)
+        t_estrela, linhas_estrela = medir(estrela, sql, parametros, repeticoes)
+        totais[0] += t_normal
+        totais[1] += t_estrela
+        print(f"{nome:<38} | {t_normal * 1000:>7.1f}ms | {t_estrela * 1000:>7.1f}ms | "
+              f"{t_normal / t_estrela:>6.2f}x | {'✅' if iguais(linhas_normal, linhas_estrela) else '❌'}")
+    print("-" * 88)
+    print(f"{'Soma das medianas':<38} | {totais[0] * 1000:>7.1f}ms | {totais[1] * 1000:>7.1f}ms | "
+          f"{totais[0] / totais[1]:>6.2f}x")
+
+# ============================================
+# EXECUÇÃO
+# ============================================
+def rodar_escala(escala, args, pasta):
+    gera_dados = os.path.join(PASTA_FINANCEIRO, 'gera_dados.py')
+    banco = os.path.join(pasta, f'normal_{escala}.db')
+    banco_estrela = os.path.join(pasta, f'estrela_{escala}.db')
+    subprocess.run([sys.executable, gera_dados, '--escala', str(escala), '--ate', args.ate, '--db', banco],
+                   check=True, stdout=subprocess.DEVNULL)
+    shutil.copyfile(banco, banco_estrela)
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, gera_dados, '--migrar', '--estrela', '--db', banco_estrela],
+                   check=True, stdout=subprocess.DEVNULL)
+    conversao = time.perf_counter() - inicio
+
+    normal = sqlite3.connect(f"file:{banco}?mode=ro", uri=True)
+    estrela = sqlite3.connect(f"file:{banco_estrela}?mode=ro", uri=True)
+    linhas = sum(normal.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0] for tabela in COLUNAS_CARGA)
+    mb_normal = os.path.getsize(banco) / (1024 * 1024)
+    mb_estrela = os.path.getsize(banco_estrela) / (1024 * 1024)
+    print(f"\n📦 Escala {escala}: {linhas:,} linhas | arquivo {mb_normal:.1f} MB → {mb_estrela:.1f} MB "
+          f"({(1 - mb_estrela / mb_normal) * 100:.0f}% menor) | conversão {conversao:.2f}s")
+    partes_normal, partes_estrela = tamanhos(normal), tamanhos(estrela)
+    if partes_normal and partes_estrela:
+        print("   " + " | ".join(f"{grupo} {partes_normal[grupo]:.1f} → {partes_estrela[grupo]:.1f} MB"
+                                 for grupo in partes_normal))
+
+    comparar("Varredura (todo o histórico)", [(nome, sql, ()) for nome, sql in VARREDURAS],
+             normal, estrela, args.repeticoes)
+    consultas = []
+    for pergunta in PERGUNTAS:
+        _, sql, parametros, _ = assistente.montar_consulta(roteador.rotear(pergunta))
+        consultas.append((pergunta, sql, parametros))
+    comparar("Consultas do assistente", consultas, normal, estrela, args.repeticoes)
+    normal.close()
+    estrela.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamanho e varredura: banco normal x esquema estrela")
+    parser.add_argument('--escalas', type=int, nargs='+', default=[20, 200])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--ate', default='2025-06', help="Último mês dos dados (AAAA-MM)")
+    args = parser.parse_args()
+
+    print("=" * 88)
+    print("⭐ BANCO FINANCEIRO: NORMAL x ESQUEMA ESTRELA")
+    print("=" * 88)
+    print(f"Escalas: {args.escalas} | {args.repeticoes} repetições (mediana) | SQLite {sqlite3.sqlite_version}")
+
+    pasta = tempfile.mkdtemp()
+    try:
+        for escala in args.escalas:
+            rodar_escala(escala, args, pasta)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
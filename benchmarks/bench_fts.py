@@ -0,0 +1,162 @@
+"""
+Benchmark da busca de produtos: LIKE (como era) x FTS5 + BM25
+
+Gera um catálogo sintético (padrão: 1M produtos) no esquema de
+chatbot_rag/sql.py, cria o índice roupas_fts (chatbot_rag/busca_textual.py)
+e compara, por pergunta:
+- "like por palavra": um LOWER(nome) LIKE '%termo%' por palavra (chat_langchain_rag_v1)
+- "like frase": nome LIKE ? OR descricao LIKE ? com a frase inteira (chat_rag_refinado)
+- "fts5": uma consulta MATCH com ranking BM25 e top-k
+
+Uso:
+    python benchmarks/bench_fts.py
+    python benchmarks/bench_fts.py --produtos 100000 --repeticoes 3 --banco /tmp/catalogo.db
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'chatbot_rag'))
+
+from busca_textual import buscar_produtos, criar_indice_fts
+
+TIPOS = ['Sandália', 'Camiseta', 'Calça', 'Vestido', 'Jaqueta', 'Bermuda', 'Óculos',
+         'Moletom', 'Cachecol', 'Tênis', 'Saia', 'Blusa', 'Bolsa', 'Chinelo', 'Casaco']
+MATERIAIS = ['de Algodão', 'de Couro', 'de Lã', 'Jeans', 'de Linho', 'de Malha', 'de Seda',
+             'de Tricô', 'Sintético', 'de Poliéster']
+CORES = ['Branca', 'Preta', 'Azul', 'Vermelha', 'Verde', 'Cinza', 'Rosa', 'Bege', 'Amarela', 'Marrom']
+ESTILOS = ['Casual', 'Social', 'Esportivo', 'de Praia', 'Slim', 'Oversize', 'Básico', 'Vintage']
+DETALHES = ['com bolsos laterais', 'com estampa floral', 'gola redonda', 'com capuz',
+            'sola antiderrapante', 'proteção UV400', 'tecido leve e fresco', 'lavagem escura',
+            'tiras reguláveis', 'ideal para o inverno', 'ideal para o verão', 'acabamento premium']
+
+PERGUNTAS = [
+    "Tem sandália de praia?",
+    "óculos de sol com proteção uv",
+    "camisetas brancas de algodão",
+    "quero uma jaqueta jeans com lavagem escura",
+    "vestido floral leve para o verão",
+    "moletom cinza com capuz",
+]
+
+# ============================================
+# CATÁLOGO SINTÉTICO
+# ============================================
+def gerar_catalogo(caminho, total, lote=50_000):
+    """Cria roupas (esquema do sql.py) com 'total' produtos aleatórios"""
+    conn = sqlite3.connect(caminho)
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('''
+    CREATE TABLE roupas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        preco REAL NOT NULL,
+        quantidade INTEGER NOT NULL,
+        descricao TEXT
+    )
+    ''')
+
+    aleatorio = random.Random(42)
+    def _produtos(n):
+        for _ in range(n):
+            nome = f"{aleatorio.choice(TIPOS)} {aleatorio.choice(MATERIAIS)} {aleatorio.choice(CORES)} {aleatorio.choice(ESTILOS)}"
+            descricao = f"{nome.split()[0]} {aleatorio.choice(DETALHES)}, {aleatorio.choice(DETALHES)}."
+            yield nome, round(aleatorio.uniform(19.9, 499.9), 2), aleatorio.randint(0, 200), descricao
+
+    restantes = total
+    while restantes > 0:
+        n = min(lote, restantes)
+        conn.executemany("INSERT INTO roupas (nome, preco, quantidade, descricao) VALUES (?, ?, ?, ?)",
+                         _produtos(n))
+        restantes -= n
+    conn.commit()
+    return conn
+
+# ============================================
+# ESTRATÉGIAS DE BUSCA
+# ============================================
+def like_por_palavra(cursor, pergunta):
+    """Como em chat_langchain_rag_v1 (antes): um LIKE por palavra + dedupe em Python"""
+    vistos, produtos = set(), []
+    for termo in pergunta.lower().split():
+        cursor.execute("SELECT * FROM roupas WHERE LOWER(nome) LIKE ?", ('%' + termo + '%',))
+        for p in cursor.fetchall():
+            if p[0] not in vistos:
+                vistos.add(p[0])
+                produtos.append(p)
+    return produtos
+
+def like_frase(cursor, pergunta):
+    """Como em chat_rag_refinado (antes): frase inteira em nome OU descrição"""
+    cursor.execute("SELECT * FROM roupas WHERE nome LIKE ? OR descricao LIKE ?",
+                   ('%' + pergunta + '%', '%' + pergunta + '%'))
+    return cursor.fetchall()
+
+def fts5(cursor, pergunta):
+    return buscar_produtos(cursor, pergunta)
+
+# ============================================
+# EXECUÇÃO
+# ============================================
+def medir(funcao, cursor, pergunta, repeticoes):
+    """(melhor tempo em ms, quantidade de linhas retornadas)"""
+    melhor, linhas = float('inf'), 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        linhas = len(funcao(cursor, pergunta))
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000, linhas
+
+def main():
+    parser = argparse.ArgumentParser(description="LIKE x FTS5 na busca de produtos")
+    parser.add_argument('--produtos', type=int, default=1_000_000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--banco', help="Arquivo do catálogo (padrão: temporário)")
+    args = parser.parse_args()
+
+    caminho = args.banco or os.path.join(tempfile.mkdtemp(), 'catalogo.db')
+    if os.path.exists(caminho):
+        os.remove(caminho)
+
+    print(f"\n🏭 Gerando {args.produtos:,} produtos em {caminho}...")
+    inicio = time.perf_counter()
+    conn = gerar_catalogo(caminho, args.produtos)
+    print(f"   ✅ Catálogo: {time.perf_counter() - inicio:.1f}s")
+
+    inicio = time.perf_counter()
+    criar_indice_fts(conn)
+    print(f"   ✅ Índice FTS5: {time.perf_counter() - inicio:.1f}s "
+          f"({os.path.getsize(caminho) / 1024 / 1024:.0f} MB no total)\n")
+
+    cursor = conn.cursor()
+    estrategias = [("like por palavra", like_por_palavra), ("like frase", like_frase), ("fts5", fts5)]
+
+    print(f"{'Pergunta':<45} " + " ".join(f"{nome:>22}" for nome, _ in estrategias))
+    print("-" * 115)
+    totais = {nome: 0.0 for nome, _ in estrategias}
+    for pergunta in PERGUNTAS:
+        colunas = []
+        for nome, funcao in estrategias:
+            ms, linhas = medir(funcao, cursor, pergunta, args.repeticoes)
+            totais[nome] += ms
+            colunas.append(f"{ms:>9.1f} ms {linhas:>8,} lin")
+        print(f"{pergunta[:44]:<45} " + " ".join(f"{c:>22}" for c in colunas))
+
+    print("-" * 115)
+    print(f"{'Média por pergunta':<45} " +
+          " ".join(f"{totais[nome] / len(PERGUNTAS):>19.1f} ms" for nome, _ in estrategias))
+
+    print("\n🏆 Top 3 (fts5) para a primeira pergunta:")
+    for p in fts5(cursor, PERGUNTAS[0])[:3]:
+        print(f"   → {p[1]} | R$ {p[2]:.2f} | {p[4]}")
+    conn.close()
+    print()
+
+if __name__ == "__main__":
+    main()
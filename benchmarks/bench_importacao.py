@@ -0,0 +1,141 @@
+"""
+Benchmark de inicialização a frio: tempo de import de cada bot
+
+Para cada bot roda, num processo novo, python -X importtime -c "import <bot>"
+(várias vezes, mediana) e soma o tempo próprio dos imports que um
+interpretador vazio (-c pass) não faz. É o custo pago
+antes da primeira linha útil: subir um worker do servidor, um teste ou o
+REPL até o banner.
+
+Também mostra quais dependências pesadas (boto3, langchain_core, numpy)
+foram carregadas no import e quanto custaram, com tudo o que elas puxam. O stdin é fechado e o
+diretório é temporário: um bot que ainda entra no loop ou abre o banco no
+import não trava o benchmark (é encerrado após TIMEOUT_IMPORT e marcado)
+nem deixa arquivos para trás.
+
+Uso:
+    python benchmarks/bench_importacao.py
+    python benchmarks/bench_importacao.py --repeticoes 9 --meta 150
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+
+# (rótulo, pasta, módulo)
+BOTS = [
+    ('chat_v1', 'chatbot', 'chat_v1'),
+    ('chat_v2', 'chatbot', 'chat_v2'),
+    ('chat_v3_avancado', 'chatbot', 'chat_v3_avancado'),
+    ('chat_langchain_v1', 'chatbot_com_langchain', 'chat_langchain_v1'),
+    ('chat_langchain_rag_v1', 'chatbot_rag', 'chat_langchain_rag_v1'),
+    ('chat_rag_refinado', 'chatbot_rag', 'chat_rag_refinado'),
+    ('rag_financeiro_v1', 'chatbot_rag_financeiro', 'chat_langchain_rag_financeiro_v1'),
+    ('servidor (financeiro)', 'chatbot_rag_financeiro', 'servidor'),
+    ('prompt_engineering1', '', 'prompt_engineering1'),
+    ('teste_cloude', '', 'teste_cloude'),
+]
+
+PESADOS = ('boto3', 'langchain_core', 'numpy')
+TIMEOUT_IMPORT = 15   # segundos; acima disso o bot ficou preso num loop no import
+
+# ============================================
+# MEDIÇÃO
+# ============================================
+def ler_importtime(saida):
+    """[(nível, nome, próprio_us, cumulativo_us)] das linhas 'import time:' do stderr"""
+    imports = []
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:'):
+            continue
+        partes = linha[len('import time:'):].split('|')
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue   # cabeçalho
+        nome = partes[2].rstrip()
+        nivel = (len(nome) - len(nome.lstrip()) - 1) // 2
+        imports.append((nivel, nome.strip(), int(partes[0]), int(partes[1])))
+    return imports
+
+def custo_pesados(imports):
+    """{pacote: ms} - cumulativo dos imports do pacote que não estão dentro de outro do mesmo pacote"""
+    pesados = {}
+    pilha = []
+    # O -X importtime lista os filhos antes do pai: de trás para frente, o pai vem primeiro
+    for nivel, nome, _, cumulativo in reversed(imports):
+        del pilha[nivel:]
+        pacote = nome.split('.')[0]
+        if pacote in PESADOS and pacote not in pilha:
+            pesados[pacote] = pesados.get(pacote, 0) + cumulativo / 1000
+        pilha.append(pacote)
+    return pesados
+
+def medir(codigo, pasta, cwd, ja_carregados=frozenset()):
+    """(imports em ms, wall em ms, {pesado: ms}, travou, módulos) de um processo novo"""
+    ambiente = dict(os.environ, PYTHONPATH=os.pathsep.join([pasta, RAIZ]),
+                    AWS_DEFAULT_REGION='us-east-2', PYTHONDONTWRITEBYTECODE='1')
+    inicio = time.perf_counter()
+    try:
+        saida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], cwd=cwd, env=ambiente,
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True, timeout=TIMEOUT_IMPORT).stderr
+        travou = False
+    except subprocess.TimeoutExpired as e:
+        # Loop no import que engole o EOFError do input(): mede o que importou até ali
+        saida = e.stderr.decode('utf-8', 'replace') if isinstance(e.stderr, bytes) else (e.stderr or '')
+        travou = True
+    wall = (time.perf_counter() - inicio) * 1000
+    # Soma dos tempos próprios: vale mesmo se o import do bot não terminou
+    imports = ler_importtime(saida)
+    total = sum(proprio for _, nome, proprio, _ in imports if nome not in ja_carregados) / 1000
+    return total, wall, custo_pesados(imports), travou, {nome for _, nome, _, _ in imports}
+
+def medir_mediana(codigo, pasta, cwd, repeticoes, ja_carregados=frozenset()):
+    medidas = [medir(codigo, pasta, cwd, ja_carregados) for _ in range(repeticoes)]
+    if medidas[0][3]:
+        medidas = medidas[:1]   # travou: uma medida basta, o wall é o timeout
+    return (statistics.median(m[0] for m in medidas),
+            statistics.median(m[1] for m in medidas),
+            medidas[-1][2], medidas[-1][3], medidas[-1][4])
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de import (-X importtime) de cada bot")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--meta', type=float, default=150.0, help="Meta de import por bot (ms)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        # Módulos da inicialização do interpretador (site, encodings...) ficam de fora
+        _, vazio_wall, _, _, inicializacao = medir_mediana('pass', RAIZ, cwd, args.repeticoes)
+
+        print("=" * 100)
+        print("🚀 INICIALIZAÇÃO A FRIO DOS BOTS (python -X importtime)")
+        print("=" * 100)
+        print(f"Mediana de {args.repeticoes} processos | interpretador vazio: {vazio_wall:.0f} ms wall "
+              f"(descontado) | meta: {args.meta:.0f} ms\n")
+        print(f"{'Bot':<24} | {'Import':>9} | {'Wall':>9} | {'Meta':>4} | Dependências pesadas no import")
+        print("-" * 100)
+
+        dentro = 0
+        for rotulo, pasta, modulo in BOTS:
+            pasta_abs = os.path.join(RAIZ, pasta)
+            total, wall, pesados, travou, _ = medir_mediana(f'import {modulo}', pasta_abs, cwd,
+                                                           args.repeticoes, inicializacao)
+            wall = max(0.0, wall - vazio_wall)
+            ok = total <= args.meta and not travou
+            dentro += ok
+            carregados = ", ".join(f"{nome} {ms:.0f}ms" for nome, ms in
+                                   sorted(pesados.items(), key=lambda p: -p[1])) or "nenhuma"
+            if travou:
+                carregados += " | ⏳ preso no import"
+            print(f"{rotulo:<24} | {total:>7.0f}ms | {wall:>7.0f}ms | {'✅' if ok else '⚠️':>3} | {carregados}")
+
+    print("-" * 100)
+    print(f"Bots dentro da meta: {dentro}/{len(BOTS)}")
+
+if __name__ == "__main__":
+    main()
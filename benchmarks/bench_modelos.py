@@ -0,0 +1,154 @@
+"""
+Benchmark do roteamento de modelos do assistente financeiro
+
+Gera o banco financeiro num diretório temporário, sobe o endpoint Bedrock
+falso com latência por modelo (modelos menores respondem mais rápido) e
+passa um corpus rotulado por nível (saudação / consulta pontual / análise de
+vários períodos) pelo assistente duas vezes:
+- tudo no MODEL_ID (Claude 3.5 Haiku), como antes
+- com roteamento (comum/roteador_modelos.py)
+
+Mostra a acurácia da classificação, latência p50/p95 por pergunta, custo
+total e o uso de cada modelo. Com --incertos, o Nova Micro responde
+"não tenho certeza" e as saudações sobem de modelo (escalonamento).
+
+Uso:
+    python benchmarks/bench_modelos.py
+    python benchmarks/bench_modelos.py --incertos --erros
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_FINANCEIRO = os.path.join(RAIZ, 'chatbot_rag_financeiro')
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, PASTA_FINANCEIRO)
+
+from comum.bedrock_fake import iniciar_servidor_fake, criar_cliente_fake
+from comum.clientes import definir_cliente
+from comum.limitador_taxa import limitador_taxa_padrao, percentil
+from comum.roteador_modelos import SIMPLES, CONSULTA, ANALISE
+
+# Latência simulada por modelo (s)
+LATENCIAS = {
+    'nova-micro': 0.08,
+    'claude-3-haiku': 0.15,
+    'claude-3-5-haiku': 0.25,
+    'claude-sonnet-4-5': 0.50,
+}
+
+# ============================================
+# CORPUS ROTULADO (pergunta, nível)
+# ============================================
+CORPUS = [
+    ("Oi", SIMPLES),
+    ("Olá, tudo bem?", SIMPLES),
+    ("Bom dia!", SIMPLES),
+    ("Boa tarde 👋", SIMPLES),
+    ("Obrigado!", SIMPLES),
+    ("Valeu, tchau", SIMPLES),
+    ("Qual a receita da RSM Brasil?", CONSULTA),
+    ("Mostre o faturamento total", CONSULTA),
+    ("Receitas por centro de custo", CONSULTA),
+    ("Quanto pagamos de IRPJ?", CONSULTA),
+    ("Top 5 impostos mais caros", CONSULTA),
+    ("Carga tributária total", CONSULTA),
+    ("Quantos funcionários no TI?", CONSULTA),
+    ("Custo da folha de pagamento", CONSULTA),
+    ("Salário médio por departamento", CONSULTA),
+    ("Contas pendentes", CONSULTA),
+    ("Valor de contas vencidas", CONSULTA),
+    ("Projetos mais lucrativos da Pollvo", CONSULTA),
+    ("Top clientes", CONSULTA),
+    ("Qual a situação atual da empresa?", CONSULTA),
+    ("Compare receitas dos últimos 3 meses", ANALISE),
+    ("Evolução da folha de pagamento", ANALISE),
+    ("Tendência de crescimento", ANALISE),
+    ("Como foram as últimas semanas?", ANALISE),
+    ("Variação dos impostos mês a mês", ANALISE),
+    ("Receita da RSM Tech de 2023 a 2024", ANALISE),
+]
+
+# ============================================
+# EXECUÇÃO
+# ============================================
+def rodar(assistente, rotear):
+    """Todas as perguntas do corpus (cache de respostas limpo); retorna latências em s"""
+    assistente.ROTEAR_MODELOS = rotear
+    assistente.obter_chain.cache_clear()
+    assistente.cache_respostas.limpar()
+    latencias = []
+    for pergunta, _ in CORPUS:
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):   # sem o status de cada consulta
+            assistente.inv_modelo(pergunta)
+        latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+def main():
+    parser = argparse.ArgumentParser(description="Custo e latência com e sem roteamento de modelos")
+    parser.add_argument('--incertos', action='store_true', help="Nova Micro responde com incerteza")
+    parser.add_argument('--erros', action='store_true', help="Lista as perguntas classificadas errado")
+    args = parser.parse_args()
+
+    servidor, url = iniciar_servidor_fake(latencia_por_modelo=LATENCIAS,
+                                          modelos_incertos=('nova-micro',) if args.incertos else ())
+    definir_cliente(criar_cliente_fake(url))
+    limitador_taxa_padrao.escala = 1000   # cota do Bedrock fora da medição
+
+    pasta = tempfile.mkdtemp()
+    subprocess.run([sys.executable, os.path.join(PASTA_FINANCEIRO, 'gera_dados.py')], cwd=pasta,
+                   check=True, stdout=subprocess.DEVNULL)
+    os.chdir(pasta)   # o assistente abre dados_financeiros.db na pasta atual
+    import chat_langchain_rag_financeiro_v1 as assistente
+
+    erros = [(pergunta, esperado, assistente.classificar_pergunta(pergunta)) for pergunta, esperado in CORPUS]
+    erros = [erro for erro in erros if erro[1] != erro[2]]
+
+    base = rodar(assistente, rotear=False)
+    custo_base = assistente.uso_modelo.estatisticas()['custo']
+    roteado = rodar(assistente, rotear=True)
+    stats = assistente.roteamento_modelos.estatisticas()
+
+    print("=" * 92)
+    print("🧭 ROTEAMENTO DE MODELOS (endpoint Bedrock falso)")
+    print("=" * 92)
+    print("Latência simulada: " + " | ".join(f"{m} {s * 1000:.0f} ms" for m, s in LATENCIAS.items()))
+    print(f"{len(CORPUS)} perguntas | classificação: {len(CORPUS) - len(erros)}/{len(CORPUS)} corretas | "
+          f"por nível: " + ", ".join(f"{n} {q}" for n, q in stats['por_nivel'].items()) + "\n")
+    print(f"{'Modo':<22} | {'p50':>8} | {'p95':>8} | {'Total':>8} | {'Custo':>11} | {'Custo/pergunta':>14}")
+    print("-" * 92)
+    for rotulo, latencias, custo in (("Tudo no 3.5 Haiku", base, custo_base),
+                                     ("Roteado", roteado, stats['custo_total'])):
+        print(f"{rotulo:<22} | {percentil(latencias, 50) * 1000:>6.0f}ms | {percentil(latencias, 95) * 1000:>6.0f}ms | "
+              f"{sum(latencias):>7.2f}s | ${custo:>10.6f} | ${custo / len(CORPUS):>13.7f}")
+    print("-" * 92)
+    if custo_base:
+        print(f"Economia com roteamento: {(1 - stats['custo_total'] / custo_base) * 100:.1f}%\n")
+
+    print(f"{'Modelo':<20} | {'Chamadas':>8} | {'p50':>8} | {'p95':>8} | {'Escalonou':>9} | {'Custo':>11}")
+    print("-" * 92)
+    for nome, m in stats['modelos'].items():
+        print(f"{nome:<20} | {m['chamadas']:>8} | {m['latencia_p50_ms']:>6.0f}ms | {m['latencia_p95_ms']:>6.0f}ms | "
+              f"{m['escalonamentos']:>9} | ${m['custo']:>10.6f}")
+    print("-" * 92)
+    print(f"Requisições por modelo no endpoint falso: {servidor.por_modelo}")
+
+    if args.erros and erros:
+        print("\n❌ Classificação diferente do rótulo:")
+        for pergunta, esperado, obtido in erros:
+            print(f"   • {pergunta!r}: esperado {esperado}, obtido {obtido}")
+
+    servidor.shutdown()
+    os.chdir(RAIZ)
+    shutil.rmtree(pasta, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
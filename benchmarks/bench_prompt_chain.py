@@ -0,0 +1,105 @@
+"""
+Micro-benchmark: custo por turno de montar ChatPromptTemplate + chain
+
+Antes: a cada pergunta, get_chat_prompt(prompt_augmented) criava um novo
+ChatPromptTemplate com o texto do usuário como template e um novo .pipe(modelo).
+Depois: prompt e chain são montados uma vez (obter_prompt/obter_chain);
+por turno só há formatação.
+
+O modelo é substituído por um RunnableLambda identidade: mede-se apenas o
+overhead de prompt/chain, sem Bedrock.
+
+Uso:
+    python benchmarks/bench_prompt_chain.py
+    python benchmarks/bench_prompt_chain.py --turnos 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'chatbot_rag_financeiro'))
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+import chat_langchain_rag_financeiro_v1 as assistente
+
+MODELO_NULO = RunnableLambda(lambda prompt_value: prompt_value)
+
+# Mesmo texto de system/assistant do prompt atual (obter_prompt)
+TEXTO_SYSTEM = assistente.obter_prompt().messages[0].prompt.template
+TEXTO_ASSISTANT = assistente.obter_prompt().messages[2].prompt.template
+
+PROMPT_AUMENTADO = (
+    "\n📊 DADOS - RECEITAS E FATURAMENTO\n" + "=" * 80 + "\n\n"
+    "Empresa | Receita Total | Ano | Mês\n" + "-" * 80 + "\n" +
+    "".join(f"RSM Brasil | R$ {1_234_567.89 + i:,.2f} | 2024 | {i % 12 + 1}\n" for i in range(20)) +
+    "\nPERGUNTA: Qual a receita da RSM Brasil?\n\nINSTRUÇÕES:\n1. Analise os dados\n2. Seja objetivo"
+)
+
+# ============================================
+# ANTES / DEPOIS
+# ============================================
+def get_chat_prompt_legado(entrada):
+    """Como era: texto do usuário embutido no template a cada turno"""
+    return ChatPromptTemplate.from_messages([
+        ("system", TEXTO_SYSTEM),
+        ("human", entrada),
+        ("assistant", TEXTO_ASSISTANT)
+    ])
+
+def turno_antes(entrada):
+    chain = get_chat_prompt_legado(entrada).pipe(MODELO_NULO)
+    return chain.invoke({"query": entrada})
+
+CHAIN_DEPOIS = assistente.obter_prompt() | MODELO_NULO
+
+def turno_depois(entrada):
+    return CHAIN_DEPOIS.invoke({"query": entrada})
+
+def construcao_antes(entrada):
+    return get_chat_prompt_legado(entrada).pipe(MODELO_NULO)
+
+# ============================================
+# MEDIÇÃO
+# ============================================
+def medir(funcao, turnos):
+    """Tempo médio por chamada (µs)"""
+    funcao(PROMPT_AUMENTADO)
+    inicio = time.perf_counter()
+    for _ in range(turnos):
+        funcao(PROMPT_AUMENTADO)
+    return (time.perf_counter() - inicio) / turnos * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead de prompt/chain por turno")
+    parser.add_argument('--turnos', type=int, default=2000)
+    args = parser.parse_args()
+
+    construcao = medir(construcao_antes, args.turnos)
+    antes = medir(turno_antes, args.turnos)
+    depois = medir(turno_depois, args.turnos)
+
+    print(f"\n⏱️  Overhead por turno ({args.turnos} turnos, prompt de {len(PROMPT_AUMENTADO)} caracteres)\n")
+    print(f"{'Etapa':<40} {'µs/turno':>10}")
+    print("-" * 52)
+    print(f"{'Antes: só construir template + pipe':<40} {construcao:>10.1f}")
+    print(f"{'Antes: construir + invocar':<40} {antes:>10.1f}")
+    print(f"{'Depois: invocar chain pré-compilada':<40} {depois:>10.1f}")
+    print(f"\n🚀 Redução: {antes - depois:.1f} µs/turno ({antes / depois:.1f}x)")
+
+    # Texto com chaves quebrava o template antigo (virava variável de template)
+    pergunta = "Mostre o JSON {\"ano\": 2024} da receita"
+    try:
+        turno_antes(pergunta)
+        print("\n🔤 Chaves na pergunta (antes): ok")
+    except Exception as e:
+        print(f"\n🔤 Chaves na pergunta (antes): ❌ {type(e).__name__}")
+    texto = assistente.extrair_entrada(turno_depois(pergunta))
+    print(f"🔤 Chaves na pergunta (depois): {'ok' if pergunta in texto else '❌'}\n")
+
+if __name__ == "__main__":
+    main()
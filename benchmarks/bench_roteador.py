@@ -0,0 +1,195 @@
+"""
+Benchmark do roteador de intenções do assistente financeiro
+
+Compara a cascata original de any(palavra in pergunta_lower ...) com o
+roteador compilado (chatbot_rag_financeiro/roteador.py) em um corpus rotulado:
+latência por pergunta e acurácia de intenção / empresa / imposto / TI.
+Confere também as conversas de SEGUIMENTOS: com a memória da conversa
+(MemoriaConversa.contextualizar), a pergunta curta de assunto novo mantém
+a própria intenção e só a de seguimento herda a anterior.
+
+Uso:
+    python benchmarks/bench_roteador.py
+    python benchmarks/bench_roteador.py --repeticoes 5000 --erros
+"""
+import argparse
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'chatbot_rag_financeiro'))
+
+import roteador
+from comum.memoria import MemoriaConversa
+from roteador import RECEITAS, IMPOSTOS, FOLHA, FINANCEIRO, PROJETOS, COMPARACAO, RESUMO
+
+# ============================================
+# CORPUS ROTULADO
+# (pergunta, intenção, empresa, tipo_imposto, departamento_ti)
+# ============================================
+CORPUS = [
+    ("Qual a receita da RSM Brasil?", RECEITAS, 'rsm brasil', None, False),
+    ("Mostre o faturamento total", RECEITAS, None, None, False),
+    ("Receitas por centro de custo", RECEITAS, None, None, False),
+    ("Vendas da RSM Tech em março", RECEITAS, 'rsm tech', None, False),
+    ("Qual o lucro da Pollvo Labs?", RECEITAS, 'pollvo labs', None, False),
+    ("Faturamento da RSM Consultoria", RECEITAS, 'rsm consultoria', None, False),
+    ("Quanto pagamos de IRPJ?", IMPOSTOS, None, 'IRPJ', False),
+    ("Top 5 impostos mais caros", IMPOSTOS, None, None, False),
+    ("Carga tributária total", IMPOSTOS, None, None, False),
+    ("Valor do PIS no último mês", IMPOSTOS, None, 'PIS', False),
+    ("Quanto de COFINS recolhemos?", IMPOSTOS, None, 'COFINS', False),
+    ("Tributos federais do trimestre", IMPOSTOS, None, None, False),
+    ("Alíquota efetiva de ISS", IMPOSTOS, None, 'ISS', False),
+    ("Obrigações fiscais pendentes", IMPOSTOS, None, None, False),
+    ("Recolhimento de INSS", IMPOSTOS, None, 'INSS', False),
+    ("Quantos funcionários no TI?", FOLHA, None, None, True),
+    ("Custo da folha de pagamento", FOLHA, None, None, False),
+    ("Salário médio por departamento", FOLHA, None, None, False),
+    ("Headcount da área de tecnologia", FOLHA, None, None, True),
+    ("Quanto o RH gasta com salários?", FOLHA, None, None, False),
+    ("Funcionárias contratadas em 2024", FOLHA, None, None, False),
+    ("Contas pendentes", FINANCEIRO, None, None, False),
+    ("Situação das contas a pagar", FINANCEIRO, None, None, False),
+    ("Valor de contas vencidas", FINANCEIRO, None, None, False),
+    ("Títulos vencidos por empresa", FINANCEIRO, None, None, False),
+    ("Quanto já foi pago este mês?", FINANCEIRO, None, None, False),
+    ("Projetos mais lucrativos da Pollvo", PROJETOS, 'pollvo', None, False),
+    ("Top clientes", PROJETOS, None, None, False),
+    ("Horas lançadas no timesheet", PROJETOS, None, None, False),
+    ("Lucratividade por projeto", PROJETOS, None, None, False),
+    ("Compare os resultados dos últimos 3 meses", COMPARACAO, None, None, False),
+    ("Tendência de crescimento", COMPARACAO, None, None, False),
+    ("Evolução mensal do negócio", COMPARACAO, None, None, False),
+    ("Como foram as últimas semanas?", COMPARACAO, None, None, False),
+    # Armadilhas de substring: não devem casar siglas/palavras curtas
+    ("Explique a partida dobrada do balanço", RESUMO, None, None, False),
+    ("Quanto custou a troca dos pisos da sede?", RESUMO, None, None, False),
+    ("Qual a situação atual da empresa?", RESUMO, None, None, False),
+    ("Me dê um panorama geral", RESUMO, None, None, False),
+    ("Análise crítica dos números do mês", RESUMO, None, None, False),
+    ("Existe alguma multa por atraso?", RESUMO, None, None, False),
+    ("Quais os principais indicadores?", RESUMO, None, None, False),
+    ("Preciso de um resumo executivo", RESUMO, None, None, False),
+]
+
+# ============================================
+# CONVERSAS: [(pergunta, intenção esperada depois de contextualizar)]
+# ============================================
+SEGUIMENTOS = [
+    [("Qual a receita da RSM Brasil?", RECEITAS), ("Contas pendentes", FINANCEIRO),
+     ("Impostos por tipo", IMPOSTOS), ("Top clientes", PROJETOS)],
+    [("Quanto pagamos de IRPJ?", IMPOSTOS), ("E no mês anterior?", IMPOSTOS),
+     ("Quanto foi em março?", IMPOSTOS), ("Custo da folha", FOLHA)],
+    [("Receitas por empresa", RECEITAS), ("Resumo geral", RESUMO), ("Nesse período?", RESUMO),
+     ("Tendência de crescimento", COMPARACAO)],
+]
+
+# ============================================
+# ROTEADOR ORIGINAL (cascata de any())
+# ============================================
+def rotear_legado(pergunta):
+    """Cópia da lógica de roteamento anterior, sem o SQL"""
+    pergunta_lower = pergunta.lower()
+    empresa, tipo_imposto, departamento_ti = None, None, False
+
+    if any(palavra in pergunta_lower for palavra in ['receita', 'faturamento', 'vendas', 'lucro']):
+        for emp in ['rsm brasil', 'rsm tech', 'rsm consultoria', 'rsm auditoria',
+                    'pollvo digital', 'pollvo labs', 'pollvo']:
+            if emp in pergunta_lower:
+                empresa = emp
+                break
+        intencao = RECEITAS
+    elif any(palavra in pergunta_lower for palavra in ['imposto', 'tributo', 'fiscal', 'irpj', 'csll', 'pis', 'cofins', 'iss', 'inss']):
+        for tipo_imp in ['irpj', 'csll', 'pis', 'cofins', 'iss', 'inss', 'icms', 'ipi']:
+            if tipo_imp in pergunta_lower:
+                tipo_imposto = tipo_imp.upper()
+                break
+        intencao = IMPOSTOS
+    elif any(palavra in pergunta_lower for palavra in ['folha', 'funcionário', 'funcionario', 'salário', 'salario', 'departamento', 'rh', 'ti']):
+        departamento_ti = 'ti' in pergunta_lower or 'tecnologia' in pergunta_lower
+        intencao = FOLHA
+    elif any(palavra in pergunta_lower for palavra in ['financeiro', 'pago', 'pendente', 'vencido', 'contas', 'pagamento', 'pagar']):
+        intencao = FINANCEIRO
+    elif any(palavra in pergunta_lower for palavra in ['projeto', 'cliente', 'timesheet', 'pollvo', 'lucrat']):
+        intencao = PROJETOS
+    elif any(palavra in pergunta_lower for palavra in ['comparar', 'comparação', 'comparacao', 'tendência', 'tendencia', 'evolução', 'evolucao', 'crescimento', 'últimos', 'ultimos', 'últimas', 'ultimas']):
+        intencao = COMPARACAO
+    else:
+        intencao = RESUMO
+
+    return roteador.Rota(intencao, empresa, tipo_imposto, departamento_ti)
+
+# ============================================
+# MEDIÇÕES
+# ============================================
+def medir_latencia(funcao, repeticoes):
+    """Tempo médio por pergunta (µs)"""
+    perguntas = [item[0] for item in CORPUS]
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for pergunta in perguntas:
+            funcao(pergunta)
+    return (time.perf_counter() - inicio) / (repeticoes * len(perguntas)) * 1e6
+
+def medir_acuracia(funcao):
+    """Acertos de intenção e de rota completa + lista de erros"""
+    acertos_intencao = 0
+    acertos_rota = 0
+    erros = []
+    for pergunta, *esperado in CORPUS:
+        rota = funcao(pergunta)
+        esperado = roteador.Rota(*esperado)
+        if rota.intencao == esperado.intencao:
+            acertos_intencao += 1
+        if rota == esperado:
+            acertos_rota += 1
+        else:
+            erros.append((pergunta, esperado, rota))
+    total = len(CORPUS)
+    return acertos_intencao / total * 100, acertos_rota / total * 100, erros
+
+def conferir_seguimentos():
+    """Perguntas cuja intenção, depois de contextualizar na conversa, não é a esperada"""
+    erros = []
+    for conversa in SEGUIMENTOS:
+        memoria = MemoriaConversa(tem_assunto=roteador.tem_assunto)
+        for pergunta, esperada in conversa:
+            busca = memoria.contextualizar(pergunta)
+            intencao = roteador.rotear(busca).intencao
+            if intencao != esperada:
+                erros.append((pergunta, busca, esperada, intencao))
+    return erros
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência e acurácia do roteamento")
+    parser.add_argument('--repeticoes', type=int, default=2000)
+    parser.add_argument('--erros', action='store_true', help="Lista as perguntas roteadas errado")
+    args = parser.parse_args()
+
+    print(f"\n🧭 Corpus: {len(CORPUS)} perguntas rotuladas | {args.repeticoes} repetições\n")
+    print(f"{'Roteador':<12} {'µs/pergunta':>12} {'Intenção':>10} {'Rota completa':>14}")
+    print("-" * 52)
+
+    for nome, funcao in [("cascata", rotear_legado), ("compilado", roteador.rotear)]:
+        latencia = medir_latencia(funcao, args.repeticoes)
+        acc_intencao, acc_rota, erros = medir_acuracia(funcao)
+        print(f"{nome:<12} {latencia:>12.2f} {acc_intencao:>9.1f}% {acc_rota:>13.1f}%")
+
+        if args.erros:
+            for pergunta, esperado, rota in erros:
+                print(f"   ❌ {pergunta!r}\n      esperado {tuple(esperado)} | obtido {tuple(rota)}")
+
+    erros = conferir_seguimentos()
+    total = sum(len(conversa) for conversa in SEGUIMENTOS)
+    print(f"\n💬 Seguimentos: {total - len(erros)}/{total} perguntas com a intenção esperada na conversa")
+    for pergunta, busca, esperada, intencao in erros:
+        print(f"   ❌ {pergunta!r} → busca {busca!r}\n      esperado {esperada} | obtido {intencao}")
+    print()
+    if erros:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
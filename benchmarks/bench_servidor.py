@@ -0,0 +1,160 @@
+"""
+Teste de carga do serviço HTTP do assistente financeiro (servidor.py)
+
+Sobe o endpoint Bedrock falso (comum/bedrock_fake.py), gera o banco
+financeiro num diretório temporário e, para cada quantidade de workers,
+inicia chatbot_rag_financeiro/servidor.py apontando o boto3 para o falso
+(AWS_ENDPOINT_URL_BEDROCK_RUNTIME). C clientes simultâneos, cada um com sua
+sessão e conexão keep-alive, fazem perguntas em sequência.
+
+Mede requisições/s e latência p50/p95/p99 de /ask, e tempo até o primeiro
+trecho (TTFT) + total em /ask/stream. As perguntas levam um sufixo único
+para não cair no cache de respostas.
+
+Uso:
+    python benchmarks/bench_servidor.py
+    python benchmarks/bench_servidor.py --workers 1 2 4 --clientes 32 --requisicoes 400 --latencia 0.3
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_FINANCEIRO = os.path.join(RAIZ, 'chatbot_rag_financeiro')
+sys.path.insert(0, RAIZ)
+
+from comum.bedrock_fake import iniciar_servidor_fake
+from comum.limitador_taxa import percentil
+
+PERGUNTAS = [
+    "Qual a receita da RSM Brasil?",
+    "Quanto pagamos de IRPJ?",
+    "E no mês anterior?",
+    "Quantos funcionários no TI?",
+    "Contas pendentes",
+    "Projetos mais lucrativos da Pollvo",
+    "Compare receitas dos últimos 3 meses",
+    "Mostre o faturamento total",
+]
+
+# ============================================
+# SERVIDOR
+# ============================================
+def iniciar_servidor(pasta, porta, workers, url_bedrock):
+    ambiente = dict(os.environ,
+                    AWS_ENDPOINT_URL_BEDROCK_RUNTIME=url_bedrock,
+                    AWS_ACCESS_KEY_ID='fake', AWS_SECRET_ACCESS_KEY='fake',
+                    BEDROCK_ESCALA_LIMITES='1000',   # cota do Bedrock fora da medição
+                    SESSOES_URL=f"sqlite:///{os.path.join(pasta, f'sessoes_{workers}.db')}")
+    processo = subprocess.Popen([sys.executable, os.path.join(PASTA_FINANCEIRO, 'servidor.py'),
+                                 '--porta', str(porta), '--workers', str(workers)],
+                                cwd=pasta, env=ambiente, stdout=subprocess.DEVNULL)
+    limite = time.time() + 60
+    while time.time() < limite:
+        try:
+            conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=2)
+            conexao.request('GET', '/saude')
+            if conexao.getresponse().status == 200:
+                return processo
+        except OSError:
+            time.sleep(0.2)
+    processo.kill()
+    raise RuntimeError("Servidor não respondeu em 60s")
+
+# ============================================
+# CLIENTES
+# ============================================
+def cliente(porta, indice, n_requisicoes, stream):
+    """Uma sessão: perguntas em sequência; retorna [(total, ttft, ok)]"""
+    conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=120)
+    caminho = '/ask/stream' if stream else '/ask'
+    sessao = f"carga-{indice}-{'s' if stream else 'j'}-{time.time_ns()}"
+    medidas = []
+    for i in range(n_requisicoes):
+        corpo = json.dumps({'pergunta': f"{PERGUNTAS[i % len(PERGUNTAS)]} #{indice}-{i}", 'sessao': sessao})
+        inicio = time.perf_counter()
+        ttft = None
+        try:
+            conexao.request('POST', caminho, body=corpo, headers={'Content-Type': 'application/json'})
+            resposta = conexao.getresponse()
+            ok = resposta.status == 200
+            if stream:
+                for linha in resposta:
+                    if ttft is None and linha.startswith(b'data:'):
+                        ttft = time.perf_counter() - inicio
+                    if linha.startswith(b'event: erro'):
+                        ok = False
+            else:
+                resposta.read()
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conexao.close()   # a próxima requisição reconecta
+        medidas.append((time.perf_counter() - inicio, ttft, ok))
+    conexao.close()
+    return medidas
+
+def rodar_carga(porta, clientes, requisicoes, stream):
+    por_cliente = max(1, requisicoes // clientes)
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clientes) as executor:
+        resultados = list(executor.map(lambda i: cliente(porta, i, por_cliente, stream), range(clientes)))
+    duracao = time.perf_counter() - inicio
+    medidas = [m for lista in resultados for m in lista]
+    return duracao, medidas
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga em /ask e /ask/stream com N workers")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clientes', type=int, default=16, help="Clientes simultâneos")
+    parser.add_argument('--requisicoes', type=int, default=160, help="Requisições por rodada")
+    parser.add_argument('--latencia', type=float, default=0.2, help="Latência simulada do Bedrock (s)")
+    parser.add_argument('--porta', type=int, default=18700)
+    args = parser.parse_args()
+
+    servidor_bedrock, url_bedrock = iniciar_servidor_fake(latencia=args.latencia)
+    pasta = tempfile.mkdtemp()
+    subprocess.run([sys.executable, os.path.join(PASTA_FINANCEIRO, 'gera_dados.py')], cwd=pasta,
+                   check=True, stdout=subprocess.DEVNULL)
+
+    print("=" * 100)
+    print("🌐 TESTE DE CARGA DO SERVIDOR (endpoint Bedrock falso)")
+    print("=" * 100)
+    print(f"Latência simulada: {args.latencia * 1000:.0f} ms | {args.clientes} clientes | "
+          f"{args.requisicoes} requisições/rodada | CPUs: {os.cpu_count()}\n")
+    print(f"{'Rota':<12} | {'Workers':>7} | {'Req':>5} | {'Req/s':>7} | {'p50':>8} | {'p95':>8} | {'p99':>8} | "
+          f"{'TTFT p50':>9} | {'TTFT p95':>9} | {'Erros':>5}")
+    print("-" * 100)
+
+    for n_workers in args.workers:
+        porta = args.porta + n_workers
+        processo = iniciar_servidor(pasta, porta, n_workers, url_bedrock)
+        try:
+            for stream in (False, True):
+                duracao, medidas = rodar_carga(porta, args.clientes, args.requisicoes, stream)
+                totais = [m[0] for m in medidas]
+                ttfts = [m[1] for m in medidas if m[1] is not None]
+                erros = sum(1 for m in medidas if not m[2])
+                ttft = (f"{percentil(ttfts, 50) * 1000:>7.0f}ms | {percentil(ttfts, 95) * 1000:>7.0f}ms"
+                        if stream else f"{'-':>9} | {'-':>9}")
+                print(f"{'/ask/stream' if stream else '/ask':<12} | {n_workers:>7} | {len(medidas):>5} | "
+                      f"{len(medidas) / duracao:>7.1f} | {percentil(totais, 50) * 1000:>6.0f}ms | "
+                      f"{percentil(totais, 95) * 1000:>6.0f}ms | {percentil(totais, 99) * 1000:>6.0f}ms | "
+                      f"{ttft} | {erros:>5}")
+        finally:
+            processo.terminate()
+            processo.wait()
+
+    print("-" * 100)
+    print(f"Requisições atendidas pelo endpoint falso: {servidor_bedrock.requisicoes}")
+    servidor_bedrock.shutdown()
+    shutil.rmtree(pasta, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark do armazém de sessões com N processos worker
+
+Sobe o endpoint Bedrock falso (comum/bedrock_fake.py) e o Redis local
+(comum/redis_local.py) no processo principal e distribui turnos de várias
+conversas entre N processos. Cada turno vai para um worker qualquer, que cria
+um ChatbotMeteora novo com o id da sessão (nenhum estado fica no processo):
+carrega os eventos do armazém, responde e anexa os eventos do turno.
+
+Uma sessão nunca tem dois turnos ao mesmo tempo (o cliente espera a
+resposta), mas turnos seguidos caem em workers diferentes.
+
+Mede turnos/s, latência do armazém por turno (leituras + escrita, p50/p95)
+e confere, no fim, se cada sessão tem todas as trocas e usos gravados.
+O backend memoria:// não é compartilhado entre processos: roda só com 1
+worker, numa thread do próprio processo.
+
+Uso:
+    python benchmarks/bench_sessoes.py
+    python benchmarks/bench_sessoes.py --workers 1 4 16 --sessoes 64 --turnos 6 --latencia 0.05
+    python benchmarks/bench_sessoes.py --backends sqlite redis
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'chatbot'))
+
+from comum.bedrock_fake import iniciar_servidor_fake, criar_cliente_fake
+from comum.cache_respostas import CacheRespostas
+from comum.clientes import definir_cliente
+from comum.limitador_taxa import limitador_taxa_padrao, percentil
+from comum.memoria import MODELO_RESUMO
+from comum.redis_local import iniciar_servidor_redis_local
+from comum.sessoes import ArmazemSessoes, serializar
+import chat_v3_avancado
+
+# ============================================
+# WORKER
+# ============================================
+def servir(url_bedrock, sessoes, tarefas, resultados):
+    """
+    Atende turnos (id_sessao, turno) até receber None
+    sessoes: URL do armazém (cada processo abre o seu) ou um ArmazemSessoes pronto
+    """
+    definir_cliente(criar_cliente_fake(url_bedrock))
+    # Cota do Bedrock fora da medição: o gargalo avaliado é o armazém
+    for model_id in (chat_v3_avancado.MODEL_ID, MODELO_RESUMO):
+        limitador_taxa_padrao.limites[model_id] = (1_000_000, 1_000_000_000)
+    armazem = ArmazemSessoes(sessoes) if isinstance(sessoes, str) else sessoes
+    cache = CacheRespostas()
+
+    while True:
+        tarefa = tarefas.get()
+        if tarefa is None:
+            return
+        id_sessao, turno = tarefa
+        antes = armazem.tempo_escrita + armazem.tempo_leitura
+        chatbot = chat_v3_avancado.ChatbotMeteora(cache=cache, id_sessao=id_sessao, armazem=armazem)
+        resultado = chatbot.obter_resposta(f"{id_sessao}, pergunta {turno}: tem sandália tamanho {turno + 34}?")
+        tempo_armazem = armazem.tempo_escrita + armazem.tempo_leitura - antes
+        resultados.put((id_sessao, turno, tempo_armazem, resultado.get('erro', False), os.getpid()))
+
+# ============================================
+# DESPACHANTE
+# ============================================
+def rodar(url_bedrock, sessoes_destino, n_workers, n_sessoes, turnos, em_thread=False):
+    """Libera o próximo turno de cada sessão só depois que o anterior terminou"""
+    if em_thread:
+        tarefas, resultados = queue.Queue(), queue.Queue()
+        workers = [threading.Thread(target=servir, args=(url_bedrock, sessoes_destino, tarefas, resultados))]
+    else:
+        contexto = multiprocessing.get_context('fork')
+        tarefas, resultados = contexto.Queue(), contexto.Queue()
+        workers = [contexto.Process(target=servir, args=(url_bedrock, sessoes_destino, tarefas, resultados))
+                   for _ in range(n_workers)]
+    for worker in workers:
+        worker.start()
+
+    sessoes = [f"s{i:04d}" for i in range(n_sessoes)]
+    random.shuffle(sessoes)
+    inicio = time.perf_counter()
+    for id_sessao in sessoes:
+        tarefas.put((id_sessao, 0))
+
+    tempos, erros, trocas_worker = [], 0, 0
+    ultimo_pid = {}
+    for _ in range(n_sessoes * turnos):
+        id_sessao, turno, tempo_armazem, erro, pid = resultados.get()
+        tempos.append(tempo_armazem)
+        erros += bool(erro)
+        trocas_worker += ultimo_pid.get(id_sessao, pid) != pid
+        ultimo_pid[id_sessao] = pid
+        if turno + 1 < turnos:
+            tarefas.put((id_sessao, turno + 1))
+    duracao = time.perf_counter() - inicio
+
+    for _ in workers:
+        tarefas.put(None)
+    for worker in workers:
+        worker.join()
+    return duracao, tempos, erros, trocas_worker, sessoes
+
+def conferir(armazem, sessoes, turnos):
+    """
+    (sessões íntegras, bytes médios por evento): íntegra = log com exatamente
+    'turnos' trocas e 'turnos' usos, nenhum turno perdido ou duplicado
+    """
+    integras = eventos = tamanho = 0
+    for id_sessao in sessoes:
+        log = armazem.carregar(id_sessao)
+        tipos = [evento[0] for evento in log]
+        integras += tipos.count("t") == turnos and tipos.count("u") == turnos
+        eventos += len(log)
+        tamanho += sum(len(serializar(evento).encode('utf-8')) for evento in log)
+    return integras, tamanho / eventos if eventos else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Turnos/s com sessões compartilhadas entre N processos")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--backends', nargs='+', default=['memoria', 'sqlite', 'redis'],
+                        choices=['memoria', 'sqlite', 'redis'])
+    parser.add_argument('--sessoes', type=int, default=48)
+    parser.add_argument('--turnos', type=int, default=6)
+    parser.add_argument('--latencia', type=float, default=0.05, help="Latência simulada do Bedrock (s)")
+    args = parser.parse_args()
+
+    servidor_bedrock, url_bedrock = iniciar_servidor_fake(latencia=args.latencia, intervalo_tokens=0)
+    servidor_redis, url_redis = iniciar_servidor_redis_local()
+    pasta = tempfile.mkdtemp()
+
+    print("=" * 96)
+    print("💾 BENCHMARK DO ARMAZÉM DE SESSÕES (endpoint Bedrock falso)")
+    print("=" * 96)
+    print(f"Latência simulada: {args.latencia * 1000:.0f} ms | {args.sessoes} sessões x {args.turnos} turnos | "
+          f"CPUs: {os.cpu_count()}\n")
+    print(f"{'Backend':<8} | {'Workers':>7} | {'Turnos':>6} | {'Duração':>8} | {'Turnos/s':>8} | "
+          f"{'armazém p50':>11} | {'p95':>7} | {'troca worker':>12} | {'bytes/ev':>8} | {'íntegras':>9}")
+    print("-" * 96)
+
+    for backend in args.backends:
+        for n_workers in args.workers:
+            if backend == 'memoria' and n_workers > 1:
+                continue
+            if backend == 'sqlite':
+                url_sessoes = f"sqlite:///{os.path.join(pasta, f'sessoes_{n_workers}.db')}"
+            elif backend == 'redis':
+                servidor_redis.executar([b'FLUSHALL'])
+                url_sessoes = url_redis
+            else:
+                url_sessoes = 'memoria://'
+            # memoria://: o worker (thread) e a conferência usam o mesmo dict
+            armazem = ArmazemSessoes(url_sessoes)
+            destino = armazem if backend == 'memoria' else url_sessoes
+
+            duracao, tempos, erros, trocas_worker, sessoes = rodar(
+                url_bedrock, destino, n_workers, args.sessoes, args.turnos, em_thread=backend == 'memoria')
+            integras, bytes_evento = conferir(armazem, sessoes, args.turnos)
+            total = len(tempos)
+            print(f"{backend:<8} | {n_workers:>7} | {total:>6} | {duracao:>7.2f}s | {total / duracao:>8.1f} | "
+                  f"{percentil(tempos, 50) * 1000:>9.2f}ms | {percentil(tempos, 95) * 1000:>5.2f}ms | "
+                  f"{trocas_worker / total * 100:>11.0f}% | {bytes_evento:>8.0f} | "
+                  f"{integras:>4}/{len(sessoes):<4}" + (f" ⚠️ {erros} erros" if erros else ""))
+
+    print("-" * 96)
+    print(f"Requisições atendidas pelo endpoint falso: {servidor_bedrock.requisicoes} | "
+          f"comandos no Redis local: {servidor_redis.comandos}")
+    servidor_bedrock.shutdown()
+    servidor_redis.shutdown()
+    shutil.rmtree(pasta, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
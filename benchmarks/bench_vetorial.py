@@ -0,0 +1,108 @@
+"""
+Benchmark da busca vetorial (IVF em NumPy) no catálogo sintético
+
+Gera o catálogo do bench_fts (padrão: 1M produtos), embute com o provedor
+local 'hash', constrói o índice IVF (chatbot_rag/busca_vetorial.py) e mede:
+- tempo de embeddings e de construção do índice
+- latência de consulta (p50/p95) por nprobe
+- recall@10 do IVF contra a busca exata (força bruta) nos mesmos vetores
+  (o catálogo sintético tem muitos textos repetidos → empates; conta como
+  acerto qualquer resultado com escore >= o k-ésimo escore exato)
+
+Uso:
+    python benchmarks/bench_vetorial.py
+    python benchmarks/bench_vetorial.py --produtos 100000 --consultas 50 --nprobe 4 8 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'chatbot_rag'))
+
+import busca_vetorial
+from bench_fts import gerar_catalogo
+from comum.limitador_taxa import percentil
+
+PERGUNTAS = [
+    "algo para o frio",
+    "roupa para ir à praia",
+    "look para uma festa formal",
+    "tênis para academia",
+    "óculos com proteção uv",
+    "jaqueta jeans escura",
+]
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência e recall do índice vetorial IVF")
+    parser.add_argument('--produtos', type=int, default=1_000_000)
+    parser.add_argument('--consultas', type=int, default=100)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[4, 8, 16, 32])
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp()
+    base = os.path.join(pasta, 'produtos_vetores')
+
+    print(f"\n🏭 Gerando {args.produtos:,} produtos...")
+    conn = gerar_catalogo(os.path.join(pasta, 'catalogo.db'), args.produtos)
+
+    provedor = busca_vetorial.criar_provedor('hash')
+    inicio = time.perf_counter()
+    busca_vetorial.indexar_catalogo(conn, base, provedor)
+    print(f"   ✅ Embeddings + índice IVF: {time.perf_counter() - inicio:.1f}s")
+
+    indice = busca_vetorial.carregar_indice(base)
+    tamanho = sum(os.path.getsize(os.path.join(pasta, f)) for f in os.listdir(pasta) if 'vetores' in f)
+    print(f"   📦 {len(indice):,} vetores x {provedor.dimensao} dims | {len(indice.centroides)} listas | "
+          f"{tamanho / 1024 / 1024:.0f} MB em disco\n")
+
+    # Consultas: perguntas livres + textos de produtos do próprio catálogo
+    aleatorio = np.random.default_rng(7)
+    linhas = conn.execute("SELECT nome FROM roupas WHERE id IN ({})".format(
+        ",".join(str(int(i)) for i in aleatorio.integers(1, args.produtos + 1, args.consultas)))).fetchall()
+    textos = (PERGUNTAS + [nome for (nome,) in linhas])[:args.consultas]
+    consultas = provedor.embutir(textos)
+
+    # Referência exata (força bruta sobre todos os vetores)
+    vetores = np.asarray(indice.vetores)
+    tempos_exatos, exatos = [], []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        escores = vetores @ consulta
+        melhores = np.argpartition(-escores, args.k - 1)[:args.k]
+        tempos_exatos.append(time.perf_counter() - inicio)
+        exatos.append(escores[melhores].min())
+
+    print(f"{'Busca':<16} {'p50':>9} {'p95':>9} {'recall@' + str(args.k):>11}")
+    print("-" * 48)
+    print(f"{'exata':<16} {percentil(tempos_exatos, 50) * 1000:>7.2f}ms "
+          f"{percentil(tempos_exatos, 95) * 1000:>7.2f}ms {100.0:>10.1f}%")
+
+    for nprobe in args.nprobe:
+        tempos, acertos = [], 0
+        for consulta, limiar in zip(consultas, exatos):
+            inicio = time.perf_counter()
+            resultado = indice.buscar_vetor(consulta, args.k, nprobe)
+            tempos.append(time.perf_counter() - inicio)
+            acertos += sum(1 for _, escore in resultado if escore >= limiar - 1e-5)
+        recall = acertos / (len(consultas) * args.k) * 100
+        print(f"{'ivf nprobe=' + str(nprobe):<16} {percentil(tempos, 50) * 1000:>7.2f}ms "
+              f"{percentil(tempos, 95) * 1000:>7.2f}ms {recall:>10.1f}%")
+
+    print("\n🔎 Exemplos (nprobe padrão):")
+    cursor = conn.cursor()
+    for pergunta in PERGUNTAS[:3]:
+        ids = [id_produto for id_produto, _ in indice.buscar(pergunta, k=3)]
+        nomes = [linha[1] for linha in busca_vetorial.buscar_linhas(cursor, ids)]
+        print(f"   {pergunta!r} → {nomes}")
+    conn.close()
+    print()
+
+if __name__ == "__main__":
+    main()
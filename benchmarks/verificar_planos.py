@@ -0,0 +1,181 @@
+"""
+Regressão dos planos das consultas do assistente financeiro (EXPLAIN QUERY PLAN)
+
+Gera o banco (gera_dados.py --escala N) ou usa um existente (--db) e lê o
+plano do SQLite para cada variante de montar_consulta (intenção + filtros),
+nas tabelas base (cubo=False) e no cubo mensal (cubo=True, o que o
+assistente roda com LER_CUBO). Termina com código 1 se alguma tabela fato
+(gera_dados.COLUNAS_CARGA, ou as fato_* do esquema estrela):
+- é varrida sem índice (SCAN tabela)
+- tem um índice percorrido inteiro na consulta principal
+- tem um índice percorrido numa subconsulta que ainda reordena o resultado
+  (USE TEMP B-TREE FOR ORDER BY): o LIMIT do corte por período só para a
+  leitura quando o índice já vem na ordem do ORDER BY
+ou se uma tabela do cubo (gera_dados.CUBOS) é percorrida pela chave com um
+filtro (sem índice, lê o cubo inteiro quando o filtro casa pouco) ou
+reordenada inteira (USE TEMP B-TREE FOR ORDER BY): sem filtro, a chave
+(ano, mes, ...) lida de trás para frente para no LIMIT.
+Tabelas de chaves e o resumo_executivo são pequenos e podem ser varridos.
+Mostra também a mediana de cada consulta.
+
+Uso:
+    python benchmarks/verificar_planos.py
+    python benchmarks/verificar_planos.py --escala 100
+    python benchmarks/verificar_planos.py --db dados_financeiros.db
+    python benchmarks/verificar_planos.py --estrela
+"""
+import argparse
+import os
+import re
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_FINANCEIRO = os.path.join(RAIZ, 'chatbot_rag_financeiro')
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, PASTA_FINANCEIRO)
+
+import chat_langchain_rag_financeiro_v1 as assistente
+import roteador
+from gera_dados import COLUNAS_CARGA, CUBOS, FATOS_ESTRELA
+
+# Uma pergunta por variante do SQL de montar_consulta
+PERGUNTAS = [
+    "Receitas por empresa",
+    "Qual a receita da RSM Brasil?",
+    "Impostos por tipo",
+    "Quanto pagamos de IRPJ?",
+    "Custo da folha de pagamento",
+    "Quantos funcionários no TI?",
+    "Contas pendentes",
+    "Projetos mais lucrativos da Pollvo",
+    "Compare os últimos meses",
+    "Resumo geral",
+]
+
+VARREDURA = re.compile(r'SCAN (\w+)(?: AS \w+)?( USING (?:COVERING )?INDEX \w+)?$')
+SUBCONSULTAS = ('MATERIALIZE', 'CO-ROUTINE', 'SCALAR SUBQUERY', 'LIST SUBQUERY', 'CORRELATED')
+
+# ============================================
+# ANÁLISE DO PLANO
+# ============================================
+def em_subconsulta(nos, pai):
+    while pai:
+        pai, detalhe = nos[pai]
+        if detalhe.startswith(SUBCONSULTAS):
+            return True
+    return False
+
+def problemas_do_plano(plano, fatos, cubos=(), filtrada=False):
+    """
+    Leituras inteiras de tabela fato ou do cubo no plano [(id, pai, _, detalhe)]
+    filtrada: a consulta tem WHERE (no cubo, a varredura da chave não para no LIMIT)
+    """
+    nos = {id_: (pai, detalhe) for id_, pai, _, detalhe in plano}
+    problemas = []
+    for id_, (pai, detalhe) in nos.items():
+        m = VARREDURA.match(detalhe)
+        if not m or m.group(1) not in fatos | set(cubos):
+            continue
+        if m.group(1) in cubos and not m.group(2):
+            if filtrada:
+                problemas.append(f"filtro sem índice no cubo: {detalhe}")
+            elif any(p == pai and d == 'USE TEMP B-TREE FOR ORDER BY' for p, d in nos.values()):
+                problemas.append(f"cubo reordenado inteiro, o LIMIT não interrompe a leitura: {detalhe}")
+            continue
+        if not m.group(2):
+            problemas.append(f"varredura completa: {detalhe}")
+        elif not em_subconsulta(nos, pai):
+            problemas.append(f"índice percorrido inteiro na consulta principal: {detalhe}")
+        elif any(p == pai and d == 'USE TEMP B-TREE FOR ORDER BY' for p, d in nos.values()):
+            problemas.append(f"subconsulta reordena, o LIMIT não interrompe a leitura: {detalhe}")
+    return problemas
+
+def acesso_principal(plano, fatos):
+    """Como a consulta principal lê a tabela fato ou o cubo (ou a primeira leitura, se não houver)"""
+    nos = {id_: (pai, detalhe) for id_, pai, _, detalhe in plano}
+    leituras = [d for _, (p, d) in nos.items() if d.startswith(('SCAN', 'SEARCH')) and not em_subconsulta(nos, p)]
+    for detalhe in leituras:
+        if detalhe.split()[1] in fatos:
+            return detalhe
+    return leituras[0] if leituras else '?'
+
+def medir(conn, sql, parametros, repeticoes):
+    tempos = []
+    for _ in range(repeticoes + 1):
+        inicio = time.perf_counter()
+        conn.execute(sql, parametros).fetchall()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos[1:])
+
+# ============================================
+# EXECUÇÃO
+# ============================================
+def verificar(banco, repeticoes):
+    """Imprime plano e latência de cada pergunta, nas tabelas base e no cubo; retorna a quantidade com problema"""
+    cubos = {cubo.nome for cubo in CUBOS}
+    fatos = set(COLUNAS_CARGA) | {fato.nome for fato in FATOS_ESTRELA.values()}
+    conn = sqlite3.connect(f"file:{banco}?mode=ro", uri=True)
+    falhas = 0
+    for cubo in (False, True):
+        print(f"{'Pergunta (' + ('cubo' if cubo else 'tabelas base') + ')':<37} | {'ms':>7} | "
+              f"Acesso à tabela principal")
+        print("-" * 120)
+        for pergunta in PERGUNTAS:
+            _, sql, parametros, _ = assistente.montar_consulta(roteador.rotear(pergunta), cubo=cubo)
+            try:
+                plano = conn.execute("EXPLAIN QUERY PLAN " + sql, parametros).fetchall()
+            except sqlite3.OperationalError as e:
+                print(f"❌ {pergunta:<34} | {e} (banco antigo? rode gera_dados.py --migrar --db {banco})")
+                falhas += 1
+                continue
+            problemas = problemas_do_plano(plano, fatos, cubos, filtrada=re.search(r'\bWHERE\b', sql) is not None)
+            ms = medir(conn, sql, parametros, repeticoes) * 1000
+            print(f"{'❌' if problemas else '✅'} {pergunta:<34} | {ms:>7.2f} | {acesso_principal(plano, fatos | cubos)}")
+            for problema in problemas:
+                print(f"   ↳ {problema}")
+            falhas += bool(problemas)
+        print("-" * 120)
+    conn.close()
+    return falhas
+
+def main():
+    parser = argparse.ArgumentParser(description="Falha se alguma consulta do assistente varrer uma tabela fato")
+    parser.add_argument('--db', help="Banco existente (padrão: gera um com --escala)")
+    parser.add_argument('--escala', type=int, default=20)
+    parser.add_argument('--ate', default='2025-06', help="Último mês dos dados (AAAA-MM)")
+    parser.add_argument('--estrela', action='store_true', help="Gera o banco em esquema estrela")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 120)
+    print("🔍 PLANOS DAS CONSULTAS DO ASSISTENTE (EXPLAIN QUERY PLAN)")
+    print("=" * 120)
+    pasta = None
+    banco = args.db
+    if banco is None:
+        pasta = tempfile.mkdtemp()
+        banco = os.path.join(pasta, 'dados_financeiros.db')
+        subprocess.run([sys.executable, os.path.join(PASTA_FINANCEIRO, 'gera_dados.py'), '--escala', str(args.escala),
+                        '--ate', args.ate, '--db', banco] + (['--estrela'] if args.estrela else []),
+                       check=True, stdout=subprocess.DEVNULL)
+    print(f"Banco: {banco if args.db else f'escala {args.escala}' + (' (estrela)' if args.estrela else '')} | SQLite {sqlite3.sqlite_version} | "
+          f"{args.repeticoes} repetições (mediana)\n")
+    try:
+        falhas = verificar(banco, args.repeticoes)
+    finally:
+        if pasta:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    if falhas:
+        print(f"❌ {falhas} consulta(s) com leitura inteira de tabela fato ou do cubo")
+        sys.exit(1)
+    print(f"✅ {len(PERGUNTAS)} consultas sem varredura completa, nas tabelas base e no cubo")
+
+if __name__ == "__main__":
+    main()
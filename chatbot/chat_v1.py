@@ -1,49 +1,33 @@
-import boto3
-import json
+import os
+import sys
 
-# Cliente Bedrock Runtime
-client = boto3.client(
-    service_name='bedrock-runtime',
-    region_name='us-east-2'
-)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.bedrock import InvocadorBedrock, montar_corpo
+from comum.limitador_taxa import eh_throttling
 
 # Modelo: Claude 3.5 Haiku (custo baixo)
 MODEL_ID = 'us.anthropic.claude-3-5-haiku-20241022-v1:0'
 
+# Invocador Bedrock compartilhado (cliente criado na primeira chamada, não no import)
+invocador = InvocadorBedrock(MODEL_ID)
+
 def get_config(prompt: str):
     """
     Configuração da requisição para o modelo Claude 3.5 Haiku
     Usando Messages API (formato moderno)
     """
-    return json.dumps({
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 300,
-        "temperature": 0.5,
-        "system": """Você é um assistente virtual da Meteora, um e-commerce de moda e vestuário.
+    return montar_corpo(
+        prompt,
+        max_tokens=300,
+        temperature=0.5,
+        system="""Você é um assistente virtual da Meteora, um e-commerce de moda e vestuário.
         Suas respostas devem ser:
         - Concisas (máximo 300 caracteres)
         - Focadas em produtos de moda e vestuário
         - Profissionais e amigáveis
         - Orientadas para ajudar o cliente a encontrar produtos
-        - Sem mencionar limitações técnicas""",
-        "messages": [
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
-    })
-
-def processar_resposta(response):
-    """
-    Processa a resposta do modelo e extrai o texto
-    """
-    try:
-        resposta = json.loads(response['body'].read().decode('utf-8'))
-        texto = resposta.get('content', [{}])[0].get('text', 'Resposta não encontrada')
-        return texto
-    except Exception as e:
-        return f"Erro ao processar resposta: {e}"
+        - Sem mencionar limitações técnicas"""
+    )
 
 def iniciar_chat():
     """
@@ -70,23 +54,19 @@ def iniciar_chat():
             continue
         
         try:
-            # Enviar requisição ao modelo
-            response = client.invoke_model(
-                body=get_config(entrada),
-                modelId=MODEL_ID,
-                accept="application/json",
-                contentType="application/json"
-            )
-            
-            # Processar e exibir resposta
-            resposta_texto = processar_resposta(response)
-            print(f"\nAssistente: {resposta_texto}\n")
+            # Enviar requisição ao modelo e exibir resposta
+            resposta = invocador.invocar(get_config(entrada))
+            print(f"\nAssistente: {resposta.texto}\n")
             
-        except client.exceptions.ThrottlingException:
-            print("\n⚠️ Muitas requisições. Aguarde um momento...\n")
         except Exception as e:
-            print(f"\n❌ Erro: {e}\n")
+            if eh_throttling(e):
+                print("\n⚠️ Muitas requisições. Aguarde um momento...\n")
+            else:
+                print(f"\n❌ Erro: {e}\n")
+
+def main():
+    iniciar_chat()
 
 # Executar chatbot
 if __name__ == "__main__":
-    iniciar_chat()
\ No newline at end of file
+    main()
@@ -1,16 +1,18 @@
-import boto3
-import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.bedrock import InvocadorBedrock, montar_corpo
+from comum.cache_prompt import montar_system
+from comum.limitador_taxa import eh_throttling
+from comum.memoria import MemoriaConversa, ResumidorBedrock
 
 # ============================================
 # CONFIGURAÇÕES
 # ============================================
-client = boto3.client(
-    service_name='bedrock-runtime',
-    region_name='us-east-2'
-)
-
 MODEL_ID = 'us.anthropic.claude-3-5-haiku-20241022-v1:0'  # Custo 73% menor
-MAX_HISTORICO = 10  # Limita histórico para controlar custos
+JANELA_HISTORICO = 4          # Trocas literais; as mais antigas viram resumo
+TETO_TOKENS_HISTORICO = 1000  # Teto do histórico por requisição (custo e latência estáveis)
 
 # System Prompt (instruções gerais do assistente)
 SYSTEM_PROMPT = """Você é um assistente virtual da Meteora, um e-commerce de moda e vestuário.
@@ -32,28 +34,23 @@ class ChatbotMeteora:
     """
     
     def __init__(self):
-        self.historico = []  # Lista de mensagens {role, content}
-        self.max_historico = MAX_HISTORICO
+        # Janela de mensagens recentes + resumo das antigas (modelo barato)
+        self.memoria = MemoriaConversa(JANELA_HISTORICO, TETO_TOKENS_HISTORICO,
+                                       resumidor=ResumidorBedrock())
+        # Cliente compartilhado, limitadores e contagem de uso (comum/bedrock.py)
+        self.invocador = InvocadorBedrock(MODEL_ID)
     
     def adicionar_mensagem(self, role, content):
         """
         Adiciona mensagem ao histórico
         role: 'user' ou 'assistant'
+        Passando da janela, as conversas mais antigas são resumidas
         """
-        self.historico.append({
-            "role": role,
-            "content": content
-        })
-        
-        # Limitar histórico (mantém últimas N conversas)
-        # Cada conversa = 1 user + 1 assistant = 2 mensagens
-        if len(self.historico) > self.max_historico * 2:
-            # Remove as mais antigas, mantém as mais recentes
-            self.historico = self.historico[-self.max_historico * 2:]
+        self.memoria.adicionar(role, content)
     
     def limpar_historico(self):
         """Limpa todo o histórico"""
-        self.historico = []
+        self.memoria.limpar()
     
     def obter_resposta(self, mensagem_usuario):
         """
@@ -63,44 +60,36 @@ class ChatbotMeteora:
         self.adicionar_mensagem("user", mensagem_usuario)
         
         try:
-            # Configurar requisição com histórico completo
-            config = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 300,
-                "temperature": 0.5,
-                "system": SYSTEM_PROMPT,
-                "messages": self.historico  # Envia todo o histórico
-            }
-            
-            # Invocar modelo
-            response = client.invoke_model(
-                body=json.dumps(config),
-                modelId=MODEL_ID,
-                accept="application/json",
-                contentType="application/json"
+            # Configurar requisição com o histórico (janela + resumo, dentro do teto)
+            config = montar_corpo(
+                self.memoria.mensagens(),
+                system=montar_system(MODEL_ID, SYSTEM_PROMPT),
+                max_tokens=300,
+                temperature=0.5
             )
             
-            # Processar resposta
-            resposta = json.loads(response['body'].read().decode('utf-8'))
-            texto_resposta = resposta.get('content', [{}])[0].get('text', 'Erro ao processar')
+            # Invocar modelo (limitador compartilhado: RPM/TPM + retentativas)
+            texto_resposta = self.invocador.invocar(config).texto
             
             # Adicionar resposta do assistente ao histórico
             self.adicionar_mensagem("assistant", texto_resposta)
             
             return texto_resposta
             
-        except client.exceptions.ThrottlingException:
-            # Remove última mensagem do usuário se falhou
-            if self.historico and self.historico[-1]["role"] == "user":
-                self.historico.pop()
-            return "⚠️ Muitas requisições. Aguarde um momento e tente novamente."
-        
         except Exception as e:
             # Remove última mensagem do usuário se falhou
-            if self.historico and self.historico[-1]["role"] == "user":
-                self.historico.pop()
+            self.memoria.descartar_pergunta()
+            if eh_throttling(e):
+                return "⚠️ Muitas requisições. Aguarde um momento e tente novamente."
             return f"❌ Erro: {str(e)}"
     
+    async def aobter_resposta(self, mensagem_usuario):
+        """
+        Versão assíncrona de obter_resposta: a chamada ao Bedrock roda numa
+        thread, limitada pelo limitador compartilhado (uma instância por conversa)
+        """
+        return await self.invocador.limitador.executar(self.obter_resposta, mensagem_usuario)
+    
     def iniciar(self):
         """
         Inicia o loop de conversa
@@ -114,7 +103,7 @@ class ChatbotMeteora:
         print("   • Digite sua pergunta normalmente")
         print("   • 'sair' ou 'tchau' → Encerrar")
         print("   • 'limpar' → Limpar histórico de conversa")
-        print("   • 'historico' → Ver quantas mensagens estão armazenadas\n")
+        print("   • 'historico' → Ver janela, resumo e tokens do histórico\n")
         print("-" * 80 + "\n")
         
         while True:
@@ -136,9 +125,9 @@ class ChatbotMeteora:
                 continue
             
             if entrada.lower() == 'historico':
-                num_conversas = len(self.historico) // 2
-                print(f"\n📊 Histórico: {num_conversas} conversas armazenadas")
-                print(f"   (Máximo: {self.max_historico} conversas)\n")
+                print()
+                self.memoria.mostrar_estatisticas()
+                print()
                 continue
             
             # Ignorar entradas vazias
@@ -153,6 +142,9 @@ class ChatbotMeteora:
 # ============================================
 # EXECUTAR
 # ============================================
-if __name__ == "__main__":
+def main():
     chatbot = ChatbotMeteora()
-    chatbot.iniciar()
\ No newline at end of file
+    chatbot.iniciar()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,21 +1,39 @@
-import boto3
-import json
+import os
+import sys
+import uuid
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.bedrock import InvocadorBedrock, montar_corpo
+from comum.cache_prompt import UsoPrompt, calcular_custo, montar_system
+from comum.cache_respostas import CacheRespostas
+from comum.limitador_taxa import eh_throttling, limitador_taxa_padrao
+from comum.memoria import MemoriaConversa, ResumidorBedrock
+from comum.sessoes import ArmazemSessoes
+
 # ============================================
 # CONFIGURAÇÕES
 # ============================================
-client = boto3.client(
-    service_name='bedrock-runtime',
-    region_name='us-east-2'
-)
-
 MODEL_ID = 'us.anthropic.claude-3-5-haiku-20241022-v1:0'
-MAX_HISTORICO = 10
+JANELA_HISTORICO = 4          # trocas literais; as mais antigas viram resumo
+TETO_TOKENS_HISTORICO = 1000  # teto do histórico por requisição
 
 # Preços (por 1M tokens)
-PRECO_INPUT = 0.80
-PRECO_OUTPUT = 4.00
+PRECOS = {
+    'input': 0.80,
+    'output': 4.00,
+    'cache_escrita': 1.00,   # prompt caching: gravar prefixo
+    'cache_leitura': 0.08,   # prompt caching: reaproveitar prefixo
+}
+
+# Cache de respostas
+CACHE_TTL_SEGUNDOS = 3600
+CACHE_MAX_ITENS = 500
+CACHE_ARQUIVO = None  # Ex.: 'cache_respostas.db' para persistir em disco
+
+# Sessões: None = SESSOES_URL do ambiente (padrão memoria://)
+# Ex.: 'sqlite:///sessoes.db' ou 'redis://localhost:6379/0' para vários workers
+SESSOES_URL = None
 
 SYSTEM_PROMPT = """Você é um assistente virtual da Meteora, um e-commerce de moda e vestuário.
 
@@ -32,35 +50,94 @@ DIRETRIZES:
 class ChatbotMeteora:
     """
     Chatbot com histórico, estatísticas e controle de custos
+    
+    Histórico e contadores vivem no armazém de sessões (eventos só de
+    acréscimo): outra instância, em outro processo, com o mesmo id_sessao
+    continua a conversa de onde parou. Um turno por vez em cada sessão.
     """
     
-    def __init__(self):
-        self.historico = []
-        self.max_historico = MAX_HISTORICO
+    def __init__(self, cache=None, id_sessao=None, armazem=None, limitador=None):
+        self.memoria = MemoriaConversa(JANELA_HISTORICO, TETO_TOKENS_HISTORICO,
+                                       resumidor=ResumidorBedrock())
+        self.cache = cache or CacheRespostas(
+            ttl_segundos=CACHE_TTL_SEGUNDOS,
+            max_itens=CACHE_MAX_ITENS,
+            caminho_sqlite=CACHE_ARQUIVO
+        )
+        # Mesmo histórico + mesmos parâmetros = mesma resposta (cache consultado pelo invocador)
+        # limitador: LimitadorConcorrencia das versões assíncronas (None = compartilhado)
+        self.invocador = InvocadorBedrock(MODEL_ID, cache=self.cache, uso=UsoPrompt(PRECOS),
+                                          limitador=limitador)
         
         # Estatísticas
+        self._zerar_estatisticas()
+        
+        # Sessão: retoma a existente ou registra o início de uma nova
+        self.armazem = armazem or ArmazemSessoes(SESSOES_URL)
+        self.id_sessao = id_sessao or uuid.uuid4().hex
+        self.posicao_sessao = None   # (geração, eventos já aplicados) no armazém
+        self.sincronizar_sessao()
+        if not self.posicao_sessao[1]:
+            self._registrar(["i", round(self.inicio_sessao.timestamp(), 3)])
+    
+    def _zerar_estatisticas(self):
         self.total_requisicoes = 0
         self.total_tokens_input = 0
         self.total_tokens_output = 0
+        self.total_tokens_cache_leitura = 0
+        self.total_tokens_cache_escrita = 0
         self.total_custo = 0.0
         self.inicio_sessao = datetime.now()
     
+    def sincronizar_sessao(self):
+        """Aplica os eventos gravados por outros workers desde a última leitura"""
+        eventos, self.posicao_sessao, reiniciou = self.armazem.ler_novos(self.id_sessao, self.posicao_sessao)
+        if reiniciou:
+            # A sessão expirou e foi recriada: o estado antigo não vale mais
+            self._zerar_estatisticas()
+            self.memoria.aplicar_evento(["l"])
+        for evento in eventos:
+            self._aplicar_evento(evento)
+    
+    def _aplicar_evento(self, evento):
+        if evento[0] == "i":
+            self.inicio_sessao = datetime.fromtimestamp(evento[1])
+        elif evento[0] == "u":
+            _, tokens_in, tokens_out, cache_leitura, cache_escrita, custo = evento
+            self.total_requisicoes += 1
+            self.total_tokens_input += tokens_in
+            self.total_tokens_output += tokens_out
+            self.total_tokens_cache_leitura += cache_leitura
+            self.total_tokens_cache_escrita += cache_escrita
+            self.total_custo += custo
+        else:
+            self.memoria.aplicar_evento(evento)
+    
+    def _registrar(self, *extras):
+        """Grava os eventos novos da memória (+ extras) no fim da sessão"""
+        eventos = self.memoria.retirar_eventos() + list(extras)
+        if eventos:
+            self.armazem.anexar(self.id_sessao, eventos)
+            self.posicao_sessao = self.armazem.avancar(self.posicao_sessao, len(eventos))
+    
     def adicionar_mensagem(self, role, content):
-        """Adiciona mensagem ao histórico"""
-        self.historico.append({"role": role, "content": content})
-        
-        if len(self.historico) > self.max_historico * 2:
-            self.historico = self.historico[-self.max_historico * 2:]
+        """Adiciona mensagem ao histórico (conversas antigas viram resumo)"""
+        self.memoria.adicionar(role, content)
     
     def limpar_historico(self):
         """Limpa histórico"""
-        self.historico = []
+        self.memoria.limpar()
+        self._registrar()
     
-    def calcular_custo(self, tokens_in, tokens_out):
-        """Calcula custo da requisição"""
-        custo_in = (tokens_in / 1_000_000) * PRECO_INPUT
-        custo_out = (tokens_out / 1_000_000) * PRECO_OUTPUT
-        return custo_in + custo_out
+    def calcular_custo(self, tokens_in, tokens_out, tokens_cache_leitura=0, tokens_cache_escrita=0):
+        """
+        Calcula custo da requisição
+        tokens_in não inclui os tokens servidos/gravados pelo prompt caching,
+        cobrados à parte com tarifa própria
+        """
+        return calcular_custo({'tokens_in': tokens_in, 'tokens_out': tokens_out,
+                               'cache_leitura': tokens_cache_leitura, 'cache_escrita': tokens_cache_escrita},
+                              PRECOS)
     
     def mostrar_estatisticas(self):
         """Exibe estatísticas da sessão"""
@@ -75,67 +152,73 @@ class ChatbotMeteora:
         print(f"💬 Total de perguntas: {self.total_requisicoes}")
         print(f"📥 Tokens de entrada: {self.total_tokens_input:,}")
         print(f"📤 Tokens de saída: {self.total_tokens_output:,}")
+        print(f"🧊 Prompt caching: {self.total_tokens_cache_leitura:,} tokens lidos | "
+              f"{self.total_tokens_cache_escrita:,} gravados")
+        print(f"🔑 Sessão: {self.id_sessao}")
         print(f"💰 Custo total: ${self.total_custo:.6f} (≈ R$ {self.total_custo * 5.5:.4f})")
         
         if self.total_requisicoes > 0:
             custo_medio = self.total_custo / self.total_requisicoes
             print(f"📊 Custo médio/pergunta: ${custo_medio:.6f}")
         
+        self.memoria.mostrar_estatisticas()
+        self.cache.mostrar_estatisticas()
+        self.armazem.mostrar_estatisticas()
+        limitador_taxa_padrao.mostrar_estatisticas()
+        
         print("=" * 80 + "\n")
     
     def obter_resposta(self, mensagem_usuario):
         """Envia mensagem e obtém resposta"""
+        self.sincronizar_sessao()
         self.adicionar_mensagem("user", mensagem_usuario)
         
         try:
-            config = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 300,
-                "temperature": 0.5,
-                "system": SYSTEM_PROMPT,
-                "messages": self.historico
-            }
-            
-            response = client.invoke_model(
-                body=json.dumps(config),
-                modelId=MODEL_ID,
-                accept="application/json",
-                contentType="application/json"
+            config = montar_corpo(
+                self.memoria.mensagens(),
+                system=montar_system(MODEL_ID, SYSTEM_PROMPT),
+                max_tokens=300,
+                temperature=0.5
             )
             
-            resposta = json.loads(response['body'].read().decode('utf-8'))
-            texto = resposta.get('content', [{}])[0].get('text', 'Erro')
-            usage = resposta.get('usage', {})
+            # Invocador: cache de respostas, RPM/TPM do modelo e retentativas
+            # de ThrottlingException com backoff exponencial + jitter
+            resposta = self.invocador.invocar(config)
+            uso = resposta.uso
             
-            # Atualizar estatísticas
-            tokens_in = usage.get('input_tokens', 0)
-            tokens_out = usage.get('output_tokens', 0)
-            custo = self.calcular_custo(tokens_in, tokens_out)
-            
-            self.total_requisicoes += 1
-            self.total_tokens_input += tokens_in
-            self.total_tokens_output += tokens_out
-            self.total_custo += custo
+            self.adicionar_mensagem("assistant", resposta.texto)
             
-            self.adicionar_mensagem("assistant", texto)
+            # Atualizar estatísticas (resposta do cache: turno sem tokens nem custo)
+            evento_uso = ["u", uso['tokens_in'], uso['tokens_out'], uso['cache_leitura'],
+                          uso['cache_escrita'], resposta.custo]
+            self._aplicar_evento(evento_uso)
+            self._registrar(evento_uso)
             
-            return {
-                'texto': texto,
-                'tokens_in': tokens_in,
-                'tokens_out': tokens_out,
-                'custo': custo
+            resultado = {
+                'texto': resposta.texto,
+                'tokens_in': uso['tokens_in'],
+                'tokens_out': uso['tokens_out'],
+                'tokens_cache_leitura': uso['cache_leitura'],
+                'custo': resposta.custo
             }
+            if resposta.cache:
+                resultado['cache'] = True
+            return resultado
             
-        except client.exceptions.ThrottlingException:
-            if self.historico and self.historico[-1]["role"] == "user":
-                self.historico.pop()
-            return {'texto': "⚠️ Muitas requisições. Aguarde um momento.", 'erro': True}
-        
         except Exception as e:
-            if self.historico and self.historico[-1]["role"] == "user":
-                self.historico.pop()
+            self.memoria.descartar_pergunta()
+            if eh_throttling(e):
+                # Só chega aqui depois de esgotar as retentativas do limitador
+                return {'texto': "⚠️ Muitas requisições. Aguarde um momento.", 'erro': True}
             return {'texto': f"❌ Erro: {str(e)}", 'erro': True}
     
+    async def aobter_resposta(self, mensagem_usuario):
+        """
+        Versão assíncrona de obter_resposta: a chamada ao Bedrock roda numa
+        thread, limitada pelo limitador compartilhado (uma instância por conversa)
+        """
+        return await self.invocador.limitador.executar(self.obter_resposta, mensagem_usuario)
+    
     def iniciar(self):
         """Inicia o chatbot"""
         print("=" * 80)
@@ -148,7 +231,7 @@ class ChatbotMeteora:
         print("   • 'sair' → Encerrar e ver estatísticas")
         print("   • 'limpar' → Limpar histórico")
         print("   • 'stats' → Ver estatísticas parciais")
-        print("   • 'historico' → Ver mensagens armazenadas\n")
+        print("   • 'historico' → Ver janela, resumo e tokens do histórico\n")
         print("-" * 80 + "\n")
         
         while True:
@@ -175,8 +258,9 @@ class ChatbotMeteora:
                 continue
             
             if entrada.lower() == 'historico':
-                num_conversas = len(self.historico) // 2
-                print(f"\n📊 {num_conversas}/{self.max_historico} conversas no histórico\n")
+                print()
+                self.memoria.mostrar_estatisticas()
+                print()
                 continue
             
             if not entrada:
@@ -189,13 +273,19 @@ class ChatbotMeteora:
                 print(f"\n{resultado['texto']}\n")
             else:
                 print(f"\n🤖 Assistente: {resultado['texto']}")
-                print(f"   💰 ${resultado['custo']:.6f} | 📊 {resultado['tokens_out']} tokens\n")
+                if resultado.get('cache'):
+                    print("   🗃️  Resposta do cache | 💰 $0.000000\n")
+                else:
+                    print(f"   💰 ${resultado['custo']:.6f} | 📊 {resultado['tokens_out']} tokens\n")
             
             print("-" * 80 + "\n")
 
 # ============================================
 # EXECUTAR
 # ============================================
-if __name__ == "__main__":
+def main():
     chatbot = ChatbotMeteora()
-    chatbot.iniciar()
\ No newline at end of file
+    chatbot.iniciar()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,54 +1,57 @@
-import boto3
-import json
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableLambda
+import os
+import sys
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.bedrock import InvocadorBedrock, montar_corpo
+from comum.cache_prompt import montar_system, separar_prompt
 
 # ============================================
 # CONFIGURAÇÃO
 # ============================================
-bedrock_client = boto3.client(
-    service_name='bedrock-runtime',
-    region_name="us-east-2"
-)
-
 MODEL_ID = 'us.anthropic.claude-3-5-haiku-20241022-v1:0'
 
+# boto3 e langchain_core só são importados no primeiro uso (import rápido)
+invocador = InvocadorBedrock(MODEL_ID, texto_padrao='Erro')
+
 # ============================================
 # FUNÇÃO INTERNA PARA INVOCAR BEDROCK
 # ============================================
 def _invocar_bedrock(messages):
     """Função interna que invoca Bedrock diretamente"""
     # Extrair entrada
+    instrucoes = ()
     if isinstance(messages, dict):
         entrada = messages.get('product_name', messages.get('input', ''))
     elif isinstance(messages, list):
         entrada = str(messages[-1].content if hasattr(messages[-1], 'content') else messages[-1])
+    elif hasattr(messages, 'to_messages'):
+        # ChatPromptValue: system/assistant do template vão para o system cacheável
+        instrucoes, entrada = separar_prompt(messages)
     else:
         entrada = str(messages)
     
     # Configuração
-    config = {
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 300,
-        "temperature": 0.5,
-        "system": "Você é um assistente virtual especializado em moda para e-commerce. Forneça respostas concisas com no máximo 300 caracteres.",
-        "messages": [{"role": "user", "content": entrada}]
-    }
-    
-    response = bedrock_client.invoke_model(
-        body=json.dumps(config),
-        modelId=MODEL_ID,
-        accept="application/json",
-        contentType="application/json"
+    config = montar_corpo(
+        entrada,
+        system=montar_system(MODEL_ID, "Você é um assistente virtual especializado em moda para e-commerce. Forneça respostas concisas com no máximo 300 caracteres.", *instrucoes),
+        max_tokens=300,
+        temperature=0.5
     )
     
-    resposta = json.loads(response['body'].read().decode('utf-8'))
-    return resposta.get('content', [{}])[0].get('text', 'Erro')
+    return invocador.invocar(config).texto
+
+async def _ainvocar_bedrock(messages):
+    """Versão assíncrona (.ainvoke): boto3 numa thread, com limite de concorrência"""
+    return await invocador.limitador.executar(_invocar_bedrock, messages)
 
 # ============================================
-# ✅ CRIAR MODELO UMA VEZ (como na aula)
+# ✅ CRIAR MODELO UMA VEZ (como na aula, mas no primeiro uso)
 # ============================================
-modelo = RunnableLambda(_invocar_bedrock)
+@lru_cache(maxsize=None)
+def obter_modelo():
+    from langchain_core.runnables import RunnableLambda
+    return RunnableLambda(_invocar_bedrock, afunc=_ainvocar_bedrock)
 
 # ============================================
 # HISTÓRICO
@@ -61,39 +64,46 @@ def get_hist():
 # ============================================
 # TEMPLATE DO PROMPT (igual à aula)
 # ============================================
-def get_chat_prompt(entrada):
-    template = ChatPromptTemplate.from_messages([
+@lru_cache(maxsize=None)
+def obter_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages([
         ("system", "Você é um assistente virtual especializado em moda para e-commerce. Forneça respostas concisas e úteis."),
-        ("human", entrada),
+        ("human", "{product_name}"),
         ("assistant", "Forneça uma resposta concisa com no máximo 300 caracteres, ideal para um e-commerce de roupas e itens de vestuário. Não mencionar instruções do prompt na resposta.")
     ])
-    return template
+
+# ✅ Chain criada uma vez (assim como o modelo)
+@lru_cache(maxsize=None)
+def obter_chain():
+    return obter_prompt() | obter_modelo()
 
 # ============================================
 # ✅ INVOCAR MODELO (EXATAMENTE como na aula)
 # ============================================
 def inv_modelo(prompt):
-    chain = get_chat_prompt(prompt).pipe(modelo)  # ✅ Usa modelo já criado!
-    response = chain.invoke({"product_name": prompt})
+    response = obter_chain().invoke({"product_name": prompt})
     return response
 
-# ============================================
-# MENSAGEM INICIAL (igual à aula)
-# ============================================
-print(
-    "Assistente: Olá! Sou seu Assistente Virtual. :)\n"
-    "Em que posso ajudar hoje?"
-)
-
 # ============================================
 # LOOP PRINCIPAL (igual à aula)
 # ============================================
-while True:
-    entrada = input("User: ")
-    historico.append(f"Human: {entrada}")
-    if entrada.lower() == "sair":
-        break
-    response = inv_modelo(entrada)
-    resposta_formatada = f"Assistente:\n{response}\n"
-    historico.append(f"Assistant: {resposta_formatada}")
-    print(resposta_formatada)
\ No newline at end of file
+def main():
+    # Mensagem inicial
+    print(
+        "Assistente: Olá! Sou seu Assistente Virtual. :)\n"
+        "Em que posso ajudar hoje?"
+    )
+
+    while True:
+        entrada = input("User: ")
+        historico.append(f"Human: {entrada}")
+        if entrada.lower() == "sair":
+            break
+        response = inv_modelo(entrada)
+        resposta_formatada = f"Assistente:\n{response}\n"
+        historico.append(f"Assistant: {resposta_formatada}")
+        print(resposta_formatada)
+
+if __name__ == "__main__":
+    main()
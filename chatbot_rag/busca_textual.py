@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Busca textual de produtos com SQLite FTS5
+
+- Tabela virtual roupas_fts sobre roupas(nome, descricao), sincronizada por triggers
+- Tokenizador unicode61 com remove_diacritics 2: "sandalia" encontra "Sandália"
+- Ranking BM25 (nome pesa mais que descrição), top-k numa única consulta
+  (relaxa os termos só quando a busca completa traz menos que k)
+- Stopwords ("de", "com", "tem"...) são descartadas antes do MATCH
+
+Uso (cria/reconstrói o índice num banco existente):
+    python busca_textual.py produtos.db
+"""
+import re
+import sqlite3
+import sys
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+TOKENIZADOR = "unicode61 remove_diacritics 2"
+
+# Pesos do bm25() por coluna: (nome, descricao)
+PESO_NOME = 10.0
+PESO_DESCRICAO = 1.0
+
+TOP_K_PADRAO = 5
+
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'um', 'uma', 'uns', 'umas', 'de', 'da', 'do', 'das', 'dos',
+    'em', 'na', 'no', 'nas', 'nos', 'para', 'pra', 'por', 'com', 'sem', 'e', 'ou',
+    'que', 'qual', 'quais', 'quanto', 'quanta', 'quantos', 'quantas', 'tem', 'têm',
+    'ter', 'voce', 'você', 'vocês', 'eu', 'me', 'meu', 'minha', 'se', 'é', 'ser',
+    'há', 'ha', 'algum', 'alguma', 'quero', 'queria', 'gostaria', 'procuro',
+    'mostre', 'mostrar', 'ver', 'vende', 'vendem', 'disponível', 'disponivel',
+    'preço', 'preco', 'custa', 'valor', 'ai', 'aí', 'sim', 'não', 'nao',
+    # Comparações e palavras genéricas de catálogo (impedem o AND de casar)
+    'entre', 'diferença', 'diferenca', 'compare', 'comparar', 'melhor', 'pior', 'mais',
+    'menos', 'caro', 'cara', 'barato', 'barata', 'bom', 'boa', 'está', 'esta', 'estoque',
+    'algo', 'coisa', 'produto', 'roupa', 'ir', 'à', 'ao',
+}
+
+_PALAVRA = re.compile(r'\w+', re.UNICODE)
+
+# ============================================
+# CRIAÇÃO DO ÍNDICE
+# ============================================
+def criar_indice_fts(conn):
+    """Cria roupas_fts + triggers de sincronização e (re)indexa o catálogo"""
+    cursor = conn.cursor()
+    cursor.execute(f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS roupas_fts USING fts5(
+        nome, descricao,
+        content='roupas', content_rowid='id',
+        tokenize='{TOKENIZADOR}'
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS roupas_fts_ai AFTER INSERT ON roupas BEGIN
+        INSERT INTO roupas_fts(rowid, nome, descricao)
+        VALUES (new.id, new.nome, new.descricao);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS roupas_fts_ad AFTER DELETE ON roupas BEGIN
+        INSERT INTO roupas_fts(roupas_fts, rowid, nome, descricao)
+        VALUES ('delete', old.id, old.nome, old.descricao);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS roupas_fts_au AFTER UPDATE OF nome, descricao ON roupas BEGIN
+        INSERT INTO roupas_fts(roupas_fts, rowid, nome, descricao)
+        VALUES ('delete', old.id, old.nome, old.descricao);
+        INSERT INTO roupas_fts(rowid, nome, descricao)
+        VALUES (new.id, new.nome, new.descricao);
+    END
+    ''')
+
+    # Reindexa o que já existia antes dos triggers e compacta os segmentos
+    cursor.execute("INSERT INTO roupas_fts(roupas_fts) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO roupas_fts(roupas_fts) VALUES ('optimize')")
+    conn.commit()
+
+def indice_fts_existe(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'roupas_fts'")
+    return cursor.fetchone() is not None
+
+# ============================================
+# CONSULTA
+# ============================================
+def extrair_termos(pergunta):
+    """Palavras relevantes da pergunta (sem stopwords, sem duplicatas)"""
+    termos = []
+    for palavra in _PALAVRA.findall(pergunta.lower()):
+        if palavra in STOPWORDS or len(palavra) < 2 or palavra.isdigit():
+            continue
+        # Plural simples: "camisetas" → prefixo "camiseta"
+        if len(palavra) > 4 and palavra.endswith('s'):
+            palavra = palavra[:-1]
+        if palavra not in termos:
+            termos.append(palavra)
+    return termos
+
+def montar_match(termos):
+    """Expressão MATCH do FTS5: todos os termos (AND implícito), por prefixo"""
+    return " ".join(f'"{termo}"*' if len(termo) >= 3 else f'"{termo}"' for termo in termos)
+
+def buscar_produtos(cursor, pergunta, limite=TOP_K_PADRAO):
+    """
+    Top-k produtos para a pergunta, ordenados por BM25
+    Normalmente uma consulta (todos os termos). Se vierem menos de 'limite',
+    relaxa descartando os últimos termos (em português o produto vem antes
+    dos qualificadores: "vestido floral leve" → "vestido floral" → "vestido").
+    Um OR de todos os termos seria mais simples, mas obriga o BM25 a pontuar
+    quase o catálogo inteiro quando algum termo é comum.
+    Retorna linhas de roupas (SELECT r.*)
+    """
+    termos = extrair_termos(pergunta)
+    produtos = []
+    vistos = set()
+    
+    for n in range(len(termos), 0, -1):
+        cursor.execute(f'''
+        SELECT r.*
+        FROM roupas_fts
+        JOIN roupas r ON r.id = roupas_fts.rowid
+        WHERE roupas_fts MATCH ?
+        ORDER BY bm25(roupas_fts, {PESO_NOME}, {PESO_DESCRICAO})
+        LIMIT ?
+        ''', (montar_match(termos[:n]), limite + len(produtos)))
+        
+        for produto in cursor.fetchall():
+            if produto[0] not in vistos:
+                vistos.add(produto[0])
+                produtos.append(produto)
+        if len(produtos) >= limite:
+            break
+    
+    return produtos[:limite]
+
+# ============================================
+# EXECUÇÃO DIRETA
+# ============================================
+if __name__ == "__main__":
+    caminho = sys.argv[1] if len(sys.argv) > 1 else 'produtos.db'
+    conn = sqlite3.connect(caminho)
+    criar_indice_fts(conn)
+    total = conn.execute("SELECT COUNT(*) FROM roupas").fetchone()[0]
+    conn.close()
+    print(f"🔎 Índice FTS5 criado em {caminho}: {total} produtos indexados")
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""
+Busca vetorial (embeddings) do catálogo de produtos com índice IVF em NumPy
+
+- Vetores dos produtos calculados offline (gera_dados.py / sql.py) e gravados
+  em float32 (.npy), agrupados por cluster para leitura contígua
+- IVF: k-means esférico → na consulta só os 'nprobe' clusters mais próximos
+  são varridos (milissegundos mesmo com 1M de produtos)
+- Provedor de embeddings plugável:
+    'hash'  → determinístico e local (testes/desenvolvimento, sem AWS)
+    'titan' → Amazon Titan Text Embeddings v2 via Bedrock
+- Reindexação incremental: só produtos novos/alterados são (re)embutidos
+
+Uso (indexa um banco existente):
+    python busca_vetorial.py produtos.db
+    EMBEDDINGS_PROVEDOR=titan python busca_vetorial.py produtos.db
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import unicodedata
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+PROVEDOR_PADRAO = os.environ.get('EMBEDDINGS_PROVEDOR', 'hash')
+ARQUIVO_INDICE = 'produtos_vetores'   # gera produtos_vetores.{json,vetores.npy,ids.npy,...}
+
+DIMENSAO_HASH = 128
+DIMENSAO_TITAN = 256
+MODELO_TITAN = 'amazon.titan-embed-text-v2:0'
+
+NPROBE_PADRAO = 16        # ~94% de recall@10 no bench com 100k produtos
+ITERACOES_KMEANS = 10
+AMOSTRA_KMEANS = 100_000
+LOTE_EMBEDDINGS = 20_000
+
+# ============================================
+# PROVEDORES DE EMBEDDINGS
+# ============================================
+def _normalizar_linhas(matriz):
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    matriz /= normas
+    return matriz
+
+class EmbeddingHash:
+    """
+    Embeddings determinísticos sem rede (random indexing)
+    Cada palavra (sem acento, plural simples) vira um vetor aleatório fixo,
+    semeado pelo hash da palavra; o texto é a soma normalizada. Um pequeno
+    dicionário de conceitos aproxima palavras relacionadas ("frio" ~ "lã").
+    """
+    nome = 'hash'
+
+    CONCEITOS = {
+        'frio': '_inverno', 'inverno': '_inverno', 'la': '_inverno', 'trico': '_inverno',
+        'casaco': '_inverno', 'cachecol': '_inverno', 'moletom': '_inverno', 'luva': '_inverno',
+        'quentinho': '_inverno', 'quente': '_inverno', 'capuz': '_inverno',
+        'calor': '_verao', 'verao': '_verao', 'praia': '_verao', 'sandalia': '_verao',
+        'bermuda': '_verao', 'short': '_verao', 'fresco': '_verao', 'leve': '_verao', 'sol': '_verao',
+        'festa': '_formal', 'formal': '_formal', 'social': '_formal', 'blazer': '_formal',
+        'evento': '_formal', 'casamento': '_formal',
+        'corrida': '_esporte', 'academia': '_esporte', 'esportivo': '_esporte', 'tenis': '_esporte',
+        'legging': '_esporte', 'exercicio': '_esporte', 'treino': '_esporte',
+    }
+    _PALAVRA = re.compile(r'\w+')
+
+    def __init__(self, dimensao=DIMENSAO_HASH):
+        self.dimensao = dimensao
+        self.modelo = f'hash-{dimensao}'
+        self._indices = {}
+        self._linhas = []
+        self._matriz = None
+        # O vocabulário cresce sob demanda: threads do servidor embutem em paralelo
+        self._lock = threading.Lock()
+
+    def _tokens(self, texto):
+        texto = unicodedata.normalize('NFKD', texto.lower()).encode('ascii', 'ignore').decode('ascii')
+        tokens = []
+        for palavra in self._PALAVRA.findall(texto):
+            if len(palavra) < 2:
+                continue
+            if len(palavra) > 4 and palavra.endswith('s'):
+                palavra = palavra[:-1]
+            tokens.append(palavra)
+            conceito = self.CONCEITOS.get(palavra)
+            if conceito:
+                tokens.append(conceito)
+        return tokens
+
+    def _indice_token(self, token):
+        """Posição do vetor do token em self._matriz (criado na 1ª vez; chamar com self._lock)"""
+        indice = self._indices.get(token)
+        if indice is None:
+            semente = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+            indice = len(self._linhas)
+            self._linhas.append(np.random.default_rng(semente).standard_normal(self.dimensao).astype(np.float32))
+            self._indices[token] = indice
+            self._matriz = None
+        return indice
+
+    def embutir(self, textos):
+        """Lista de textos → matriz float32 (n, dimensao) normalizada"""
+        textos_tokens = [self._tokens(texto) for texto in textos]
+        linhas, tokens = [], []
+        with self._lock:
+            for i, tokens_texto in enumerate(textos_tokens):
+                for token in tokens_texto:
+                    linhas.append(i)
+                    tokens.append(self._indice_token(token))
+            if self._matriz is None and self._linhas:
+                self._matriz = np.vstack(self._linhas)
+            # Cópia local: outra thread pode trocar self._matriz ao crescer o vocabulário
+            vetores = self._matriz
+
+        matriz = np.zeros((len(textos), self.dimensao), dtype=np.float32)
+        if tokens:
+            np.add.at(matriz, np.asarray(linhas), vetores[np.asarray(tokens)])
+        return _normalizar_linhas(matriz)
+
+class EmbeddingTitan:
+    """Amazon Titan Text Embeddings v2 (uma chamada por texto)"""
+    nome = 'titan'
+
+    def __init__(self, client=None, modelo=MODELO_TITAN, dimensao=DIMENSAO_TITAN):
+        if client is None:
+            from comum.clientes import obter_cliente
+            client = obter_cliente()   # cliente compartilhado: pool, timeouts e retentativas ajustados
+        self.client = client
+        self.modelo = modelo
+        self.dimensao = dimensao
+
+    def embutir(self, textos):
+        matriz = np.zeros((len(textos), self.dimensao), dtype=np.float32)
+        for i, texto in enumerate(textos):
+            response = self.client.invoke_model(
+                body=json.dumps({"inputText": texto, "dimensions": self.dimensao, "normalize": True}),
+                modelId=self.modelo,
+                accept="application/json",
+                contentType="application/json"
+            )
+            matriz[i] = json.loads(response['body'].read())['embedding']
+        return _normalizar_linhas(matriz)
+
+PROVEDORES = {
+    'hash': EmbeddingHash,
+    'titan': EmbeddingTitan,
+}
+
+def criar_provedor(nome=PROVEDOR_PADRAO, **opcoes):
+    """Instancia o provedor de embeddings pelo nome ('hash' ou 'titan')"""
+    if nome not in PROVEDORES:
+        raise ValueError(f"Provedor de embeddings desconhecido: {nome!r} (opções: {', '.join(PROVEDORES)})")
+    return PROVEDORES[nome](**opcoes)
+
+def texto_produto(nome, descricao):
+    """Texto embutido para cada produto"""
+    return f"{nome}. {descricao or ''}".strip()
+
+def _assinatura(texto):
+    return int.from_bytes(hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+# ============================================
+# K-MEANS ESFÉRICO (IVF)
+# ============================================
+def _atribuir(vetores, centroides, lote=LOTE_EMBEDDINGS):
+    """Cluster mais próximo (produto interno) de cada vetor, em lotes"""
+    rotulos = np.empty(len(vetores), dtype=np.int32)
+    for inicio in range(0, len(vetores), lote):
+        rotulos[inicio:inicio + lote] = np.argmax(vetores[inicio:inicio + lote] @ centroides.T, axis=1)
+    return rotulos
+
+def treinar_centroides(vetores, n_listas, iteracoes=ITERACOES_KMEANS, semente=42):
+    """k-means esférico numa amostra; retorna centroides (n_listas, d) normalizados"""
+    aleatorio = np.random.default_rng(semente)
+    amostra = vetores
+    if len(vetores) > AMOSTRA_KMEANS:
+        amostra = vetores[np.sort(aleatorio.choice(len(vetores), AMOSTRA_KMEANS, replace=False))]
+
+    centroides = amostra[aleatorio.choice(len(amostra), n_listas, replace=False)].copy()
+    for _ in range(iteracoes):
+        rotulos = _atribuir(amostra, centroides)
+        somas = np.zeros_like(centroides)
+        np.add.at(somas, rotulos, amostra)
+        vazios = ~somas.any(axis=1)
+        # Cluster vazio recebe um ponto aleatório da amostra
+        somas[vazios] = amostra[aleatorio.choice(len(amostra), int(vazios.sum()))]
+        centroides = _normalizar_linhas(somas)
+    return centroides
+
+def numero_listas(total):
+    """~√N listas: cada consulta varre nprobe·√N vetores + √N centroides"""
+    return max(1, min(total, int(np.sqrt(total))))
+
+# ============================================
+# ÍNDICE
+# ============================================
+class IndiceVetorial:
+    """Índice IVF carregado do disco (vetores via memória mapeada)"""
+
+    def __init__(self, base, provedor, ids, vetores, centroides, inicios, assinaturas):
+        self.base = base
+        self.provedor = provedor
+        self.ids = ids
+        self.vetores = vetores
+        self.centroides = centroides
+        self.inicios = inicios            # offsets: lista i = vetores[inicios[i]:inicios[i+1]]
+        self.assinaturas = assinaturas
+
+    def __len__(self):
+        return len(self.ids)
+
+    def buscar(self, pergunta, k=5, nprobe=NPROBE_PADRAO):
+        """Top-k (id, similaridade) para a pergunta"""
+        consulta = self.provedor.embutir([pergunta])[0]
+        return self.buscar_vetor(consulta, k, nprobe)
+
+    def buscar_vetor(self, consulta, k=5, nprobe=NPROBE_PADRAO):
+        if not len(self.ids):
+            return []
+        nprobe = min(nprobe, len(self.centroides))
+        escores_listas = self.centroides @ consulta
+        listas = np.argpartition(-escores_listas, nprobe - 1)[:nprobe]
+
+        faixas = [(self.inicios[i], self.inicios[i + 1]) for i in listas if self.inicios[i + 1] > self.inicios[i]]
+        if not faixas:
+            return []
+        candidatos = np.concatenate([self.vetores[a:b] for a, b in faixas])
+        posicoes = np.concatenate([np.arange(a, b) for a, b in faixas])
+
+        escores = candidatos @ consulta
+        k = min(k, len(escores))
+        melhores = np.argpartition(-escores, k - 1)[:k]
+        melhores = melhores[np.argsort(-escores[melhores])]
+        return [(int(self.ids[posicoes[i]]), float(escores[i])) for i in melhores]
+
+def _caminhos(base):
+    return {
+        'meta': f'{base}.json',
+        'vetores': f'{base}.vetores.npy',
+        'ids': f'{base}.ids.npy',
+        'centroides': f'{base}.centroides.npy',
+        'assinaturas': f'{base}.assinaturas.npy',
+    }
+
+def carregar_indice(base=ARQUIVO_INDICE, provedor=None, **opcoes_provedor):
+    """Carrega o índice (None se não existir). O provedor vem dos metadados"""
+    caminhos = _caminhos(base)
+    if not os.path.exists(caminhos['meta']):
+        return None
+    with open(caminhos['meta'], encoding='utf-8') as f:
+        meta = json.load(f)
+
+    if provedor is None:
+        if meta['provedor'] == 'hash':
+            opcoes_provedor.setdefault('dimensao', meta['dimensao'])
+        provedor = criar_provedor(meta['provedor'], **opcoes_provedor)
+
+    return IndiceVetorial(
+        base,
+        provedor,
+        np.load(caminhos['ids']),
+        np.load(caminhos['vetores'], mmap_mode='r'),
+        np.load(caminhos['centroides']),
+        np.asarray(meta['inicios'], dtype=np.int64),
+        np.load(caminhos['assinaturas'])
+    )
+
+def construir_indice(base, provedor, ids, vetores, assinaturas, centroides=None):
+    """Treina (ou reaproveita) centroides, agrupa por lista e grava os arquivos"""
+    ids = np.asarray(ids, dtype=np.int64)
+    assinaturas = np.asarray(assinaturas, dtype=np.int64)
+    if centroides is None:
+        centroides = treinar_centroides(vetores, numero_listas(len(vetores)))
+
+    rotulos = _atribuir(vetores, centroides)
+    ordem = np.argsort(rotulos, kind='stable')
+    contagens = np.bincount(rotulos, minlength=len(centroides))
+    inicios = np.concatenate([[0], np.cumsum(contagens)])
+
+    # Grava em .tmp e troca no fim: quem já abriu o índice (mmap) não é afetado
+    caminhos = _caminhos(base)
+    arrays = {
+        'vetores': vetores[ordem],
+        'ids': ids[ordem],
+        'assinaturas': assinaturas[ordem],
+        'centroides': centroides,
+    }
+    for chave, array in arrays.items():
+        with open(caminhos[chave] + '.tmp', 'wb') as f:
+            np.save(f, array)
+    with open(caminhos['meta'] + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({
+            'provedor': provedor.nome,
+            'modelo': provedor.modelo,
+            'dimensao': provedor.dimensao,
+            'total': int(len(ids)),
+            'listas': int(len(centroides)),
+            'inicios': inicios.tolist(),
+        }, f)
+    for chave in list(arrays) + ['meta']:
+        os.replace(caminhos[chave] + '.tmp', caminhos[chave])
+
+def indexar_catalogo(conn, base=ARQUIVO_INDICE, provedor=None):
+    """
+    (Re)indexa roupas. Reaproveita os vetores de produtos cujo texto não mudou
+    e os centroides, enquanto o catálogo não dobrar de tamanho
+    Retorna: (total indexado, quantos foram embutidos agora)
+    """
+    anterior = carregar_indice(base) if provedor is None else carregar_indice(base, provedor)
+    if provedor is None:
+        provedor = anterior.provedor if anterior else criar_provedor()
+    if anterior and (anterior.provedor.nome, anterior.provedor.dimensao) != (provedor.nome, provedor.dimensao):
+        anterior = None
+
+    reaproveitaveis = {}
+    if anterior:
+        for posicao, (id_produto, assinatura) in enumerate(zip(anterior.ids, anterior.assinaturas)):
+            reaproveitaveis[(int(id_produto), int(assinatura))] = posicao
+
+    ids, assinaturas, pendentes = [], [], []
+    linhas = conn.execute("SELECT id, nome, descricao FROM roupas ORDER BY id").fetchall()
+    vetores = np.zeros((len(linhas), provedor.dimensao), dtype=np.float32)
+    for i, (id_produto, nome, descricao) in enumerate(linhas):
+        texto = texto_produto(nome, descricao)
+        assinatura = _assinatura(texto)
+        ids.append(id_produto)
+        assinaturas.append(assinatura)
+        posicao = reaproveitaveis.get((id_produto, assinatura))
+        if posicao is not None:
+            vetores[i] = anterior.vetores[posicao]
+        else:
+            pendentes.append((i, texto))
+
+    for inicio in range(0, len(pendentes), LOTE_EMBEDDINGS):
+        lote = pendentes[inicio:inicio + LOTE_EMBEDDINGS]
+        vetores[[i for i, _ in lote]] = provedor.embutir([texto for _, texto in lote])
+
+    centroides = None
+    if anterior and len(linhas) < 2 * max(1, len(anterior)):
+        centroides = anterior.centroides
+    if linhas:
+        construir_indice(base, provedor, ids, vetores, assinaturas, centroides)
+    return len(linhas), len(pendentes)
+
+def buscar_linhas(cursor, ids):
+    """Linhas de roupas (SELECT *) para os ids, na mesma ordem"""
+    if not ids:
+        return []
+    marcadores = ", ".join("?" for _ in ids)
+    cursor.execute(f"SELECT * FROM roupas WHERE id IN ({marcadores})", list(ids))
+    por_id = {linha[0]: linha for linha in cursor.fetchall()}
+    return [por_id[i] for i in ids if i in por_id]
+
+# ============================================
+# EXECUÇÃO DIRETA
+# ============================================
+if __name__ == "__main__":
+    import sqlite3
+
+    caminho = sys.argv[1] if len(sys.argv) > 1 else 'produtos.db'
+    conn = sqlite3.connect(caminho)
+    total, embutidos = indexar_catalogo(conn)
+    conn.close()
+    print(f"🧭 Índice vetorial '{ARQUIVO_INDICE}': {total} produtos ({embutidos} embutidos agora)")
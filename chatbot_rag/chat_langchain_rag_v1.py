@@ -1,38 +1,55 @@
-import boto3
-import json
-import sqlite3
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableLambda
+import os
+import sys
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.bedrock import InvocadorBedrock, montar_corpo
+from comum.cache_prompt import montar_system, separar_prompt
+from comum.cache_respostas import CacheRespostas
+from comum.clientes import ClientePreguicoso
+from comum.conexoes import obter_pool
+from comum.memoria import MemoriaConversa, ResumidorBedrock
+from comum.empacotador_contexto import EmpacotadorContexto, descrever
+
+from busca_textual import extrair_termos, indice_fts_existe
 
 # ============================================
 # CONFIGURAÇÃO BEDROCK
 # ============================================
-bedrock_client = boto3.client(
-    service_name='bedrock-runtime',
-    region_name="us-east-2"
-)
+# boto3, langchain_core e numpy só são importados no primeiro uso (import rápido)
+bedrock_client = ClientePreguicoso()
 
 MODEL_ID = 'us.anthropic.claude-3-5-haiku-20241022-v1:0'
 
+# Cache de respostas (TTL + LRU); use caminho_sqlite para persistir em disco
+cache_respostas = CacheRespostas(ttl_segundos=3600, max_itens=500)
+
 # ============================================
 # FUNÇÃO PARA CONFIGURAR MODELO
 # ============================================
-def configurar_modelo(client, max_tokens=300, temperature=0.5, top_p=0.9):
+def configurar_modelo(client, max_tokens=300, temperature=0.5, top_p=0.9, cache=None, limitador=None):
     """Configura parâmetros do modelo"""
+    # Cache: mesma pergunta + mesmos dados do banco = mesma resposta
+    invocador = InvocadorBedrock(MODEL_ID, client=client, cache=cache, limitador=limitador, texto_padrao='Erro')
+    
     def _invocar_com_parametros(messages):
+        instrucoes = ()
         if isinstance(messages, dict):
             entrada = messages.get('product_name', messages.get('input', ''))
         elif isinstance(messages, list):
             entrada = str(messages[-1].content if hasattr(messages[-1], 'content') else messages[-1])
+        elif hasattr(messages, 'to_messages'):
+            # ChatPromptValue: system/assistant do template vão para o system cacheável
+            instrucoes, entrada = separar_prompt(messages)
         else:
             entrada = str(messages)
         
-        config = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            "top_p": top_p,
-            "system": """Você é um assistente virtual especializado em moda para e-commerce da Meteora.
+        config = montar_corpo(
+            entrada,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            system=montar_system(MODEL_ID, """Você é um assistente virtual especializado em moda para e-commerce da Meteora.
 
 SUAS RESPONSABILIDADES:
 - Fornecer informações precisas sobre produtos de vestuário
@@ -44,31 +61,45 @@ REGRAS:
 - Se a pergunta não for sobre moda: redirecione gentilmente
 - Se não houver produtos: sugira termos de busca alternativos
 - Sempre mencione preço e quantidade quando disponíveis
-- Nunca invente informações""",
-            "messages": [{"role": "user", "content": entrada}]
-        }
-        
-        response = client.invoke_model(
-            body=json.dumps(config),
-            modelId=MODEL_ID,
-            accept="application/json",
-            contentType="application/json"
+- Nunca invente informações""", *instrucoes)
         )
         
-        resposta = json.loads(response['body'].read().decode('utf-8'))
-        return resposta.get('content', [{}])[0].get('text', 'Erro')
+        return invocador.invocar(config).texto
+    
+    async def _ainvocar_com_parametros(messages):
+        """Versão assíncrona (.ainvoke): boto3 numa thread, com limite de concorrência"""
+        return await invocador.limitador.executar(_invocar_com_parametros, messages)
     
-    return RunnableLambda(_invocar_com_parametros)
+    from langchain_core.runnables import RunnableLambda
+    return RunnableLambda(_invocar_com_parametros, afunc=_ainvocar_com_parametros)
+
+# ============================================
+# POOL DE CONEXÕES (somente leitura, compartilhado)
+# ============================================
+pool_produtos = obter_pool('produtos.db')
 
-modelo = configurar_modelo(bedrock_client)
+# Recuperação híbrida (BM25 + vetores, RRF): só os top_k produtos vão para o prompt
+# Criada na primeira busca: carrega numpy e o índice vetorial só quando precisa
+@lru_cache(maxsize=None)
+def obter_recuperador():
+    from busca_vetorial import carregar_indice
+    from recuperacao_hibrida import RecuperadorHibrido
+    return RecuperadorHibrido(carregar_indice(), top_k=5)
+
+# Orçamento de tokens para os produtos no prompt (acima disso: CSV / resumo)
+ORCAMENTO_CONTEXTO = 300
+COLUNAS_PRODUTO = ['ID', 'Nome', 'Preço', 'Estoque', 'Descrição']
+empacotador = EmpacotadorContexto(ORCAMENTO_CONTEXTO)
 
 # ============================================
 # HISTÓRICO
 # ============================================
-historico = []
+# Janela de trocas recentes + resumo das antigas (modelo barato), com teto de tokens
+# Seguimento sem produto próprio ("Quanto custa?") herda o da pergunta anterior
+memoria = MemoriaConversa(resumidor=ResumidorBedrock(bedrock_client), tem_assunto=extrair_termos)
 
 def get_hist():
-    return "\n".join(historico)
+    return memoria.como_texto()
 
 # ============================================
 # FUNÇÃO DE CONSULTA CORRIGIDA
@@ -76,10 +107,13 @@ def get_hist():
 def consulta_produto(nome_produto):
     """
     Consulta produtos no banco - VERSÃO CORRIGIDA
+    Com o índice FTS5: BM25 + índice vetorial fundidos por RRF (recuperacao_hibrida.py)
     """
-    conn = sqlite3.connect('produtos.db')
-    cursor = conn.cursor()
+    with pool_produtos.conexao() as cursor:
+        if indice_fts_existe(cursor):
+            return obter_recuperador().recuperar(cursor, nome_produto)
     
+    # Sem índice: um LIKE por palavra (varredura completa)
     # 🔧 CORREÇÃO: Busca apenas em NOME (mais confiável)
     # Remove acentos e converte para minúsculas para melhor match
     termos_busca = nome_produto.lower().split()
@@ -87,17 +121,16 @@ def consulta_produto(nome_produto):
     # Lista para armazenar todos os produtos encontrados
     produtos_encontrados = []
     
-    # Buscar por cada termo
-    for termo in termos_busca:
-        cursor.execute("""
-            SELECT * FROM roupas 
-            WHERE LOWER(nome) LIKE ?
-        """, ('%' + termo + '%',))
-        
-        resultados = cursor.fetchall()
-        produtos_encontrados.extend(resultados)
-    
-    conn.close()
+    # Buscar por cada termo (mesmo statement preparado para todos os termos)
+    with pool_produtos.conexao() as cursor:
+        for termo in termos_busca:
+            cursor.execute("""
+                SELECT * FROM roupas 
+                WHERE LOWER(nome) LIKE ?
+            """, ('%' + termo + '%',))
+            
+            resultados = cursor.fetchall()
+            produtos_encontrados.extend(resultados)
     
     # Remover duplicatas mantendo ordem
     produtos_unicos = []
@@ -112,8 +145,10 @@ def consulta_produto(nome_produto):
 # ============================================
 # TEMPLATE DO PROMPT
 # ============================================
-def get_chat_prompt(entrada):
-    template = ChatPromptTemplate.from_messages([
+@lru_cache(maxsize=None)
+def obter_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages([
         ("system", """Você é assistente virtual da Meteora especializado em moda.
 
 DIRETRIZES:
@@ -127,9 +162,9 @@ FORMATO:
 - Direto e útil
 - Com informações concretas (preço, quantidade)
 - Sem mencionar "banco de dados" ou limitações técnicas"""),
-        
-        ("human", entrada),
-        
+    
+        ("human", "{product_name}"),
+    
         ("assistant", """Forneça resposta concisa (máximo 300 caracteres).
 
 SE HOUVER PRODUTOS:
@@ -144,50 +179,64 @@ SE PERGUNTA FORA DO ESCOPO:
 - Redirecione educadamente para moda
 - Pergunte como pode ajudar com vestuário""")
     ])
-    return template
+
+# Chain criada uma vez, na primeira pergunta
+@lru_cache(maxsize=None)
+def obter_chain():
+    return obter_prompt() | configurar_modelo(bedrock_client, cache=cache_respostas)
 
 # ============================================
 # INVOCAR MODELO COM RAG
 # ============================================
-def inv_modelo(prompt):
-    """Invoca modelo COM RAG"""
+def formatar_produtos(produtos):
+    """Um bloco por produto - formato completo do contexto"""
+    produtos_info = []
+    for p in produtos:
+        # Estrutura: ID, Nome, Preço, Quantidade, (Descrição se existir)
+        info = f"""Produto ID {p[0]}:
+- Nome: {p[1]}
+- Preço: R$ {p[2]:.2f}
+- Estoque: {p[3]} unidades"""
+        
+        # Adicionar descrição se existir (índice 4)
+        if len(p) > 4 and p[4]:
+            info += f"\n- Descrição: {p[4]}"
+        
+        produtos_info.append(info.strip())
+    return "\n\n".join(produtos_info)
+
+def inv_modelo(prompt, memoria=None):
+    """Invoca modelo COM RAG (memoria: histórico da conversa, opcional)"""
     prompt_original = prompt
+    historico = memoria.como_texto() if memoria is not None else ""
+    bloco_historico = f"{historico}\n\n" if historico else ""
+    # Seguimentos ("Quanto custa?") buscam pelo assunto da pergunta anterior
+    busca = memoria.contextualizar(prompt) if memoria is not None else prompt
     
     # 🔍 DEBUG: Mostrar o que está buscando
-    print(f"  🔍 Buscando: '{prompt}'", end="\r")
+    print(f"  🔍 Buscando: '{busca}'", end="\r")
     
     # Consultar produtos
-    produtos_encontrados = consulta_produto(prompt)
+    produtos_encontrados = consulta_produto(busca)
     
     # 🔍 DEBUG: Mostrar quantos encontrou
     print(f"  📦 Encontrados: {len(produtos_encontrados)} produto(s)    ", end="\r")
     
     if produtos_encontrados:
-        produtos_info = []
-        for p in produtos_encontrados:
-            # Estrutura: ID, Nome, Preço, Quantidade, (Descrição se existir)
-            info = f"""Produto ID {p[0]}:
-- Nome: {p[1]}
-- Preço: R$ {p[2]:.2f}
-- Estoque: {p[3]} unidades"""
-            
-            # Adicionar descrição se existir (índice 4)
-            if len(p) > 4 and p[4]:
-                info += f"\n- Descrição: {p[4]}"
-            
-            produtos_info.append(info.strip())
-        
-        produtos_formatados = "\n\n".join(produtos_info)
+        # Sem orçamento para todos os detalhes: CSV ou CSV + resumo
+        contexto = empacotador.empacotar(COLUNAS_PRODUTO, produtos_encontrados, formatar_produtos)
+        print(f"  📦 {descrever(contexto)}     ", end="\r")
+        produtos_formatados = contexto.texto
         
         prompt_augmented = f"""PRODUTOS DISPONÍVEIS:
 {produtos_formatados}
 
-PERGUNTA: {prompt_original}
+{bloco_historico}PERGUNTA: {prompt_original}
 
 INSTRUÇÕES: Use as informações acima para responder com preço e disponibilidade."""
         
     else:
-        prompt_augmented = f"""SITUAÇÃO: Nenhum produto encontrado.
+        prompt_augmented = f"""{bloco_historico}SITUAÇÃO: Nenhum produto encontrado.
 
 BUSCA: "{prompt_original}"
 
@@ -197,8 +246,7 @@ INSTRUÇÕES:
 3. Peça mais detalhes
 4. NÃO invente informações"""
     
-    chain = get_chat_prompt(prompt_augmented).pipe(modelo)
-    response = chain.invoke({"product_name": prompt_augmented})
+    response = obter_chain().invoke({"product_name": prompt_augmented})
     return response
 
 # ============================================
@@ -206,11 +254,9 @@ INSTRUÇÕES:
 # ============================================
 def listar_produtos():
     """Lista catálogo completo"""
-    conn = sqlite3.connect('produtos.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT nome, preco, quantidade FROM roupas ORDER BY nome")
-    produtos = cursor.fetchall()
-    conn.close()
+    with pool_produtos.conexao() as cursor:
+        cursor.execute("SELECT nome, preco, quantidade FROM roupas ORDER BY nome")
+        produtos = cursor.fetchall()
     
     print("\n" + "=" * 80)
     print("📦 CATÁLOGO METEORA")
@@ -219,52 +265,53 @@ def listar_produtos():
         print(f"{i}. {p[0]:30} → R$ {p[1]:6.2f} | {p[2]:3} un.")
     print("=" * 80 + "\n")
 
-# ============================================
-# MENSAGEM INICIAL
-# ============================================
-print("=" * 80)
-print("🛍️  METEORA - ASSISTENTE VIRTUAL")
-print("=" * 80)
-print("\nAssistente: Olá! Sou seu Assistente Virtual da Meteora. 😊")
-print("Especializado em moda e vestuário.\n")
-print("💡 Comandos:")
-print("   • 'produtos' = ver catálogo completo")
-print("   • 'sair' = encerrar\n")
-print("-" * 80 + "\n")
-
 # ============================================
 # LOOP PRINCIPAL
 # ============================================
-while True:
-    try:
-        entrada = input("User: ").strip()
-        
-        if entrada.lower() == "sair":
-            print("\nAssistente: Até logo! Volte sempre! 👋✨\n")
+def main():
+    # Mensagem inicial
+    print("=" * 80)
+    print("🛍️  METEORA - ASSISTENTE VIRTUAL")
+    print("=" * 80)
+    print("\nAssistente: Olá! Sou seu Assistente Virtual da Meteora. 😊")
+    print("Especializado em moda e vestuário.\n")
+    print("💡 Comandos:")
+    print("   • 'produtos' = ver catálogo completo")
+    print("   • 'sair' = encerrar\n")
+    print("-" * 80 + "\n")
+
+    while True:
+        try:
+            entrada = input("User: ").strip()
+
+            if entrada.lower() == "sair":
+                print("\nAssistente: Até logo! Volte sempre! 👋✨\n")
+                break
+
+            if entrada.lower() == "produtos":
+                listar_produtos()
+                continue
+
+            if not entrada:
+                continue
+
+            memoria.adicionar("user", entrada)
+
+            # Processar com RAG
+            response = inv_modelo(entrada, memoria)
+
+            resposta_formatada = f"\nAssistente:\n{response}\n"
+            memoria.adicionar("assistant", response)
+
+            print(resposta_formatada)
+            print("-" * 80 + "\n")
+
+        except (KeyboardInterrupt, EOFError):
+            print("\n\nAssistente: Até logo! 👋\n")
             break
-        
-        if entrada.lower() == "produtos":
-            listar_produtos()
-            continue
-        
-        if not entrada:
-            continue
-        
-        historico.append(f"Human: {entrada}")
-        
-        # Processar com RAG
-        response = inv_modelo(entrada)
-        
-        resposta_formatada = f"\nAssistente:\n{response}\n"
-        historico.append(f"Assistant: {resposta_formatada}")
-        
-        print(resposta_formatada)
-        print("-" * 80 + "\n")
-        
-    except KeyboardInterrupt:
-        print("\n\nAssistente: Até logo! 👋\n")
-        break
-    except Exception as e:
-        print(f"\n❌ Erro: {e}\n")
-        if historico and historico[-1].startswith("Human:"):
-            historico.pop()
\ No newline at end of file
+        except Exception as e:
+            print(f"\n❌ Erro: {e}\n")
+            memoria.descartar_pergunta()
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,52 @@
-import boto3
-import json
-import sqlite3
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableLambda
+import os
+import sys
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.bedrock import InvocadorBedrock, montar_corpo
+from comum.cache_prompt import montar_system, separar_prompt
+from comum.cache_respostas import CacheRespostas
+from comum.clientes import ClientePreguicoso
+from comum.conexoes import obter_pool
+from comum.memoria import MemoriaConversa, ResumidorBedrock
+from comum.empacotador_contexto import EmpacotadorContexto
+
+from busca_textual import extrair_termos
 
 # ============================================
-# CONEXÃO COM BANCO DE DADOS
+# CONEXÃO COM BANCO DE DADOS (pool somente leitura, compartilhado)
 # ============================================
-conn = sqlite3.connect('produtos.db')
-cursor = conn.cursor()
+pool_produtos = obter_pool('produtos.db')
+
+# Recuperação híbrida (BM25 + vetores, RRF); sem índice vetorial gerado, só o lexical
+# top_k = quantos produtos entram no prompt
+# Criada na primeira busca: carrega numpy e o índice vetorial só quando precisa
+@lru_cache(maxsize=None)
+def obter_recuperador():
+    from busca_vetorial import carregar_indice
+    from recuperacao_hibrida import RecuperadorHibrido
+    return RecuperadorHibrido(carregar_indice(), top_k=5)
+
+# Orçamento de tokens para os produtos no prompt (acima disso: CSV / resumo)
+ORCAMENTO_CONTEXTO = 300
+COLUNAS_PRODUTO = ['ID', 'Nome', 'Preço', 'Estoque', 'Descrição']
+empacotador = EmpacotadorContexto(ORCAMENTO_CONTEXTO)
 
 # ============================================
 # CONFIGURAÇÃO BEDROCK
 # ============================================
-bedrock_client = boto3.client(
-    service_name='bedrock-runtime',
-    region_name="us-east-2"
-)
+# boto3, langchain_core e numpy só são importados no primeiro uso (import rápido)
+bedrock_client = ClientePreguicoso()
 
 MODEL_ID = 'us.anthropic.claude-3-5-haiku-20241022-v1:0'
 
+# Cache de respostas (TTL + LRU); use caminho_sqlite para persistir em disco
+cache_respostas = CacheRespostas(ttl_segundos=3600, max_itens=500)
+
 # ============================================
 # FUNÇÃO PARA CONFIGURAR MODELO (refinamento de parâmetros)
 # ============================================
-def configurar_modelo(client, max_tokens=300, temperature=0.5, top_p=0.9):
+def configurar_modelo(client, max_tokens=300, temperature=0.5, top_p=0.9, cache=None, limitador=None):
     """
     Configura parâmetros do modelo para respostas mais precisas
     
@@ -32,21 +55,28 @@ def configurar_modelo(client, max_tokens=300, temperature=0.5, top_p=0.9):
     - temperature: Criatividade (0.5 = balanceado)
     - top_p: Nucleus sampling (0.9 = diversidade controlada)
     """
+    # Cache: mesma pergunta + mesmos dados do banco = mesma resposta
+    invocador = InvocadorBedrock(MODEL_ID, client=client, cache=cache, limitador=limitador, texto_padrao='Erro')
+    
     def _invocar_com_parametros(messages):
         """Invoca modelo com parâmetros personalizados"""
+        instrucoes = ()
         if isinstance(messages, dict):
             entrada = messages.get('product_name', messages.get('input', ''))
         elif isinstance(messages, list):
             entrada = str(messages[-1].content if hasattr(messages[-1], 'content') else messages[-1])
+        elif hasattr(messages, 'to_messages'):
+            # ChatPromptValue: system/assistant do template vão para o system cacheável
+            instrucoes, entrada = separar_prompt(messages)
         else:
             entrada = str(messages)
         
-        config = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            "top_p": top_p,
-            "system": """Você é um assistente virtual especializado em moda para e-commerce.
+        config = montar_corpo(
+            entrada,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            system=montar_system(MODEL_ID, """Você é um assistente virtual especializado em moda para e-commerce.
             
 SUAS RESPONSABILIDADES:
 - Fornecer informações precisas sobre produtos de vestuário
@@ -58,71 +88,61 @@ REGRAS IMPORTANTES:
 - Se a pergunta não for sobre moda: redirecione gentilmente
 - Se não houver produtos no banco: sugira termos de busca alternativos
 - Nunca invente informações sobre produtos
-- Sempre mencione preço e quantidade quando disponíveis""",
-            "messages": [{"role": "user", "content": entrada}]
-        }
-        
-        response = client.invoke_model(
-            body=json.dumps(config),
-            modelId=MODEL_ID,
-            accept="application/json",
-            contentType="application/json"
+- Sempre mencione preço e quantidade quando disponíveis""", *instrucoes)
         )
         
-        resposta = json.loads(response['body'].read().decode('utf-8'))
-        return resposta.get('content', [{}])[0].get('text', 'Erro')
+        return invocador.invocar(config).texto
+    
+    async def _ainvocar_com_parametros(messages):
+        """Versão assíncrona (.ainvoke): boto3 numa thread, com limite de concorrência"""
+        return await invocador.limitador.executar(_invocar_com_parametros, messages)
     
-    return RunnableLambda(_invocar_com_parametros)
+    from langchain_core.runnables import RunnableLambda
+    return RunnableLambda(_invocar_com_parametros, afunc=_ainvocar_com_parametros)
 
 # ============================================
 # CRIAR MODELO COM PARÂMETROS REFINADOS
 # ============================================
-modelo = configurar_modelo(
-    bedrock_client,
-    max_tokens=300,    # Respostas concisas
-    temperature=0.5,   # Balanceado (nem muito criativo, nem muito rígido)
-    top_p=0.9         # Diversidade controlada
-)
+@lru_cache(maxsize=None)
+def obter_modelo():
+    return configurar_modelo(
+        bedrock_client,
+        max_tokens=300,    # Respostas concisas
+        temperature=0.5,   # Balanceado (nem muito criativo, nem muito rígido)
+        top_p=0.9,        # Diversidade controlada
+        cache=cache_respostas
+    )
 
 # ============================================
 # HISTÓRICO
 # ============================================
-historico = []
+# Janela de trocas recentes + resumo das antigas (modelo barato), com teto de tokens
+# Seguimento sem produto próprio ("Quanto custa?") herda o da pergunta anterior
+memoria = MemoriaConversa(resumidor=ResumidorBedrock(bedrock_client), tem_assunto=extrair_termos)
 
 def get_hist():
     """Retorna histórico concatenado"""
-    return "\n".join(historico)
+    return memoria.como_texto()
 
 # ============================================
 # FUNÇÃO DE CONSULTA AO BANCO
 # ============================================
 def consulta_produto(nome_produto):
     """
-    Consulta produtos no banco de dados usando busca LIKE
-    Busca case-insensitive e parcial
+    Consulta produtos no banco de dados (recuperacao_hibrida.py)
+    Candidatos do FTS5/BM25 (ou LIKE, sem o índice) e do índice vetorial,
+    fundidos por RRF: só os top-k mais relevantes vão para o prompt
     """
-    conn = sqlite3.connect('produtos.db')
-    cursor = conn.cursor()
-    
-    # Busca em nome E descrição para melhor cobertura
-    cursor.execute("""
-        SELECT * FROM roupas 
-        WHERE nome LIKE ? OR descricao LIKE ?
-    """, ('%' + nome_produto + '%', '%' + nome_produto + '%'))
-    
-    resultado = cursor.fetchall()
-    conn.close()
-    return resultado
+    with pool_produtos.conexao() as cursor:
+        return obter_recuperador().recuperar(cursor, nome_produto)
 
 # ============================================
 # TEMPLATE DO PROMPT REFINADO
 # ============================================
-def get_chat_prompt(entrada):
-    """
-    Define o template de prompt refinado para o LangChain
-    Com instruções detalhadas para melhor qualidade de resposta
-    """
-    template = ChatPromptTemplate.from_messages([
+@lru_cache(maxsize=None)
+def obter_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages([
         ("system", """Você é um assistente virtual especializado em moda para e-commerce.
 
 DIRETRIZES ESPECÍFICAS:
@@ -138,9 +158,9 @@ FORMATO DE RESPOSTA:
 - Direta e útil
 - Com informações concretas (preço, quantidade, características)
 - Sem mencionar "banco de dados" ou "prompt" na resposta"""),
-        
-        ("human", entrada),
-        
+    
+        ("human", "{product_name}"),
+    
         ("assistant", """Forneça uma resposta concisa, direta e útil com no máximo 300 caracteres.
 
 SE HOUVER PRODUTOS:
@@ -163,43 +183,55 @@ NÃO MENCIONE:
 - "Sistema"
 - Limitações técnicas""")
     ])
-    return template
+
+# Chain montada uma única vez, na primeira pergunta (a pergunta entra como variável, não no template)
+@lru_cache(maxsize=None)
+def obter_chain():
+    return obter_prompt() | obter_modelo()
 
 # ============================================
 # INVOCAR MODELO COM RAG REFINADO
 # ============================================
-def inv_modelo(prompt):
+def formatar_produtos(produtos):
+    """Um bloco detalhado por produto - formato completo do contexto"""
+    produtos_info = []
+    for p in produtos:
+        info = f"""
+Produto ID {p[0]}:
+- Nome: {p[1]}
+- Preço: R$ {p[2]:.2f}
+- Estoque: {p[3]} unidades
+- Descrição: {p[4] if len(p) > 4 else 'N/A'}
+"""
+        produtos_info.append(info.strip())
+    return "\n\n".join(produtos_info)
+
+def inv_modelo(prompt, memoria=None):
     """
     Invoca o modelo COM consulta refinada ao banco (RAG)
     Inclui melhor formatação e tratamento de casos
+    memoria: histórico da conversa; seguimentos ("Quanto custa?") buscam o assunto anterior
     """
     # Guardar prompt original para contexto
     prompt_original = prompt
+    historico = memoria.como_texto() if memoria is not None else ""
+    bloco_historico = f"{historico}\n\n" if historico else ""
+    busca = memoria.contextualizar(prompt) if memoria is not None else prompt
     
     # Consultar produtos no banco (busca ampliada)
-    produtos_encontrados = consulta_produto(prompt)
+    produtos_encontrados = consulta_produto(busca)
     
     # Verificar se encontrou produtos
     if produtos_encontrados:
-        # Formatar informações dos produtos de forma detalhada
-        produtos_info = []
-        for p in produtos_encontrados:
-            info = f"""
-Produto ID {p[0]}:
-- Nome: {p[1]}
-- Preço: R$ {p[2]:.2f}
-- Estoque: {p[3]} unidades
-- Descrição: {p[4] if len(p) > 4 else 'N/A'}
-"""
-            produtos_info.append(info.strip())
-        
-        produtos_formatados = "\n\n".join(produtos_info)
+        # Formatar produtos dentro do orçamento de tokens (detalhado, CSV ou CSV + resumo)
+        contexto = empacotador.empacotar(COLUNAS_PRODUTO, produtos_encontrados, formatar_produtos)
+        produtos_formatados = contexto.texto
         
         # Prompt aumentado com contexto rico
         prompt_augmented = f"""PRODUTOS DISPONÍVEIS NO ESTOQUE:
 {produtos_formatados}
 
-PERGUNTA DO CLIENTE:
+{bloco_historico}PERGUNTA DO CLIENTE:
 {prompt_original}
 
 INSTRUÇÕES:
@@ -209,7 +241,7 @@ Seja entusiasmado mas profissional."""
         
     else:
         # Prompt para caso não encontre produtos
-        prompt_augmented = f"""SITUAÇÃO: Nenhum produto encontrado no estoque.
+        prompt_augmented = f"""{bloco_historico}SITUAÇÃO: Nenhum produto encontrado no estoque.
 
 BUSCA DO CLIENTE: "{prompt_original}"
 
@@ -220,39 +252,18 @@ INSTRUÇÕES:
 4. Seja prestativo e ofereça ajuda para refinar a busca
 5. NÃO invente produtos ou informações"""
     
-    # Criar e executar chain
-    chain = get_chat_prompt(prompt_augmented).pipe(modelo)
-    response = chain.invoke({"product_name": prompt_augmented})
+    response = obter_chain().invoke({"product_name": prompt_augmented})
     return response
 
-# ============================================
-# MENSAGEM INICIAL
-# ============================================
-print("=" * 80)
-print("🛍️  METEORA - ASSISTENTE VIRTUAL REFINADO")
-print("=" * 80)
-print("✨ Chatbot com RAG + Prompt Engineering + Parâmetros Otimizados")
-print("=" * 80)
-print("\nAssistente: Olá! Sou seu Assistente Virtual da Meteora. 😊")
-print("Especializado em moda e vestuário.")
-print("\nEm que posso ajudar hoje?")
-print("\n💡 Dicas:")
-print("   • Pergunte sobre roupas, calçados e acessórios")
-print("   • Digite 'sair' para encerrar")
-print("   • Digite 'produtos' para ver catálogo\n")
-print("-" * 80 + "\n")
-
 # ============================================
 # COMANDOS ESPECIAIS
 # ============================================
 def listar_produtos():
     """Lista todos os produtos disponíveis"""
-    conn = sqlite3.connect('produtos.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT nome, preco, quantidade FROM roupas ORDER BY nome")
-    produtos = cursor.fetchall()
-    conn.close()
-    
+    with pool_produtos.conexao() as cursor:
+        cursor.execute("SELECT nome, preco, quantidade FROM roupas ORDER BY nome")
+        produtos = cursor.fetchall()
+
     print("\n" + "=" * 80)
     print("📦 CATÁLOGO DE PRODUTOS")
     print("=" * 80)
@@ -263,43 +274,70 @@ def listar_produtos():
 # ============================================
 # LOOP PRINCIPAL
 # ============================================
-while True:
-    try:
-        entrada = input("User: ").strip()
-        
-        # Comandos especiais
-        if entrada.lower() == "sair":
-            print("\nAssistente: Foi um prazer ajudá-lo(a)!")
-            print("Volte sempre à Meteora! 👋✨\n")
+def main():
+    # Mensagem inicial
+    print("=" * 80)
+    print("🛍️  METEORA - ASSISTENTE VIRTUAL REFINADO")
+    print("=" * 80)
+    print("✨ Chatbot com RAG + Prompt Engineering + Parâmetros Otimizados")
+    print("=" * 80)
+    print("\nAssistente: Olá! Sou seu Assistente Virtual da Meteora. 😊")
+    print("Especializado em moda e vestuário.")
+    print("\nEm que posso ajudar hoje?")
+    print("\n💡 Dicas:")
+    print("   • Pergunte sobre roupas, calçados e acessórios")
+    print("   • Digite 'sair' para encerrar")
+    print("   • Digite 'produtos' para ver catálogo")
+    print("   • Digite 'stats' para ver os tempos da busca, o contexto e a memória\n")
+    print("-" * 80 + "\n")
+
+    while True:
+        try:
+            entrada = input("User: ").strip()
+
+            # Comandos especiais
+            if entrada.lower() == "sair":
+                print("\nAssistente: Foi um prazer ajudá-lo(a)!")
+                print("Volte sempre à Meteora! 👋✨\n")
+                break
+
+            if entrada.lower() == "produtos":
+                listar_produtos()
+                continue
+
+            if entrada.lower() == "stats":
+                print()
+                obter_recuperador().mostrar_estatisticas()
+                empacotador.mostrar_estatisticas()
+                memoria.mostrar_estatisticas()
+                print()
+                continue
+
+            if not entrada:
+                continue
+
+            # Adicionar ao histórico
+            memoria.adicionar("user", entrada)
+
+            # Processar com RAG
+            print("\n⏳ Consultando catálogo...", end="\r")
+            response = inv_modelo(entrada, memoria)
+
+            # Formatar e exibir resposta
+            resposta_formatada = f"Assistente:\n{response}\n"
+            memoria.adicionar("assistant", response)
+
+            print(" " * 50, end="\r")  # Limpar "Consultando..."
+            print(resposta_formatada)
+            print("-" * 80 + "\n")
+
+        except (KeyboardInterrupt, EOFError):
+            print("\n\nAssistente: Até logo! 👋\n")
             break
-        
-        if entrada.lower() == "produtos":
-            listar_produtos()
-            continue
-        
-        if not entrada:
-            continue
-        
-        # Adicionar ao histórico
-        historico.append(f"Human: {entrada}")
-        
-        # Processar com RAG
-        print("\n⏳ Consultando catálogo...", end="\r")
-        response = inv_modelo(entrada)
-        
-        # Formatar e exibir resposta
-        resposta_formatada = f"Assistente:\n{response}\n"
-        historico.append(f"Assistant: {resposta_formatada}")
-        
-        print(" " * 50, end="\r")  # Limpar "Consultando..."
-        print(resposta_formatada)
-        print("-" * 80 + "\n")
-        
-    except KeyboardInterrupt:
-        print("\n\nAssistente: Até logo! 👋\n")
-        break
-    except Exception as e:
-        print(f"\n❌ Erro: {e}\n")
-        # Remover última mensagem do histórico se falhou
-        if historico and historico[-1].startswith("Human:"):
-            historico.pop()
\ No newline at end of file
+        except Exception as e:
+            print(f"\n❌ Erro: {e}\n")
+            # Descartar a pergunta do histórico se falhou
+            memoria.descartar_pergunta()
+
+if __name__ == "__main__":
+    main()
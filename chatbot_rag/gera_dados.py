@@ -1,5 +1,8 @@
 import sqlite3
 
+from busca_textual import criar_indice_fts
+from busca_vetorial import indexar_catalogo
+
 conn = sqlite3.connect('produtos.db')
 
 cursor = conn.cursor()
@@ -44,6 +47,12 @@ VALUES (?, ?, ?, ?)
 ''', produtos)
 
 conn.commit()
+
+# Índice de busca textual (FTS5 + triggers de sincronização)
+criar_indice_fts(conn)
+
+# Índice vetorial (embeddings + IVF)
+indexar_catalogo(conn)
 conn.close()
 
 print("Banco de dados criado e populado com sucesso!")
\ No newline at end of file
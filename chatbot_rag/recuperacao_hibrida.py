@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Recuperação híbrida de produtos: BM25 (FTS5) + vetores, fundidos por RRF
+
+Estágios (cada um cronometrado):
+1. lexical  → até 'candidatos' produtos do FTS5 (busca_textual.py);
+               sem o índice, LIKE em nome/descrição
+2. vetorial → até 'candidatos' vizinhos no índice IVF (busca_vetorial.py),
+               descartando similaridade abaixo de SIMILARIDADE_MINIMA
+3. fusão    → reciprocal rank fusion: escore = Σ peso / (K_RRF + posição),
+               corta no top-k e busca só essas linhas
+
+Só o top-k vai para o prompt (antes todo hit do LIKE era despejado nele).
+
+Uso:
+    recuperador = RecuperadorHibrido(carregar_indice(), top_k=5)
+    produtos = recuperador.recuperar(cursor, "algo para o frio")
+    recuperador.mostrar_estatisticas()
+"""
+import threading
+import time
+
+from busca_textual import TOP_K_PADRAO, buscar_produtos, indice_fts_existe
+from busca_vetorial import NPROBE_PADRAO, buscar_linhas
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+K_RRF = 60                    # constante do RRF (valor usual da literatura)
+CANDIDATOS_POR_ESTAGIO = 20   # teto de candidatos de cada estágio antes da fusão
+SIMILARIDADE_MINIMA = 0.08    # abaixo disso o vizinho vetorial não entra na fusão
+
+# Peso de cada estágio na soma do RRF
+PESO_LEXICAL = 1.0
+PESO_VETORIAL = 1.0
+
+ESTAGIOS = ('lexical', 'vetorial', 'fusao', 'total')
+
+# ============================================
+# FUSÃO
+# ============================================
+def fundir_rrf(rankings, k_rrf=K_RRF):
+    """
+    Reciprocal rank fusion
+    rankings: lista de (peso, [ids em ordem de relevância])
+    Retorna [(id, escore)] do maior para o menor escore
+    """
+    escores = {}
+    for peso, ids in rankings:
+        for posicao, id_produto in enumerate(ids, start=1):
+            escores[id_produto] = escores.get(id_produto, 0.0) + peso / (k_rrf + posicao)
+    return sorted(escores.items(), key=lambda item: item[1], reverse=True)
+
+def buscar_like(cursor, pergunta, limite=CANDIDATOS_POR_ESTAGIO):
+    """Estágio lexical sem o índice FTS5: frase inteira em nome OU descrição"""
+    cursor.execute("""
+        SELECT * FROM roupas
+        WHERE nome LIKE ? OR descricao LIKE ?
+        LIMIT ?
+    """, ('%' + pergunta + '%', '%' + pergunta + '%', limite))
+    return cursor.fetchall()
+
+# ============================================
+# RECUPERADOR
+# ============================================
+class RecuperadorHibrido:
+    """Pipeline lexical + vetorial + RRF com top-k configurável e tempos por estágio"""
+
+    def __init__(self, indice_vetorial=None, top_k=TOP_K_PADRAO, candidatos=CANDIDATOS_POR_ESTAGIO,
+                 k_rrf=K_RRF, nprobe=NPROBE_PADRAO, similaridade_minima=SIMILARIDADE_MINIMA):
+        self.indice_vetorial = indice_vetorial
+        self.top_k = top_k
+        self.candidatos = candidatos
+        self.k_rrf = k_rrf
+        self.nprobe = nprobe
+        self.similaridade_minima = similaridade_minima
+
+        self._lock = threading.Lock()
+        self.consultas = 0
+        self.tempos_totais = {estagio: 0.0 for estagio in ESTAGIOS}
+        self.ultimos_tempos = {}
+
+    def recuperar(self, cursor, pergunta, top_k=None):
+        """Top-k linhas de roupas (SELECT *) para a pergunta, da mais à menos relevante"""
+        top_k = top_k or self.top_k
+        tempos = {}
+        inicio = time.perf_counter()
+
+        # 1. Lexical
+        if indice_fts_existe(cursor):
+            lexicais = buscar_produtos(cursor, pergunta, limite=self.candidatos)
+        else:
+            lexicais = buscar_like(cursor, pergunta, limite=self.candidatos)
+        marco = time.perf_counter()
+        tempos['lexical'] = marco - inicio
+
+        # 2. Vetorial
+        vetoriais = []
+        if self.indice_vetorial is not None and pergunta.strip():
+            vetoriais = [id_produto for id_produto, similaridade
+                         in self.indice_vetorial.buscar(pergunta, k=self.candidatos, nprobe=self.nprobe)
+                         if similaridade >= self.similaridade_minima]
+        tempos['vetorial'] = time.perf_counter() - marco
+        marco = time.perf_counter()
+
+        # 3. Fusão + corte no top-k
+        fundidos = fundir_rrf([
+            (PESO_LEXICAL, [linha[0] for linha in lexicais]),
+            (PESO_VETORIAL, vetoriais),
+        ], self.k_rrf)
+        ids = [id_produto for id_produto, _ in fundidos[:top_k]]
+
+        por_id = {linha[0]: linha for linha in lexicais}
+        faltantes = [i for i in ids if i not in por_id]
+        if faltantes:
+            por_id.update((linha[0], linha) for linha in buscar_linhas(cursor, faltantes))
+        produtos = [por_id[i] for i in ids if i in por_id]
+
+        fim = time.perf_counter()
+        tempos['fusao'] = fim - marco
+        tempos['total'] = fim - inicio
+        self._registrar(tempos)
+        return produtos
+
+    def _registrar(self, tempos):
+        with self._lock:
+            self.consultas += 1
+            for estagio, segundos in tempos.items():
+                self.tempos_totais[estagio] += segundos
+            self.ultimos_tempos = tempos
+
+    def estatisticas(self):
+        """Média em ms de cada estágio"""
+        with self._lock:
+            consultas = self.consultas
+            totais = dict(self.tempos_totais)
+        return {
+            'consultas': consultas,
+            **{f'{estagio}_ms': totais[estagio] / consultas * 1000 if consultas else 0.0
+               for estagio in ESTAGIOS},
+        }
+
+    def mostrar_estatisticas(self):
+        stats = self.estatisticas()
+        print(f"🔀 Recuperação híbrida: {stats['consultas']} consultas | top-{self.top_k} de "
+              f"{self.candidatos} candidatos/estágio | média: lexical {stats['lexical_ms']:.2f}ms, "
+              f"vetorial {stats['vetorial_ms']:.2f}ms, fusão {stats['fusao_ms']:.2f}ms, "
+              f"total {stats['total_ms']:.2f}ms")
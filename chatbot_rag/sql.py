@@ -1,6 +1,9 @@
 import sqlite3
 import os
 
+from busca_textual import criar_indice_fts
+from busca_vetorial import indexar_catalogo
+
 # Apagar banco antigo se existir
 if os.path.exists('produtos.db'):
     os.remove('produtos.db')
@@ -40,6 +43,14 @@ VALUES (?, ?, ?, ?)
 
 conn.commit()
 
+# Índice de busca textual (FTS5 + triggers de sincronização)
+criar_indice_fts(conn)
+print("🔎 Índice FTS5 'roupas_fts' criado")
+
+# Índice vetorial (embeddings + IVF) para buscas por significado
+total_vetores, _ = indexar_catalogo(conn)
+print(f"🧭 Índice vetorial criado: {total_vetores} produtos")
+
 # VERIFICAR
 print("\n" + "=" * 80)
 print("✅ BANCO RECRIADO!")
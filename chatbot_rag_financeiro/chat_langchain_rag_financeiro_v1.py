@@ -1,39 +1,78 @@
-import boto3
-import json
-import sqlite3
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableLambda
+import asyncio
+import os
+import sys
+import time
 from datetime import datetime
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum import roteador_modelos
+from comum.bedrock import InvocadorBedrock, montar_corpo
+from comum.cache_prompt import UsoPrompt, montar_system, separar_prompt
+from comum.cache_respostas import CacheRespostas
+from comum.clientes import ClientePreguicoso, obter_cliente
+from comum.empacotador_contexto import EmpacotadorContexto, descrever
+from comum.lago_colunar import MotorDuckDB, obter_motor
+from comum.memoria import MemoriaConversa, ResumidorBedrock
+
+import roteador
 
 # ============================================
 # CONFIGURAÇÃO BEDROCK
 # ============================================
-bedrock_client = boto3.client(
-    service_name='bedrock-runtime',
-    region_name="us-east-2"
-)
+# boto3 e langchain_core só são importados no primeiro uso: o import do módulo
+# fica leve para o servidor, o modo em lote e os benchmarks
+bedrock_client = ClientePreguicoso()
 
 MODEL_ID = 'us.anthropic.claude-3-5-haiku-20241022-v1:0'
+MODO_STREAMING = True  # Exibe a resposta token a token (invoke_model_with_response_stream)
+
+# Roteamento de modelos (comum/roteador_modelos.py): saudações no Nova Micro,
+# consultas pontuais no Claude 3 Haiku, comparações/tendências no MODEL_ID;
+# False = toda pergunta no MODEL_ID
+ROTEAR_MODELOS = True
 
 # ============================================
-# FUNÇÃO PARA CONFIGURAR MODELO
+# POOL DE CONEXÕES (somente leitura, compartilhado)
 # ============================================
-def configurar_modelo(client, max_tokens=500, temperature=0.3, top_p=0.9):
-    """Configura parâmetros do modelo para análises financeiras precisas"""
-    def _invocar_com_parametros(messages):
-        if isinstance(messages, dict):
-            entrada = messages.get('query', messages.get('input', ''))
-        elif isinstance(messages, list):
-            entrada = str(messages[-1].content if hasattr(messages[-1], 'content') else messages[-1])
-        else:
-            entrada = str(messages)
-        
-        config = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            "top_p": top_p,
-            "system": """Você é um assistente financeiro e contábil especializado da RSM/Pollvo.
+# SQLite (caminho do .db) ou o lake Parquet no DuckDB (duckdb:///lago_financeiro,
+# gerado por gera_dados.py --parquet); as consultas são as mesmas nos dois
+DADOS_FINANCEIROS = os.environ.get('DADOS_FINANCEIROS', 'dados_financeiros.db')
+pool_financeiro = obter_motor(DADOS_FINANCEIROS)
+
+# Agregações lidas do cubo mensal (gera_dados.py, CUBOS); sem ele no banco
+# (tem_cubo), a consulta vai às tabelas base. O cubo vale até a próxima carga:
+# o ETL chama atualizar_cubos, como faz com o resumo_executivo
+LER_CUBO = True
+
+# ============================================
+# CACHE DE RESPOSTAS (TTL + LRU)
+# ============================================
+CACHE_ARQUIVO = None  # Ex.: 'cache_respostas.db' para persistir em disco
+cache_respostas = CacheRespostas(ttl_segundos=3600, max_itens=500, caminho_sqlite=CACHE_ARQUIVO)
+
+# Preços Claude 3.5 Haiku (por 1M tokens)
+PRECO_INPUT = 0.80
+PRECO_OUTPUT = 4.00
+PRECO_CACHE_ESCRITA = 1.00
+PRECO_CACHE_LEITURA = 0.08
+
+# Tokens e custo das chamadas ao MODEL_ID sem roteamento (inclui leituras/escritas do prompt caching)
+uso_modelo = UsoPrompt({
+    'input': PRECO_INPUT,
+    'output': PRECO_OUTPUT,
+    'cache_escrita': PRECO_CACHE_ESCRITA,
+    'cache_leitura': PRECO_CACHE_LEITURA,
+})
+
+# Com roteamento: uso, custo e latência de cada modelo ficam no roteador
+roteamento_modelos = roteador_modelos.RoteadorModelos(client=bedrock_client, cache=cache_respostas)
+
+# Orçamento de tokens para as linhas do banco no prompt aumentado
+ORCAMENTO_CONTEXTO = 400
+empacotador = EmpacotadorContexto(ORCAMENTO_CONTEXTO)
+
+SYSTEM_PROMPT = """Você é um assistente financeiro e contábil especializado da RSM/Pollvo.
 
 SUAS RESPONSABILIDADES:
 - Analisar dados financeiros, contábeis, fiscais e de folha de pagamento
@@ -55,227 +94,413 @@ FORMATO DE RESPOSTA:
 - Clara e objetiva
 - Com valores formatados corretamente
 - Destacando informações-chave
-- Com contexto temporal quando aplicável""",
-            "messages": [{"role": "user", "content": entrada}]
-        }
-        
-        response = client.invoke_model(
-            body=json.dumps(config),
-            modelId=MODEL_ID,
-            accept="application/json",
-            contentType="application/json"
-        )
-        
-        resposta = json.loads(response['body'].read().decode('utf-8'))
-        return resposta.get('content', [{}])[0].get('text', 'Erro ao processar')
-    
-    return RunnableLambda(_invocar_com_parametros)
+- Com contexto temporal quando aplicável"""
+
+# ============================================
+# CORPO DA REQUISIÇÃO
+# ============================================
+def extrair_entrada(messages):
+    """Extrai o texto enviado ao modelo a partir da saída do prompt/chain"""
+    if isinstance(messages, dict):
+        return messages.get('query', messages.get('input', ''))
+    elif isinstance(messages, list):
+        return str(messages[-1].content if hasattr(messages[-1], 'content') else messages[-1])
+    elif hasattr(messages, 'to_string'):
+        # ChatPromptValue: "System: ...\nHuman: ...\nAI: ..."
+        return messages.to_string()
+    return str(messages)
+
+def separar_entrada(messages):
+    """
+    Retorna (instruções estáticas, texto do usuário)
+    Com ChatPromptValue, system/assistant do template vão para o system cacheável
+    """
+    if hasattr(messages, 'to_messages'):
+        return separar_prompt(messages)
+    return (), extrair_entrada(messages)
+
+def montar_config(entrada, max_tokens=500, temperature=0.3, top_p=0.9, instrucoes=()):
+    """
+    Monta o corpo da requisição (Messages API) para o Bedrock
+    SYSTEM_PROMPT + instruções fixas formam o prefixo com checkpoint de cache
+    """
+    return montar_corpo(
+        entrada,
+        system=montar_system(MODEL_ID, SYSTEM_PROMPT, *instrucoes),
+        max_tokens=max_tokens,
+        temperature=temperature,
+        top_p=top_p
+    )
 
-modelo = configurar_modelo(bedrock_client)
+# ============================================
+# FUNÇÃO PARA CONFIGURAR MODELO
+# ============================================
+def configurar_modelo(client, max_tokens=500, temperature=0.3, top_p=0.9, streaming=False, cache=None,
+                      limitador=None, roteamento=None):
+    """
+    Configura parâmetros do modelo para análises financeiras precisas
+    
+    Com streaming=True o Runnable usa invoke_model_with_response_stream e
+    emite os trechos de texto conforme chegam (compatível com .stream())
+    
+    Com cache (CacheRespostas) a resposta é reaproveitada quando model ID,
+    parâmetros e prompt aumentado são idênticos
+    
+    O Runnable também expõe .ainvoke()/.astream(): a chamada ao boto3 roda
+    numa thread, limitada pelo LimitadorConcorrencia (padrão: compartilhado)
+    
+    Com roteamento (RoteadorModelos) o modelo sai do nível da pergunta,
+    passado em config={"configurable": {"nivel": ...}}; sem ele, MODEL_ID
+    
+    Invocação, limitador de taxa e contagem de uso ficam no InvocadorBedrock
+    """
+    invocador = InvocadorBedrock(MODEL_ID, client=client, cache=cache, uso=uso_modelo, limitador=limitador)
+    
+    def _montar_config(messages):
+        instrucoes, entrada = separar_entrada(messages)
+        return montar_config(entrada, max_tokens, temperature, top_p, instrucoes)
+    
+    def _chamar(metodo, messages, config):
+        """Método do roteador (no nível da pergunta) ou do invocador do MODEL_ID"""
+        corpo = _montar_config(messages)
+        if roteamento is None:
+            return getattr(invocador, metodo)(corpo)
+        nivel = (config or {}).get('configurable', {}).get('nivel', roteador_modelos.CONSULTA)
+        return getattr(roteamento, metodo)(corpo, nivel)
+    
+    def _invocar_com_parametros(messages, config):
+        return _chamar('invocar', messages, config).texto
+    
+    def _invocar_com_stream(messages, config):
+        """Gera os deltas de texto à medida que o Bedrock os envia"""
+        yield from _chamar('invocar_stream', messages, config)
+    
+    async def _ainvocar_com_parametros(messages, config):
+        return (await _chamar('ainvocar', messages, config)).texto
+    
+    async def _ainvocar_com_stream(messages, config):
+        async for trecho in _chamar('ainvocar_stream', messages, config):
+            yield trecho
+    
+    from langchain_core.runnables import RunnableLambda
+    if streaming:
+        return RunnableLambda(_invocar_com_stream, afunc=_ainvocar_com_stream)
+    return RunnableLambda(_invocar_com_parametros, afunc=_ainvocar_com_parametros)
 
 # ============================================
 # HISTÓRICO
 # ============================================
-historico = []
+# Janela de trocas recentes + resumo das antigas (modelo barato), com teto de tokens
+# Seguimento sem intenção/empresa própria ("Quanto foi em março?") herda o assunto anterior
+memoria = MemoriaConversa(resumidor=ResumidorBedrock(bedrock_client), tem_assunto=roteador.tem_assunto)
 
 def get_hist():
-    return "\n".join(historico)
+    return memoria.como_texto()
 
 # ============================================
 # FUNÇÕES DE CONSULTA INTELIGENTE (CORRIGIDAS)
 # ============================================
+# Filtros pelas tabelas de chaves (gera_dados.py, CHAVES): o LIKE roda na
+# tabela pequena e a tabela fato é lida pelo índice da coluna *_id
+IDS_EMPRESA = "SELECT id FROM empresas WHERE chave LIKE ?"
+IDS_IMPOSTO = "SELECT id FROM tipos_imposto WHERE UPPER(nome) = ?"
+IDS_TI = ("SELECT id FROM departamentos WHERE chave LIKE '%ti%' "
+          "OR chave LIKE '%tecnologia%' OR chave LIKE '%desenvolvimento%' OR chave LIKE '%suporte%'")
+FILTRO_EMPRESA = f"empresa_id IN ({IDS_EMPRESA})"
+FILTRO_IMPOSTO = f"tipo_imposto_id = ({IDS_IMPOSTO})"
+FILTRO_TI = f"departamento_id IN ({IDS_TI})"
+
+def periodos_recentes(origem, grupo, limite, filtro=None):
+    """
+    (WITH, WHERE) que restringem a consulta aos meses que cabem no LIMIT
+    As consultas ordenam por ano DESC, mes DESC e cortam em 'limite' grupos:
+    nenhum grupo anterior ao mês do limite-ésimo entra no resultado. O corte
+    lê só o começo do índice (ano DESC, mes DESC, ...) e a agregação vira uma
+    busca por faixa nele, em vez de agrupar a tabela inteira
+    """
+    com = f'''
+        WITH corte AS (
+            SELECT COALESCE(MAX(ano), 0) AS ano, COALESCE(MAX(mes), 0) AS mes
+            FROM (SELECT DISTINCT ano, mes, {grupo} FROM {origem} {'WHERE ' + filtro if filtro else ''}
+                  ORDER BY ano DESC, mes DESC LIMIT 1 OFFSET {limite - 1})
+        )'''
+    # Dois escalares (e não uma linha do corte): o DuckDB não compara linha com subconsulta
+    recentes = "(ano, mes) >= ((SELECT ano FROM corte), (SELECT mes FROM corte))"
+    return com, f"WHERE {filtro} AND {recentes}" if filtro else f"WHERE {recentes}"
+
+def ler_cubo(cubo, colunas, ordem, limite, filtro=None, coluna_id=None, ids=None):
+    """
+    SQL sobre o cubo mensal (gera_dados.py, CUBOS): cada linha já é um grupo
+    do mês com as agregações prontas, então sai o GROUP BY e o corte por
+    período. A chave (ano, mes, ...) lida de trás para frente para no LIMIT
+    filtro: igualdade com índice (coluna, ano DESC, mes DESC) no cubo
+    (INDICES_CUBOS), que já entrega as linhas na ordem do ORDER BY
+    coluna_id IN (ids): vários ids não saem na ordem do índice; cada id lê só
+    as 'limite' linhas mais recentes e o mês mais novo entre esses cortes
+    restringe a leitura (como periodos_recentes), em vez de ordenar o
+    histórico inteiro dos ids. O CROSS JOIN fixa a leitura pelo índice, id a
+    id: o planejador não conhece o corte e preferiria a faixa da chave
+    """
+    if coluna_id is None:
+        return f'''
+    SELECT {colunas}, ano, mes
+    FROM {cubo}
+    {'WHERE ' + filtro if filtro else ''}
+    ORDER BY ano DESC, mes DESC, {ordem} DESC
+    LIMIT {limite}
+    '''
+    # A 'limite'-ésima linha mais recente do id
+    ultima = f"FROM {cubo} WHERE {coluna_id} = chaves.id ORDER BY ano DESC, mes DESC LIMIT 1 OFFSET {limite - 1}"
+    return f'''
+    WITH chaves AS ({ids}),
+    cortes AS (
+        SELECT (SELECT ano {ultima}) AS ano, (SELECT mes {ultima}) AS mes
+        FROM chaves
+    ),
+    corte AS (
+        SELECT COALESCE(MAX(ano), 0) AS ano, COALESCE(MAX(mes), 0) AS mes
+        FROM (SELECT ano, mes FROM cortes WHERE ano IS NOT NULL ORDER BY ano DESC, mes DESC LIMIT 1)
+    )
+    SELECT {colunas}, ano, mes
+    FROM chaves CROSS JOIN {cubo}
+    WHERE {coluna_id} = chaves.id
+      AND (ano, mes) >= ((SELECT ano FROM corte), (SELECT mes FROM corte))
+    ORDER BY ano DESC, mes DESC, {ordem} DESC
+    LIMIT {limite}
+    '''
+
+def montar_consulta(rota, cubo=False):
+    """
+    Traduz a rota (roteador.rotear) no SQL da categoria
+    cubo=True: lê as agregações do cubo mensal em vez das tabelas base
+    Retorna: (tipo_consulta, sql, parametros, colunas)
+    """
+    # ============================================
+    # 1. RECEITAS / FATURAMENTO
+    # ============================================
+    if rota.intencao == roteador.RECEITAS:
+        if rota.empresa and cubo:
+            return ("RECEITAS E FATURAMENTO",
+                    ler_cubo('cubo_receita_empresa_centro', 'empresa, centro_custo, total', 'total', 15,
+                             coluna_id='empresa_id', ids=IDS_EMPRESA),
+                    ('%' + rota.empresa + '%',), ['Empresa', 'Centro de Custo', 'Receita Total', 'Ano', 'Mês'])
+        if rota.empresa:
+            # 🔧 CORREÇÃO: Ajustar SELECT para corresponder às colunas
+            sql = f'''
+            SELECT empresa, centro_custo, SUM(receita) as total, ano, mes
+            FROM rsm_contabil_consolidado
+            WHERE {FILTRO_EMPRESA}
+            GROUP BY empresa, centro_custo, ano, mes
+            ORDER BY ano DESC, mes DESC, total DESC
+            LIMIT 15
+            '''
+            return ("RECEITAS E FATURAMENTO", sql, ('%' + rota.empresa + '%',),
+                    ['Empresa', 'Centro de Custo', 'Receita Total', 'Ano', 'Mês'])
+        
+        if cubo:
+            return ("RECEITAS E FATURAMENTO", ler_cubo('cubo_receita_empresa', 'empresa, total', 'total', 20), (),
+                    ['Empresa', 'Receita Total', 'Ano', 'Mês'])
+        com, onde = periodos_recentes('rsm_contabil_consolidado', 'empresa', 20)
+        sql = f'''{com}
+        SELECT empresa, SUM(receita) as total, ano, mes
+        FROM rsm_contabil_consolidado
+        {onde}
+        GROUP BY empresa, ano, mes
+        ORDER BY ano DESC, mes DESC, total DESC
+        LIMIT 20
+        '''
+        return "RECEITAS E FATURAMENTO", sql, (), ['Empresa', 'Receita Total', 'Ano', 'Mês']
+    
+    # ============================================
+    # 2. IMPOSTOS / TRIBUTOS (CORRIGIDO)
+    # ============================================
+    if rota.intencao == roteador.IMPOSTOS:
+        if rota.tipo_imposto and cubo:
+            return ("IMPOSTOS E TRIBUTOS",
+                    ler_cubo('cubo_imposto_empresa_tipo', 'empresa, tipo_imposto, total, aliquota_media', 'total', 15,
+                             FILTRO_IMPOSTO),
+                    (rota.tipo_imposto,), ['Empresa', 'Tipo', 'Total', 'Alíquota Média (%)', 'Ano', 'Mês'])
+        if rota.tipo_imposto:
+            # 🔧 CORREÇÃO: Usar valor_a_recolher ao invés de imposto
+            com, onde = periodos_recentes('fiscal_consolidado', 'empresa, tipo_imposto', 15, FILTRO_IMPOSTO)
+            sql = f'''{com}
+            SELECT empresa, tipo_imposto, SUM(valor_a_recolher) as total, 
+                   AVG(aliquota_efetiva) as aliquota_media, ano, mes
+            FROM fiscal_consolidado
+            {onde}
+            GROUP BY empresa, tipo_imposto, ano, mes
+            ORDER BY ano DESC, mes DESC, total DESC
+            LIMIT 15
+            '''
+            return ("IMPOSTOS E TRIBUTOS", sql, (rota.tipo_imposto, rota.tipo_imposto),
+                    ['Empresa', 'Tipo', 'Total', 'Alíquota Média (%)', 'Ano', 'Mês'])
+        
+        if cubo:
+            return ("IMPOSTOS E TRIBUTOS",
+                    ler_cubo('cubo_imposto_tipo', 'tipo_imposto, total, aliquota_media', 'total', 20), (),
+                    ['Tipo Imposto', 'Total', 'Alíquota Média (%)', 'Ano', 'Mês'])
+        # 🔧 CORREÇÃO: Usar valor_a_recolher
+        com, onde = periodos_recentes('fiscal_consolidado', 'tipo_imposto', 20)
+        sql = f'''{com}
+        SELECT tipo_imposto, SUM(valor_a_recolher) as total, 
+               AVG(aliquota_efetiva) as aliquota_media, ano, mes
+        FROM fiscal_consolidado
+        {onde}
+        GROUP BY tipo_imposto, ano, mes
+        ORDER BY ano DESC, mes DESC, total DESC
+        LIMIT 20
+        '''
+        return ("IMPOSTOS E TRIBUTOS", sql, (),
+                ['Tipo Imposto', 'Total', 'Alíquota Média (%)', 'Ano', 'Mês'])
+    
+    # ============================================
+    # 3. FOLHA DE PAGAMENTO
+    # ============================================
+    if rota.intencao == roteador.FOLHA:
+        colunas = ['Departamento', 'Empresa', 'Funcionários', 'Folha Total', 'Salário Médio', 'Ano', 'Mês']
+        # Verificar se busca departamento específico
+        if cubo:
+            return ("FOLHA DE PAGAMENTO",
+                    ler_cubo('cubo_folha_departamento_empresa',
+                             'departamento, empresa, total_func, total_folha, salario_medio_geral', 'total_folha', 20,
+                             coluna_id='departamento_id' if rota.departamento_ti else None, ids=IDS_TI),
+                    (), colunas)
+        com, onde = periodos_recentes('folha_consolidada', 'departamento, empresa', 20,
+                                      FILTRO_TI if rota.departamento_ti else None)
+        sql = f'''{com}
+        SELECT departamento, empresa, SUM(funcionarios) as total_func, 
+               SUM(folha) as total_folha, AVG(salario_medio) as salario_medio_geral,
+               ano, mes
+        FROM folha_consolidada
+        {onde}
+        GROUP BY departamento, empresa, ano, mes
+        ORDER BY ano DESC, mes DESC, total_folha DESC
+        LIMIT 20
+        '''
+        return "FOLHA DE PAGAMENTO", sql, (), colunas
+    
+    # ============================================
+    # 4. SITUAÇÃO FINANCEIRA
+    # ============================================
+    if rota.intencao == roteador.FINANCEIRO:
+        if cubo:
+            return ("SITUAÇÃO FINANCEIRA",
+                    ler_cubo('cubo_financeiro_status_empresa', 'status, empresa, qtd, total', 'total', 20), (),
+                    ['Status', 'Empresa', 'Quantidade', 'Valor Total', 'Ano', 'Mês'])
+        com, onde = periodos_recentes('financeiro_consolidado', 'status, empresa', 20)
+        sql = f'''{com}
+        SELECT status, empresa, SUM(quantidade) as qtd, SUM(valor) as total, ano, mes
+        FROM financeiro_consolidado
+        {onde}
+        GROUP BY status, empresa, ano, mes
+        ORDER BY ano DESC, mes DESC, total DESC
+        LIMIT 20
+        '''
+        return ("SITUAÇÃO FINANCEIRA", sql, (),
+                ['Status', 'Empresa', 'Quantidade', 'Valor Total', 'Ano', 'Mês'])
+    
+    # ============================================
+    # 5. PROJETOS / CLIENTES
+    # ============================================
+    if rota.intencao == roteador.PROJETOS:
+        if cubo:
+            return ("PROJETOS E CLIENTES", ler_cubo('cubo_projeto_cliente', 'projeto, cliente, total', 'total', 20),
+                    (), ['Projeto', 'Cliente', 'Receita', 'Ano', 'Mês'])
+        com, onde = periodos_recentes('pollvo_timesheet', 'projeto, cliente', 20)
+        sql = f'''{com}
+        SELECT projeto, cliente, SUM(receita_projeto) as total, ano, mes
+        FROM pollvo_timesheet
+        {onde}
+        GROUP BY projeto, cliente, ano, mes
+        ORDER BY ano DESC, mes DESC, total DESC
+        LIMIT 20
+        '''
+        return "PROJETOS E CLIENTES", sql, (), ['Projeto', 'Cliente', 'Receita', 'Ano', 'Mês']
+    
+    # ============================================
+    # 6. COMPARAÇÃO / TENDÊNCIAS (CORRIGIDO)
+    # ============================================
+    if rota.intencao == roteador.COMPARACAO:
+        # 🔧 CORREÇÃO: Usar nomes corretos da view
+        sql = '''
+        SELECT ano, mes, 
+               receita_total_rsm, receita_total_pollvo,
+               impostos_total, folha_total, funcionarios_total
+        FROM resumo_executivo
+        ORDER BY ano DESC, mes DESC
+        LIMIT 12
+        '''
+        return ("ANÁLISE COMPARATIVA", sql, (),
+                ['Ano', 'Mês', 'Receita RSM', 'Receita Pollvo', 'Impostos', 'Folha', 'Funcionários'])
+    
+    # ============================================
+    # 7. RESUMO GERAL
+    # ============================================
+    # 🔧 CORREÇÃO: Usar nomes corretos da view
+    sql = '''
+    SELECT ano, mes, 
+           (COALESCE(receita_total_rsm, 0) + COALESCE(receita_total_pollvo, 0)) as receita_total,
+           impostos_total, folha_total, funcionarios_total
+    FROM resumo_executivo
+    ORDER BY ano DESC, mes DESC
+    LIMIT 6
+    '''
+    return "RESUMO GERAL", sql, (), ['Ano', 'Mês', 'Receita Total', 'Impostos', 'Folha', 'Funcionários']
+
+def classificar_pergunta(pergunta, memoria=None):
+    """
+    Nível da pergunta para o roteamento de modelos
+    A intenção de comparação/tendência do roteador é sempre análise de vários períodos
+    """
+    busca = memoria.contextualizar(pergunta) if memoria is not None else pergunta
+    if roteador.rotear(busca).intencao == roteador.COMPARACAO:
+        return roteador_modelos.ANALISE
+    return roteador_modelos.classificar(pergunta)
+
+def config_modelo(pergunta, memoria=None):
+    """config do LangChain que leva o nível da pergunta até o Runnable do modelo"""
+    return {"configurable": {"nivel": classificar_pergunta(pergunta, memoria)}}
+
+@lru_cache(maxsize=None)
+def tem_cubo():
+    """
+    O banco tem o cubo mensal? Conferido uma vez, na primeira consulta: no SQLite
+    pelo log cubos_pendentes, no lake pelas tabelas do cubo (o log não é exportado)
+    """
+    if isinstance(pool_financeiro, MotorDuckDB):
+        sql = "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'cubo_receita_empresa'"
+    else:
+        sql = "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'cubos_pendentes'"
+    with pool_financeiro.conexao() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchall()[0][0] > 0
+
 def consultar_dados_financeiros(pergunta):
     """
     Identifica tipo de consulta e executa SQL apropriado
     Retorna: (tipo_consulta, dados, colunas)
     """
-    conn = sqlite3.connect('dados_financeiros.db')
-    cursor = conn.cursor()
-    
-    pergunta_lower = pergunta.lower()
+    rota = roteador.rotear(pergunta)
+    tipo, sql, parametros, colunas = montar_consulta(rota, cubo=LER_CUBO and tem_cubo())
     
     try:
-        # ============================================
-        # 1. RECEITAS / FATURAMENTO
-        # ============================================
-        if any(palavra in pergunta_lower for palavra in ['receita', 'faturamento', 'vendas', 'lucro']):
-            # Verificar se é por empresa específica
-            empresas = ['rsm brasil', 'rsm tech', 'rsm consultoria', 'rsm auditoria', 
-                       'pollvo digital', 'pollvo labs', 'pollvo']
-            empresa_filtro = None
-            for emp in empresas:
-                if emp in pergunta_lower:
-                    empresa_filtro = emp
-                    break
-            
-            if empresa_filtro:
-                # 🔧 CORREÇÃO: Ajustar SELECT para corresponder às colunas
-                cursor.execute('''
-                SELECT empresa, centro_custo, SUM(receita) as total, ano, mes
-                FROM rsm_contabil_consolidado
-                WHERE LOWER(empresa) LIKE ?
-                GROUP BY empresa, centro_custo, ano, mes
-                ORDER BY ano DESC, mes DESC, total DESC
-                LIMIT 15
-                ''', ('%' + empresa_filtro + '%',))
-                colunas = ['Empresa', 'Centro de Custo', 'Receita Total', 'Ano', 'Mês']
-            else:
-                cursor.execute('''
-                SELECT empresa, SUM(receita) as total, ano, mes
-                FROM rsm_contabil_consolidado
-                GROUP BY empresa, ano, mes
-                ORDER BY ano DESC, mes DESC, total DESC
-                LIMIT 20
-                ''')
-                colunas = ['Empresa', 'Receita Total', 'Ano', 'Mês']
-            
-            tipo = "RECEITAS E FATURAMENTO"
-        
-        # ============================================
-        # 2. IMPOSTOS / TRIBUTOS (CORRIGIDO)
-        # ============================================
-        elif any(palavra in pergunta_lower for palavra in ['imposto', 'tributo', 'fiscal', 'irpj', 'csll', 'pis', 'cofins', 'iss', 'inss']):
-            tipo_imposto = None
-            for tipo_imp in ['irpj', 'csll', 'pis', 'cofins', 'iss', 'inss', 'icms', 'ipi']:
-                if tipo_imp in pergunta_lower:
-                    tipo_imposto = tipo_imp.upper()
-                    break
-            
-            if tipo_imposto:
-                # 🔧 CORREÇÃO: Usar valor_a_recolher ao invés de imposto
-                cursor.execute('''
-                SELECT empresa, tipo_imposto, SUM(valor_a_recolher) as total, 
-                       AVG(aliquota_efetiva) as aliquota_media, ano, mes
-                FROM fiscal_consolidado
-                WHERE UPPER(tipo_imposto) = ?
-                GROUP BY empresa, tipo_imposto, ano, mes
-                ORDER BY ano DESC, mes DESC, total DESC
-                LIMIT 15
-                ''', (tipo_imposto,))
-                colunas = ['Empresa', 'Tipo', 'Total', 'Alíquota Média (%)', 'Ano', 'Mês']
-            else:
-                # 🔧 CORREÇÃO: Usar valor_a_recolher
-                cursor.execute('''
-                SELECT tipo_imposto, SUM(valor_a_recolher) as total, 
-                       AVG(aliquota_efetiva) as aliquota_media, ano, mes
-                FROM fiscal_consolidado
-                GROUP BY tipo_imposto, ano, mes
-                ORDER BY ano DESC, mes DESC, total DESC
-                LIMIT 20
-                ''')
-                colunas = ['Tipo Imposto', 'Total', 'Alíquota Média (%)', 'Ano', 'Mês']
-            
-            tipo = "IMPOSTOS E TRIBUTOS"
-        
-        # ============================================
-        # 3. FOLHA DE PAGAMENTO
-        # ============================================
-        elif any(palavra in pergunta_lower for palavra in ['folha', 'funcionário', 'funcionario', 'salário', 'salario', 'departamento', 'rh', 'ti']):
-            # Verificar se busca departamento específico
-            if 'ti' in pergunta_lower or 'tecnologia' in pergunta_lower:
-                cursor.execute('''
-                SELECT departamento, empresa, SUM(funcionarios) as total_func, 
-                       SUM(folha) as total_folha, AVG(salario_medio) as salario_medio_geral,
-                       ano, mes
-                FROM folha_consolidada
-                WHERE LOWER(departamento) LIKE '%ti%' 
-                   OR LOWER(departamento) LIKE '%tecnologia%'
-                   OR LOWER(departamento) LIKE '%desenvolvimento%'
-                   OR LOWER(departamento) LIKE '%suporte%'
-                GROUP BY departamento, empresa, ano, mes
-                ORDER BY ano DESC, mes DESC, total_folha DESC
-                LIMIT 20
-                ''')
-            else:
-                cursor.execute('''
-                SELECT departamento, empresa, SUM(funcionarios) as total_func, 
-                       SUM(folha) as total_folha, AVG(salario_medio) as salario_medio_geral,
-                       ano, mes
-                FROM folha_consolidada
-                GROUP BY departamento, empresa, ano, mes
-                ORDER BY ano DESC, mes DESC, total_folha DESC
-                LIMIT 20
-                ''')
-            
-            colunas = ['Departamento', 'Empresa', 'Funcionários', 'Folha Total', 'Salário Médio', 'Ano', 'Mês']
-            tipo = "FOLHA DE PAGAMENTO"
-        
-        # ============================================
-        # 4. SITUAÇÃO FINANCEIRA
-        # ============================================
-        elif any(palavra in pergunta_lower for palavra in ['financeiro', 'pago', 'pendente', 'vencido', 'contas', 'pagamento', 'pagar']):
-            cursor.execute('''
-            SELECT status, empresa, SUM(quantidade) as qtd, SUM(valor) as total, ano, mes
-            FROM financeiro_consolidado
-            GROUP BY status, empresa, ano, mes
-            ORDER BY ano DESC, mes DESC, total DESC
-            LIMIT 20
-            ''')
-            colunas = ['Status', 'Empresa', 'Quantidade', 'Valor Total', 'Ano', 'Mês']
-            tipo = "SITUAÇÃO FINANCEIRA"
-        
-        # ============================================
-        # 5. PROJETOS / CLIENTES
-        # ============================================
-        elif any(palavra in pergunta_lower for palavra in ['projeto', 'cliente', 'timesheet', 'pollvo', 'lucrat']):
-            cursor.execute('''
-            SELECT projeto, cliente, SUM(receita_projeto) as total, ano, mes
-            FROM pollvo_timesheet
-            GROUP BY projeto, cliente, ano, mes
-            ORDER BY ano DESC, mes DESC, total DESC
-            LIMIT 20
-            ''')
-            colunas = ['Projeto', 'Cliente', 'Receita', 'Ano', 'Mês']
-            tipo = "PROJETOS E CLIENTES"
-        
-        # ============================================
-        # 6. COMPARAÇÃO / TENDÊNCIAS (CORRIGIDO)
-        # ============================================
-        elif any(palavra in pergunta_lower for palavra in ['comparar', 'comparação', 'comparacao', 'tendência', 'tendencia', 'evolução', 'evolucao', 'crescimento', 'últimos', 'ultimos', 'últimas', 'ultimas']):
-            # 🔧 CORREÇÃO: Usar nomes corretos da view
-            cursor.execute('''
-            SELECT ano, mes, 
-                   receita_total_rsm, receita_total_pollvo,
-                   impostos_total, folha_total, funcionarios_total
-            FROM resumo_executivo
-            ORDER BY ano DESC, mes DESC
-            LIMIT 12
-            ''')
-            colunas = ['Ano', 'Mês', 'Receita RSM', 'Receita Pollvo', 'Impostos', 'Folha', 'Funcionários']
-            tipo = "ANÁLISE COMPARATIVA"
-        
-        # ============================================
-        # 7. RESUMO GERAL
-        # ============================================
-        else:
-            # 🔧 CORREÇÃO: Usar nomes corretos da view
-            cursor.execute('''
-            SELECT ano, mes, 
-                   (COALESCE(receita_total_rsm, 0) + COALESCE(receita_total_pollvo, 0)) as receita_total,
-                   impostos_total, folha_total, funcionarios_total
-            FROM resumo_executivo
-            ORDER BY ano DESC, mes DESC
-            LIMIT 6
-            ''')
-            colunas = ['Ano', 'Mês', 'Receita Total', 'Impostos', 'Folha', 'Funcionários']
-            tipo = "RESUMO GERAL"
-        
-        dados = cursor.fetchall()
-        conn.close()
+        with pool_financeiro.conexao() as cursor:
+            cursor.execute(sql, parametros)
+            dados = cursor.fetchall()
         
         return tipo, dados, colunas
         
     except Exception as e:
-        conn.close()
         print(f"\n⚠️  Erro na consulta SQL: {e}")
         return "ERRO", [], []
 
 # ============================================
 # TEMPLATE DO PROMPT REFINADO
 # ============================================
-def get_chat_prompt(entrada):
-    """Define o template de prompt refinado"""
-    template = ChatPromptTemplate.from_messages([
+@lru_cache(maxsize=None)
+def obter_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages([
         ("system", """Você é um assistente financeiro/contábil especializado.
 
 DIRETRIZES:
@@ -286,9 +511,9 @@ DIRETRIZES:
 5. Use linguagem profissional mas acessível
 
 NUNCA MENCIONE: banco de dados, prompt, sistema, limitações técnicas"""),
-        
-        ("human", entrada),
-        
+    
+        ("human", "{query}"),
+    
         ("assistant", """Analise e responda:
 
 SE HOUVER DADOS:
@@ -302,58 +527,94 @@ SE NÃO HOUVER:
 
 SEMPRE formate valores em R$""")
     ])
-    return template
+
+# Chains (normal e streaming) montadas uma única vez, no primeiro uso; a pergunta entra em {query}
+@lru_cache(maxsize=None)
+def obter_chain(streaming=False):
+    return obter_prompt() | configurar_modelo(bedrock_client, streaming=streaming, cache=cache_respostas,
+                                              roteamento=roteamento_modelos if ROTEAR_MODELOS else None)
+
+def aquecer():
+    """Faz já o que o import adiou (boto3, cliente, chains); o servidor chama antes de atender"""
+    obter_cliente()
+    obter_chain()
+    obter_chain(streaming=True)
 
 # ============================================
-# INVOCAR MODELO COM RAG
+# MONTAR PROMPT COM RAG
 # ============================================
-def inv_modelo(prompt):
-    """Invoca modelo COM RAG"""
+def formatar_tabela(colunas, dados):
+    """Tabela legível (" | ", R$ e %) - formato completo do contexto"""
+    dados_formatados = " | ".join(colunas) + "\n"
+    dados_formatados += "-" * 80 + "\n"
+    
+    for row in dados:
+        linha = []
+        for i, valor in enumerate(row):
+            col_nome = colunas[i].lower() if i < len(colunas) else ''
+            
+            # Formatar valores monetários
+            if any(palavra in col_nome for palavra in ['total', 'receita', 'folha', 'valor', 'salário', 'imposto']):
+                if isinstance(valor, (int, float)) and abs(valor) > 100:
+                    linha.append(f"R$ {valor:,.2f}")
+                else:
+                    linha.append(str(valor) if valor is not None else 'N/A')
+            # Formatar percentuais
+            elif 'alíquota' in col_nome or '%' in col_nome:
+                if isinstance(valor, (int, float)):
+                    linha.append(f"{valor:.2f}%")
+                else:
+                    linha.append(str(valor) if valor is not None else 'N/A')
+            else:
+                linha.append(str(valor) if valor is not None else 'N/A')
+        
+        dados_formatados += " | ".join(linha) + "\n"
+    return dados_formatados
+
+def preparar_prompt(prompt, exibir_status=True, consulta=None, memoria=None):
+    """
+    Consulta o banco e monta o prompt aumentado
+    consulta: resultado já obtido de consultar_dados_financeiros (evita repetir o SQL)
+    memoria: MemoriaConversa da sessão; o histórico entra no prompt e perguntas
+             de seguimento ("E no mês anterior?") herdam o assunto na consulta
+    Retorna: (prompt_augmented, mensagem_erro)
+    """
     prompt_original = prompt
+    historico = ""
+    busca = prompt
+    if memoria is not None:
+        historico = memoria.como_texto()
+        busca = memoria.contextualizar(prompt)
+    bloco_historico = f"{historico}\n\n" if historico else ""
     
-    print(f"  🔍 Analisando consulta...", end="\r")
-    tipo_consulta, dados, colunas = consultar_dados_financeiros(prompt)
+    if exibir_status:
+        print(f"  🔍 Analisando consulta...", end="\r")
+    tipo_consulta, dados, colunas = consulta or consultar_dados_financeiros(busca)
     
     if tipo_consulta == "ERRO":
-        return "Desculpe, ocorreu um erro ao consultar os dados. Por favor, reformule sua pergunta ou use o comando 'ajuda' para ver exemplos."
+        return None, "Desculpe, ocorreu um erro ao consultar os dados. Por favor, reformule sua pergunta ou use o comando 'ajuda' para ver exemplos."
     
-    print(f"  📊 Categoria: {tipo_consulta} ({len(dados)} registros)     ", end="\r")
+    if exibir_status:
+        print(f"  📊 Categoria: {tipo_consulta} ({len(dados)} registros)     ", end="\r")
     
     if dados and len(dados) > 0:
-        # Formatar dados
-        dados_formatados = f"\n📊 DADOS - {tipo_consulta}\n{'=' * 80}\n\n"
-        dados_formatados += " | ".join(colunas) + "\n"
-        dados_formatados += "-" * 80 + "\n"
+        # Formatar dados dentro do orçamento de tokens (tabela, CSV ou CSV + resumo)
+        contexto = empacotador.empacotar(colunas, dados, lambda linhas: formatar_tabela(colunas, linhas))
+        if exibir_status:
+            print(f"  📦 Contexto {descrever(contexto)}     ", end="\r")
         
-        for row in dados:
-            linha = []
-            for i, valor in enumerate(row):
-                col_nome = colunas[i].lower() if i < len(colunas) else ''
-                
-                # Formatar valores monetários
-                if any(palavra in col_nome for palavra in ['total', 'receita', 'folha', 'valor', 'salário', 'imposto']):
-                    if isinstance(valor, (int, float)) and abs(valor) > 100:
-                        linha.append(f"R$ {valor:,.2f}")
-                    else:
-                        linha.append(str(valor) if valor is not None else 'N/A')
-                # Formatar percentuais
-                elif 'alíquota' in col_nome or '%' in col_nome:
-                    if isinstance(valor, (int, float)):
-                        linha.append(f"{valor:.2f}%")
-                    else:
-                        linha.append(str(valor) if valor is not None else 'N/A')
-                else:
-                    linha.append(str(valor) if valor is not None else 'N/A')
-            
-            dados_formatados += " | ".join(linha) + "\n"
+        dados_formatados = f"\n📊 DADOS - {tipo_consulta}\n{'=' * 80}\n\n{contexto.texto}"
+        detalhe_registros = ""
+        if contexto.linhas_omitidas:
+            detalhe_registros = f" ({contexto.linhas_incluidas} detalhados, {contexto.linhas_omitidas} no resumo)"
         
         prompt_augmented = f"""{dados_formatados}
 
-PERGUNTA: {prompt_original}
+{bloco_historico}PERGUNTA: {prompt_original}
 
 CONTEXTO:
 - Data: {datetime.now().strftime('%d/%m/%Y')}
-- Registros: {len(dados)}
+- Registros: {len(dados)}{detalhe_registros}
 - Categoria: {tipo_consulta}
 
 INSTRUÇÕES:
@@ -364,7 +625,7 @@ INSTRUÇÕES:
 5. Seja objetivo"""
         
     else:
-        prompt_augmented = f"""SITUAÇÃO: Nenhum dado encontrado.
+        prompt_augmented = f"""{bloco_historico}SITUAÇÃO: Nenhum dado encontrado.
 
 CONSULTA: "{prompt_original}"
 CATEGORIA: {tipo_consulta}
@@ -379,107 +640,179 @@ INSTRUÇÕES:
    • Projetos Pollvo
 3. Seja prestativo"""
     
-    chain = get_chat_prompt(prompt_augmented).pipe(modelo)
-    response = chain.invoke({"query": prompt_augmented})
+    return prompt_augmented, None
+
+def montar_entrada_modelo(prompt_augmented):
+    """(instruções, texto) que a chain entrega ao modelo (usado pelo modo em lote)"""
+    return separar_entrada(obter_prompt().invoke({"query": prompt_augmented}))
+
+# ============================================
+# INVOCAR MODELO COM RAG
+# ============================================
+def inv_modelo(prompt, memoria=None):
+    """Invoca modelo COM RAG (memoria: histórico da conversa, opcional)"""
+    prompt_augmented, erro = preparar_prompt(prompt, memoria=memoria)
+    if erro:
+        return erro
+    
+    response = obter_chain().invoke({"query": prompt_augmented}, config=config_modelo(prompt, memoria))
     return response
 
+def inv_modelo_stream(prompt, memoria=None):
+    """Invoca modelo COM RAG em modo streaming (gera trechos de texto)"""
+    prompt_augmented, erro = preparar_prompt(prompt, memoria=memoria)
+    if erro:
+        yield erro
+        return
+    
+    for trecho in obter_chain(streaming=True).stream({"query": prompt_augmented}, config=config_modelo(prompt, memoria)):
+        yield trecho
+
+async def ainv_modelo(prompt, memoria=None, exibir_status=True):
+    """Versão assíncrona de inv_modelo (várias conversas no mesmo processo, uma memoria cada)"""
+    prompt_augmented, erro = await asyncio.to_thread(preparar_prompt, prompt, exibir_status, None, memoria)
+    if erro:
+        return erro
+    
+    return await obter_chain().ainvoke({"query": prompt_augmented}, config=config_modelo(prompt, memoria))
+
+async def ainv_modelo_stream(prompt, memoria=None, exibir_status=True):
+    """Versão assíncrona de inv_modelo_stream"""
+    prompt_augmented, erro = await asyncio.to_thread(preparar_prompt, prompt, exibir_status, None, memoria)
+    if erro:
+        yield erro
+        return
+    
+    async for trecho in obter_chain(streaming=True).astream({"query": prompt_augmented},
+                                                            config=config_modelo(prompt, memoria)):
+        yield trecho
+
 # ============================================
 # COMANDOS ESPECIAIS (mantidos iguais)
 # ============================================
 def mostrar_resumo():
     """Mostra resumo executivo"""
-    conn = sqlite3.connect('dados_financeiros.db')
-    cursor = conn.cursor()
-    data_atual = datetime.now()
+    with pool_financeiro.conexao() as cursor:
+        data_atual = datetime.now()
     
-    print("\n" + "=" * 80)
-    print(f"📊 RESUMO EXECUTIVO - {data_atual.strftime('%B/%Y').upper()}")
-    print("=" * 80)
+        print("\n" + "=" * 80)
+        print(f"📊 RESUMO EXECUTIVO - {data_atual.strftime('%B/%Y').upper()}")
+        print("=" * 80)
+    
+        # Receitas
+        cursor.execute('SELECT SUM(receita) FROM rsm_contabil_consolidado WHERE ano = ? AND mes = ?', 
+                      (data_atual.year, data_atual.month))
+        receita_rsm = cursor.fetchone()[0] or 0
+    
+        cursor.execute('SELECT SUM(receita) FROM pollvo_contabil_consolidado WHERE ano = ? AND mes = ?',
+                      (data_atual.year, data_atual.month))
+        receita_pollvo = cursor.fetchone()[0] or 0
+    
+        print(f"\n💰 RECEITAS:")
+        print(f"   • RSM:    R$ {receita_rsm:>15,.2f}")
+        print(f"   • Pollvo: R$ {receita_pollvo:>15,.2f}")
+        print(f"   • TOTAL:  R$ {(receita_rsm + receita_pollvo):>15,.2f}")
+    
+        # Impostos (CORRIGIDO)
+        cursor.execute('''
+        SELECT tipo_imposto, SUM(imposto) as total
+        FROM rsm_fiscal_consolidado
+        WHERE ano = ? AND mes = ?
+        GROUP BY tipo_imposto
+        ORDER BY total DESC
+        LIMIT 5
+        ''', (data_atual.year, data_atual.month))
+    
+        print(f"\n📊 IMPOSTOS (Top 5):")
+        impostos_total = 0
+        for row in cursor.fetchall():
+            print(f"   • {row[0]:10} → R$ {row[1]:>12,.2f}")
+            impostos_total += row[1]
+        print(f"   {'─' * 35}")
+        print(f"   • TOTAL:      R$ {impostos_total:>12,.2f}")
     
-    # Receitas
-    cursor.execute('SELECT SUM(receita) FROM rsm_contabil_consolidado WHERE ano = ? AND mes = ?', 
-                  (data_atual.year, data_atual.month))
-    receita_rsm = cursor.fetchone()[0] or 0
-    
-    cursor.execute('SELECT SUM(receita) FROM pollvo_contabil_consolidado WHERE ano = ? AND mes = ?',
-                  (data_atual.year, data_atual.month))
-    receita_pollvo = cursor.fetchone()[0] or 0
-    
-    print(f"\n💰 RECEITAS:")
-    print(f"   • RSM:    R$ {receita_rsm:>15,.2f}")
-    print(f"   • Pollvo: R$ {receita_pollvo:>15,.2f}")
-    print(f"   • TOTAL:  R$ {(receita_rsm + receita_pollvo):>15,.2f}")
-    
-    # Impostos (CORRIGIDO)
-    cursor.execute('''
-    SELECT tipo_imposto, SUM(imposto) as total
-    FROM rsm_fiscal_consolidado
-    WHERE ano = ? AND mes = ?
-    GROUP BY tipo_imposto
-    ORDER BY total DESC
-    LIMIT 5
-    ''', (data_atual.year, data_atual.month))
-    
-    print(f"\n📊 IMPOSTOS (Top 5):")
-    impostos_total = 0
-    for row in cursor.fetchall():
-        print(f"   • {row[0]:10} → R$ {row[1]:>12,.2f}")
-        impostos_total += row[1]
-    print(f"   {'─' * 35}")
-    print(f"   • TOTAL:      R$ {impostos_total:>12,.2f}")
-    
-    # Folha
-    cursor.execute('''
-    SELECT SUM(folha), SUM(funcionarios) FROM rsm_folha_consolidada
-    WHERE ano = ? AND mes = ?
-    ''', (data_atual.year, data_atual.month))
-    folha_dados = cursor.fetchone()
-    folha = folha_dados[0] or 0
-    func = folha_dados[1] or 0
-    
-    print(f"\n👥 FOLHA DE PAGAMENTO:")
-    print(f"   • Funcionários:    {func:>6}")
-    print(f"   • Folha Total:     R$ {folha:>12,.2f}")
-    if func > 0:
-        print(f"   • Salário Médio:   R$ {(folha/func):>12,.2f}")
-    
-    # Financeiro
-    cursor.execute('''
-    SELECT status, SUM(qtd), SUM(total)
-    FROM rsm_financeiro_consolidado
-    WHERE ano = ? AND mes = ?
-    GROUP BY status
-    ORDER BY SUM(total) DESC
-    ''', (data_atual.year, data_atual.month))
-    
-    print(f"\n💳 SITUAÇÃO FINANCEIRA:")
-    for row in cursor.fetchall():
-        print(f"   • {row[0]:15} → {row[1]:4} itens | R$ {row[2]:>12,.2f}")
+        # Folha
+        cursor.execute('''
+        SELECT SUM(folha), SUM(funcionarios) FROM rsm_folha_consolidada
+        WHERE ano = ? AND mes = ?
+        ''', (data_atual.year, data_atual.month))
+        folha_dados = cursor.fetchone()
+        folha = folha_dados[0] or 0
+        func = folha_dados[1] or 0
+    
+        print(f"\n👥 FOLHA DE PAGAMENTO:")
+        print(f"   • Funcionários:    {func:>6}")
+        print(f"   • Folha Total:     R$ {folha:>12,.2f}")
+        if func > 0:
+            print(f"   • Salário Médio:   R$ {(folha/func):>12,.2f}")
+    
+        # Financeiro
+        cursor.execute('''
+        SELECT status, SUM(qtd), SUM(total)
+        FROM rsm_financeiro_consolidado
+        WHERE ano = ? AND mes = ?
+        GROUP BY status
+        ORDER BY SUM(total) DESC
+        ''', (data_atual.year, data_atual.month))
+    
+        print(f"\n💳 SITUAÇÃO FINANCEIRA:")
+        for row in cursor.fetchall():
+            print(f"   • {row[0]:15} → {row[1]:4} itens | R$ {row[2]:>12,.2f}")
     
     print("=" * 80 + "\n")
-    conn.close()
 
 def listar_empresas():
     """Lista empresas"""
-    conn = sqlite3.connect('dados_financeiros.db')
-    cursor = conn.cursor()
+    with pool_financeiro.conexao() as cursor:
     
-    print("\n" + "=" * 80)
-    print("🏢 EMPRESAS CADASTRADAS")
-    print("=" * 80)
+        print("\n" + "=" * 80)
+        print("🏢 EMPRESAS CADASTRADAS")
+        print("=" * 80)
     
-    print("\n📌 RSM:")
-    cursor.execute('SELECT DISTINCT empresa FROM rsm_contabil_consolidado ORDER BY empresa')
-    for row in cursor.fetchall():
-        print(f"   • {row[0]}")
+        print("\n📌 RSM:")
+        cursor.execute('SELECT DISTINCT empresa FROM rsm_contabil_consolidado ORDER BY empresa')
+        for row in cursor.fetchall():
+            print(f"   • {row[0]}")
     
-    print("\n📌 POLLVO:")
-    cursor.execute('SELECT DISTINCT empresa FROM pollvo_contabil_consolidado ORDER BY empresa')
-    for row in cursor.fetchall():
-        print(f"   • {row[0]}")
+        print("\n📌 POLLVO:")
+        cursor.execute('SELECT DISTINCT empresa FROM pollvo_contabil_consolidado ORDER BY empresa')
+        for row in cursor.fetchall():
+            print(f"   • {row[0]}")
     
     print("=" * 80 + "\n")
-    conn.close()
+
+EXEMPLOS_CONSULTAS = {
+    "Receitas": [
+        "Qual a receita da RSM Brasil?",
+        "Mostre o faturamento total",
+        "Receitas por centro de custo"
+    ],
+    "Impostos": [
+        "Quanto pagamos de IRPJ?",
+        "Top 5 impostos mais caros",
+        "Carga tributária total"
+    ],
+    "Folha": [
+        "Quantos funcionários no TI?",
+        "Custo da folha de pagamento",
+        "Salário médio por departamento"
+    ],
+    "Financeiro": [
+        "Contas pendentes",
+        "Situação das contas a pagar",
+        "Valor de contas vencidas"
+    ],
+    "Projetos": [
+        "Projetos mais lucrativos da Pollvo",
+        "Receita do Projeto Alpha",
+        "Top clientes"
+    ],
+    "Análises": [
+        "Compare receitas dos últimos 3 meses",
+        "Evolução da folha de pagamento",
+        "Tendência de crescimento"
+    ]
+}
 
 def mostrar_ajuda():
     """Mostra exemplos"""
@@ -487,40 +820,7 @@ def mostrar_ajuda():
     print("💡 EXEMPLOS DE CONSULTAS")
     print("=" * 80)
     
-    exemplos = {
-        "Receitas": [
-            "Qual a receita da RSM Brasil?",
-            "Mostre o faturamento total",
-            "Receitas por centro de custo"
-        ],
-        "Impostos": [
-            "Quanto pagamos de IRPJ?",
-            "Top 5 impostos mais caros",
-            "Carga tributária total"
-        ],
-        "Folha": [
-            "Quantos funcionários no TI?",
-            "Custo da folha de pagamento",
-            "Salário médio por departamento"
-        ],
-        "Financeiro": [
-            "Contas pendentes",
-            "Situação das contas a pagar",
-            "Valor de contas vencidas"
-        ],
-        "Projetos": [
-            "Projetos mais lucrativos da Pollvo",
-            "Receita do Projeto Alpha",
-            "Top clientes"
-        ],
-        "Análises": [
-            "Compare receitas dos últimos 3 meses",
-            "Evolução da folha de pagamento",
-            "Tendência de crescimento"
-        ]
-    }
-    
-    for categoria, perguntas in exemplos.items():
+    for categoria, perguntas in EXEMPLOS_CONSULTAS.items():
         print(f"\n📍 {categoria}:")
         for p in perguntas:
             print(f"   • {p}")
@@ -528,61 +828,102 @@ def mostrar_ajuda():
     print("\n" + "=" * 80 + "\n")
 
 # ============================================
-# MENSAGEM INICIAL
+# LOOP PRINCIPAL (REPL)
 # ============================================
-print("=" * 80)
-print("💼 RSM/POLLVO - ASSISTENTE FINANCEIRO REFINADO v2")
-print("=" * 80)
-print("✨ RAG + LangChain + Claude 3.5 Haiku + Correções de Bugs")
-print("=" * 80)
-print(f"\n🤖 Assistente financeiro e contábil pronto!")
-print(f"📅 {datetime.now().strftime('%d/%m/%Y %H:%M')}")
-print("\n📝 Comandos: resumo | empresas | ajuda | sair")
-print("\n💡 Pergunte sobre:")
-print("   • Receitas • Impostos • Folha • Financeiro • Projetos\n")
-print("-" * 80 + "\n")
-
-# ============================================
-# LOOP PRINCIPAL
-# ============================================
-while True:
-    try:
-        entrada = input("💬 Você: ").strip()
-        
-        if entrada.lower() == "sair":
-            print("\n👋 Até logo!\n")
+def main():
+    """Inicia o assistente no terminal (modo local; como serviço: servidor.py + cliente.py)"""
+    print("=" * 80)
+    print("💼 RSM/POLLVO - ASSISTENTE FINANCEIRO REFINADO v2")
+    print("=" * 80)
+    print("✨ RAG + LangChain + Roteamento de modelos (Nova Micro → Claude) + Correções de Bugs")
+    print("=" * 80)
+    print(f"\n🤖 Assistente financeiro e contábil pronto!")
+    print(f"📅 {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+    print("\n📝 Comandos: resumo | empresas | ajuda | stats | limpar | sair")
+    print("\n💡 Pergunte sobre:")
+    print("   • Receitas • Impostos • Folha • Financeiro • Projetos\n")
+    print("-" * 80 + "\n")
+    
+    while True:
+        try:
+            entrada = input("💬 Você: ").strip()
+            
+            if entrada.lower() == "sair":
+                print("\n👋 Até logo!\n")
+                break
+            
+            if entrada.lower() == "resumo":
+                mostrar_resumo()
+                continue
+            
+            if entrada.lower() == "empresas":
+                listar_empresas()
+                continue
+            
+            if entrada.lower() == "ajuda":
+                mostrar_ajuda()
+                continue
+            
+            if entrada.lower() == "stats":
+                pool_financeiro.mostrar_estatisticas()
+                cache_respostas.mostrar_estatisticas()
+                if ROTEAR_MODELOS:
+                    roteamento_modelos.mostrar_estatisticas()
+                else:
+                    uso_modelo.mostrar_estatisticas()
+                empacotador.mostrar_estatisticas()
+                memoria.mostrar_estatisticas()
+                print()
+                continue
+            
+            if entrada.lower() == "limpar":
+                memoria.limpar()
+                print("\n🗑️  Histórico da conversa limpo!\n")
+                continue
+            
+            if not entrada:
+                continue
+            
+            memoria.adicionar("user", entrada)
+            
+            inicio = time.perf_counter()
+            
+            if MODO_STREAMING:
+                # Latência reportada = tempo até o primeiro token (TTFT)
+                trechos = []
+                tempo_primeiro_token = None
+                for trecho in inv_modelo_stream(entrada, memoria):
+                    if tempo_primeiro_token is None:
+                        tempo_primeiro_token = time.perf_counter() - inicio
+                        print(" " * 80, end="\r")
+                        print("\n🤖 Assistente:")
+                    print(trecho, end="", flush=True)
+                    trechos.append(trecho)
+                response = "".join(trechos)
+                tempo_total = time.perf_counter() - inicio
+                
+                print("\n")
+                if tempo_primeiro_token is not None:
+                    print(f"   ⚡ Primeiro token: {tempo_primeiro_token * 1000:.0f} ms | ⏱️  Total: {tempo_total:.1f}s\n")
+            else:
+                response = inv_modelo(entrada, memoria)
+                tempo_total = time.perf_counter() - inicio
+                
+                print(" " * 80, end="\r")
+                print(f"\n🤖 Assistente:\n{response}\n")
+                print(f"   ⏱️  Tempo de resposta: {tempo_total:.1f}s\n")
+            
+            print("-" * 80 + "\n")
+            
+            memoria.adicionar("assistant", response)
+            
+        except (KeyboardInterrupt, EOFError):
+            print("\n\n👋 Até logo!\n")
             break
-        
-        if entrada.lower() == "resumo":
-            mostrar_resumo()
-            continue
-        
-        if entrada.lower() == "empresas":
-            listar_empresas()
-            continue
-        
-        if entrada.lower() == "ajuda":
-            mostrar_ajuda()
-            continue
-        
-        if not entrada:
-            continue
-        
-        historico.append(f"User: {entrada}")
-        
-        response = inv_modelo(entrada)
-        
-        print(" " * 80, end="\r")
-        print(f"\n🤖 Assistente:\n{response}\n")
-        print("-" * 80 + "\n")
-        
-        historico.append(f"Assistant: {response}")
-        
-    except KeyboardInterrupt:
-        print("\n\n👋 Até logo!\n")
-        break
-    except Exception as e:
-        print(f"\n❌ Erro inesperado: {e}")
-        print("💡 Tente reformular a pergunta ou use 'ajuda'\n")
-        if historico and historico[-1].startswith("User:"):
-            historico.pop()
\ No newline at end of file
+        except Exception as e:
+            print(f"\n❌ Erro inesperado: {e}")
+            print("💡 Tente reformular a pergunta ou use 'ajuda'\n")
+            memoria.descartar_pergunta()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Terminal do assistente financeiro como cliente fino do servidor.py
+
+Não abre banco nem cliente Bedrock: cada pergunta vai para POST /ask/stream
+e os trechos (SSE) são impressos conforme chegam. A sessão devolvida pelo
+servidor é reenviada nas perguntas seguintes, então o histórico fica no
+armazém de sessões do servidor.
+
+Uso:
+    python servidor.py --workers 4          (em outro terminal)
+    python cliente.py --url http://127.0.0.1:8000
+"""
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+
+URL_PADRAO = 'http://127.0.0.1:8000'
+
+# ============================================
+# CHAMADA AO SERVIDOR
+# ============================================
+def ler_eventos(resposta):
+    """Gera (evento, dados) de um corpo text/event-stream"""
+    evento, dados = 'message', []
+    for linha in resposta:
+        linha = linha.decode('utf-8').rstrip('\r\n')
+        if not linha:
+            if dados:
+                yield evento, json.loads("\n".join(dados))
+            evento, dados = 'message', []
+        elif linha.startswith('event:'):
+            evento = linha[len('event:'):].strip()
+        elif linha.startswith('data:'):
+            dados.append(linha[len('data:'):].strip())
+
+def perguntar_stream(url, pergunta, sessao=None, timeout=60):
+    """Gera (evento, dados): 'message' com {'texto'}, depois 'fim' ou 'erro'"""
+    corpo = json.dumps({'pergunta': pergunta, 'sessao': sessao}).encode('utf-8')
+    requisicao = urllib.request.Request(f"{url}/ask/stream", data=corpo, method='POST',
+                                        headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(requisicao, timeout=timeout) as resposta:
+        yield from ler_eventos(resposta)
+
+# ============================================
+# LOOP PRINCIPAL (REPL)
+# ============================================
+def main():
+    parser = argparse.ArgumentParser(description="Cliente de terminal do assistente financeiro")
+    parser.add_argument('--url', default=URL_PADRAO)
+    args = parser.parse_args()
+    url = args.url.rstrip('/')
+
+    print("=" * 80)
+    print("💼 RSM/POLLVO - ASSISTENTE FINANCEIRO (cliente)")
+    print("=" * 80)
+    print(f"🌐 Servidor: {url}")
+    print("📝 Comandos: limpar | sair\n")
+    print("-" * 80 + "\n")
+
+    sessao = None
+    while True:
+        try:
+            entrada = input("💬 Você: ").strip()
+        except (KeyboardInterrupt, EOFError):
+            print("\n\n👋 Até logo!\n")
+            break
+
+        if entrada.lower() == "sair":
+            print("\n👋 Até logo!\n")
+            break
+        if entrada.lower() == "limpar":
+            sessao = None
+            print("\n🗑️  Nova conversa iniciada!\n")
+            continue
+        if not entrada:
+            continue
+
+        inicio = time.perf_counter()
+        tempo_primeiro_token = None
+        try:
+            for evento, dados in perguntar_stream(url, entrada, sessao):
+                if evento == 'message':
+                    if tempo_primeiro_token is None:
+                        tempo_primeiro_token = time.perf_counter() - inicio
+                        print("\n🤖 Assistente:")
+                    print(dados['texto'], end="", flush=True)
+                elif evento == 'fim':
+                    sessao = dados['sessao']
+                elif evento == 'erro':
+                    sessao = dados.get('sessao', sessao)
+                    print(f"\n❌ {dados['erro']}")
+        except (urllib.error.URLError, ConnectionError) as e:
+            print(f"\n❌ Servidor indisponível ({e}). Ele está rodando em {url}?\n")
+            continue
+
+        print("\n")
+        if tempo_primeiro_token is not None:
+            print(f"   ⚡ Primeiro token: {tempo_primeiro_token * 1000:.0f} ms | "
+                  f"⏱️  Total: {time.perf_counter() - inicio:.1f}s\n")
+        print("-" * 80 + "\n")
+
+if __name__ == "__main__":
+    main()
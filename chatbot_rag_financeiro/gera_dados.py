@@ -5,23 +5,777 @@ Script para criar banco de dados SQLite mockado
 Simula estrutura de Data Lake (Athena/S3) local
 Baseado em: RSM + Pollvo - Dados Contábeis, Financeiros, Fiscais, Folha, Timesheet
 
+Carga em volume para teste de carga (--escala):
+- Escala N: N× empresas, projetos e clientes e mais meses (até 10 anos);
+  --escala 1000 gera milhares de empresas e milhões de linhas
+- Determinístico: cada (tabela, empresa/projeto) tem o próprio gerador
+  aleatório derivado da --semente, então a mesma semente e o mesmo --ate dão
+  os mesmos dados com 1 ou N processos (só created_at muda)
+- executemany em lotes alimentados por geradores, numa transação, com
+  journal_mode=OFF e synchronous=OFF durante a carga; índices e triggers
+  do resumo são criados depois dos dados
+- --processos N: cada processo gera sua fatia num SQLite próprio e o
+  principal junta as fatias em ordem (mesmos ids da carga serial)
+- --parquet PASTA: exporta o banco pronto para o lake Parquet consultado
+  pelo DuckDB (comum/lago_colunar.py; DADOS_FINANCEIROS=duckdb:///PASTA)
+
+Consultas do assistente sem varredura completa:
+- Tabelas de chaves (empresas, tipos_imposto, departamentos) com a chave
+  normalizada e colunas *_id nas tabelas fato, para os filtros por empresa,
+  imposto e departamento buscarem pelo índice em vez de LOWER(...) LIKE;
+  triggers preenchem os *_id (e as chaves novas) das linhas de um ETL
+- Índices de cobertura no formato de cada consulta (INDICES) + ANALYZE
+- --migrar: leva um banco já gerado ao schema atual sem gerar de novo
+
+Cubo mensal (CUBOS): cada agrupamento do assistente (empresa × centro de
+custo, tipo de imposto × empresa, departamento × empresa, status × empresa,
+projeto × cliente) pré-agregado por mês em tabelas cubo_*. Triggers nas
+tabelas base registram os meses alterados e atualizar_cubos recalcula só
+esses (após um ETL: atualizar_cubos(conn) ou --migrar)
+
+--estrela: esquema estrela opcional. Dimensões (dim_empresa, dim_centro_custo,
+dim_departamento, dim_imposto, dim_status, dim_cliente, dim_projeto e
+dim_periodo) com chaves inteiras e tabelas fato_* só com inteiros e reais;
+os nomes originais e as views consolidadas viram joins, então as consultas
+do assistente e os relatórios não mudam. Banco menor e varreduras mais curtas.
+
+Uso:
+    python gera_dados.py
+    python gera_dados.py --escala 1000 --processos 4 --ate 2025-06
+    python gera_dados.py --escala 100 --parquet lago_financeiro
+    python gera_dados.py --migrar --db dados_financeiros.db
+    python gera_dados.py --escala 200 --estrela
+
 Autor: RSM Projects
 Data: 2025
 """
 
+import argparse
+import multiprocessing
+import shutil
 import sqlite3
 import os
-from datetime import datetime, timedelta
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from itertools import islice
 import random
+from collections import namedtuple
 from decimal import Decimal
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum import lago_colunar
+from roteador import normalizar
+
+# ============================================
+# RESUMO EXECUTIVO MATERIALIZADO
+# ============================================
+# Tabelas que alimentam o resumo_executivo (alterações geram log por ano/mês)
+TABELAS_RESUMO = [
+    'rsm_contabil_consolidado',
+    'pollvo_contabil_consolidado',
+    'rsm_fiscal_consolidado',
+    'rsm_folha_consolidada'
+]
+
+def atualizar_resumo_executivo(conn, completo=False):
+    """
+    Recalcula o resumo_executivo apenas para os meses pendentes no log
+    (preenchido pelos triggers das tabelas base). Chame após cada carga/ETL.
+    
+    completo=True marca todos os meses existentes como pendentes.
+    Retorna a quantidade de meses recalculados.
+    """
+    cursor = conn.cursor()
+    
+    if completo:
+        for tabela in TABELAS_RESUMO:
+            cursor.execute(f'''
+            INSERT OR IGNORE INTO resumo_executivo_pendentes (ano, mes)
+            SELECT DISTINCT ano, mes FROM {tabela}
+            ''')
+    
+    cursor.execute('SELECT COUNT(*) FROM resumo_executivo_pendentes')
+    meses = cursor.fetchone()[0]
+    if meses == 0:
+        return 0
+    
+    cursor.execute('''
+    DELETE FROM resumo_executivo
+    WHERE (ano, mes) IN (SELECT ano, mes FROM resumo_executivo_pendentes)
+    ''')
+    
+    # Mesmas agregações da antiga view, mas só para os meses alterados
+    # (cada subconsulta usa o índice (ano, mes) da tabela base)
+    cursor.execute('''
+    INSERT INTO resumo_executivo
+        (ano, mes, receita_total_rsm, receita_total_pollvo,
+         impostos_total, folha_total, funcionarios_total)
+    SELECT
+        c.ano,
+        c.mes,
+        (SELECT SUM(receita) FROM rsm_contabil_consolidado r 
+         WHERE r.ano = c.ano AND r.mes = c.mes),
+        (SELECT SUM(receita) FROM pollvo_contabil_consolidado p 
+         WHERE p.ano = c.ano AND p.mes = c.mes),
+        (SELECT SUM(imposto) FROM rsm_fiscal_consolidado f 
+         WHERE f.ano = c.ano AND f.mes = c.mes),
+        (SELECT SUM(folha) FROM rsm_folha_consolidada fo 
+         WHERE fo.ano = c.ano AND fo.mes = c.mes),
+        (SELECT SUM(funcionarios) FROM rsm_folha_consolidada fo2 
+         WHERE fo2.ano = c.ano AND fo2.mes = c.mes)
+    FROM resumo_executivo_pendentes c
+    WHERE EXISTS (
+        SELECT 1 FROM rsm_contabil_consolidado r2
+        WHERE r2.ano = c.ano AND r2.mes = c.mes
+    )
+    ''')
+    
+    cursor.execute('DELETE FROM resumo_executivo_pendentes')
+    conn.commit()
+    return meses
+
+def criar_triggers_log(conn, tabela, log, registro):
+    """
+    Triggers que apenas registram o mês tocado (custo mínimo por INSERT)
+    registro: INSERT no log com {linha} no lugar de NEW ou OLD
+    """
+    for sufixo, evento, linhas in (('ins', 'INSERT', ['NEW']), ('del', 'DELETE', ['OLD']),
+                                   ('upd', 'UPDATE', ['OLD', 'NEW'])):
+        registros = "".join("\n            " + registro.format(linha=linha) for linha in linhas)
+        conn.execute(f'''
+        CREATE TRIGGER trg_{tabela}_{log}_{sufixo} AFTER {evento} ON {tabela}
+        BEGIN{registros}
+        END
+        ''')
+
+def criar_triggers_resumo(conn, tabela, ano='{linha}.ano', mes='{linha}.mes'):
+    """ano/mes: expressões sobre a linha alterada ({linha} vira NEW ou OLD)"""
+    criar_triggers_log(conn, tabela, 'resumo', "INSERT OR IGNORE INTO resumo_executivo_pendentes (ano, mes) "
+                                               f"VALUES ({ano}, {mes});")
+
+# ============================================
+# CUBO MENSAL (agregações do assistente)
+# ============================================
+# Cada agrupamento de montar_consulta (chat_langchain_rag_financeiro_v1.py) tem
+# uma tabela com as agregações prontas: uma linha por grupo e mês, com as
+# mesmas colunas que a consulta devolve. O assistente lê o cubo e só ordena.
+# Atualização incremental como a do resumo_executivo: triggers nas tabelas
+# base registram (origem, ano, mes) em cubos_pendentes e atualizar_cubos
+# recalcula só esses meses
+# nome: tabela do cubo | origem: tabela base (triggers) | fonte: tabela ou view agregada
+# grupo: GROUP BY além de ano/mes (chave primária) | ids: *_id dos filtros (um por nome do grupo)
+# medidas: [(coluna, agregação, tipo)]
+Cubo = namedtuple('Cubo', ['nome', 'origem', 'fonte', 'grupo', 'ids', 'medidas'])
+
+CUBOS = [
+    Cubo('cubo_receita_empresa', 'rsm_contabil_consolidado', 'rsm_contabil_consolidado',
+         ['empresa'], [], [('total', 'SUM(receita)', 'REAL')]),
+    Cubo('cubo_receita_empresa_centro', 'rsm_contabil_consolidado', 'rsm_contabil_consolidado',
+         ['empresa', 'centro_custo'], ['empresa_id'], [('total', 'SUM(receita)', 'REAL')]),
+    Cubo('cubo_imposto_tipo', 'rsm_fiscal_consolidado', 'fiscal_consolidado',
+         ['tipo_imposto'], [], [('total', 'SUM(valor_a_recolher)', 'REAL'),
+                                ('aliquota_media', 'AVG(aliquota_efetiva)', 'REAL')]),
+    Cubo('cubo_imposto_empresa_tipo', 'rsm_fiscal_consolidado', 'fiscal_consolidado',
+         ['empresa', 'tipo_imposto'], ['tipo_imposto_id'], [('total', 'SUM(valor_a_recolher)', 'REAL'),
+                                                            ('aliquota_media', 'AVG(aliquota_efetiva)', 'REAL')]),
+    Cubo('cubo_folha_departamento_empresa', 'rsm_folha_consolidada', 'folha_consolidada',
+         ['departamento', 'empresa'], ['departamento_id'], [('total_func', 'SUM(funcionarios)', 'INTEGER'),
+                                                            ('total_folha', 'SUM(folha)', 'REAL'),
+                                                            ('salario_medio_geral', 'AVG(salario_medio)', 'REAL')]),
+    Cubo('cubo_financeiro_status_empresa', 'rsm_financeiro_consolidado', 'financeiro_consolidado',
+         ['status', 'empresa'], [], [('qtd', 'SUM(quantidade)', 'INTEGER'), ('total', 'SUM(valor)', 'REAL')]),
+    Cubo('cubo_projeto_cliente', 'pollvo_timesheet', 'pollvo_timesheet',
+         ['projeto', 'cliente'], [], [('total', 'SUM(receita_projeto)', 'REAL')]),
+]
+
+# Filtros por empresa, imposto e departamento: sem eles, o cubo seria lido
+# inteiro quando o filtro casa poucas linhas (ou nenhuma). Os de cobertura
+# completam a chave (ano, mes, grupo) com as medidas que a consulta lê
+INDICES_CUBOS = [
+    ('idx_cubo_receita_empresa_centro_empresa', 'cubo_receita_empresa_centro', 'empresa_id, ano DESC, mes DESC, total'),
+    ('idx_cubo_imposto_empresa_tipo_tipo', 'cubo_imposto_empresa_tipo',
+     'tipo_imposto_id, ano DESC, mes DESC, total, aliquota_media'),
+    ('idx_cubo_folha_departamento_empresa_departamento', 'cubo_folha_departamento_empresa',
+     'departamento_id, ano DESC, mes DESC, total_folha, total_func, salario_medio_geral'),
+]
+
+def criar_triggers_cubo(conn, tabela, origem=None, ano='{linha}.ano', mes='{linha}.mes'):
+    """origem: nome registrado no log (no esquema estrela, a tabela original da fato_*)"""
+    criar_triggers_log(conn, tabela, 'cubo', "INSERT OR IGNORE INTO cubos_pendentes (origem, ano, mes) "
+                                             f"VALUES ('{origem or tabela}', {ano}, {mes});")
+
+def criar_cubos(conn):
+    """
+    Cria as tabelas dos CUBOS, o log cubos_pendentes e os triggers nas tabelas
+    base (fato_* no esquema estrela) e preenche tudo. Precisa das VIEWS
+    Retorna os cubos criados ([] se o banco já tinha o cubo)
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'cubos_pendentes'").fetchone():
+        return []
+    conn.execute('''
+    CREATE TABLE cubos_pendentes (
+        origem TEXT NOT NULL,
+        ano INTEGER NOT NULL,
+        mes INTEGER NOT NULL,
+        PRIMARY KEY (origem, ano, mes)
+    ) WITHOUT ROWID
+    ''')
+    estrela = eh_estrela(conn)
+    for origem in dict.fromkeys(cubo.origem for cubo in CUBOS):
+        if estrela:
+            criar_triggers_cubo(conn, FATOS_ESTRELA[origem].nome, origem,
+                                ano='{linha}.periodo_id / 100', mes='{linha}.periodo_id % 100')
+        else:
+            criar_triggers_cubo(conn, origem)
+    
+    # Leitura por ano DESC, mes DESC: a chave primária percorrida de trás para frente
+    for cubo in CUBOS:
+        definicoes = ['ano INTEGER NOT NULL', 'mes INTEGER NOT NULL']
+        definicoes += [f"{coluna} TEXT NOT NULL" for coluna in cubo.grupo]
+        definicoes += [f"{coluna} INTEGER" for coluna in cubo.ids]
+        definicoes += [f"{coluna} {tipo}" for coluna, _, tipo in cubo.medidas]
+        definicoes.append(f"PRIMARY KEY (ano, mes, {', '.join(cubo.grupo)})")
+        conn.execute(f"CREATE TABLE {cubo.nome} ({', '.join(definicoes)}) WITHOUT ROWID")
+    atualizar_cubos(conn, completo=True)
+    criar_indices_cubos(conn)
+    return [cubo.nome for cubo in CUBOS]
+
+def criar_indices_cubos(conn):
+    """Índices de INDICES_CUBOS que faltam + ANALYZE; retorna os criados"""
+    existentes = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    criados = []
+    for nome, tabela, colunas in INDICES_CUBOS:
+        if nome not in existentes:
+            conn.execute(f"CREATE INDEX {nome} ON {tabela}({colunas})")
+            criados.append(nome)
+    conn.execute('ANALYZE')
+    conn.commit()
+    return criados
+
+def atualizar_cubos(conn, completo=False):
+    """
+    Recalcula nos CUBOS apenas os meses pendentes no log (preenchido pelos
+    triggers das tabelas base). Chame após cada carga/ETL, como o resumo
+    
+    completo=True recalcula os cubos inteiros.
+    Retorna {cubo: meses recalculados}
+    """
+    cursor = conn.cursor()
+    meses = {}
+    for cubo in CUBOS:
+        grupo = ', '.join(cubo.grupo + cubo.ids)
+        medidas = ', '.join(agregacao for _, agregacao, _ in cubo.medidas)
+        colunas = ', '.join(['ano', 'mes'] + cubo.grupo + cubo.ids + [coluna for coluna, _, _ in cubo.medidas])
+        if completo:
+            cursor.execute(f"DELETE FROM {cubo.nome}")
+            onde = ''
+        else:
+            pendentes = f"(SELECT ano, mes FROM cubos_pendentes WHERE origem = '{cubo.origem}')"
+            cursor.execute(f"DELETE FROM {cubo.nome} WHERE (ano, mes) IN {pendentes}")
+            onde = f"WHERE (ano, mes) IN {pendentes}"
+        cursor.execute(f'''
+        INSERT INTO {cubo.nome} ({colunas})
+        SELECT ano, mes, {grupo}, {medidas}
+        FROM {cubo.fonte}
+        {onde}
+        GROUP BY ano, mes, {grupo}
+        ''')
+        meses[cubo.nome] = cursor.execute(
+            f"SELECT COUNT(DISTINCT ano * 100 + mes) FROM {cubo.nome}" if completo else
+            f"SELECT COUNT(*) FROM cubos_pendentes WHERE origem = '{cubo.origem}'").fetchone()[0]
+    
+    cursor.execute('DELETE FROM cubos_pendentes')
+    conn.commit()
+    return meses
+
+# ============================================
+# CARGA EM VOLUME
+# ============================================
+SEMENTE_PADRAO = 42
+MESES_BASE = 18          # escala 1: o banco de sempre
+MESES_MAX = 120          # escalas maiores ganham anos, até 10
+LOTE_INSERCAO = 10_000   # linhas por executemany
+MAX_PROCESSOS = 10       # cada fatia é um ATTACH na junção (limite do SQLite)
+
+# Colunas preenchidas pela carga (id e created_at ficam com o padrão da tabela)
+COLUNAS_CARGA = {
+    'rsm_contabil_consolidado': ('empresa', 'centro_custo', 'receita', 'ano', 'mes', 'data', 'empresa_id'),
+    'pollvo_contabil_consolidado': ('empresa', 'centro_custo', 'receita', 'ano', 'mes', 'data', 'empresa_id'),
+    'rsm_financeiro_consolidado': ('empresa', 'status', 'qtd', 'total', 'ano', 'mes', 'data_vencimento',
+                                   'empresa_id'),
+    'rsm_fiscal_consolidado': ('empresa', 'tipo_imposto', 'imposto', 'base_calculo', 'ano', 'mes', 'competencia',
+                               'empresa_id', 'tipo_imposto_id'),
+    'rsm_folha_consolidada': ('empresa', 'departamento', 'funcionarios', 'folha', 'ano', 'mes', 'competencia',
+                              'empresa_id', 'departamento_id'),
+    'pollvo_timesheet': ('projeto', 'cliente', 'receita_projeto', 'ano', 'mes', 'competencia'),
+}
+
+# (nome, tabela, colunas): criados depois da carga, em uma passada por índice
+# Cada consulta do assistente (montar_consulta) tem um índice de cobertura com
+# (ano DESC, mes DESC) na ordem do ORDER BY (o corte por período lê só o
+# começo dele), o *_id filtrado e as demais colunas lidas, sem voltar à tabela.
+# O filtro por empresa vem antes do período: uma empresa são poucas linhas
+INDICES = [
+    ('idx_rsm_contabil_empresa_periodo', 'rsm_contabil_consolidado',
+     'empresa_id, ano DESC, mes DESC, centro_custo, empresa, receita'),
+    ('idx_rsm_contabil_periodo', 'rsm_contabil_consolidado', 'ano DESC, mes DESC, empresa, receita'),
+    ('idx_pollvo_contabil_empresa', 'pollvo_contabil_consolidado', 'empresa'),
+    ('idx_pollvo_contabil_data', 'pollvo_contabil_consolidado', 'ano, mes'),
+    ('idx_rsm_financeiro_periodo', 'rsm_financeiro_consolidado', 'ano DESC, mes DESC, status, empresa, qtd, total'),
+    ('idx_rsm_fiscal_periodo', 'rsm_fiscal_consolidado',
+     'ano DESC, mes DESC, tipo_imposto_id, empresa, tipo_imposto, imposto, base_calculo'),
+    ('idx_rsm_folha_periodo', 'rsm_folha_consolidada',
+     'ano DESC, mes DESC, departamento_id, departamento, empresa, funcionarios, folha'),
+    ('idx_pollvo_timesheet_cliente', 'pollvo_timesheet', 'cliente'),
+    ('idx_pollvo_timesheet_periodo', 'pollvo_timesheet', 'ano DESC, mes DESC, projeto, cliente, receita_projeto'),
+]
+
+# Substituídos pelos de cobertura acima (bancos gerados por versões anteriores)
+INDICES_OBSOLETOS = [
+    'idx_rsm_contabil_empresa', 'idx_rsm_contabil_data',
+    'idx_rsm_financeiro_status', 'idx_rsm_financeiro_data',
+    'idx_rsm_fiscal_tipo', 'idx_rsm_fiscal_data',
+    'idx_rsm_folha_depto', 'idx_rsm_folha_data',
+    'idx_pollvo_timesheet_data',
+]
+
+# ============================================
+# CHAVES NORMALIZADAS
+# ============================================
+# LOWER(empresa) LIKE '%...%' não usa índice: os filtros do assistente buscam
+# o id numa tabela de chaves pequena (nome + chave sem acentos, em minúsculas)
+# e a tabela fato é lida pelo índice da coluna *_id
+# tabela de chaves → (coluna de texto, coluna *_id, tabelas fato que a carregam)
+CHAVES = {
+    'empresas': ('empresa', 'empresa_id', ['rsm_contabil_consolidado', 'pollvo_contabil_consolidado',
+                                           'rsm_financeiro_consolidado', 'rsm_fiscal_consolidado',
+                                           'rsm_folha_consolidada']),
+    'tipos_imposto': ('tipo_imposto', 'tipo_imposto_id', ['rsm_fiscal_consolidado']),
+    'departamentos': ('departamento', 'departamento_id', ['rsm_folha_consolidada']),
+}
+
+def criar_tabela_chaves(conn, tabela):
+    conn.execute(f'''
+    CREATE TABLE IF NOT EXISTS {tabela} (
+        id INTEGER PRIMARY KEY,
+        nome TEXT NOT NULL UNIQUE,
+        chave TEXT NOT NULL
+    )
+    ''')
+
+def criar_tabelas_chaves(conn):
+    for tabela in CHAVES:
+        criar_tabela_chaves(conn, tabela)
+
+def inserir_chaves(conn, tabela, nomes):
+    """Nomes que ainda não estão na tabela de chaves; ids seguem a ordem de 'nomes'"""
+    conn.executemany(f"INSERT OR IGNORE INTO {tabela} (nome, chave) VALUES (?, ?)",
+                     [(nome, normalizar(nome)) for nome in nomes])
+
+# normalizar() em SQL para os triggers (o LOWER do SQLite só conhece ASCII):
+# cobre os acentos do português, que é o que aparece nos nomes
+ACENTOS = {'a': 'áàâãä', 'e': 'éèêë', 'i': 'íìîï', 'o': 'óòôõö', 'u': 'úùûü', 'c': 'ç', 'n': 'ñ'}
+
+def sql_normalizar_chave(tabela_chave, nome):
+    """
+    Comandos que levam a chave de 'nome' (gravada como LOWER(nome)) a normalizar(nome)
+    Um UPDATE por letra: o parser do SQLite não aceita 30 REPLACE aninhados
+    """
+    comandos = []
+    for letra, acentuadas in ACENTOS.items():
+        expressao = 'chave'
+        for acentuada in acentuadas + acentuadas.upper():
+            expressao = f"REPLACE({expressao}, '{acentuada}', '{letra}')"
+        comandos.append(f"UPDATE {tabela_chave} SET chave = {expressao} WHERE nome = {nome};")
+    return comandos
+
+def criar_triggers_chaves(conn):
+    """
+    Linhas gravadas por um ETL com as colunas originais (sem *_id) ganham o id
+    e o nome novo entra na tabela de chaves; sem isso os filtros do assistente,
+    que buscam pelo *_id, não as encontrariam. Também ao trocar o nome
+    Criados depois da carga: a carga já grava os ids
+    """
+    for tabela_chave, (coluna, coluna_id, tabelas) in CHAVES.items():
+        for tabela in tabelas:
+            normalizacao = "".join("\n                " + comando
+                                   for comando in sql_normalizar_chave(tabela_chave, 'NEW.' + coluna))
+            corpo = f'''
+            BEGIN
+                INSERT OR IGNORE INTO {tabela_chave} (nome, chave) VALUES (NEW.{coluna}, LOWER(NEW.{coluna}));{normalizacao}
+                UPDATE {tabela} SET {coluna_id} = (SELECT id FROM {tabela_chave} WHERE nome = NEW.{coluna})
+                WHERE id = NEW.id;
+            END'''
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{tabela}_{coluna_id}_ins AFTER INSERT ON {tabela} "
+                         f"WHEN NEW.{coluna_id} IS NULL {corpo}")
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{tabela}_{coluna_id}_upd "
+                         f"AFTER UPDATE OF {coluna} ON {tabela} {corpo}")
+
+# ============================================
+# VIEWS ANALÍTICAS
+# ============================================
+# As colunas *_id vão no fim: quem lê as views por posição não muda
+VIEWS = [
+    ('contabil_consolidado', '''
+        SELECT
+            empresa,
+            centro_custo,
+            receita AS credito,
+            0.0 AS debito,
+            ano,
+            mes,
+            data,
+            empresa_id
+        FROM rsm_contabil_consolidado
+        UNION ALL
+        SELECT
+            empresa,
+            centro_custo,
+            receita AS credito,
+            0.0 AS debito,
+            ano,
+            mes,
+            data,
+            empresa_id
+        FROM pollvo_contabil_consolidado
+    '''),
+    ('financeiro_consolidado', '''
+        SELECT
+            empresa,
+            status,
+            qtd AS quantidade,
+            total AS valor,
+            ano,
+            mes,
+            data_vencimento,
+            empresa_id
+        FROM rsm_financeiro_consolidado
+    '''),
+    ('fiscal_consolidado', '''
+        SELECT
+            empresa,
+            tipo_imposto,
+            imposto AS valor_a_recolher,
+            base_calculo,
+            ROUND((imposto / NULLIF(base_calculo, 0)) * 100, 2) AS aliquota_efetiva,
+            ano,
+            mes,
+            competencia,
+            empresa_id,
+            tipo_imposto_id
+        FROM rsm_fiscal_consolidado
+    '''),
+    ('folha_consolidada', '''
+        SELECT
+            empresa,
+            departamento,
+            funcionarios,
+            folha,
+            ROUND(folha / NULLIF(funcionarios, 0), 2) AS salario_medio,
+            ano,
+            mes,
+            competencia,
+            empresa_id,
+            departamento_id
+        FROM rsm_folha_consolidada
+    '''),
+]
+
+def criar_indices(conn):
+    """Índices de INDICES que faltam + ANALYZE (estatísticas para o planejador); retorna os criados"""
+    existentes = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    criados = []
+    for nome, tabela, colunas in INDICES:
+        if nome not in existentes:
+            conn.execute(f"CREATE INDEX {nome} ON {tabela}({colunas})")
+            criados.append(nome)
+    conn.execute('ANALYZE')
+    conn.commit()
+    return criados
+
+def migrar_schema(conn):
+    """
+    Leva um banco gerado por versões anteriores ao schema atual (idempotente)
+    - Tabelas de chaves com os nomes presentes nas tabelas fato
+    - Colunas *_id adicionadas e preenchidas; views recriadas com elas
+    - Triggers que preenchem os *_id das linhas gravadas sem eles (ETL)
+    - INDICES_OBSOLETOS trocados pelos índices de cobertura, e ANALYZE
+    - CUBOS criados, ou atualizados nos meses pendentes (também no esquema estrela),
+      com os INDICES_CUBOS que faltarem
+    Retorna {'colunas': [...], 'indices_criados': [...], 'indices_removidos': [...], 'cubos': [...]}
+    """
+    mudancas = {'colunas': [], 'indices_criados': [], 'indices_removidos': [], 'cubos': []}
+    if not eh_estrela(conn):
+        _migrar_chaves_e_indices(conn, mudancas)
+    mudancas['cubos'] = criar_cubos(conn)
+    if not mudancas['cubos']:
+        mudancas['indices_criados'] += criar_indices_cubos(conn)
+    atualizar_cubos(conn)
+    return mudancas
+
+def _migrar_chaves_e_indices(conn, mudancas):
+    criar_tabelas_chaves(conn)
+    for tabela_chave, (coluna, coluna_id, tabelas) in CHAVES.items():
+        nomes = set()
+        for tabela in tabelas:
+            nomes.update(nome for (nome,) in conn.execute(f"SELECT DISTINCT {coluna} FROM {tabela}"))
+        inserir_chaves(conn, tabela_chave, sorted(nomes))
+        for tabela in tabelas:
+            colunas = [info[1] for info in conn.execute(f"PRAGMA table_info({tabela})")]
+            if coluna_id not in colunas:
+                conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna_id} INTEGER REFERENCES {tabela_chave}(id)")
+                mudancas['colunas'].append(f"{tabela}.{coluna_id}")
+            conn.execute(f'''
+            UPDATE {tabela}
+            SET {coluna_id} = (SELECT id FROM {tabela_chave} WHERE nome = {tabela}.{coluna})
+            WHERE {coluna_id} IS NULL
+            ''')
+    
+    for nome, sql in VIEWS:
+        conn.execute(f"DROP VIEW IF EXISTS {nome}")
+        conn.execute(f"CREATE VIEW {nome} AS {sql}")
+    criar_triggers_chaves(conn)
+    
+    existentes = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    for nome in INDICES_OBSOLETOS:
+        if nome in existentes:
+            conn.execute(f"DROP INDEX {nome}")
+            mudancas['indices_removidos'].append(nome)
+    conn.commit()
+    mudancas['indices_criados'] = criar_indices(conn)
+    
+    # O UPDATE passou pelos triggers: os valores não mudaram, mas o log precisa esvaziar
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'resumo_executivo_pendentes'").fetchone():
+        atualizar_resumo_executivo(conn)
+
+# ============================================
+# ESQUEMA ESTRELA (--estrela)
+# ============================================
+# As tabelas fato passam a guardar só inteiros e reais: cada texto vira o id
+# de uma dimensão e ano/mes/data viram periodo_id (AAAAMM, na ordem de ano, mes).
+# Os nomes originais viram views com os joins: as consultas não mudam
+# coluna de texto → dimensão (empresa, tipo_imposto e departamento mantêm os ids de CHAVES)
+DIMENSOES = {
+    'empresa': 'dim_empresa',
+    'centro_custo': 'dim_centro_custo',
+    'departamento': 'dim_departamento',
+    'tipo_imposto': 'dim_imposto',
+    'status': 'dim_status',
+    'cliente': 'dim_cliente',
+    'projeto': 'dim_projeto',
+}
+
+# nome: tabela fato | dimensoes: colunas de texto | medidas: números | data: coluna que vira o período
+Fato = namedtuple('Fato', ['nome', 'dimensoes', 'medidas', 'data'])
+
+FATOS_ESTRELA = {
+    'rsm_contabil_consolidado': Fato('fato_rsm_contabil', ['empresa', 'centro_custo'], ['receita'], 'data'),
+    'pollvo_contabil_consolidado': Fato('fato_pollvo_contabil', ['empresa', 'centro_custo'], ['receita'], 'data'),
+    'rsm_financeiro_consolidado': Fato('fato_rsm_financeiro', ['empresa', 'status'], ['qtd', 'total'],
+                                       'data_vencimento'),
+    'rsm_fiscal_consolidado': Fato('fato_rsm_fiscal', ['empresa', 'tipo_imposto'], ['imposto', 'base_calculo'],
+                                   'competencia'),
+    'rsm_folha_consolidada': Fato('fato_rsm_folha', ['empresa', 'departamento'], ['funcionarios', 'folha'],
+                                  'competencia'),
+    'pollvo_timesheet': Fato('fato_pollvo_timesheet', ['projeto', 'cliente'], ['receita_projeto'], 'competencia'),
+}
+
+# Mesmo formato de INDICES, com periodo_id no lugar de (ano, mes)
+INDICES_ESTRELA = [
+    ('idx_fato_rsm_contabil_empresa_periodo', 'fato_rsm_contabil',
+     'empresa_id, periodo_id DESC, centro_custo_id, receita'),
+    ('idx_fato_rsm_contabil_periodo', 'fato_rsm_contabil', 'periodo_id DESC, empresa_id, centro_custo_id, receita'),
+    ('idx_fato_pollvo_contabil_periodo', 'fato_pollvo_contabil',
+     'periodo_id DESC, empresa_id, centro_custo_id, receita'),
+    ('idx_fato_rsm_financeiro_periodo', 'fato_rsm_financeiro', 'periodo_id DESC, status_id, empresa_id, qtd, total'),
+    ('idx_fato_rsm_fiscal_periodo', 'fato_rsm_fiscal',
+     'periodo_id DESC, tipo_imposto_id, empresa_id, imposto, base_calculo'),
+    ('idx_fato_rsm_folha_periodo', 'fato_rsm_folha',
+     'periodo_id DESC, departamento_id, empresa_id, funcionarios, folha'),
+    ('idx_fato_pollvo_timesheet_periodo', 'fato_pollvo_timesheet',
+     'periodo_id DESC, projeto_id, cliente_id, receita_projeto'),
+]
+
+def eh_estrela(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'dim_periodo'").fetchone() is not None
+
+def _sql_view_estrela(fato, colunas):
+    """
+    SELECT com os joins que devolve as colunas da tabela original (menos created_at)
+    LEFT JOIN nas dimensões: o SQLite as mantém como busca pela chave no laço
+    interno (a ordem fica entre fato e período) e omite as que a consulta não lê.
+    Os *_id são NOT NULL e as dimensões completas: o resultado é o do JOIN
+    """
+    # Sem apelido nas tabelas: o EXPLAIN QUERY PLAN mostra fato_* e dim_periodo pelo nome
+    expressoes = []
+    for coluna in colunas:
+        if coluna in fato.dimensoes:
+            expressoes.append(f"{coluna}.nome AS {coluna}")
+        elif coluna in ('ano', 'mes'):
+            expressoes.append(f"dim_periodo.{coluna}")
+        elif coluna == fato.data:
+            expressoes.append(f"dim_periodo.data AS {coluna}")
+        elif coluna != 'created_at':
+            expressoes.append(f"{fato.nome}.{coluna}")
+    joins = "".join(f"\n        LEFT JOIN {DIMENSOES[c]} {c} ON {c}.id = {fato.nome}.{c}_id" for c in fato.dimensoes)
+    return f'''
+        SELECT {', '.join(expressoes)}
+        FROM {fato.nome}
+        JOIN dim_periodo ON dim_periodo.id = {fato.nome}.periodo_id{joins}
+    '''
+
+def converter_estrela(conn):
+    """
+    Troca as tabelas fato pelo esquema estrela no mesmo arquivo (dimensões, fato_*,
+    views com os nomes originais, triggers do resumo e INDICES_ESTRELA) e faz VACUUM
+    O banco precisa estar no schema atual (migrar_schema). As datas têm de ser o
+    1º dia do mês: o esquema estrela guarda só o período
+    Retorna False se o banco já estava em estrela
+    """
+    if eh_estrela(conn):
+        return False
+    for tabela, fato in FATOS_ESTRELA.items():
+        fora = conn.execute(f"SELECT COUNT(*) FROM {tabela} "
+                            f"WHERE {fato.data} <> printf('%04d-%02d-01', ano, mes)").fetchone()[0]
+        if fora:
+            raise ValueError(f"{tabela}: {fora} linhas com {fato.data} fora do 1º dia do mês "
+                             f"(o esquema estrela guarda só ano/mês)")
+    
+    # Dimensões: as de CHAVES mantêm os ids (já gravados nas colunas *_id)
+    conn.execute('''
+    CREATE TABLE dim_periodo (
+        id INTEGER PRIMARY KEY,
+        ano INTEGER NOT NULL,
+        mes INTEGER NOT NULL,
+        data DATE NOT NULL,
+        UNIQUE (ano, mes)
+    )
+    ''')
+    periodos = " UNION ".join(f"SELECT ano, mes FROM {tabela}" for tabela in FATOS_ESTRELA)
+    conn.execute(f"INSERT INTO dim_periodo SELECT ano * 100 + mes, ano, mes, printf('%04d-%02d-01', ano, mes) "
+                 f"FROM ({periodos})")
+    chaves = {coluna: tabela for tabela, (coluna, _, _) in CHAVES.items()}
+    for coluna, dimensao in DIMENSOES.items():
+        criar_tabela_chaves(conn, dimensao)
+        if coluna in chaves:
+            conn.execute(f"INSERT INTO {dimensao} SELECT id, nome, chave FROM {chaves[coluna]}")
+        nomes = set()
+        for tabela, fato in FATOS_ESTRELA.items():
+            if coluna in fato.dimensoes:
+                nomes.update(nome for (nome,) in conn.execute(f"SELECT DISTINCT {coluna} FROM {tabela}"))
+        inserir_chaves(conn, dimensao, sorted(nomes))
+    
+    # Tabelas fato: mesmos ids, só inteiros e reais
+    colunas_originais = {}
+    for tabela, fato in FATOS_ESTRELA.items():
+        info = conn.execute(f"PRAGMA table_info({tabela})").fetchall()
+        colunas_originais[tabela] = [coluna[1] for coluna in info]
+        tipos = {coluna[1]: coluna[2] for coluna in info}
+        definicoes = ['id INTEGER PRIMARY KEY', 'periodo_id INTEGER NOT NULL REFERENCES dim_periodo(id)']
+        definicoes += [f"{c}_id INTEGER NOT NULL REFERENCES {DIMENSOES[c]}(id)" for c in fato.dimensoes]
+        definicoes += [f"{m} {tipos[m]} NOT NULL" for m in fato.medidas]
+        conn.execute(f"CREATE TABLE {fato.nome} ({', '.join(definicoes)})")
+        joins = " ".join(f"JOIN {DIMENSOES[c]} {c} ON {c}.nome = t.{c}" for c in fato.dimensoes)
+        conn.execute(f'''
+        INSERT INTO {fato.nome}
+        SELECT t.id, t.ano * 100 + t.mes, {', '.join(c + '.id' for c in fato.dimensoes)},
+               {', '.join('t.' + m for m in fato.medidas)}
+        FROM {tabela} t {joins}
+        ORDER BY t.id
+        ''')
+    
+    # Nomes originais viram views (as consolidadas são recriadas por cima delas)
+    for nome, _ in VIEWS:
+        conn.execute(f"DROP VIEW IF EXISTS {nome}")
+    for tabela, fato in FATOS_ESTRELA.items():
+        conn.execute(f"DROP TABLE {tabela}")
+        conn.execute(f"CREATE VIEW {tabela} AS {_sql_view_estrela(fato, colunas_originais[tabela])}")
+    for tabela in CHAVES:
+        conn.execute(f"DROP TABLE {tabela}")
+        conn.execute(f"CREATE VIEW {tabela} AS SELECT id, nome, chave FROM {DIMENSOES[CHAVES[tabela][0]]}")
+    for nome, sql in VIEWS:
+        conn.execute(f"CREATE VIEW {nome} AS {sql}")
+    
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'resumo_executivo_pendentes'").fetchone():
+        for tabela in TABELAS_RESUMO:
+            criar_triggers_resumo(conn, FATOS_ESTRELA[tabela].nome,
+                                  ano='{linha}.periodo_id / 100', mes='{linha}.periodo_id % 100')
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'cubos_pendentes'").fetchone():
+        for tabela in dict.fromkeys(cubo.origem for cubo in CUBOS):
+            criar_triggers_cubo(conn, FATOS_ESTRELA[tabela].nome, tabela,
+                                ano='{linha}.periodo_id / 100', mes='{linha}.periodo_id % 100')
+    for nome, tabela, colunas in INDICES_ESTRELA:
+        conn.execute(f"CREATE INDEX {nome} ON {tabela}({colunas})")
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.execute('VACUUM')
+    return True
+
+def meses_ate(ano, mes, quantidade):
+    """[(ano, mes, 'AAAA-MM-01')] dos 'quantidade' meses que terminam em ano/mes, do mais antigo"""
+    meses = []
+    for i in range(quantidade - 1, -1, -1):
+        a, m = divmod(ano * 12 + mes - 1 - i, 12)
+        meses.append((a, m + 1, f"{a}-{m + 1:02d}-01"))
+    return meses
+
+def expandir(nomes, escala, prefixo):
+    """Nomes originais primeiro, completados até len(nomes) × escala"""
+    total = len(nomes) * escala
+    return nomes + [f"{prefixo} {i:05d}" for i in range(len(nomes) + 1, total + 1)]
+
+def pragmas_carga(conn):
+    """Sem journal nem fsync: uma falha no meio da carga exige gerar de novo"""
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('PRAGMA cache_size=-65536')   # 64 MB
+    conn.execute('PRAGMA temp_store=MEMORY')
+
+def pragmas_padrao(conn):
+    conn.execute('PRAGMA journal_mode=DELETE')
+    conn.execute('PRAGMA synchronous=FULL')
+
+def inserir_em_lotes(conn, tabela, linhas, lote=LOTE_INSERCAO):
+    """executemany em blocos de 'lote' linhas tiradas do gerador; retorna o total inserido"""
+    colunas = COLUNAS_CARGA[tabela]
+    sql = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})"
+    total = 0
+    while True:
+        bloco = list(islice(linhas, lote))
+        if not bloco:
+            return total
+        conn.executemany(sql, bloco)
+        total += len(bloco)
+
+def _gerar_fatia(tarefa):
+    """Processo filho: gera a fatia 'parte' de cada tabela num SQLite próprio"""
+    arquivo, opcoes, parte, partes = tarefa
+    builder = DatabaseFinanceiroBuilder(arquivo, **opcoes)
+    conn = sqlite3.connect(arquivo)
+    pragmas_carga(conn)
+    for tabela, colunas in COLUNAS_CARGA.items():
+        conn.execute(f"CREATE TABLE {tabela} ({', '.join(colunas)})")
+        n = len(builder.entidades(tabela))
+        inserir_em_lotes(conn, tabela, builder.linhas(tabela, n * parte // partes, n * (parte + 1) // partes))
+    conn.commit()
+    conn.close()
+
 class DatabaseFinanceiroBuilder:
     """Construtor de database financeiro mockado"""
     
-    def __init__(self, db_name='dados_financeiros.db'):
+    def __init__(self, db_name='dados_financeiros.db', escala=1, meses=None,
+                 semente=SEMENTE_PADRAO, ate=None, processos=1, estrela=False):
         self.db_name = db_name
         self.conn = None
         self.cursor = None
+        self.escala = escala
+        self.semente = semente
+        self.ate = ate or (date.today().year, date.today().month)
+        self.processos = max(1, min(processos, MAX_PROCESSOS))
+        self.estrela = estrela
+        self.meses = meses_ate(*self.ate, meses or min(MESES_MAX, MESES_BASE * escala))
         
         # Configurações de dados
         self.empresas_rsm = [
@@ -102,6 +856,23 @@ class DatabaseFinanceiroBuilder:
             'Projeto Eta - Integration',
             'Projeto Theta - Analytics'
         ]
+        
+        # Escala: mais empresas, projetos e clientes (os originais vêm primeiro)
+        self.empresas_rsm = expandir(self.empresas_rsm, escala, 'RSM Filial')
+        self.empresas_pollvo = expandir(self.empresas_pollvo, escala, 'Pollvo Unidade')
+        self.projetos = expandir(self.projetos, escala, 'Projeto')
+        self.clientes = expandir(self.clientes, escala, 'Cliente')
+        
+        # Ids das tabelas de chaves: posição na lista (a carga insere nessa ordem)
+        self.ids = {tabela: {nome: i for i, nome in enumerate(nomes, 1)} for tabela, nomes in self.chaves().items()}
+    
+    def chaves(self):
+        """Nomes de cada tabela de chaves (CHAVES), na ordem dos ids"""
+        return {
+            'empresas': self.empresas_rsm + self.empresas_pollvo,
+            'tipos_imposto': self.tipos_imposto,
+            'departamentos': self.departamentos,
+        }
     
     def conectar(self):
         """Cria conexão com banco"""
@@ -132,18 +903,11 @@ class DatabaseFinanceiroBuilder:
             ano INTEGER NOT NULL,
             mes INTEGER NOT NULL,
             data DATE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            empresa_id INTEGER REFERENCES empresas(id)
         )
         ''')
         
-        # Índices para performance
-        self.cursor.execute('''
-        CREATE INDEX idx_rsm_contabil_empresa ON rsm_contabil_consolidado(empresa)
-        ''')
-        self.cursor.execute('''
-        CREATE INDEX idx_rsm_contabil_data ON rsm_contabil_consolidado(ano, mes)
-        ''')
-        
         # ============================================
         # POLLVO - CONTÁBIL
         # ============================================
@@ -157,17 +921,11 @@ class DatabaseFinanceiroBuilder:
             ano INTEGER NOT NULL,
             mes INTEGER NOT NULL,
             data DATE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            empresa_id INTEGER REFERENCES empresas(id)
         )
         ''')
         
-        self.cursor.execute('''
-        CREATE INDEX idx_pollvo_contabil_empresa ON pollvo_contabil_consolidado(empresa)
-        ''')
-        self.cursor.execute('''
-        CREATE INDEX idx_pollvo_contabil_data ON pollvo_contabil_consolidado(ano, mes)
-        ''')
-        
         # ============================================
         # RSM - FINANCEIRO
         # ============================================
@@ -182,17 +940,11 @@ class DatabaseFinanceiroBuilder:
             ano INTEGER NOT NULL,
             mes INTEGER NOT NULL,
             data_vencimento DATE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            empresa_id INTEGER REFERENCES empresas(id)
         )
         ''')
         
-        self.cursor.execute('''
-        CREATE INDEX idx_rsm_financeiro_status ON rsm_financeiro_consolidado(status)
-        ''')
-        self.cursor.execute('''
-        CREATE INDEX idx_rsm_financeiro_data ON rsm_financeiro_consolidado(ano, mes)
-        ''')
-        
         # ============================================
         # RSM - FISCAL
         # ============================================
@@ -207,17 +959,12 @@ class DatabaseFinanceiroBuilder:
             ano INTEGER NOT NULL,
             mes INTEGER NOT NULL,
             competencia DATE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            empresa_id INTEGER REFERENCES empresas(id),
+            tipo_imposto_id INTEGER REFERENCES tipos_imposto(id)
         )
         ''')
         
-        self.cursor.execute('''
-        CREATE INDEX idx_rsm_fiscal_tipo ON rsm_fiscal_consolidado(tipo_imposto)
-        ''')
-        self.cursor.execute('''
-        CREATE INDEX idx_rsm_fiscal_data ON rsm_fiscal_consolidado(ano, mes)
-        ''')
-        
         # ============================================
         # RSM - FOLHA
         # ============================================
@@ -232,17 +979,12 @@ class DatabaseFinanceiroBuilder:
             ano INTEGER NOT NULL,
             mes INTEGER NOT NULL,
             competencia DATE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            empresa_id INTEGER REFERENCES empresas(id),
+            departamento_id INTEGER REFERENCES departamentos(id)
         )
         ''')
         
-        self.cursor.execute('''
-        CREATE INDEX idx_rsm_folha_depto ON rsm_folha_consolidada(departamento)
-        ''')
-        self.cursor.execute('''
-        CREATE INDEX idx_rsm_folha_data ON rsm_folha_consolidada(ano, mes)
-        ''')
-        
         # ============================================
         # POLLVO - TIMESHEET
         # ============================================
@@ -260,113 +1002,199 @@ class DatabaseFinanceiroBuilder:
         )
         ''')
         
+        # ============================================
+        # CHAVES NORMALIZADAS
+        # ============================================
+        print("7️⃣  Criando: " + ", ".join(CHAVES))
+        criar_tabelas_chaves(self.conn)
+        
+        print("\n✅ Estrutura de tabelas criada com sucesso!")
+    
+    def criar_indices(self):
+        """Cria os índices depois da carga (ordenar uma vez sai mais barato que manter a cada INSERT)"""
+        print("\n" + "=" * 80)
+        print("🔍 CRIANDO ÍNDICES")
+        print("=" * 80)
+        
+        inicio = time.perf_counter()
+        criados = criar_indices(self.conn)
+        print(f"\n✅ {len(criados)} índices criados (+ ANALYZE) em {time.perf_counter() - inicio:.2f}s")
+        criar_triggers_chaves(self.conn)
+        self.conn.commit()
+        print("🔑 Triggers das chaves: linhas de ETL sem *_id recebem o id")
+    
+    def criar_resumo_materializado(self):
+        """Cria tabela resumo_executivo materializada + log de meses alterados"""
+        print("\n" + "=" * 80)
+        print("🧮 CRIANDO RESUMO EXECUTIVO MATERIALIZADO")
+        print("=" * 80)
+        
+        # Leitura por (ano, mes) vira busca direta na chave primária
+        print("\n1️⃣  Criando: resumo_executivo (tabela)")
         self.cursor.execute('''
-        CREATE INDEX idx_pollvo_timesheet_cliente ON pollvo_timesheet(cliente)
+        CREATE TABLE resumo_executivo (
+            ano INTEGER NOT NULL,
+            mes INTEGER NOT NULL,
+            receita_total_rsm REAL,
+            receita_total_pollvo REAL,
+            impostos_total REAL,
+            folha_total REAL,
+            funcionarios_total INTEGER,
+            atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (ano, mes)
+        ) WITHOUT ROWID
         ''')
+        
+        print("2️⃣  Criando: resumo_executivo_pendentes (log de alterações)")
         self.cursor.execute('''
-        CREATE INDEX idx_pollvo_timesheet_data ON pollvo_timesheet(ano, mes)
+        CREATE TABLE resumo_executivo_pendentes (
+            ano INTEGER NOT NULL,
+            mes INTEGER NOT NULL,
+            PRIMARY KEY (ano, mes)
+        ) WITHOUT ROWID
         ''')
         
-        print("\n✅ Estrutura de tabelas criada com sucesso!")
+        print("3️⃣  Criando triggers nas tabelas base")
+        for tabela in TABELAS_RESUMO:
+            criar_triggers_resumo(self.conn, tabela)
+        
+        print("\n✅ Resumo materializado criado com sucesso!")
+    
+    def atualizar_resumo_executivo(self):
+        """Recalcula o resumo executivo dos meses alterados"""
+        # Triggers nascem depois da carga: todos os meses entram no recálculo
+        meses = atualizar_resumo_executivo(self.conn, completo=True)
+        print(f"\n🧮 Resumo executivo atualizado: {meses} meses recalculados")
+    
+    def entidades(self, tabela):
+        """Empresas (ou projetos, no timesheet) que geram as linhas da tabela"""
+        if tabela == 'pollvo_timesheet':
+            return self.projetos
+        if tabela == 'pollvo_contabil_consolidado':
+            return self.empresas_pollvo
+        return self.empresas_rsm
+    
+    def linhas(self, tabela, inicio=0, fim=None):
+        """
+        Gera as linhas da tabela para as entidades [inicio, fim), todos os meses
+        Cada entidade tem o próprio gerador aleatório (semente:tabela:índice),
+        então qualquer fatia sai igual à mesma fatia da carga completa
+        """
+        gerar = {
+            'rsm_contabil_consolidado': self._linhas_rsm_contabil,
+            'pollvo_contabil_consolidado': self._linhas_pollvo_contabil,
+            'rsm_financeiro_consolidado': self._linhas_rsm_financeiro,
+            'rsm_fiscal_consolidado': self._linhas_rsm_fiscal,
+            'rsm_folha_consolidada': self._linhas_rsm_folha,
+            'pollvo_timesheet': self._linhas_pollvo_timesheet,
+        }[tabela]
+        entidades = self.entidades(tabela)
+        for i in range(inicio, len(entidades) if fim is None else fim):
+            yield from gerar(random.Random(f"{self.semente}:{tabela}:{i}"), entidades[i])
+    
+    def _linhas_rsm_contabil(self, rng, empresa):
+        empresa_id = self.ids['empresas'][empresa]
+        for ano, mes, data_str in self.meses:
+            for cc in rng.sample(self.centros_custo, rng.randint(4, 6)):
+                receita = round(rng.uniform(50000, 800000), 2)
+                yield (empresa, cc, receita, ano, mes, data_str, empresa_id)
+    
+    def _linhas_pollvo_contabil(self, rng, empresa):
+        empresa_id = self.ids['empresas'][empresa]
+        for ano, mes, data_str in self.meses:
+            for cc in rng.sample(self.centros_custo, rng.randint(3, 5)):
+                receita = round(rng.uniform(30000, 500000), 2)
+                yield (empresa, cc, receita, ano, mes, data_str, empresa_id)
+    
+    def _linhas_rsm_financeiro(self, rng, empresa):
+        empresa_id = self.ids['empresas'][empresa]
+        for ano, mes, data_str in self.meses:
+            for status in self.status_financeiro:
+                qtd = rng.randint(5, 80)
+                total = round(rng.uniform(10000, 350000), 2)
+                yield (empresa, status, qtd, total, ano, mes, data_str, empresa_id)
+    
+    def _linhas_rsm_fiscal(self, rng, empresa):
+        empresa_id = self.ids['empresas'][empresa]
+        for ano, mes, data_str in self.meses:
+            for tipo in self.tipos_imposto:
+                imposto = round(rng.uniform(8000, 150000), 2)
+                # Base de cálculo entre 1.8x e 2.5x o imposto
+                base = round(imposto * rng.uniform(1.8, 2.5), 2)
+                yield (empresa, tipo, imposto, base, ano, mes, data_str, empresa_id, self.ids['tipos_imposto'][tipo])
+    
+    def _linhas_rsm_folha(self, rng, empresa):
+        empresa_id = self.ids['empresas'][empresa]
+        for ano, mes, data_str in self.meses:
+            for depto in self.departamentos:
+                funcionarios = rng.randint(5, 85)
+                # Salário médio entre R$ 5.000 e R$ 18.000
+                folha = round(funcionarios * rng.uniform(5000, 18000), 2)
+                yield (empresa, depto, funcionarios, folha, ano, mes, data_str, empresa_id,
+                       self.ids['departamentos'][depto])
+    
+    def _linhas_pollvo_timesheet(self, rng, projeto):
+        for ano, mes, data_str in self.meses:
+            cliente = rng.choice(self.clientes)
+            receita = round(rng.uniform(25000, 280000), 2)
+            yield (projeto, cliente, receita, ano, mes, data_str)
+    
+    def _popular_em_fatias(self):
+        """Fatias geradas em paralelo, cada uma num SQLite temporário, e juntadas em ordem"""
+        pasta = tempfile.mkdtemp(prefix='gera_dados_')
+        opcoes = {'escala': self.escala, 'meses': len(self.meses), 'semente': self.semente, 'ate': self.ate}
+        arquivos = [os.path.join(pasta, f'fatia_{i}.db') for i in range(self.processos)]
+        try:
+            inicio = time.perf_counter()
+            with multiprocessing.Pool(self.processos) as pool:
+                pool.map(_gerar_fatia, [(arquivo, opcoes, i, self.processos) for i, arquivo in enumerate(arquivos)])
+            print(f"\n⚙️  {self.processos} fatias geradas em {time.perf_counter() - inicio:.2f}s")
+            
+            # ATTACH não roda dentro de transação: anexa todas antes da junção
+            for i, arquivo in enumerate(arquivos):
+                self.cursor.execute(f"ATTACH DATABASE ? AS fatia_{i}", (arquivo,))
+            contagens = {}
+            for tabela, colunas in COLUNAS_CARGA.items():
+                inicio = time.perf_counter()
+                lista = ', '.join(colunas)
+                for i in range(self.processos):
+                    self.cursor.execute(f"INSERT INTO {tabela} ({lista}) SELECT {lista} FROM fatia_{i}.{tabela} ORDER BY rowid")
+                linhas = self.cursor.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+                contagens[tabela] = (linhas, time.perf_counter() - inicio)
+            self.conn.commit()
+            for i in range(self.processos):
+                self.cursor.execute(f"DETACH DATABASE fatia_{i}")
+            return contagens
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
     
     def popular_dados(self):
-        """Popula tabelas com dados mockados"""
+        """Popula tabelas com dados mockados (executemany em lotes, uma transação)"""
         print("\n" + "=" * 80)
-        print("📝 POPULANDO DADOS (últimos 18 meses)")
+        print(f"📝 POPULANDO DADOS ({len(self.meses)} meses | escala {self.escala} | semente {self.semente})")
         print("=" * 80)
         
-        data_base = datetime.now()
-        registros_inseridos = {
-            'rsm_contabil': 0,
-            'pollvo_contabil': 0,
-            'rsm_financeiro': 0,
-            'rsm_fiscal': 0,
-            'rsm_folha': 0,
-            'pollvo_timesheet': 0
-        }
-        
-        for i in range(18):  # 18 meses de dados
-            mes_data = data_base - timedelta(days=30 * i)
-            ano = mes_data.year
-            mes = mes_data.month
-            data_str = f"{ano}-{mes:02d}-01"
-            
-            # RSM CONTÁBIL
-            for empresa in self.empresas_rsm:
-                for cc in random.sample(self.centros_custo, random.randint(4, 6)):
-                    receita = round(random.uniform(50000, 800000), 2)
-                    self.cursor.execute('''
-                    INSERT INTO rsm_contabil_consolidado 
-                    (empresa, centro_custo, receita, ano, mes, data)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (empresa, cc, receita, ano, mes, data_str))
-                    registros_inseridos['rsm_contabil'] += 1
-            
-            # POLLVO CONTÁBIL
-            for empresa in self.empresas_pollvo:
-                for cc in random.sample(self.centros_custo, random.randint(3, 5)):
-                    receita = round(random.uniform(30000, 500000), 2)
-                    self.cursor.execute('''
-                    INSERT INTO pollvo_contabil_consolidado 
-                    (empresa, centro_custo, receita, ano, mes, data)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (empresa, cc, receita, ano, mes, data_str))
-                    registros_inseridos['pollvo_contabil'] += 1
-            
-            # RSM FINANCEIRO
-            for empresa in self.empresas_rsm:
-                for status in self.status_financeiro:
-                    qtd = random.randint(5, 80)
-                    total = round(random.uniform(10000, 350000), 2)
-                    self.cursor.execute('''
-                    INSERT INTO rsm_financeiro_consolidado 
-                    (empresa, status, qtd, total, ano, mes, data_vencimento)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (empresa, status, qtd, total, ano, mes, data_str))
-                    registros_inseridos['rsm_financeiro'] += 1
-            
-            # RSM FISCAL
-            for empresa in self.empresas_rsm:
-                for tipo in self.tipos_imposto:
-                    imposto = round(random.uniform(8000, 150000), 2)
-                    # Base de cálculo entre 1.8x e 2.5x o imposto
-                    base = round(imposto * random.uniform(1.8, 2.5), 2)
-                    self.cursor.execute('''
-                    INSERT INTO rsm_fiscal_consolidado 
-                    (empresa, tipo_imposto, imposto, base_calculo, ano, mes, competencia)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (empresa, tipo, imposto, base, ano, mes, data_str))
-                    registros_inseridos['rsm_fiscal'] += 1
-            
-            # RSM FOLHA
-            for empresa in self.empresas_rsm:
-                for depto in self.departamentos:
-                    funcionarios = random.randint(5, 85)
-                    # Salário médio entre R$ 5.000 e R$ 18.000
-                    folha = round(funcionarios * random.uniform(5000, 18000), 2)
-                    self.cursor.execute('''
-                    INSERT INTO rsm_folha_consolidada 
-                    (empresa, departamento, funcionarios, folha, ano, mes, competencia)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (empresa, depto, funcionarios, folha, ano, mes, data_str))
-                    registros_inseridos['rsm_folha'] += 1
-            
-            # POLLVO TIMESHEET
-            for projeto in self.projetos:
-                cliente = random.choice(self.clientes)
-                receita = round(random.uniform(25000, 280000), 2)
-                self.cursor.execute('''
-                INSERT INTO pollvo_timesheet 
-                (projeto, cliente, receita_projeto, ano, mes, competencia)
-                VALUES (?, ?, ?, ?, ?, ?)
-                ''', (projeto, cliente, receita, ano, mes, data_str))
-                registros_inseridos['pollvo_timesheet'] += 1
-        
-        self.conn.commit()
+        pragmas_carga(self.conn)
+        inicio = time.perf_counter()
+        for tabela, nomes in self.chaves().items():
+            inserir_chaves(self.conn, tabela, nomes)
+        if self.processos > 1:
+            contagens = self._popular_em_fatias()
+        else:
+            contagens = {}
+            for tabela in COLUNAS_CARGA:
+                inicio_tabela = time.perf_counter()
+                linhas = inserir_em_lotes(self.conn, tabela, self.linhas(tabela))
+                contagens[tabela] = (linhas, time.perf_counter() - inicio_tabela)
+            self.conn.commit()
+        duracao = time.perf_counter() - inicio
+        pragmas_padrao(self.conn)
         
         print("\n📊 Registros inseridos:")
-        for tabela, count in registros_inseridos.items():
-            print(f"   • {tabela:25} → {count:5} registros")
+        for tabela, (linhas, segundos) in contagens.items():
+            print(f"   • {tabela:30} → {linhas:>12,} registros | {linhas / max(segundos, 1e-9):>12,.0f} linhas/s")
+        total = sum(linhas for linhas, _ in contagens.values())
+        print(f"\n⚡ {total:,} registros em {duracao:.2f}s → {total / max(duracao, 1e-9):,.0f} linhas/s")
     
     def criar_views(self):
         """Cria views analíticas"""
@@ -374,112 +1202,41 @@ class DatabaseFinanceiroBuilder:
         print("👁️  CRIANDO VIEWS ANALÍTICAS")
         print("=" * 80)
         
-        # ============================================
-        # VIEW: CONTÁBIL CONSOLIDADO
-        # ============================================
-        print("\n1️⃣  Criando: contabil_consolidado")
-        self.cursor.execute('''
-        CREATE VIEW IF NOT EXISTS contabil_consolidado AS
-        SELECT
-            empresa,
-            centro_custo,
-            receita AS credito,
-            0.0 AS debito,
-            ano,
-            mes,
-            data
-        FROM rsm_contabil_consolidado
-        UNION ALL
-        SELECT
-            empresa,
-            centro_custo,
-            receita AS credito,
-            0.0 AS debito,
-            ano,
-            mes,
-            data
-        FROM pollvo_contabil_consolidado
-        ''')
+        print()
+        for i, (nome, sql) in enumerate(VIEWS, 1):
+            print(f"{i}\ufe0f\u20e3  Criando: {nome}")
+            self.cursor.execute(f"CREATE VIEW IF NOT EXISTS {nome} AS {sql}")
         
-        # ============================================
-        # VIEW: FINANCEIRO CONSOLIDADO
-        # ============================================
-        print("2️⃣  Criando: financeiro_consolidado")
-        self.cursor.execute('''
-        CREATE VIEW IF NOT EXISTS financeiro_consolidado AS
-        SELECT
-            empresa,
-            status,
-            qtd AS quantidade,
-            total AS valor,
-            ano,
-            mes,
-            data_vencimento
-        FROM rsm_financeiro_consolidado
-        ''')
-        
-        # ============================================
-        # VIEW: FISCAL CONSOLIDADO
-        # ============================================
-        print("3️⃣  Criando: fiscal_consolidado")
-        self.cursor.execute('''
-        CREATE VIEW IF NOT EXISTS fiscal_consolidado AS
-        SELECT
-            empresa,
-            tipo_imposto,
-            imposto AS valor_a_recolher,
-            base_calculo,
-            ROUND((imposto / NULLIF(base_calculo, 0)) * 100, 2) AS aliquota_efetiva,
-            ano,
-            mes,
-            competencia
-        FROM rsm_fiscal_consolidado
-        ''')
-        
-        # ============================================
-        # VIEW: FOLHA CONSOLIDADA
-        # ============================================
-        print("4️⃣  Criando: folha_consolidada")
-        self.cursor.execute('''
-        CREATE VIEW IF NOT EXISTS folha_consolidada AS
-        SELECT
-            empresa,
-            departamento,
-            funcionarios,
-            folha,
-            ROUND(folha / NULLIF(funcionarios, 0), 2) AS salario_medio,
-            ano,
-            mes,
-            competencia
-        FROM rsm_folha_consolidada
-        ''')
+        print("\n✅ Views criadas com sucesso!")
+    
+    def criar_cubos(self):
+        """Cria e preenche o cubo mensal (CUBOS) + log de meses alterados e triggers"""
+        print("\n" + "=" * 80)
+        print("🧊 CRIANDO CUBO MENSAL")
+        print("=" * 80)
         
-        # ============================================
-        # VIEW: RESUMO EXECUTIVO (nova!)
-        # ============================================
-        print("5️⃣  Criando: resumo_executivo")
-        self.cursor.execute('''
-        CREATE VIEW IF NOT EXISTS resumo_executivo AS
-        SELECT
-            ano,
-            mes,
-            (SELECT SUM(receita) FROM rsm_contabil_consolidado r 
-             WHERE r.ano = c.ano AND r.mes = c.mes) AS receita_total_rsm,
-            (SELECT SUM(receita) FROM pollvo_contabil_consolidado p 
-             WHERE p.ano = c.ano AND p.mes = c.mes) AS receita_total_pollvo,
-            (SELECT SUM(imposto) FROM rsm_fiscal_consolidado f 
-             WHERE f.ano = c.ano AND f.mes = c.mes) AS impostos_total,
-            (SELECT SUM(folha) FROM rsm_folha_consolidada fo 
-             WHERE fo.ano = c.ano AND fo.mes = c.mes) AS folha_total,
-            (SELECT SUM(funcionarios) FROM rsm_folha_consolidada fo2 
-             WHERE fo2.ano = c.ano AND fo2.mes = c.mes) AS funcionarios_total
-        FROM (
-            SELECT DISTINCT ano, mes FROM rsm_contabil_consolidado
-        ) c
-        ORDER BY ano DESC, mes DESC
-        ''')
+        inicio = time.perf_counter()
+        criar_cubos(self.conn)
+        print()
+        for cubo in CUBOS:
+            linhas = self.cursor.execute(f"SELECT COUNT(*) FROM {cubo.nome}").fetchone()[0]
+            print(f"   • {cubo.nome:35} → {linhas:>10,} linhas ({' × '.join(cubo.grupo)} × mês)")
+        print(f"\n✅ {len(CUBOS)} cubos criados em {time.perf_counter() - inicio:.2f}s")
+    
+    def converter_estrela(self):
+        """Troca as tabelas fato pelo esquema estrela (dimensões + fato_* só com números)"""
+        print("\n" + "=" * 80)
+        print("⭐ CONVERTENDO PARA ESQUEMA ESTRELA")
+        print("=" * 80)
         
-        print("\n✅ Views criadas com sucesso!")
+        antes = os.path.getsize(self.db_name) / (1024 * 1024)
+        inicio = time.perf_counter()
+        converter_estrela(self.conn)
+        depois = os.path.getsize(self.db_name) / (1024 * 1024)
+        print(f"\n📐 Dimensões: dim_periodo, {', '.join(DIMENSOES.values())}")
+        print(f"📊 Fatos: {', '.join(fato.nome for fato in FATOS_ESTRELA.values())}")
+        print(f"\n✅ Convertido em {time.perf_counter() - inicio:.2f}s | "
+              f"{antes:.2f} MB → {depois:.2f} MB ({(1 - depois / antes) * 100:.0f}% menor)")
     
     def gerar_relatorios(self):
         """Gera relatórios de validação"""
@@ -487,7 +1244,8 @@ class DatabaseFinanceiroBuilder:
         print("📈 RELATÓRIOS DE VALIDAÇÃO")
         print("=" * 80)
         
-        data_atual = datetime.now()
+        # Último mês gerado (--ate), não a data de hoje
+        data_atual = date(*self.ate, 1)
         
         # Receita por empresa
         print("\n💰 RECEITA POR EMPRESA (3 meses mais recentes):")
@@ -586,7 +1344,7 @@ class DatabaseFinanceiroBuilder:
             self.cursor.execute(f"SELECT COUNT(*) FROM {tabela}")
             count = self.cursor.fetchone()[0]
             total_registros += count
-            print(f"   • {tabela:40} → {count:6} registros")
+            print(f"   • {tabela:40} → {count:>12,} registros")
         
         print(f"\n   TOTAL: {total_registros:,} registros")
         
@@ -618,6 +1376,25 @@ class DatabaseFinanceiroBuilder:
         for idx in indices:
             print(f"   • {idx[0]}")
     
+    def exportar_parquet(self, destino):
+        """Exporta as tabelas para o lake Parquet (partições ano/mes nas tabelas grandes)"""
+        print("\n" + "=" * 80)
+        print("🗂️  EXPORTANDO PARA PARQUET")
+        print("=" * 80)
+        
+        inicio = time.perf_counter()
+        resultado = lago_colunar.exportar_parquet(self.db_name, destino)
+        duracao = time.perf_counter() - inicio
+        
+        print(f"\n📁 Lake: {destino}")
+        for tabela, (linhas, tamanho, particionada) in resultado.items():
+            layout = "ano=/mes=" if particionada else "arquivo único"
+            print(f"   • {tabela:30} → {linhas:>12,} registros | {tamanho / (1024 * 1024):>8.2f} MB | {layout}")
+        total = sum(tamanho for _, tamanho, _ in resultado.values()) / (1024 * 1024)
+        sqlite_mb = os.path.getsize(self.db_name) / (1024 * 1024)
+        print(f"\n💾 Parquet: {total:.2f} MB (SQLite: {sqlite_mb:.2f} MB) em {duracao:.2f}s")
+        print(f"🦆 Consultar com DuckDB: DADOS_FINANCEIROS=duckdb:///{destino}")
+    
     def fechar(self):
         """Fecha conexão"""
         if self.conn:
@@ -636,7 +1413,13 @@ class DatabaseFinanceiroBuilder:
             self.conectar()
             self.criar_tabelas()
             self.popular_dados()
+            self.criar_indices()
+            self.criar_resumo_materializado()
+            self.atualizar_resumo_executivo()
             self.criar_views()
+            self.criar_cubos()
+            if self.estrela:
+                self.converter_estrela()
             self.gerar_relatorios()
             self.estatisticas_finais()
             
@@ -657,6 +1440,50 @@ class DatabaseFinanceiroBuilder:
 # ============================================
 # EXECUÇÃO PRINCIPAL
 # ============================================
+def main():
+    parser = argparse.ArgumentParser(description="Gera o banco financeiro mockado")
+    parser.add_argument('--db', default='dados_financeiros.db', help="Arquivo SQLite de saída")
+    parser.add_argument('--escala', type=int, default=1,
+                        help="Fator de escala (1000: milhares de empresas, 10 anos, milhões de linhas)")
+    parser.add_argument('--meses', type=int, help=f"Meses de dados (padrão: {MESES_BASE} × escala, até {MESES_MAX})")
+    parser.add_argument('--semente', type=int, default=SEMENTE_PADRAO, help="Semente dos dados aleatórios")
+    parser.add_argument('--ate', help="Último mês AAAA-MM (padrão: mês atual)")
+    parser.add_argument('--processos', type=int, default=1,
+                        help=f"Processos gerando fatias em paralelo (até {MAX_PROCESSOS})")
+    parser.add_argument('--parquet', metavar='PASTA', help="Exporta também para Parquet (lake do DuckDB)")
+    parser.add_argument('--migrar', action='store_true',
+                        help="Só atualiza o schema do --db existente (chaves, colunas *_id, índices, cubos) "
+                             "e recalcula os meses pendentes do cubo")
+    parser.add_argument('--estrela', action='store_true',
+                        help="Esquema estrela: dimensões + fatos só com inteiros e reais (com --migrar, converte o --db)")
+    args = parser.parse_args()
+    
+    if args.migrar:
+        conn = sqlite3.connect(args.db)
+        inicio = time.perf_counter()
+        mudancas = migrar_schema(conn)
+        print(f"🔧 {args.db} migrado em {time.perf_counter() - inicio:.2f}s")
+        for rotulo, itens in (("Colunas adicionadas", mudancas['colunas']),
+                              ("Índices criados", mudancas['indices_criados']),
+                              ("Índices removidos", mudancas['indices_removidos']),
+                              ("Cubos criados", mudancas['cubos'])):
+            print(f"   • {rotulo}: {', '.join(itens) or '—'}")
+        if args.estrela:
+            antes = os.path.getsize(args.db) / (1024 * 1024)
+            inicio = time.perf_counter()
+            convertido = converter_estrela(conn)
+            print(f"⭐ Esquema estrela: " + (f"convertido em {time.perf_counter() - inicio:.2f}s | {antes:.2f} MB → "
+                                           f"{os.path.getsize(args.db) / (1024 * 1024):.2f} MB"
+                                           if convertido else "o banco já estava convertido"))
+        conn.close()
+        return
+    
+    ate = tuple(int(parte) for parte in args.ate.split('-')) if args.ate else None
+    builder = DatabaseFinanceiroBuilder(args.db, escala=args.escala, meses=args.meses, semente=args.semente,
+                                        ate=ate, processos=args.processos, estrela=args.estrela)
+    builder.executar()
+    if args.parquet:
+        builder.exportar_parquet(args.parquet)
+
 if __name__ == "__main__":
-    builder = DatabaseFinanceiroBuilder('dados_financeiros.db')
-    builder.executar()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modo em lote do assistente financeiro
+
+Pré-responde uma lista de perguntas (ex.: rodada noturna das perguntas da
+'ajuda' + FAQ): consulta o banco para todas, deduplica prompts aumentados
+idênticos e envia só os únicos ao Bedrock, em paralelo limitado ou via
+Bedrock Batch Inference (JSONL). As respostas vão para a tabela respostas_lote.
+
+Uso:
+    python lote_perguntas.py perguntas.txt
+    python lote_perguntas.py --exemplos --paralelismo 8
+    python lote_perguntas.py perguntas.txt --exportar-jsonl lote.jsonl
+    python lote_perguntas.py perguntas.txt --importar-jsonl lote.jsonl.out
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import chat_langchain_rag_financeiro_v1 as assistente
+from comum.bedrock import InvocadorBedrock, extrair_texto
+from comum.cache_prompt import UsoPrompt, calcular_custo, extrair_uso
+from comum.limitador_taxa import limitador_taxa_padrao
+
+# Uso do lote contado à parte do assistente interativo (mesmos preços)
+invocador = InvocadorBedrock(assistente.MODEL_ID, client=assistente.bedrock_client,
+                             uso=UsoPrompt(assistente.uso_modelo.precos))
+
+# ============================================
+# LEITURA DAS PERGUNTAS
+# ============================================
+def ler_perguntas(arquivo=None, incluir_exemplos=False):
+    """Lê uma pergunta por linha (ignora vazias e comentários '#')"""
+    perguntas = []
+    if incluir_exemplos:
+        for lista in assistente.EXEMPLOS_CONSULTAS.values():
+            perguntas.extend(lista)
+    if arquivo:
+        with open(arquivo, encoding='utf-8') as f:
+            for linha in f:
+                linha = linha.strip()
+                if linha and not linha.startswith('#'):
+                    perguntas.append(linha)
+
+    # Remove perguntas repetidas mantendo a ordem
+    return list(dict.fromkeys(perguntas))
+
+# ============================================
+# PREPARAÇÃO E DEDUPLICAÇÃO
+# ============================================
+def preparar_lote(perguntas):
+    """
+    Executa a consulta SQL de cada pergunta e agrupa prompts idênticos
+    Retorna: (itens por pergunta, prompts únicos {chave: (instruções, entrada)})
+    """
+    itens = []
+    unicos = {}
+
+    for pergunta in perguntas:
+        consulta = assistente.consultar_dados_financeiros(pergunta)
+        tipo, dados, _ = consulta
+        prompt_augmented, erro = assistente.preparar_prompt(pergunta, exibir_status=False, consulta=consulta)
+
+        if erro:
+            itens.append({'pergunta': pergunta, 'categoria': tipo, 'registros': 0,
+                          'chave': None, 'erro': erro})
+            continue
+
+        instrucoes, entrada = assistente.montar_entrada_modelo(prompt_augmented)
+        chave = hashlib.sha256(json.dumps([instrucoes, entrada]).encode('utf-8')).hexdigest()
+        unicos.setdefault(chave, (instrucoes, entrada))
+        itens.append({'pergunta': pergunta, 'categoria': tipo, 'registros': len(dados),
+                      'chave': chave, 'erro': None})
+
+    return itens, unicos
+
+# ============================================
+# INVOCAÇÃO
+# ============================================
+def invocar_prompt(instrucoes, entrada):
+    """Invoca o modelo para um prompt (respeitando o limitador de taxa)"""
+    inicio = time.perf_counter()
+    resposta = invocador.invocar(assistente.montar_config(entrada, instrucoes=instrucoes))
+    return {
+        'texto': resposta.texto,
+        **resposta.uso,
+        'custo': resposta.custo,
+        'latencia_ms': (time.perf_counter() - inicio) * 1000,
+    }
+
+def extrair_resultado(resposta, latencia=0.0):
+    """Texto, tokens e custo de uma resposta da Messages API (saída do Batch Inference)"""
+    uso = extrair_uso(resposta.get('usage'))
+    return {
+        'texto': extrair_texto(resposta),
+        **uso,
+        'custo': calcular_custo(uso, assistente.uso_modelo.precos),
+        'latencia_ms': latencia * 1000,
+    }
+
+def invocar_em_paralelo(unicos, paralelismo):
+    """Envia os prompts únicos com no máximo 'paralelismo' chamadas simultâneas"""
+    resultados = {}
+
+    def _tarefa(item):
+        chave, (instrucoes, entrada) = item
+        try:
+            return chave, invocar_prompt(instrucoes, entrada)
+        except Exception as e:
+            return chave, {'texto': f"❌ Erro: {e}", 'tokens_in': 0, 'tokens_out': 0,
+                           'custo': 0.0, 'latencia_ms': 0.0, 'erro': True}
+
+    with ThreadPoolExecutor(max_workers=paralelismo) as executor:
+        for chave, resultado in executor.map(_tarefa, unicos.items()):
+            resultados[chave] = resultado
+    return resultados
+
+# ============================================
+# BEDROCK BATCH INFERENCE (JSONL)
+# ============================================
+def exportar_jsonl(unicos, arquivo):
+    """Gera o arquivo de entrada do job de Batch Inference (um registro por prompt)"""
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        for chave, (instrucoes, entrada) in unicos.items():
+            registro = {'recordId': chave, 'modelInput': assistente.montar_config(entrada, instrucoes=instrucoes)}
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+def importar_jsonl(arquivo):
+    """Lê a saída do job de Batch Inference ({recordId, modelOutput})"""
+    resultados = {}
+    with open(arquivo, encoding='utf-8') as f:
+        for linha in f:
+            if not linha.strip():
+                continue
+            registro = json.loads(linha)
+            saida = registro.get('modelOutput')
+            if saida:
+                resultados[registro['recordId']] = extrair_resultado(saida)
+            else:
+                erro = registro.get('error', {}).get('errorMessage', 'sem saída')
+                resultados[registro['recordId']] = {
+                    'texto': f"❌ Erro: {erro}", 'tokens_in': 0, 'tokens_out': 0,
+                    'custo': 0.0, 'latencia_ms': 0.0, 'erro': True
+                }
+    return resultados
+
+# ============================================
+# GRAVAÇÃO DOS RESULTADOS
+# ============================================
+def gravar_resultados(arquivo_db, execucao_id, itens, resultados):
+    """Grava uma linha por pergunta na tabela respostas_lote"""
+    conn = sqlite3.connect(arquivo_db)
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS respostas_lote (
+        execucao_id TEXT NOT NULL,
+        pergunta TEXT NOT NULL,
+        categoria TEXT,
+        registros INTEGER,
+        chave_prompt TEXT,
+        resposta TEXT,
+        tokens_in INTEGER,
+        tokens_out INTEGER,
+        custo REAL,
+        latencia_ms REAL,
+        criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (execucao_id, pergunta)
+    )
+    ''')
+
+    linhas = []
+    cobrados = set()
+    for item in itens:
+        resultado = resultados.get(item['chave']) if item['chave'] else None
+        if resultado is None:
+            texto = item['erro'] or "❌ Sem resposta"
+            linhas.append((execucao_id, item['pergunta'], item['categoria'], item['registros'],
+                           item['chave'], texto, 0, 0, 0.0, 0.0))
+            continue
+
+        # Prompt deduplicado: custo/tokens contabilizados só na primeira pergunta
+        primeira = item['chave'] not in cobrados
+        cobrados.add(item['chave'])
+        linhas.append((
+            execucao_id, item['pergunta'], item['categoria'], item['registros'], item['chave'],
+            resultado['texto'],
+            resultado['tokens_in'] if primeira else 0,
+            resultado['tokens_out'] if primeira else 0,
+            resultado['custo'] if primeira else 0.0,
+            resultado['latencia_ms'] if primeira else 0.0
+        ))
+
+    conn.executemany('''
+    INSERT OR REPLACE INTO respostas_lote
+    (execucao_id, pergunta, categoria, registros, chave_prompt, resposta,
+     tokens_in, tokens_out, custo, latencia_ms)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', linhas)
+    conn.commit()
+    conn.close()
+
+# ============================================
+# EXECUÇÃO PRINCIPAL
+# ============================================
+def main():
+    parser = argparse.ArgumentParser(description="Pré-responde perguntas em lote")
+    parser.add_argument('arquivo', nargs='?', help="Arquivo com uma pergunta por linha")
+    parser.add_argument('--exemplos', action='store_true', help="Inclui as perguntas do comando 'ajuda'")
+    parser.add_argument('--paralelismo', type=int, default=8, help="Chamadas simultâneas ao Bedrock")
+    parser.add_argument('--saida', default='respostas_lote.db', help="Banco SQLite dos resultados")
+    parser.add_argument('--exportar-jsonl', help="Só gera o JSONL para Bedrock Batch Inference")
+    parser.add_argument('--importar-jsonl', help="Grava a saída (.jsonl.out) de um job de Batch Inference")
+    args = parser.parse_args()
+
+    perguntas = ler_perguntas(args.arquivo, args.exemplos)
+    if not perguntas:
+        parser.error("nenhuma pergunta informada (use um arquivo e/ou --exemplos)")
+
+    print("=" * 80)
+    print("📦 ASSISTENTE FINANCEIRO - MODO EM LOTE")
+    print("=" * 80)
+
+    inicio = time.perf_counter()
+    itens, unicos = preparar_lote(perguntas)
+    tempo_sql = time.perf_counter() - inicio
+    print(f"\n📝 Perguntas: {len(perguntas)} | Prompts únicos: {len(unicos)} "
+          f"({len(perguntas) - len(unicos)} deduplicados/erros) | SQL: {tempo_sql:.2f}s")
+
+    if args.exportar_jsonl:
+        exportar_jsonl(unicos, args.exportar_jsonl)
+        print(f"\n💾 JSONL gerado: {args.exportar_jsonl} ({len(unicos)} registros)")
+        print("🚀 Envie ao S3 e crie o job com 'aws bedrock create-model-invocation-job'")
+        return
+
+    inicio_modelo = time.perf_counter()
+    if args.importar_jsonl:
+        resultados = importar_jsonl(args.importar_jsonl)
+    else:
+        resultados = invocar_em_paralelo(unicos, args.paralelismo)
+    tempo_modelo = time.perf_counter() - inicio_modelo
+
+    execucao_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+    gravar_resultados(args.saida, execucao_id, itens, resultados)
+
+    duracao = time.perf_counter() - inicio
+    tokens_in = sum(r['tokens_in'] for r in resultados.values())
+    tokens_out = sum(r['tokens_out'] for r in resultados.values())
+    custo = sum(r['custo'] for r in resultados.values())
+    erros = sum(1 for r in resultados.values() if r.get('erro'))
+
+    print("\n" + "=" * 80)
+    print("📊 RELATÓRIO DA EXECUÇÃO")
+    print("=" * 80)
+    print(f"🆔 Execução: {execucao_id} → {args.saida} (tabela respostas_lote)")
+    print(f"⏱️  Duração total: {duracao:.2f}s (modelo: {tempo_modelo:.2f}s)")
+    print(f"🚀 Throughput: {len(perguntas) / duracao:.2f} perguntas/s | "
+          f"{len(resultados) / tempo_modelo if tempo_modelo else 0:.2f} chamadas/s")
+    cache_leitura = sum(r.get('cache_leitura', 0) for r in resultados.values())
+    print(f"📥 Tokens de entrada: {tokens_in:,} (+{cache_leitura:,} lidos do cache) | "
+          f"📤 Tokens de saída: {tokens_out:,}")
+    print(f"💰 Custo total: ${custo:.6f} (≈ R$ {custo * 5.5:.4f})")
+    print(f"❌ Erros: {erros}")
+    limitador_taxa_padrao.mostrar_estatisticas()
+    print("=" * 80 + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Roteador de intenções do assistente financeiro
+
+Substitui a cascata de any(palavra in pergunta ...) por UMA regex compilada:
+- Acentos removidos antes da busca ("salário" == "salario")
+- Palavras inteiras (\\b): "ti" não casa com "partida", "pis" não casa com "pisos"
+- Uma única passada extrai intenção, empresa, tipo de imposto e depto. de TI
+"""
+import re
+import unicodedata
+from collections import namedtuple
+
+# ============================================
+# RESULTADO DO ROTEAMENTO
+# ============================================
+Rota = namedtuple('Rota', ['intencao', 'empresa', 'tipo_imposto', 'departamento_ti'])
+
+# Intenções em ordem de prioridade (mesma ordem da cascata original)
+RECEITAS = 'receitas'
+IMPOSTOS = 'impostos'
+FOLHA = 'folha'
+FINANCEIRO = 'financeiro'
+PROJETOS = 'projetos'
+COMPARACAO = 'comparacao'
+RESUMO = 'resumo'
+
+PRIORIDADE = [RECEITAS, IMPOSTOS, FOLHA, FINANCEIRO, PROJETOS, COMPARACAO]
+
+# ============================================
+# VOCABULÁRIO (já sem acentos)
+# ============================================
+# Radicais com \w* aceitam plural/flexões; siglas curtas só casam inteiras
+EMPRESAS = ['rsm brasil', 'rsm tech', 'rsm consultoria', 'rsm auditoria',
+            'pollvo digital', 'pollvo labs', 'pollvo']
+
+TIPOS_IMPOSTO = ['irpj', 'csll', 'pis', 'cofins', 'iss', 'inss', 'icms', 'ipi']
+
+PALAVRAS_CHAVE = {
+    RECEITAS: [r'receita\w*', r'faturamento\w*', r'vendas?', r'lucros?'],
+    IMPOSTOS: [r'impostos?', r'tribut\w*', r'fisca(?:l|is)'],
+    FOLHA: [r'folhas?', r'funcionari[oa]s?', r'salari\w*', r'departamentos?', r'rh'],
+    FINANCEIRO: [r'financeir[oa]s?', r'pag[oa]s?', r'pendentes?', r'vencid[oa]s?',
+                 r'contas?', r'pagamentos?', r'pagar'],
+    PROJETOS: [r'projetos?', r'clientes?', r'timesheets?', r'lucrativ\w*'],
+    COMPARACAO: [r'compar\w*', r'tendencias?', r'evoluc\w*', r'crescimento',
+                 r'ultim[oa]s?'],
+}
+
+PALAVRAS_TI = [r'ti', r'tecnologia']
+
+# ============================================
+# REGEX ÚNICA COM GRUPOS NOMEADOS
+# ============================================
+def _alternativas(padroes):
+    return '|'.join(padroes)
+
+def _compilar():
+    # Empresas primeiro: "pollvo digital" deve vencer "pollvo" na mesma posição
+    grupos = [
+        '(?P<empresa>' + _alternativas(e.replace(' ', r'\s+') for e in EMPRESAS) + ')',
+        '(?P<imposto_tipo>' + _alternativas(TIPOS_IMPOSTO) + ')',
+        '(?P<ti>' + _alternativas(PALAVRAS_TI) + ')',
+    ]
+    padroes = EMPRESAS + TIPOS_IMPOSTO + PALAVRAS_TI
+    for intencao in PRIORIDADE:
+        grupos.append(f'(?P<{intencao}>' + _alternativas(PALAVRAS_CHAVE[intencao]) + ')')
+        padroes = padroes + PALAVRAS_CHAVE[intencao]
+    # Lookahead pela 1ª letra descarta rápido as palavras que não começam nenhum termo
+    iniciais = ''.join(sorted({padrao[0] for padrao in padroes}))
+    return re.compile(r'\b(?=[' + iniciais + r'])(?:' + '|'.join(grupos) + r')\b')
+
+PADRAO = _compilar()
+
+# ============================================
+# ROTEAMENTO
+# ============================================
+def normalizar(texto):
+    """Minúsculas e sem acentos"""
+    texto = texto.lower()
+    if texto.isascii():
+        return texto
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+def rotear(pergunta):
+    """
+    Classifica a pergunta em uma passada
+    Retorna: Rota(intencao, empresa, tipo_imposto, departamento_ti)
+    """
+    encontradas = set()
+    empresa = None
+    tipo_imposto = None
+    departamento_ti = False
+
+    for m in PADRAO.finditer(normalizar(pergunta)):
+        grupo = m.lastgroup
+        if grupo == 'empresa':
+            if empresa is None:
+                empresa = ' '.join(m.group().split())
+            # Citar a Pollvo também indica projetos (como na cascata original)
+            if m.group().startswith('pollvo'):
+                encontradas.add(PROJETOS)
+        elif grupo == 'imposto_tipo':
+            if tipo_imposto is None:
+                tipo_imposto = m.group().upper()
+            encontradas.add(IMPOSTOS)
+        elif grupo == 'ti':
+            departamento_ti = True
+            encontradas.add(FOLHA)
+        else:
+            encontradas.add(grupo)
+
+    intencao = next((i for i in PRIORIDADE if i in encontradas), RESUMO)
+    return Rota(intencao, empresa, tipo_imposto, departamento_ti)
+
+# Pedidos de resumo: RESUMO é também a rota de quem não disse do que trata
+_PEDIDO_RESUMO = re.compile(r'\b(?:resum\w*|gera(?:l|is)|panorama|visao)\b')
+
+def tem_assunto(pergunta):
+    """
+    A pergunta diz do que trata (intenção, empresa ou pedido de resumo)?
+    Senão é seguimento da anterior ("Quanto foi em março?") e herda o assunto
+    dela (MemoriaConversa.contextualizar)
+    """
+    rota = rotear(pergunta)
+    return (rota.intencao != RESUMO or rota.empresa is not None
+            or _PEDIDO_RESUMO.search(normalizar(pergunta)) is not None)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serviço HTTP (ASGI) do assistente financeiro
+
+Expõe o roteamento + consulta + geração de chat_langchain_rag_financeiro_v1:
+    POST /ask         {"pergunta": "...", "sessao": "opcional"} → JSON
+    POST /ask/stream  mesmo corpo → text/event-stream (SSE), um evento por trecho
+    GET  /saude       verificação de vida do worker
+
+- Histórico por sessão no armazém de sessões (comum/sessoes.py): com
+  SESSOES_URL=sqlite:///... ou redis://..., qualquer worker atende qualquer
+  turno; sem "sessao" no corpo, uma nova é criada e devolvida
+- Cada worker mantém um pool de conexões SQLite somente leitura, compartilhado
+  por todas as requisições dele, e o limitador de chamadas ao Bedrock
+- Timeout por requisição (TIMEOUT_REQUISICAO): /ask responde 504; no stream
+  um evento "erro" encerra a resposta
+- O import do assistente é leve (boto3/langchain ficam para o primeiro uso);
+  assistente.aquecer() carrega tudo na subida, antes da primeira requisição
+
+Uso (na pasta do dados_financeiros.db):
+    python servidor.py --porta 8000 --workers 4
+    uvicorn servidor:app --workers 4          (se o uvicorn estiver instalado)
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+import chat_langchain_rag_financeiro_v1 as assistente
+import roteador
+from comum.memoria import MemoriaConversa, ResumidorBedrock
+from comum.sessoes import ArmazemSessoes
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+TIMEOUT_REQUISICAO = float(os.environ.get('TIMEOUT_REQUISICAO', 30))  # segundos
+MAX_PERGUNTA = 2000   # caracteres
+
+armazem = ArmazemSessoes()
+
+# ============================================
+# SESSÃO
+# ============================================
+def carregar_memoria(id_sessao):
+    """Reconstrói a memória da conversa a partir dos eventos salvos"""
+    memoria = MemoriaConversa(resumidor=ResumidorBedrock(assistente.bedrock_client),
+                              tem_assunto=roteador.tem_assunto)
+    for evento in armazem.carregar(id_sessao):
+        memoria.aplicar_evento(evento)
+    return memoria
+
+def salvar_turno(id_sessao, memoria, resposta):
+    """Fecha a troca (pode resumir as antigas) e anexa os eventos novos"""
+    memoria.adicionar("assistant", resposta)
+    armazem.anexar(id_sessao, memoria.retirar_eventos())
+
+# ============================================
+# HTTP
+# ============================================
+async def _ler_corpo(receive):
+    corpo = b""
+    while True:
+        mensagem = await receive()
+        corpo += mensagem.get('body', b"")
+        if not mensagem.get('more_body'):
+            return corpo
+
+async def _responder_json(send, status, dados):
+    corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json; charset=utf-8'),
+                            (b'content-length', str(len(corpo)).encode())]})
+    await send({'type': 'http.response.body', 'body': corpo})
+
+def _evento_sse(dados, evento=None):
+    linha = f"event: {evento}\n" if evento else ""
+    return f"{linha}data: {json.dumps(dados, ensure_ascii=False)}\n\n".encode('utf-8')
+
+def _validar(corpo):
+    """(pergunta, id_sessao) ou levanta ValueError com a mensagem para o cliente"""
+    try:
+        dados = json.loads(corpo or b"{}")
+    except json.JSONDecodeError:
+        raise ValueError("Corpo deve ser JSON")
+    pergunta = str(dados.get('pergunta', '')).strip() if isinstance(dados, dict) else ''
+    if not pergunta:
+        raise ValueError("Campo 'pergunta' é obrigatório")
+    if len(pergunta) > MAX_PERGUNTA:
+        raise ValueError(f"Pergunta maior que {MAX_PERGUNTA} caracteres")
+    return pergunta, str(dados.get('sessao') or uuid.uuid4().hex)
+
+async def perguntar(send, pergunta, id_sessao):
+    inicio = time.perf_counter()
+    memoria = await asyncio.to_thread(carregar_memoria, id_sessao)
+    memoria.adicionar("user", pergunta)
+    try:
+        resposta = await asyncio.wait_for(
+            assistente.ainv_modelo(pergunta, memoria, exibir_status=False), TIMEOUT_REQUISICAO)
+    except asyncio.TimeoutError:
+        await _responder_json(send, 504, {'erro': f"Tempo limite de {TIMEOUT_REQUISICAO:g}s excedido",
+                                          'sessao': id_sessao})
+        return
+    except Exception as e:
+        await _responder_json(send, 502, {'erro': f"Falha ao gerar a resposta: {e}", 'sessao': id_sessao})
+        return
+    await asyncio.to_thread(salvar_turno, id_sessao, memoria, resposta)
+    await _responder_json(send, 200, {'resposta': resposta, 'sessao': id_sessao,
+                                      'tempo_ms': round((time.perf_counter() - inicio) * 1000, 1)})
+
+async def perguntar_stream(send, pergunta, id_sessao):
+    inicio = time.perf_counter()
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'text/event-stream; charset=utf-8'),
+                            (b'cache-control', b'no-cache')]})
+    memoria = await asyncio.to_thread(carregar_memoria, id_sessao)
+    memoria.adicionar("user", pergunta)
+
+    # Prazo único para a requisição inteira, não por trecho
+    prazo = inicio + TIMEOUT_REQUISICAO
+    trechos = []
+    gerador = assistente.ainv_modelo_stream(pergunta, memoria, exibir_status=False)
+    try:
+        while True:
+            try:
+                trecho = await asyncio.wait_for(gerador.__anext__(), max(0.0, prazo - time.perf_counter()))
+            except StopAsyncIteration:
+                break
+            trechos.append(trecho)
+            await send({'type': 'http.response.body', 'body': _evento_sse({'texto': trecho}), 'more_body': True})
+    except Exception as e:
+        if isinstance(e, asyncio.TimeoutError):
+            erro = f"Tempo limite de {TIMEOUT_REQUISICAO:g}s excedido"
+        else:
+            erro = f"Falha ao gerar a resposta: {e}"
+        await send({'type': 'http.response.body', 'more_body': False,
+                    'body': _evento_sse({'erro': erro, 'sessao': id_sessao}, 'erro')})
+        return
+    finally:
+        await gerador.aclose()
+
+    await asyncio.to_thread(salvar_turno, id_sessao, memoria, "".join(trechos))
+    await send({'type': 'http.response.body', 'more_body': False,
+                'body': _evento_sse({'sessao': id_sessao,
+                                     'tempo_ms': round((time.perf_counter() - inicio) * 1000, 1)}, 'fim')})
+
+ROTAS = {
+    ('POST', '/ask'): perguntar,
+    ('POST', '/ask/stream'): perguntar_stream,
+}
+
+async def app(scope, receive, send):
+    """Aplicação ASGI 3"""
+    if scope['type'] == 'lifespan':
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'lifespan.startup':
+                await asyncio.to_thread(assistente.aquecer)
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensagem['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    metodo, caminho = scope['method'], scope['path'].rstrip('/') or '/'
+    if (metodo, caminho) == ('GET', '/saude'):
+        await _responder_json(send, 200, {'status': 'ok', 'pid': os.getpid()})
+        return
+    rota = ROTAS.get((metodo, caminho))
+    if rota is None:
+        existe = any(caminho == c for _, c in ROTAS)
+        await _responder_json(send, 405 if existe else 404,
+                              {'erro': "Método não permitido" if existe else "Rota não encontrada"})
+        return
+
+    try:
+        pergunta, id_sessao = _validar(await _ler_corpo(receive))
+    except ValueError as e:
+        await _responder_json(send, 400, {'erro': str(e)})
+        return
+    await rota(send, pergunta, id_sessao)
+
+# ============================================
+# EXECUTAR
+# ============================================
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP do assistente financeiro")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        from comum.servidor_asgi import servir
+        # Uma vez no processo pai: os workers herdam boto3/langchain já carregados no fork
+        assistente.aquecer()
+        servir(app, args.host, args.porta, args.workers)
+        return
+    uvicorn.run('servidor:app', host=args.host, port=args.porta, workers=args.workers,
+                app_dir=os.path.dirname(os.path.abspath(__file__)))
+
+if __name__ == "__main__":
+    main()
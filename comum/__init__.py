@@ -0,0 +1,3 @@
+"""
+Módulos compartilhados entre os chatbots (conexões, cache, utilitários)
+"""
@@ -0,0 +1,297 @@
+"""
+Invocação de modelos do Bedrock (Anthropic Messages API) num lugar só
+
+Antes cada bot repetia invoke_model + json.loads(body) + content[0]['text'],
+com o próprio cliente e sem as mesmas proteções. O InvocadorBedrock junta:
+- Cliente compartilhado e ajustado (comum/clientes.py): pool, keep-alive,
+  timeouts e retentativas adaptive
+- LimitadorTaxa (RPM/TPM + backoff no throttling) em toda chamada, com a
+  contagem real de tokens corrigindo a estimativa
+- Cache de respostas plugável: qualquer objeto com gerar_chave/obter/guardar
+  (CacheRespostas); a chave leva model ID, parâmetros e mensagens
+- Uso e custo por chamada (UsoPrompt), inclusive os tokens de prompt caching
+- Streaming (invoke_model_with_response_stream) e versões assíncronas, que
+  rodam no LimitadorConcorrencia (uma thread por chamada em voo)
+- Um só formato para quem chama: o corpo é sempre o da Messages API e é
+  traduzido para o modelo (Amazon Nova; system sem checkpoint de cache nos
+  modelos sem prompt caching), e a resposta volta normalizada
+
+Uso:
+    invocador = InvocadorBedrock(MODEL_ID, cache=CacheRespostas())
+    corpo = montar_corpo("Oi!", system=SYSTEM_PROMPT, max_tokens=300)
+    resposta = invocador.invocar(corpo)          # Resposta(texto, uso, custo, cache)
+    for trecho in invocador.invocar_stream(corpo):
+        print(trecho, end="")
+"""
+import json
+from collections import namedtuple
+
+from comum.cache_prompt import PRECOS_HAIKU, UsoPrompt, extrair_uso, suporta_cache
+from comum.clientes import ClientePreguicoso
+from comum.concorrencia import limitador_padrao
+from comum.limitador_taxa import estimar_tokens, limitador_taxa_padrao
+
+# ============================================
+# CONFIGURAÇÕES PADRÃO
+# ============================================
+ANTHROPIC_VERSION = "bedrock-2023-05-31"
+
+# Trecho do model ID → preços por 1M tokens
+PRECOS_MODELOS = {
+    'nova-micro': {'input': 0.035, 'output': 0.14, 'cache_escrita': 0.035, 'cache_leitura': 0.00875},
+    'nova-lite': {'input': 0.06, 'output': 0.24, 'cache_escrita': 0.06, 'cache_leitura': 0.015},
+    'claude-3-5-haiku': PRECOS_HAIKU,
+    'claude-3-haiku': {'input': 0.25, 'output': 1.25, 'cache_escrita': 0.30, 'cache_leitura': 0.03},
+    'claude-sonnet-4-5': {'input': 3.00, 'output': 15.00, 'cache_escrita': 3.75, 'cache_leitura': 0.30},
+}
+
+# texto: resposta do modelo | uso: tokens (extrair_uso) | custo: US$ | cache: veio do cache de respostas
+# parada: stop_reason ('end_turn', 'max_tokens', ...) | modelo: model ID que respondeu
+Resposta = namedtuple('Resposta', ['texto', 'uso', 'custo', 'cache', 'parada', 'modelo'])
+
+def precos_modelo(model_id):
+    """Tabela de preços do modelo (Claude 3.5 Haiku se desconhecido)"""
+    for trecho, precos in PRECOS_MODELOS.items():
+        if trecho in model_id:
+            return precos
+    return PRECOS_HAIKU
+
+# ============================================
+# CORPO E RESPOSTA
+# ============================================
+def montar_corpo(mensagens, system=None, max_tokens=300, temperature=0.5, top_p=None):
+    """
+    Corpo da Messages API
+    mensagens: texto (uma mensagem do usuário) ou lista [{"role", "content"}]
+    system: texto ou blocos de montar_system (prompt caching)
+    """
+    if isinstance(mensagens, str):
+        mensagens = [{"role": "user", "content": mensagens}]
+    corpo = {
+        "anthropic_version": ANTHROPIC_VERSION,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+    if top_p is not None:
+        corpo["top_p"] = top_p
+    if system:
+        corpo["system"] = system
+    corpo["messages"] = mensagens
+    return corpo
+
+def ler_resposta(response):
+    """Corpo JSON de uma resposta do invoke_model"""
+    return json.loads(response['body'].read())
+
+def extrair_texto(resposta, padrao='Erro ao processar'):
+    """Texto do primeiro bloco de conteúdo da resposta"""
+    return (resposta.get('content') or [{}])[0].get('text', padrao)
+
+# ============================================
+# FORMATO POR FAMÍLIA DE MODELO
+# ============================================
+def eh_nova(model_id):
+    return 'amazon.nova' in model_id
+
+def _texto_system(system):
+    if isinstance(system, list):
+        return "\n\n".join(bloco.get('text', '') for bloco in system)
+    return system
+
+def corpo_para_modelo(model_id, corpo):
+    """Traduz o corpo da Messages API para o formato que o modelo aceita"""
+    system = corpo.get('system')
+    if eh_nova(model_id):
+        configuracao = {'maxTokens': corpo['max_tokens'], 'temperature': corpo.get('temperature', 0.5)}
+        if 'top_p' in corpo:
+            configuracao['topP'] = corpo['top_p']
+        mensagens = []
+        for mensagem in corpo['messages']:
+            conteudo = mensagem['content']
+            if isinstance(conteudo, str):
+                conteudo = [{'text': conteudo}]
+            else:
+                conteudo = [{'text': bloco.get('text', '')} for bloco in conteudo]
+            mensagens.append({'role': mensagem['role'], 'content': conteudo})
+        nova = {'schemaVersion': 'messages-v1', 'messages': mensagens, 'inferenceConfig': configuracao}
+        if system:
+            nova['system'] = [{'text': _texto_system(system)}]
+        return nova
+    if isinstance(system, list) and not suporta_cache(model_id):
+        # Checkpoint de cache num modelo sem prompt caching: volta ao texto único
+        return {**corpo, 'system': _texto_system(system)}
+    return corpo
+
+def _uso_nova(usage):
+    usage = usage or {}
+    return {
+        'input_tokens': usage.get('inputTokens', 0),
+        'output_tokens': usage.get('outputTokens', 0),
+        'cache_read_input_tokens': usage.get('cacheReadInputTokenCount', 0),
+        'cache_creation_input_tokens': usage.get('cacheWriteInputTokenCount', 0),
+    }
+
+def normalizar_resposta(model_id, resposta):
+    """Resposta do modelo no formato da Messages API (content, stop_reason, usage)"""
+    if not eh_nova(model_id):
+        return resposta
+    conteudo = resposta.get('output', {}).get('message', {}).get('content') or []
+    return {
+        'content': [{'type': 'text', 'text': bloco['text']} for bloco in conteudo if 'text' in bloco],
+        'stop_reason': resposta.get('stopReason'),
+        'usage': _uso_nova(resposta.get('usage')),
+    }
+
+def normalizar_evento(model_id, parte):
+    """Evento do streaming no formato da Messages API (message_start, content_block_delta, message_delta)"""
+    if not eh_nova(model_id):
+        return parte
+    if 'contentBlockDelta' in parte:
+        return {'type': 'content_block_delta',
+                'delta': {'text': parte['contentBlockDelta'].get('delta', {}).get('text', '')}}
+    if 'messageStop' in parte:
+        return {'type': 'message_delta', 'delta': {'stop_reason': parte['messageStop'].get('stopReason')}}
+    if 'metadata' in parte:
+        return {'type': 'message_delta', 'usage': _uso_nova(parte['metadata'].get('usage'))}
+    return {}
+
+# ============================================
+# INVOCADOR
+# ============================================
+class InvocadorBedrock:
+    """Um modelo do Bedrock com cliente, limitadores, cache de respostas e contagem de uso"""
+
+    def __init__(self, model_id, client=None, cache=None, uso=None,
+                 limitador_taxa=None, limitador=None, max_espera=None, texto_padrao='Erro ao processar'):
+        self.model_id = model_id
+        self.client = client if client is not None else ClientePreguicoso()
+        self.cache = cache
+        self.uso = uso if uso is not None else UsoPrompt(precos_modelo(model_id))
+        self.limitador_taxa = limitador_taxa or limitador_taxa_padrao
+        self.limitador = limitador or limitador_padrao
+        self.max_espera = max_espera   # teto de fila no limitador de taxa (chamadas opcionais)
+        self.texto_padrao = texto_padrao   # resposta sem bloco de texto
+
+    def chave_cache(self, corpo):
+        """Model ID + parâmetros + mensagens (só o texto, se for uma pergunta única)"""
+        parametros = {k: v for k, v in corpo.items() if k != 'messages'}
+        mensagens = corpo['messages']
+        if len(mensagens) == 1 and isinstance(mensagens[0]['content'], str):
+            prompt = mensagens[0]['content']
+        else:
+            prompt = json.dumps(mensagens, ensure_ascii=False)
+        return self.cache.gerar_chave(self.model_id, parametros, prompt)
+
+    def _do_cache(self, corpo):
+        """(chave, texto em cache ou None); chave None sem cache"""
+        if self.cache is None:
+            return None, None
+        chave = self.chave_cache(corpo)
+        return chave, self.cache.obter(chave)
+
+    def _executar(self, chamada, dados, max_tokens, contar_tokens=None):
+        """Chamada ao cliente passando pelo limitador de taxa do modelo"""
+        return self.limitador_taxa.executar(
+            self.model_id, chamada,
+            tokens_estimados=estimar_tokens(dados, max_tokens),
+            contar_tokens=contar_tokens,
+            max_espera=self.max_espera,
+        )
+
+    def invocar(self, corpo):
+        """Resposta completa (Resposta); ThrottlingException só depois das retentativas"""
+        chave, texto = self._do_cache(corpo)
+        if texto is not None:
+            return Resposta(texto, extrair_uso(None), 0.0, True, 'cache', self.model_id)
+
+        dados = json.dumps(corpo_para_modelo(self.model_id, corpo))
+
+        def _invocar():
+            response = self.client.invoke_model(
+                body=dados,
+                modelId=self.model_id,
+                accept="application/json",
+                contentType="application/json"
+            )
+            return normalizar_resposta(self.model_id, ler_resposta(response))
+
+        resposta = self._executar(_invocar, dados, corpo['max_tokens'],
+                                  contar_tokens=lambda r: sum(extrair_uso(r.get('usage')).values()))
+        texto = extrair_texto(resposta, self.texto_padrao)
+        uso, custo = self.uso.registrar(resposta.get('usage'))
+        parada = resposta.get('stop_reason')
+        if chave is not None and parada != 'max_tokens':
+            self.cache.guardar(chave, texto)
+        return Resposta(texto, uso, custo, False, parada, self.model_id)
+
+    def invocar_stream(self, corpo):
+        """
+        Gera os trechos de texto conforme o Bedrock os envia; o uso é registrado no fim,
+        mesmo se o consumidor fechar o gerador antes
+        Retorna o stop_reason (valor do StopIteration, 'cache' se veio do cache)
+        """
+        chave, texto = self._do_cache(corpo)
+        if texto is not None:
+            yield texto
+            return 'cache'
+
+        dados = json.dumps(corpo_para_modelo(self.model_id, corpo))
+
+        def _abrir():
+            # O throttling acontece na abertura do stream: só ela passa pelo limitador
+            return self.client.invoke_model_with_response_stream(
+                body=dados,
+                modelId=self.model_id,
+                accept="application/json",
+                contentType="application/json"
+            )
+
+        response = self._executar(_abrir, dados, corpo['max_tokens'])
+        trechos = []
+        usage = {}
+        parada = None
+        try:
+            for evento in response['body']:
+                chunk = evento.get('chunk')
+                if not chunk:
+                    continue
+                parte = normalizar_evento(self.model_id, json.loads(chunk['bytes']))
+                tipo = parte.get('type')
+                if tipo == 'content_block_delta':
+                    texto = parte.get('delta', {}).get('text', '')
+                    if texto:
+                        trechos.append(texto)
+                        yield texto
+                elif tipo == 'message_start':
+                    # Tokens de entrada e de cache chegam no início do stream
+                    usage.update(parte.get('message', {}).get('usage', {}))
+                elif tipo == 'message_delta':
+                    usage.update(parte.get('usage', {}))
+                    parada = parte.get('delta', {}).get('stop_reason') or parada
+        finally:
+            # Também quando o cliente desiste no meio (SSE desconectado): o uso
+            # de saída não chegou, então é estimado pelo texto já gerado
+            fechar = getattr(response['body'], 'close', None)
+            if fechar is not None:
+                fechar()
+            if 'output_tokens' not in usage:
+                usage['output_tokens'] = estimar_tokens("".join(trechos))
+            uso, _ = self.uso.registrar(usage)
+            # Igual ao contar_tokens do invocar: o balde de TPM recebe o uso real
+            self.limitador_taxa.registrar_uso(
+                self.model_id, sum(uso.values()) - estimar_tokens(dados, corpo['max_tokens'])
+            )
+
+        # Resposta cortada no max_tokens não vai para o cache (igual ao invocar)
+        if chave is not None and trechos and parada != 'max_tokens':
+            self.cache.guardar(chave, "".join(trechos))
+        return parada
+
+    async def ainvocar(self, corpo):
+        """invocar() numa thread do limitador de concorrência"""
+        return await self.limitador.executar(self.invocar, corpo)
+
+    async def ainvocar_stream(self, corpo):
+        """invocar_stream() consumido numa thread; os trechos chegam ao event loop"""
+        async for trecho in self.limitador.iterar(self.invocar_stream, corpo):
+            yield trecho
@@ -0,0 +1,240 @@
+"""
+Endpoint Bedrock Runtime falso para testes locais (sem AWS)
+
+Atende InvokeModel e InvokeModelWithResponseStream no formato da Messages API
+da Anthropic (ou no do Amazon Nova, para modelos amazon.nova-*), com latência
+simulada (opcionalmente por modelo). Blocos "system" com cache_control são
+tratados como prompt caching (cache_creation/cache_read_input_tokens). Um cliente boto3 real aponta para ele via
+endpoint_url, então o caminho HTTP/pool de conexões do botocore é exercitado.
+
+Uso:
+    servidor, url = iniciar_servidor_fake(latencia=0.2)
+    client = criar_cliente_fake(url)
+"""
+import base64
+import json
+import struct
+import threading
+import time
+import zlib
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from comum.clientes import MAX_CONEXOES, configuracao_padrao
+
+# ============================================
+# CODIFICAÇÃO EVENT STREAM (application/vnd.amazon.eventstream)
+# ============================================
+def _cabecalho_string(nome, valor):
+    nome_b = nome.encode('utf-8')
+    valor_b = valor.encode('utf-8')
+    return struct.pack('>B', len(nome_b)) + nome_b + struct.pack('>BH', 7, len(valor_b)) + valor_b
+
+def codificar_evento(evento):
+    """Codifica um evento da Anthropic como mensagem 'chunk' do event stream"""
+    payload = json.dumps({
+        'bytes': base64.b64encode(json.dumps(evento).encode('utf-8')).decode('ascii')
+    }).encode('utf-8')
+    cabecalhos = (
+        _cabecalho_string(':event-type', 'chunk') +
+        _cabecalho_string(':content-type', 'application/json') +
+        _cabecalho_string(':message-type', 'event')
+    )
+    total = 12 + len(cabecalhos) + len(payload) + 4
+    prelude = struct.pack('>II', total, len(cabecalhos))
+    prelude += struct.pack('>I', zlib.crc32(prelude) & 0xffffffff)
+    mensagem = prelude + cabecalhos + payload
+    return mensagem + struct.pack('>I', zlib.crc32(mensagem) & 0xffffffff)
+
+# ============================================
+# RESPOSTAS SIMULADAS
+# ============================================
+RESPOSTA_INCERTA = "Não tenho certeza sobre isso."
+
+def _texto_resposta(corpo, incerto=False):
+    if incerto:
+        return RESPOSTA_INCERTA
+    mensagens = corpo.get('messages') or [{}]
+    conteudo = mensagens[-1].get('content', '')
+    if isinstance(conteudo, list):
+        conteudo = " ".join(bloco.get('text', '') for bloco in conteudo if isinstance(bloco, dict))
+    return f"Resposta simulada para: {str(conteudo)[:60]}"
+
+def _do_modelo(valores, model_id, padrao):
+    """Valor do primeiro trecho de model ID que aparece em model_id"""
+    return next((valor for trecho, valor in valores.items() if trecho in model_id), padrao)
+
+def _estimar_tokens(corpo):
+    return max(1, len(json.dumps(corpo, ensure_ascii=False)) // 4)
+
+def _uso_entrada(servidor, corpo):
+    """usage de entrada; o prefixo até o último checkpoint conta como cache"""
+    total = _estimar_tokens(corpo)
+    system = corpo.get('system')
+    if not isinstance(system, list):
+        return {'input_tokens': total}
+    
+    marcados = [i for i, bloco in enumerate(system) if bloco.get('cache_control')]
+    if not marcados:
+        return {'input_tokens': total}
+    
+    prefixo = json.dumps(system[:marcados[-1] + 1], ensure_ascii=False)
+    tokens_prefixo = min(total, len(prefixo) // 4)
+    if tokens_prefixo < servidor.minimo_cache:
+        return {'input_tokens': total}
+    
+    with servidor.lock:
+        lido = prefixo in servidor.prefixos_cache
+        servidor.prefixos_cache.add(prefixo)
+    return {
+        'input_tokens': total - tokens_prefixo,
+        'cache_read_input_tokens': tokens_prefixo if lido else 0,
+        'cache_creation_input_tokens': 0 if lido else tokens_prefixo,
+    }
+
+class _HandlerBedrockFake(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_POST(self):
+        tamanho = int(self.headers.get('Content-Length', 0))
+        corpo = json.loads(self.rfile.read(tamanho) or b'{}')
+        servidor = self.server
+        
+        # /model/{modelId}/invoke[-with-response-stream]
+        model_id = unquote(self.path.split('/')[2]) if self.path.count('/') >= 3 else ''
+        with servidor.lock:
+            servidor.requisicoes += 1
+            servidor.por_modelo[model_id] = servidor.por_modelo.get(model_id, 0) + 1
+        
+        incerto = any(trecho in model_id for trecho in servidor.modelos_incertos)
+        texto = _texto_resposta(corpo, incerto)
+        uso_entrada = _uso_entrada(servidor, corpo)
+        tokens_out = max(1, len(texto) // 4)
+        latencia = _do_modelo(servidor.latencia_por_modelo, model_id, servidor.latencia)
+        nova = 'amazon.nova' in model_id
+        
+        if self.path.endswith('/invoke-with-response-stream'):
+            self._responder_stream(texto, uso_entrada, tokens_out, latencia, nova)
+        else:
+            self._responder_json(texto, uso_entrada, tokens_out, latencia, nova)
+    
+    def _responder_json(self, texto, uso_entrada, tokens_out, latencia, nova=False):
+        time.sleep(latencia)
+        if nova:
+            corpo = {
+                'output': {'message': {'role': 'assistant', 'content': [{'text': texto}]}},
+                'stopReason': 'end_turn',
+                'usage': {'inputTokens': uso_entrada['input_tokens'], 'outputTokens': tokens_out,
+                          'totalTokens': uso_entrada['input_tokens'] + tokens_out},
+            }
+        else:
+            corpo = {
+                'id': 'msg_fake',
+                'type': 'message',
+                'role': 'assistant',
+                'content': [{'type': 'text', 'text': texto}],
+                'stop_reason': 'end_turn',
+                'usage': {**uso_entrada, 'output_tokens': tokens_out},
+            }
+        dados = json.dumps(corpo).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+    
+    def _enviar_chunk(self, dados):
+        self.wfile.write(f"{len(dados):X}\r\n".encode('ascii') + dados + b"\r\n")
+        self.wfile.flush()
+    
+    def _responder_stream(self, texto, uso_entrada, tokens_out, latencia, nova=False):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.amazon.eventstream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        
+        # Primeiro token após a latência "de fila"; o resto chega em rajadas
+        time.sleep(latencia)
+        if nova:
+            self._stream_nova(texto, uso_entrada, tokens_out)
+            return
+        self._enviar_chunk(codificar_evento({
+            'type': 'message_start',
+            'message': {'usage': {**uso_entrada, 'output_tokens': 0}},
+        }))
+        palavras = texto.split(' ')
+        for i, palavra in enumerate(palavras):
+            trecho = palavra if i == 0 else ' ' + palavra
+            self._enviar_chunk(codificar_evento({
+                'type': 'content_block_delta',
+                'index': 0,
+                'delta': {'type': 'text_delta', 'text': trecho},
+            }))
+            time.sleep(self.server.intervalo_tokens)
+        self._enviar_chunk(codificar_evento({
+            'type': 'message_delta',
+            'delta': {'stop_reason': 'end_turn'},
+            'usage': {'output_tokens': tokens_out},
+        }))
+        self._enviar_chunk(codificar_evento({'type': 'message_stop'}))
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+    
+    def _stream_nova(self, texto, uso_entrada, tokens_out):
+        self._enviar_chunk(codificar_evento({'messageStart': {'role': 'assistant'}}))
+        for i, palavra in enumerate(texto.split(' ')):
+            self._enviar_chunk(codificar_evento({
+                'contentBlockDelta': {'delta': {'text': palavra if i == 0 else ' ' + palavra},
+                                      'contentBlockIndex': 0},
+            }))
+            time.sleep(self.server.intervalo_tokens)
+        self._enviar_chunk(codificar_evento({'contentBlockStop': {'contentBlockIndex': 0}}))
+        self._enviar_chunk(codificar_evento({'messageStop': {'stopReason': 'end_turn'}}))
+        self._enviar_chunk(codificar_evento({
+            'metadata': {'usage': {'inputTokens': uso_entrada['input_tokens'], 'outputTokens': tokens_out}},
+        }))
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+# ============================================
+# INICIALIZAÇÃO
+# ============================================
+def iniciar_servidor_fake(latencia=0.2, intervalo_tokens=0.005, porta=0, minimo_cache=0,
+                          latencia_por_modelo=None, modelos_incertos=()):
+    """
+    Sobe o servidor numa thread daemon. Retorna (servidor, url)
+    minimo_cache: tokens mínimos do prefixo para o checkpoint valer
+    latencia_por_modelo: {trecho do model ID: latência}, sobrepõe 'latencia'
+    modelos_incertos: trechos de model ID que respondem RESPOSTA_INCERTA
+    """
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), _HandlerBedrockFake)
+    servidor.daemon_threads = True
+    servidor.latencia = latencia
+    servidor.intervalo_tokens = intervalo_tokens
+    servidor.latencia_por_modelo = latencia_por_modelo or {}
+    servidor.modelos_incertos = tuple(modelos_incertos)
+    servidor.requisicoes = 0
+    servidor.por_modelo = {}
+    servidor.minimo_cache = minimo_cache
+    servidor.prefixos_cache = set()
+    servidor.lock = threading.Lock()
+    
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+def criar_cliente_fake(url, max_pool_connections=MAX_CONEXOES):
+    """Cliente boto3 bedrock-runtime apontando para o endpoint falso (configuração dos clientes reais)"""
+    import boto3
+    
+    return boto3.client(
+        service_name='bedrock-runtime',
+        region_name='us-east-2',
+        endpoint_url=url,
+        aws_access_key_id='fake',
+        aws_secret_access_key='fake',
+        config=configuracao_padrao(max_pool_connections=max_pool_connections, retries={'max_attempts': 0})
+    )
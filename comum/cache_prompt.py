@@ -0,0 +1,145 @@
+"""
+Prompt caching do Bedrock (Anthropic Messages API) para os prompts estáticos
+
+- Os blocos fixos (system prompt + instruções do template) viram blocos de
+  texto no campo "system"; o último recebe cache_control (checkpoint)
+- O Bedrock reaproveita o prefixo já processado: menos tokens cobrados a
+  preço cheio e menor tempo até o primeiro token
+- Uso: cache_read_input_tokens / cache_creation_input_tokens são somados e
+  precificados separadamente (leitura bem mais barata, escrita um pouco mais cara)
+
+Obs.: o prefixo só é cacheado a partir de um mínimo de tokens por modelo;
+abaixo disso o checkpoint é ignorado pelo Bedrock, sem erro.
+"""
+import threading
+
+# ============================================
+# MODELOS COM SUPORTE
+# ============================================
+# Trecho do model ID → mínimo de tokens do prefixo para o checkpoint valer
+MODELOS_COM_CACHE = {
+    'claude-3-5-haiku': 2048,
+    'claude-3-7-sonnet': 1024,
+    'claude-sonnet-4': 1024,
+    'claude-opus-4': 1024,
+}
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Preços Claude 3.5 Haiku (por 1M tokens)
+PRECOS_HAIKU = {
+    'input': 0.80,
+    'output': 4.00,
+    'cache_escrita': 1.00,
+    'cache_leitura': 0.08,
+}
+
+def minimo_tokens_cache(model_id):
+    """Mínimo de tokens do prefixo cacheável (None se o modelo não suporta)"""
+    for trecho, minimo in MODELOS_COM_CACHE.items():
+        if trecho in model_id:
+            return minimo
+    return None
+
+def suporta_cache(model_id):
+    return minimo_tokens_cache(model_id) is not None
+
+# ============================================
+# MONTAGEM DO CORPO
+# ============================================
+def montar_system(model_id, *blocos):
+    """
+    Campo "system" da requisição a partir dos blocos estáticos
+    Com suporte: lista de blocos de texto, checkpoint no último
+    Sem suporte: texto único (formato anterior)
+    """
+    blocos = [b for b in blocos if b]
+    if not suporta_cache(model_id):
+        return "\n\n".join(blocos)
+
+    system = [{"type": "text", "text": texto} for texto in blocos]
+    if system:
+        system[-1]["cache_control"] = CACHE_CONTROL
+    return system
+
+def separar_prompt(prompt_value):
+    """
+    Separa a saída de um ChatPromptTemplate em (blocos estáticos, texto do usuário)
+    Mensagens system/assistant do template são fixas → vão para o system cacheado
+    """
+    estaticos = []
+    humanas = []
+    for mensagem in prompt_value.to_messages():
+        if mensagem.type == 'human':
+            humanas.append(mensagem.content)
+        else:
+            estaticos.append(mensagem.content)
+    return tuple(estaticos), "\n\n".join(humanas)
+
+# ============================================
+# USO E CUSTO
+# ============================================
+def extrair_uso(usage):
+    """Normaliza o campo usage (invoke_model ou message_start do streaming)"""
+    usage = usage or {}
+    return {
+        'tokens_in': usage.get('input_tokens', 0),
+        'tokens_out': usage.get('output_tokens', 0),
+        'cache_leitura': usage.get('cache_read_input_tokens', 0) or 0,
+        'cache_escrita': usage.get('cache_creation_input_tokens', 0) or 0,
+    }
+
+def calcular_custo(uso, precos=PRECOS_HAIKU):
+    """Custo em US$ de uma chamada (input_tokens já exclui os tokens de cache)"""
+    return (uso['tokens_in'] * precos['input'] +
+            uso['tokens_out'] * precos['output'] +
+            uso['cache_escrita'] * precos['cache_escrita'] +
+            uso['cache_leitura'] * precos['cache_leitura']) / 1_000_000
+
+class UsoPrompt:
+    """Acumula tokens/custo das chamadas de um bot (thread-safe)"""
+
+    def __init__(self, precos=PRECOS_HAIKU):
+        self.precos = precos
+        self._lock = threading.Lock()
+        self.chamadas = 0
+        self.totais = {'tokens_in': 0, 'tokens_out': 0, 'cache_leitura': 0, 'cache_escrita': 0}
+        self.custo = 0.0
+
+    def registrar(self, usage):
+        """Soma o usage de uma resposta; retorna (uso normalizado, custo)"""
+        uso = extrair_uso(usage)
+        custo = calcular_custo(uso, self.precos)
+        with self._lock:
+            self.chamadas += 1
+            for chave, valor in uso.items():
+                self.totais[chave] += valor
+            self.custo += custo
+        return uso, custo
+
+    def estatisticas(self):
+        with self._lock:
+            totais = dict(self.totais)
+            custo = self.custo
+            chamadas = self.chamadas
+
+        # Quanto custaria sem cache: leituras e escritas a preço de input
+        sem_cache = custo + (totais['cache_leitura'] * (self.precos['input'] - self.precos['cache_leitura']) +
+                             totais['cache_escrita'] * (self.precos['input'] - self.precos['cache_escrita'])) / 1_000_000
+        entrada = totais['tokens_in'] + totais['cache_leitura'] + totais['cache_escrita']
+        return {
+            'chamadas': chamadas,
+            **totais,
+            'custo': custo,
+            'economia': sem_cache - custo,
+            'taxa_leitura_cache': totais['cache_leitura'] / entrada * 100 if entrada else 0.0,
+        }
+
+    def mostrar_estatisticas(self):
+        """Exibe uso de tokens e efeito do prompt caching"""
+        stats = self.estatisticas()
+        print(f"🧊 Prompt caching: {stats['cache_leitura']:,} tokens lidos do cache "
+              f"({stats['taxa_leitura_cache']:.1f}% da entrada) | {stats['cache_escrita']:,} escritos | "
+              f"economia ${stats['economia']:.6f}")
+        print(f"💰 Modelo: {stats['chamadas']} chamadas | {stats['tokens_in']:,} in / "
+              f"{stats['tokens_out']:,} out | ${stats['custo']:.6f}")
@@ -0,0 +1,192 @@
+"""
+Cache de respostas do Bedrock com TTL e despejo LRU
+
+A chave é o hash do model ID, dos parâmetros de geração e do prompt final
+(já aumentado com os dados do banco). Se as linhas retornadas pelo SQL mudam,
+o prompt muda e a resposta antiga deixa de ser encontrada automaticamente.
+
+Backends: memória (padrão) ou SQLite em disco (caminho_sqlite=...), que
+sobrevive a reinícios e pode ser compartilhado entre processos.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ============================================
+# CONFIGURAÇÕES PADRÃO
+# ============================================
+TTL_SEGUNDOS = 3600   # 1 hora
+MAX_ITENS = 500
+
+def normalizar_texto(texto):
+    """Normaliza espaços e caixa para que variações triviais gerem a mesma chave"""
+    return " ".join(str(texto).split()).casefold()
+
+# ============================================
+# BACKENDS
+# ============================================
+class _BackendMemoria:
+    """LRU em memória: OrderedDict chave -> (expira_em, resposta)"""
+    
+    def __init__(self, max_itens):
+        self.max_itens = max_itens
+        self.itens = OrderedDict()
+    
+    def obter(self, chave, agora):
+        item = self.itens.get(chave)
+        if item is None:
+            return None
+        expira_em, resposta = item
+        if expira_em <= agora:
+            del self.itens[chave]
+            return None
+        self.itens.move_to_end(chave)
+        return resposta
+    
+    def guardar(self, chave, resposta, expira_em):
+        self.itens[chave] = (expira_em, resposta)
+        self.itens.move_to_end(chave)
+        despejados = 0
+        while len(self.itens) > self.max_itens:
+            self.itens.popitem(last=False)
+            despejados += 1
+        return despejados
+    
+    def tamanho(self):
+        return len(self.itens)
+    
+    def limpar(self):
+        self.itens.clear()
+
+class _BackendSQLite:
+    """LRU em disco: tabela com expiração e último acesso indexado"""
+    
+    def __init__(self, caminho, max_itens):
+        self.max_itens = max_itens
+        self.conn = sqlite3.connect(caminho, check_same_thread=False, timeout=10)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS cache_respostas (
+            chave TEXT PRIMARY KEY,
+            resposta TEXT NOT NULL,
+            expira_em REAL NOT NULL,
+            acessado_em REAL NOT NULL
+        ) WITHOUT ROWID
+        ''')
+        self.conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_cache_respostas_acesso
+        ON cache_respostas(acessado_em)
+        ''')
+        self.conn.commit()
+    
+    def obter(self, chave, agora):
+        row = self.conn.execute(
+            'SELECT resposta, expira_em FROM cache_respostas WHERE chave = ?', (chave,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= agora:
+            self.conn.execute('DELETE FROM cache_respostas WHERE chave = ?', (chave,))
+            self.conn.commit()
+            return None
+        self.conn.execute(
+            'UPDATE cache_respostas SET acessado_em = ? WHERE chave = ?', (agora, chave)
+        )
+        self.conn.commit()
+        return row[0]
+    
+    def guardar(self, chave, resposta, expira_em):
+        agora = time.time()
+        self.conn.execute('''
+        INSERT OR REPLACE INTO cache_respostas (chave, resposta, expira_em, acessado_em)
+        VALUES (?, ?, ?, ?)
+        ''', (chave, resposta, expira_em, agora))
+        
+        excesso = self.tamanho() - self.max_itens
+        if excesso > 0:
+            self.conn.execute('''
+            DELETE FROM cache_respostas WHERE chave IN (
+                SELECT chave FROM cache_respostas ORDER BY acessado_em LIMIT ?
+            )
+            ''', (excesso,))
+        self.conn.commit()
+        return max(excesso, 0)
+    
+    def tamanho(self):
+        return self.conn.execute('SELECT COUNT(*) FROM cache_respostas').fetchone()[0]
+    
+    def limpar(self):
+        self.conn.execute('DELETE FROM cache_respostas')
+        self.conn.commit()
+
+# ============================================
+# CACHE DE RESPOSTAS
+# ============================================
+class CacheRespostas:
+    """Cache de respostas com TTL, LRU e contadores de acerto/falha"""
+    
+    def __init__(self, ttl_segundos=TTL_SEGUNDOS, max_itens=MAX_ITENS, caminho_sqlite=None):
+        self.ttl_segundos = ttl_segundos
+        if caminho_sqlite:
+            self.backend = _BackendSQLite(caminho_sqlite, max_itens)
+        else:
+            self.backend = _BackendMemoria(max_itens)
+        self._lock = threading.Lock()
+        
+        # Estatísticas
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+    
+    @staticmethod
+    def gerar_chave(model_id, parametros, prompt):
+        """Hash SHA-256 de model ID + parâmetros de geração + prompt normalizado"""
+        material = json.dumps(
+            [model_id, parametros, normalizar_texto(prompt)],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+    
+    def obter(self, chave):
+        """Retorna a resposta em cache ou None (contabiliza acerto/falha)"""
+        with self._lock:
+            resposta = self.backend.obter(chave, time.time())
+            if resposta is None:
+                self.falhas += 1
+            else:
+                self.acertos += 1
+            return resposta
+    
+    def guardar(self, chave, resposta):
+        """Armazena resposta com expiração em ttl_segundos"""
+        with self._lock:
+            self.despejos += self.backend.guardar(
+                chave, resposta, time.time() + self.ttl_segundos
+            )
+    
+    def limpar(self):
+        with self._lock:
+            self.backend.limpar()
+    
+    def estatisticas(self):
+        """Retorna contadores de acerto/falha do cache"""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'despejos': self.despejos,
+                'itens': self.backend.tamanho(),
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+            }
+    
+    def mostrar_estatisticas(self):
+        """Exibe estatísticas do cache"""
+        stats = self.estatisticas()
+        print(f"🗃️  Cache de respostas: {stats['acertos']} acertos | {stats['falhas']} falhas "
+              f"({stats['taxa_acerto'] * 100:.1f}% acerto) | {stats['itens']} itens")
@@ -0,0 +1,97 @@
+"""
+Clientes AWS criados sob demanda (inicialização a frio rápida)
+
+Importar o boto3 e montar um cliente custa ~0,2 s; fazer isso no import de
+cada bot deixa lento subir um worker, um teste ou o REPL, mesmo quando o
+modelo nem é chamado. Aqui o boto3 só é importado na primeira chamada real:
+- obter_cliente(): um cliente por (serviço, região) e por processo, criado
+  sob lock (clientes boto3 são thread-safe, mas não atravessam um fork)
+- ClientePreguicoso: objeto com a mesma interface do cliente, para ficar no
+  lugar do antigo `client = boto3.client(...)` de módulo; o cliente de verdade
+  nasce no primeiro atributo acessado (invoke_model, exceptions, ...)
+- definir_cliente(): troca o cliente de todos os bots do processo (ex.: o
+  endpoint falso dos benchmarks)
+
+Todos saem com a mesma configuração do botocore (configuracao_padrao):
+- Pool de conexões maior que o limitador de concorrência, para nenhuma
+  chamada esperar conexão HTTP livre; keep-alive TCP nas conexões ociosas
+- Timeouts de conexão curtos (endpoint fora do ar falha rápido) e de
+  leitura longos o bastante para respostas em streaming
+- Retentativas no modo adaptive para erros transitórios (rede, 5xx) e
+  controle de envio no cliente após throttling; o throttling que sobra cai
+  no LimitadorTaxa (comum/limitador_taxa.py), com fila e backoff por modelo
+
+Uso:
+    client = ClientePreguicoso()            # no import: nada do boto3
+    client.invoke_model(...)                # aqui: importa e cria
+"""
+import os
+import threading
+
+# ============================================
+# CONFIGURAÇÕES PADRÃO
+# ============================================
+SERVICO_PADRAO = 'bedrock-runtime'
+REGIAO_PADRAO = 'us-east-2'
+
+MAX_CONEXOES = 25          # pool HTTP por cliente (botocore: 10)
+TIMEOUT_CONEXAO = 3        # segundos para abrir a conexão
+TIMEOUT_LEITURA = 60       # segundos sem receber bytes (inclui pausas do streaming)
+MAX_TENTATIVAS_HTTP = 3    # total de tentativas do botocore, a primeira inclusa
+
+_clientes = {}
+_substitutos = {}
+_lock = threading.Lock()
+
+def configuracao_padrao(**opcoes):
+    """botocore Config dos clientes (opcoes sobrescrevem os padrões)"""
+    from botocore.config import Config
+    padrao = {
+        'max_pool_connections': MAX_CONEXOES,
+        'tcp_keepalive': True,
+        'connect_timeout': TIMEOUT_CONEXAO,
+        'read_timeout': TIMEOUT_LEITURA,
+        'retries': {'mode': 'adaptive', 'total_max_attempts': MAX_TENTATIVAS_HTTP},
+    }
+    padrao.update(opcoes)
+    return Config(**padrao)
+
+# ============================================
+# FÁBRICA
+# ============================================
+def obter_cliente(servico=SERVICO_PADRAO, regiao=REGIAO_PADRAO):
+    """Cliente boto3 compartilhado do processo, criado (e o boto3 importado) no primeiro uso"""
+    cliente = _substitutos.get((servico, regiao))
+    if cliente is not None:
+        return cliente
+    chave = (servico, regiao, os.getpid())
+    cliente = _clientes.get(chave)
+    if cliente is None:
+        with _lock:
+            cliente = _clientes.get(chave)
+            if cliente is None:
+                import boto3
+                cliente = _clientes[chave] = boto3.client(service_name=servico, region_name=regiao,
+                                                          config=configuracao_padrao())
+    return cliente
+
+def definir_cliente(cliente, servico=SERVICO_PADRAO, regiao=REGIAO_PADRAO):
+    """Faz obter_cliente() devolver 'cliente' (também nos processos filhos); None volta ao padrão"""
+    with _lock:
+        if cliente is None:
+            _substitutos.pop((servico, regiao), None)
+        else:
+            _substitutos[(servico, regiao)] = cliente
+
+class ClientePreguicoso:
+    """Representa um cliente boto3 sem criá-lo; repassa os atributos ao cliente de obter_cliente()"""
+
+    def __init__(self, servico=SERVICO_PADRAO, regiao=REGIAO_PADRAO):
+        self.servico = servico
+        self.regiao = regiao
+
+    def __getattr__(self, nome):
+        return getattr(obter_cliente(self.servico, self.regiao), nome)
+
+    def __repr__(self):
+        return f"<ClientePreguicoso {self.servico} ({self.regiao})>"
@@ -0,0 +1,135 @@
+"""
+Camada assíncrona para as chamadas (síncronas) do boto3
+
+As chamadas ao Bedrock são delegadas a um pool de threads dedicado e um
+limitador controla quantas ficam em voo ao mesmo tempo, permitindo atender
+várias conversas concorrentes no mesmo processo (ex.: atrás de um servidor web).
+"""
+import asyncio
+import functools
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+# ============================================
+# CONFIGURAÇÕES PADRÃO
+# ============================================
+# Abaixo do pool HTTP do cliente compartilhado (comum/clientes.py, MAX_CONEXOES):
+# toda chamada em voo tem conexão livre, e sobra folga para resumos e embeddings
+MAX_SIMULTANEAS = 10
+
+_FIM = object()
+
+# ============================================
+# LIMITADOR DE CONCORRÊNCIA
+# ============================================
+class LimitadorConcorrencia:
+    """
+    Limita chamadas simultâneas e executa funções bloqueantes em threads
+    Pode ser usado a partir de vários event loops (um semáforo por loop)
+    """
+    
+    def __init__(self, max_simultaneas=MAX_SIMULTANEAS):
+        self.max_simultaneas = max_simultaneas
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_simultaneas,
+            thread_name_prefix='bedrock'
+        )
+        self._semaforos = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        
+        # Estatísticas
+        self.em_execucao = 0
+        self.aguardando = 0
+        self.pico_execucao = 0
+        self.pico_aguardando = 0
+        self.total_chamadas = 0
+        self.tempo_espera_total = 0.0
+    
+    def _semaforo(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaforo = self._semaforos.get(loop)
+            if semaforo is None:
+                semaforo = asyncio.Semaphore(self.max_simultaneas)
+                self._semaforos[loop] = semaforo
+            return semaforo
+    
+    async def __aenter__(self):
+        inicio = time.perf_counter()
+        with self._lock:
+            self.aguardando += 1
+            self.pico_aguardando = max(self.pico_aguardando, self.aguardando)
+        try:
+            await self._semaforo().acquire()
+        finally:
+            with self._lock:
+                self.aguardando -= 1
+        with self._lock:
+            self.em_execucao += 1
+            self.pico_execucao = max(self.pico_execucao, self.em_execucao)
+            self.total_chamadas += 1
+            self.tempo_espera_total += time.perf_counter() - inicio
+        return self
+    
+    async def __aexit__(self, *exc):
+        with self._lock:
+            self.em_execucao -= 1
+        self._semaforo().release()
+        return False
+    
+    async def executar(self, func, *args, **kwargs):
+        """Executa func(*args, **kwargs) numa thread, respeitando o limite"""
+        async with self:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
+            )
+    
+    async def iterar(self, gerador_func, *args, **kwargs):
+        """
+        Consome um gerador síncrono numa thread e repassa os itens ao event loop
+        (usado para streaming assíncrono)
+        """
+        async with self:
+            loop = asyncio.get_running_loop()
+            fila = asyncio.Queue()
+            
+            def _produzir():
+                try:
+                    for item in gerador_func(*args, **kwargs):
+                        loop.call_soon_threadsafe(fila.put_nowait, item)
+                except BaseException as erro:
+                    loop.call_soon_threadsafe(fila.put_nowait, erro)
+                finally:
+                    loop.call_soon_threadsafe(fila.put_nowait, _FIM)
+            
+            tarefa = loop.run_in_executor(self._executor, _produzir)
+            while True:
+                item = await fila.get()
+                if item is _FIM:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+            await tarefa
+    
+    def estatisticas(self):
+        """Retorna contadores de concorrência"""
+        with self._lock:
+            return {
+                'max_simultaneas': self.max_simultaneas,
+                'em_execucao': self.em_execucao,
+                'aguardando': self.aguardando,
+                'pico_execucao': self.pico_execucao,
+                'pico_aguardando': self.pico_aguardando,
+                'total_chamadas': self.total_chamadas,
+                'espera_media_ms': (
+                    self.tempo_espera_total / self.total_chamadas * 1000
+                    if self.total_chamadas else 0.0
+                ),
+            }
+
+# Limitador compartilhado pelos bots do processo
+limitador_padrao = LimitadorConcorrencia()
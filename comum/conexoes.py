@@ -0,0 +1,212 @@
+"""
+Pool de conexões SQLite somente leitura compartilhado pelos chatbots
+
+Evita abrir o arquivo, reler o schema e esfriar o cache de páginas a cada
+pergunta. As conexões ficam abertas, com PRAGMAs de leitura ajustados, e o
+cache de statements do sqlite3 reaproveita as consultas já preparadas.
+"""
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+# ============================================
+# CONFIGURAÇÕES PADRÃO
+# ============================================
+TAMANHO_POOL = 4
+MMAP_SIZE = 256 * 1024 * 1024      # 256 MB mapeados em memória
+CACHE_SIZE_KIB = 64 * 1024         # 64 MB de cache de páginas por conexão
+CACHED_STATEMENTS = 128            # Statements preparados mantidos por conexão
+TIMEOUT_AGUARDAR = 10.0            # Segundos aguardando conexão livre
+
+# ============================================
+# CONEXÃO DO POOL
+# ============================================
+class ConexaoPooled:
+    """
+    Conexão somente leitura com interface de cursor (execute/fetchone/fetchall)
+    Registra acertos do cache de statements do sqlite3
+    """
+    
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = sqlite3.connect(
+            pool.uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=pool.cached_statements
+        )
+        self.conn.execute("PRAGMA query_only = ON")
+        self.conn.execute(f"PRAGMA mmap_size = {int(pool.mmap_size)}")
+        self.conn.execute(f"PRAGMA cache_size = -{int(pool.cache_size_kib)}")
+        
+        # Espelho do LRU interno do sqlite3 (mesma chave: texto do SQL)
+        self._statements = OrderedDict()
+        self._cursor = None
+    
+    def execute(self, sql, params=()):
+        """Executa SQL reaproveitando o statement preparado quando possível"""
+        if sql in self._statements:
+            self._statements.move_to_end(sql)
+            self.pool._registrar_statement(acerto=True)
+        else:
+            self._statements[sql] = True
+            if len(self._statements) > self.pool.cached_statements:
+                self._statements.popitem(last=False)
+            self.pool._registrar_statement(acerto=False)
+        
+        self._cursor = self.conn.execute(sql, params)
+        return self._cursor
+    
+    def fetchone(self):
+        return self._cursor.fetchone()
+    
+    def fetchall(self):
+        return self._cursor.fetchall()
+    
+    def fechar(self):
+        self._cursor = None
+        self.conn.close()
+
+# ============================================
+# POOL DE CONEXÕES
+# ============================================
+class PoolConexoesSQLite:
+    """Pool thread-safe de conexões somente leitura para um arquivo SQLite"""
+    
+    def __init__(self, caminho, tamanho=TAMANHO_POOL, mmap_size=MMAP_SIZE,
+                 cache_size_kib=CACHE_SIZE_KIB, cached_statements=CACHED_STATEMENTS,
+                 timeout=TIMEOUT_AGUARDAR):
+        self.caminho = str(Path(caminho).resolve())
+        self.uri = f"{Path(self.caminho).as_uri()}?mode=ro"
+        self.tamanho = tamanho
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        
+        # LIFO: reutiliza primeiro a conexão com cache mais "quente"
+        self._livres = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._criadas = 0
+        
+        # Estatísticas
+        self.conexoes_criadas = 0
+        self.emprestimos = 0
+        self.reutilizacoes = 0
+        self.esperas = 0
+        self.statements_acertos = 0
+        self.statements_falhas = 0
+    
+    def _registrar_statement(self, acerto):
+        with self._lock:
+            if acerto:
+                self.statements_acertos += 1
+            else:
+                self.statements_falhas += 1
+    
+    def _obter(self):
+        try:
+            conexao = self._livres.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                pode_criar = self._criadas < self.tamanho
+                if pode_criar:
+                    self._criadas += 1
+            
+            if pode_criar:
+                try:
+                    conexao = ConexaoPooled(self)
+                except Exception:
+                    with self._lock:
+                        self._criadas -= 1
+                    raise
+                with self._lock:
+                    self.conexoes_criadas += 1
+                    self.emprestimos += 1
+                return conexao
+            
+            with self._lock:
+                self.esperas += 1
+            try:
+                conexao = self._livres.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError(
+                    f"Nenhuma conexão livre em {self.timeout}s ({self.caminho})"
+                )
+        
+        with self._lock:
+            self.emprestimos += 1
+            self.reutilizacoes += 1
+        return conexao
+    
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool (use com 'with')"""
+        conexao = self._obter()
+        try:
+            yield conexao
+        finally:
+            self._livres.put(conexao)
+    
+    def estatisticas(self):
+        """Retorna contadores de reutilização de conexões e de statements"""
+        with self._lock:
+            total_statements = self.statements_acertos + self.statements_falhas
+            return {
+                'arquivo': self.caminho,
+                'conexoes_abertas': self._criadas,
+                'conexoes_criadas': self.conexoes_criadas,
+                'emprestimos': self.emprestimos,
+                'reutilizacoes': self.reutilizacoes,
+                'esperas': self.esperas,
+                'statements_acertos': self.statements_acertos,
+                'statements_falhas': self.statements_falhas,
+                'taxa_acerto_statements': (
+                    self.statements_acertos / total_statements if total_statements else 0.0
+                ),
+            }
+    
+    def mostrar_estatisticas(self):
+        """Exibe estatísticas do pool"""
+        stats = self.estatisticas()
+        print("\n" + "=" * 80)
+        print("🗄️  ESTATÍSTICAS DO POOL DE CONEXÕES")
+        print("=" * 80)
+        print(f"📁 Arquivo: {stats['arquivo']}")
+        print(f"🔌 Conexões abertas: {stats['conexoes_abertas']}/{self.tamanho}")
+        print(f"♻️  Empréstimos: {stats['emprestimos']} ({stats['reutilizacoes']} reutilizações)")
+        print(f"⏳ Esperas por conexão livre: {stats['esperas']}")
+        print(f"📝 Statements em cache: {stats['statements_acertos']} acertos | "
+              f"{stats['statements_falhas']} preparações "
+              f"({stats['taxa_acerto_statements'] * 100:.1f}% acerto)")
+        print("=" * 80 + "\n")
+    
+    def fechar(self):
+        """Fecha todas as conexões livres"""
+        while True:
+            try:
+                conexao = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            conexao.fechar()
+            with self._lock:
+                self._criadas -= 1
+
+# ============================================
+# REGISTRO DE POOLS (um por arquivo)
+# ============================================
+_pools = {}
+_pools_lock = threading.Lock()
+
+def obter_pool(caminho, **opcoes):
+    """Retorna o pool compartilhado do arquivo, criando-o na primeira chamada"""
+    chave = str(Path(caminho).resolve())
+    with _pools_lock:
+        pool = _pools.get(chave)
+        if pool is None:
+            pool = PoolConexoesSQLite(chave, **opcoes)
+            _pools[chave] = pool
+        return pool
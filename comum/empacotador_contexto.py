@@ -0,0 +1,192 @@
+"""
+Empacotamento do contexto (linhas do banco) dentro de um orçamento de tokens
+
+O prompt aumentado recebia todas as linhas no formato "bonito" (tabela com
+" | " ou blocos por produto), sem olhar o tamanho. Aqui:
+- Tokens estimados localmente (sem chamada de rede), por pedaços de palavra
+- As linhas entram na ordem de prioridade recebida (o SQL já ordena por
+  recência, a busca híbrida por relevância) ou por uma chave própria
+- Escada de formatos, do mais legível ao mais compacto:
+    completo   → formatação original do bot, se couber
+    csv        → cabeçalho uma vez, valores crus
+    csv+resumo → as primeiras linhas que couberem + resumo agregado das demais
+- Cada chamada informa os tokens economizados em relação ao formato completo
+"""
+import csv
+import io
+import math
+import re
+import threading
+from collections import namedtuple
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+ORCAMENTO_PADRAO = 500   # tokens de entrada reservados para os dados
+
+# Colunas de período (resumo mostra a faixa) e de taxa/preço unitário (resumo mostra a média)
+COLUNAS_PERIODO = ('ano', 'mês', 'mes', 'data', 'periodo', 'período')
+COLUNAS_MEDIA = ('alíquota', 'aliquota', '%', 'médio', 'medio', 'média', 'media', 'preço', 'preco')
+COLUNAS_IGNORADAS = ('id',)
+
+FORMATO_COMPLETO = 'completo'
+FORMATO_CSV = 'csv'
+FORMATO_RESUMO = 'csv+resumo'
+
+ContextoEmpacotado = namedtuple('ContextoEmpacotado', [
+    'texto', 'formato', 'tokens', 'tokens_completo', 'linhas_incluidas', 'linhas_omitidas'
+])
+
+# ============================================
+# ESTIMATIVA DE TOKENS
+# ============================================
+# Dígitos, letras e cada símbolo isolado; tokenizadores BPE quebram números em
+# ~3 dígitos e palavras em ~4 letras (português acentuado um pouco menos)
+_PECAS = re.compile(r'\d+|[^\W\d_]+|[^\w\s]')
+
+def estimar_tokens(texto):
+    """Estimativa local de tokens (margem de ~10-15% para Claude em pt-BR)"""
+    total = 0
+    for peca in _PECAS.findall(texto):
+        if peca[0].isdigit():
+            total += math.ceil(len(peca) / 3)
+        elif peca[0].isalpha():
+            total += math.ceil(len(peca) / (4 if peca.isascii() else 3))
+        else:
+            total += 1
+    return total
+
+# ============================================
+# FORMATOS COMPACTOS
+# ============================================
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float):
+        return f"{valor:.2f}".rstrip('0').rstrip('.')
+    return str(valor)
+
+def formatar_csv(colunas, linhas, cabecalho=True):
+    """CSV sem formatação monetária (R$, milhar): bem menos tokens por linha"""
+    saida = io.StringIO()
+    escritor = csv.writer(saida, lineterminator='\n')
+    if cabecalho:
+        escritor.writerow(colunas)
+    for linha in linhas:
+        escritor.writerow([_valor_csv(v) for v in linha])
+    return saida.getvalue()
+
+def _tipo_coluna(nome):
+    nome = nome.lower()
+    if nome in COLUNAS_IGNORADAS:
+        return None
+    if any(trecho == nome or trecho in nome.split() for trecho in COLUNAS_PERIODO):
+        return 'periodo'
+    if any(trecho in nome for trecho in COLUNAS_MEDIA):
+        return 'media'
+    return 'soma'
+
+def resumir_linhas(colunas, linhas):
+    """Resumo agregado: soma dos valores, média das taxas, faixa dos períodos, distintos do texto"""
+    partes = []
+    for i, nome in enumerate(colunas):
+        valores = [linha[i] for linha in linhas if i < len(linha) and linha[i] is not None]
+        tipo = _tipo_coluna(nome)
+        if not valores or tipo is None:
+            continue
+        numericos = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in valores)
+        if not numericos:
+            partes.append(f"{nome}: {len(set(valores))} distintos")
+        elif tipo == 'periodo':
+            faixa = f"{min(valores)}-{max(valores)}" if min(valores) != max(valores) else f"{min(valores)}"
+            partes.append(f"{nome}: {faixa}")
+        elif tipo == 'media':
+            partes.append(f"{nome} médio: {_valor_csv(sum(valores) / len(valores))}")
+        else:
+            partes.append(f"{nome} somado: {_valor_csv(float(sum(valores)))}")
+    return f"+{len(linhas)} linhas omitidas ({'; '.join(partes)})"
+
+# ============================================
+# EMPACOTADOR
+# ============================================
+class EmpacotadorContexto:
+    """Encaixa linhas no orçamento de tokens e acumula a economia (thread-safe)"""
+
+    def __init__(self, orcamento_tokens=ORCAMENTO_PADRAO):
+        self.orcamento_tokens = orcamento_tokens
+        self._lock = threading.Lock()
+        self.requisicoes = 0
+        self.tokens_usados = 0
+        self.tokens_economizados = 0
+        self.por_formato = {FORMATO_COMPLETO: 0, FORMATO_CSV: 0, FORMATO_RESUMO: 0}
+
+    def empacotar(self, colunas, linhas, formatar_completo, prioridade=None, orcamento_tokens=None):
+        """
+        colunas/linhas: resultado do SQL (ou da busca)
+        formatar_completo(linhas) → texto no formato original do bot
+        prioridade: chave opcional (maior primeiro); sem ela vale a ordem recebida
+        Retorna ContextoEmpacotado
+        """
+        orcamento = orcamento_tokens or self.orcamento_tokens
+        linhas = list(linhas)
+        if prioridade is not None:
+            linhas.sort(key=prioridade, reverse=True)
+
+        completo = formatar_completo(linhas)
+        tokens_completo = estimar_tokens(completo)
+        if tokens_completo <= orcamento:
+            return self._registrar(ContextoEmpacotado(completo, FORMATO_COMPLETO, tokens_completo,
+                                                      tokens_completo, len(linhas), 0))
+
+        texto = formatar_csv(colunas, linhas)
+        tokens = estimar_tokens(texto)
+        if tokens <= orcamento:
+            return self._registrar(ContextoEmpacotado(texto, FORMATO_CSV, tokens,
+                                                      tokens_completo, len(linhas), 0))
+
+        # Mantém as n primeiras linhas + resumo das demais; n = maior que couber
+        cabecalho = formatar_csv(colunas, [])
+        custos = [estimar_tokens(formatar_csv(colunas, [linha], cabecalho=False)) for linha in linhas]
+        acumulado = estimar_tokens(cabecalho)
+        n = 0
+        while n < len(linhas) and acumulado + custos[n] <= orcamento:
+            acumulado += custos[n]
+            n += 1
+        while True:
+            texto = cabecalho + formatar_csv(colunas, linhas[:n], cabecalho=False) + resumir_linhas(colunas, linhas[n:])
+            tokens = estimar_tokens(texto)
+            if tokens <= orcamento or n == 0:
+                break
+            n -= 1
+
+        return self._registrar(ContextoEmpacotado(texto, FORMATO_RESUMO, tokens,
+                                                  tokens_completo, n, len(linhas) - n))
+
+    def _registrar(self, contexto):
+        with self._lock:
+            self.requisicoes += 1
+            self.tokens_usados += contexto.tokens
+            self.tokens_economizados += contexto.tokens_completo - contexto.tokens
+            self.por_formato[contexto.formato] += 1
+        return contexto
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'requisicoes': self.requisicoes,
+                'tokens_usados': self.tokens_usados,
+                'tokens_economizados': self.tokens_economizados,
+                'por_formato': dict(self.por_formato),
+            }
+
+    def mostrar_estatisticas(self):
+        stats = self.estatisticas()
+        formatos = ", ".join(f"{nome} {qtd}" for nome, qtd in stats['por_formato'].items())
+        print(f"📦 Contexto: {stats['requisicoes']} prompts | orçamento {self.orcamento_tokens} tokens | "
+              f"{stats['tokens_usados']:,} usados, {stats['tokens_economizados']:,} economizados | {formatos}")
+
+def descrever(contexto):
+    """Linha curta para o status de cada requisição"""
+    omitidas = f", {contexto.linhas_omitidas} resumidas" if contexto.linhas_omitidas else ""
+    return (f"{contexto.formato}: {contexto.linhas_incluidas} linhas{omitidas}, ~{contexto.tokens} tokens "
+            f"(-{contexto.tokens_completo - contexto.tokens})")
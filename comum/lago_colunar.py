@@ -0,0 +1,295 @@
+"""
+Data lake colunar local: Parquet particionado + DuckDB
+
+O banco financeiro simula um data lake (Athena/S3), mas o SQLite guarda
+linha a linha, e toda consulta do assistente é um GROUP BY que lê poucas
+colunas de muitas linhas. Aqui o mesmo banco vira um lake colunar:
+- exportar_parquet(): cada tabela vira um diretório Parquet (zstd); com
+  ano e mes, partições Hive ano=AAAA/mes=M quando cada mês tem linhas para
+  um arquivo que valha a pena abrir, senão um arquivo só ordenado por
+  ano/mes (as estatísticas de cada row group fazem a poda); o _lago.json
+  guarda as colunas de cada tabela e o SQL das views
+- MotorDuckDB: roda as mesmas consultas (mesmo SQL, parâmetros '?') no
+  DuckDB sobre os arquivos, com a interface do pool de conexões SQLite
+  (conexao(), execute/fetchone/fetchall, estatisticas()); filtros em ano/mes
+  só abrem as partições necessárias
+- obter_motor(): SQLite (caminho do .db) ou DuckDB (duckdb:///pasta_do_lago),
+  escolhido por URL
+
+Dependências opcionais (pip install pyarrow duckdb), importadas só no uso.
+
+Uso:
+    exportar_parquet('dados_financeiros.db', 'lago_financeiro')
+    motor = obter_motor('duckdb:///lago_financeiro')
+    with motor.conexao() as cursor:
+        cursor.execute("SELECT ano, mes, SUM(receita) FROM rsm_contabil_consolidado GROUP BY 1, 2")
+        dados = cursor.fetchall()
+"""
+import json
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from comum.conexoes import TAMANHO_POOL, TIMEOUT_AGUARDAR, obter_pool
+from comum.limitador_taxa import percentil
+
+# ============================================
+# CONFIGURAÇÕES PADRÃO
+# ============================================
+ARQUIVO_LAGO = '_lago.json'          # colunas por tabela + SQL das views
+TABELAS_IGNORADAS = {'sqlite_sequence', 'sqlite_stat1', 'sqlite_stat4', 'resumo_executivo_pendentes',
+                     'cubos_pendentes'}
+COLUNAS_PARTICAO = ('ano', 'mes')
+LINHAS_POR_LOTE = 100_000            # linhas lidas do SQLite por vez na exportação
+LINHAS_POR_GRUPO = 122_880           # row group do Parquet (o do DuckDB): unidade da poda por ano/mes
+LINHAS_MIN_PARTICAO = 200_000        # média por mês para partição própria (abaixo: arquivos
+                                     # pequenos custam mais para abrir do que poupam)
+COMPRESSAO = 'zstd'
+PREFIXO_DUCKDB = 'duckdb:///'
+
+def _tipo_arrow(pa, tipo_sqlite):
+    """Afinidade de tipo do SQLite → tipo Arrow (datas e timestamps ficam texto, como no SQLite)"""
+    tipo = (tipo_sqlite or '').upper()
+    if 'INT' in tipo:
+        return pa.int64()
+    if any(t in tipo for t in ('REAL', 'FLOA', 'DOUB', 'NUMERIC', 'DECIMAL')):
+        return pa.float64()
+    return pa.string()
+
+# ============================================
+# EXPORTAÇÃO
+# ============================================
+def exportar_parquet(caminho_db, destino, compressao=COMPRESSAO, particionar=None):
+    """
+    Exporta as tabelas do SQLite para Parquet em 'destino' (apagado antes)
+    Lê em lotes (memória limitada), em ordem de ano/mes
+    particionar: None decide por tabela (LINHAS_MIN_PARTICAO), True/False força
+    Retorna {tabela: (linhas, bytes em disco, particionada)}
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    destino = Path(destino)
+    if destino.exists():
+        shutil.rmtree(destino)
+    destino.mkdir(parents=True)
+
+    # O write_dataset consome os lotes numa thread dele (uma de cada vez)
+    conn = sqlite3.connect(f"{Path(caminho_db).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+    try:
+        objetos = conn.execute(
+            "SELECT type, name, sql FROM sqlite_master WHERE type IN ('table', 'view') ORDER BY rowid"
+        ).fetchall()
+        lago = {'tabelas': {}, 'views': []}
+        resultado = {}
+        for tipo, nome, sql in objetos:
+            if tipo == 'view':
+                lago['views'].append(sql)
+                continue
+            if nome in TABELAS_IGNORADAS:
+                continue
+            info = conn.execute(f"PRAGMA table_info({nome})").fetchall()
+            colunas = [coluna[1] for coluna in info]
+            schema = pa.schema([(coluna[1], _tipo_arrow(pa, coluna[2])) for coluna in info])
+            por_mes = all(c in colunas for c in COLUNAS_PARTICAO)
+            linhas, meses = conn.execute(
+                f"SELECT COUNT(*), COUNT(DISTINCT {' * 100 + '.join(COLUNAS_PARTICAO)}) FROM {nome}"
+                if por_mes else f"SELECT COUNT(*), 1 FROM {nome}").fetchone()
+            # Tabela vazia não gera partição: um arquivo sem linhas mantém o schema legível
+            particionada = por_mes and linhas > 0 and (
+                particionar if particionar is not None else linhas / meses >= LINHAS_MIN_PARTICAO)
+
+            ordem = f" ORDER BY {', '.join(COLUNAS_PARTICAO)}" if por_mes else ""
+            cursor = conn.execute(f"SELECT {', '.join(colunas)} FROM {nome}{ordem}")
+
+            def lotes(cursor=cursor, schema=schema):
+                while True:
+                    bloco = cursor.fetchmany(LINHAS_POR_LOTE)
+                    if not bloco:
+                        return
+                    yield pa.RecordBatch.from_arrays(
+                        [pa.array(valores, type=campo.type) for valores, campo in zip(zip(*bloco), schema)],
+                        schema=schema)
+
+            pasta = destino / nome
+            if linhas:
+                ds.write_dataset(
+                    lotes(), pasta, schema=schema, format='parquet',
+                    partitioning=list(COLUNAS_PARTICAO) if particionada else None,
+                    partitioning_flavor='hive' if particionada else None,
+                    file_options=ds.ParquetFileFormat().make_write_options(compression=compressao),
+                    min_rows_per_group=LINHAS_POR_GRUPO, max_rows_per_group=LINHAS_POR_GRUPO,
+                    existing_data_behavior='overwrite_or_ignore',
+                )
+            else:
+                pasta.mkdir()
+                pq.write_table(schema.empty_table(), pasta / 'part-0.parquet', compression=compressao)
+            tamanho = sum(arquivo.stat().st_size for arquivo in pasta.rglob('*.parquet'))
+            lago['tabelas'][nome] = {'colunas': colunas, 'particionada': particionada}
+            resultado[nome] = (linhas, tamanho, particionada)
+    finally:
+        conn.close()
+
+    (destino / ARQUIVO_LAGO).write_text(json.dumps(lago, ensure_ascii=False, indent=2), encoding='utf-8')
+    return resultado
+
+# ============================================
+# MOTOR DE CONSULTAS DUCKDB
+# ============================================
+class _CursorDuckDB:
+    """Cursor com a interface do ConexaoPooled (execute/fetchone/fetchall)"""
+
+    def __init__(self, motor, conexao):
+        self.motor = motor
+        self.conexao = conexao
+
+    def execute(self, sql, params=()):
+        inicio = time.perf_counter()
+        self.conexao.execute(sql, list(params))
+        self.motor._registrar(time.perf_counter() - inicio)
+        return self
+
+    def fetchone(self):
+        return self.conexao.fetchone()
+
+    def fetchall(self):
+        return self.conexao.fetchall()
+
+class MotorDuckDB:
+    """
+    Lake Parquet consultado pelo DuckDB, com a interface do PoolConexoesSQLite
+    Uma conexão em memória com as tabelas e views do lake; cada empréstimo usa
+    um cursor próprio dela (cursores do DuckDB podem rodar em threads diferentes)
+    """
+
+    def __init__(self, pasta, tamanho=TAMANHO_POOL, threads=None, timeout=TIMEOUT_AGUARDAR):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("O motor DuckDB requer o pacote duckdb (pip install duckdb)") from e
+
+        self.pasta = Path(pasta).resolve()
+        self.caminho = f"{PREFIXO_DUCKDB}{self.pasta}"   # duckdb:////caminho/absoluto
+        self.tamanho = tamanho
+        self.timeout = timeout
+        lago = json.loads((self.pasta / ARQUIVO_LAGO).read_text(encoding='utf-8'))
+
+        self.conn = duckdb.connect(':memory:')
+        if threads:
+            self.conn.execute(f"SET threads = {int(threads)}")
+        for nome, tabela in lago['tabelas'].items():
+            # Colunas na ordem do SQLite (as de partição viriam por último no SELECT *)
+            padrao = str(self.pasta / nome / ('**/*.parquet' if tabela['particionada'] else '*.parquet'))
+            origem = f"read_parquet('{padrao}', hive_partitioning = {str(tabela['particionada']).lower()})"
+            self.conn.execute(f"CREATE VIEW {nome} AS SELECT {', '.join(tabela['colunas'])} FROM {origem}")
+        for sql in lago['views']:
+            self.conn.execute(sql)
+
+        self._livres = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._criadas = 0
+
+        # Estatísticas
+        self.emprestimos = 0
+        self.esperas = 0
+        self._tempos = deque(maxlen=5000)
+
+    def _registrar(self, segundos):
+        with self._lock:
+            self._tempos.append(segundos)
+
+    def _obter(self):
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            pode_criar = self._criadas < self.tamanho
+            if pode_criar:
+                self._criadas += 1
+            else:
+                self.esperas += 1
+        if pode_criar:
+            return _CursorDuckDB(self, self.conn.cursor())
+        try:
+            return self._livres.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Nenhum cursor livre em {self.timeout}s ({self.caminho})")
+
+    @contextmanager
+    def conexao(self):
+        """Empresta um cursor (use com 'with'), como PoolConexoesSQLite.conexao()"""
+        cursor = self._obter()
+        with self._lock:
+            self.emprestimos += 1
+        try:
+            yield cursor
+        finally:
+            self._livres.put(cursor)
+
+    def estatisticas(self):
+        """Consultas executadas e latência (p50/p95) no DuckDB"""
+        with self._lock:
+            tempos = list(self._tempos)
+            return {
+                'arquivo': self.caminho,
+                'cursores_abertos': self._criadas,
+                'emprestimos': self.emprestimos,
+                'esperas': self.esperas,
+                'consultas': len(tempos),
+                'latencia_p50_ms': percentil(tempos, 50) * 1000,
+                'latencia_p95_ms': percentil(tempos, 95) * 1000,
+            }
+
+    def mostrar_estatisticas(self):
+        """Exibe estatísticas do motor"""
+        stats = self.estatisticas()
+        print("\n" + "=" * 80)
+        print("🦆 ESTATÍSTICAS DO MOTOR DUCKDB (Parquet)")
+        print("=" * 80)
+        print(f"📁 Lake: {stats['arquivo']}")
+        print(f"🔌 Cursores abertos: {stats['cursores_abertos']}/{self.tamanho}")
+        print(f"♻️  Empréstimos: {stats['emprestimos']} | ⏳ Esperas: {stats['esperas']}")
+        print(f"📝 Consultas: {stats['consultas']} | p50 {stats['latencia_p50_ms']:.1f} ms | "
+              f"p95 {stats['latencia_p95_ms']:.1f} ms")
+        print("=" * 80 + "\n")
+
+    def fechar(self):
+        """Fecha os cursores livres e a conexão"""
+        while True:
+            try:
+                cursor = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            cursor.conexao.close()
+            with self._lock:
+                self._criadas -= 1
+        self.conn.close()
+
+# ============================================
+# ESCOLHA DO MOTOR
+# ============================================
+_motores = {}
+_motores_lock = threading.Lock()
+
+def obter_motor(url, **opcoes):
+    """
+    Motor de consultas compartilhado da URL:
+        dados_financeiros.db        pool SQLite (comum/conexoes.py)
+        duckdb:///lago_financeiro   DuckDB sobre o lake Parquet
+    """
+    if not url.startswith(PREFIXO_DUCKDB):
+        return obter_pool(url, **opcoes)
+    # duckdb:///relativo e duckdb:////caminho/absoluto (como sqlite:/// em comum/sessoes.py)
+    pasta = str(Path(url[len(PREFIXO_DUCKDB):]).resolve())
+    with _motores_lock:
+        motor = _motores.get(pasta)
+        if motor is None:
+            motor = _motores[pasta] = MotorDuckDB(pasta, **opcoes)
+        return motor
@@ -0,0 +1,252 @@
+"""
+Limitador de taxa adaptativo e agendador de retentativas para o Bedrock
+
+- Dois baldes de tokens por model ID: requisições/minuto e tokens/minuto
+- ThrottlingException → nova tentativa com backoff exponencial e jitter
+  (full jitter) e redução temporária da taxa daquele modelo
+- Fila por ordem de chegada em cada modelo: quem espera há mais tempo
+  (inclusive quem está sendo retentado) é atendido primeiro; um modelo sem
+  cota não segura as chamadas dos outros
+- Métricas: profundidade da fila, retentativas e latência p50/p95/p99
+"""
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+
+# ============================================
+# CONFIGURAÇÕES PADRÃO
+# ============================================
+# (requisições por minuto, tokens por minuto) por model ID
+LIMITES_MODELOS = {
+    'us.amazon.nova-micro-v1:0': (100, 400_000),
+    'us.anthropic.claude-3-5-haiku-20241022-v1:0': (50, 200_000),
+    'us.anthropic.claude-3-haiku-20240307-v1:0': (50, 200_000),
+    'us.anthropic.claude-sonnet-4-5-20250929-v1:0': (20, 100_000),
+}
+LIMITE_PADRAO = (20, 100_000)
+# Multiplica todos os limites: contas com cota ampliada ou carga contra o endpoint falso
+ESCALA_LIMITES = float(os.environ.get('BEDROCK_ESCALA_LIMITES', 1))
+
+MAX_TENTATIVAS = 6
+ESPERA_BASE = 0.5      # segundos
+ESPERA_MAXIMA = 20.0   # segundos
+FATOR_REDUCAO = 0.7    # taxa multiplicada por este fator a cada throttling
+FATOR_RECUPERACAO = 1.1   # e recuperada aos poucos a cada sucesso
+TAXA_MINIMA = 0.1         # nunca abaixo de 10% da taxa nominal
+
+CODIGOS_THROTTLING = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceUnavailableException',
+}
+
+def eh_throttling(erro):
+    """Identifica erros de limite de taxa do Bedrock (botocore ClientError)"""
+    codigo = getattr(erro, 'response', {}).get('Error', {}).get('Code')
+    return codigo in CODIGOS_THROTTLING or type(erro).__name__ in CODIGOS_THROTTLING
+
+def estimar_tokens(corpo, max_tokens=0):
+    """Estimativa grosseira: ~4 caracteres por token + saída máxima"""
+    return len(corpo) // 4 + max_tokens
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+# ============================================
+# BALDE DE TOKENS
+# ============================================
+class BaldeTokens:
+    """Balde clássico: capacidade por minuto, reposição contínua"""
+    
+    def __init__(self, por_minuto):
+        self.capacidade_nominal = float(por_minuto)
+        self.capacidade = float(por_minuto)
+        self.disponivel = float(por_minuto)
+        self.ultimo = time.monotonic()
+    
+    def _repor(self, agora):
+        decorrido = agora - self.ultimo
+        self.ultimo = agora
+        self.disponivel = min(self.capacidade, self.disponivel + decorrido * self.capacidade / 60.0)
+    
+    def espera_para(self, quantidade, agora):
+        """Segundos até haver 'quantidade' disponível (0 = já há)"""
+        self._repor(agora)
+        quantidade = min(quantidade, self.capacidade)
+        if self.disponivel >= quantidade:
+            return 0.0
+        return (quantidade - self.disponivel) * 60.0 / self.capacidade
+    
+    def consumir(self, quantidade):
+        self.disponivel -= min(quantidade, self.capacidade)
+    
+    def ajustar_taxa(self, fator):
+        piso = max(1.0, self.capacidade_nominal * TAXA_MINIMA)
+        self.capacidade = max(piso, min(self.capacidade_nominal, self.capacidade * fator))
+        self.disponivel = min(self.disponivel, self.capacidade)
+
+# ============================================
+# LIMITADOR DE TAXA
+# ============================================
+class LimitadorTaxa:
+    """Limitador adaptativo por modelo, compartilhado entre threads"""
+    
+    def __init__(self, limites=None, max_tentativas=MAX_TENTATIVAS,
+                 espera_base=ESPERA_BASE, espera_maxima=ESPERA_MAXIMA, escala=ESCALA_LIMITES):
+        self.limites = dict(LIMITES_MODELOS)
+        self.limites.update(limites or {})
+        self.escala = escala
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        
+        self._baldes = {}
+        self._filas = {}  # model ID → (heap (chegada, sequência), condição)
+        self._sequencia = itertools.count()
+        self._trava = threading.Lock()   # uma trava para baldes, filas e métricas
+        
+        # Métricas
+        self.pico_fila = 0
+        self.total_requisicoes = 0
+        self.total_retentativas = 0
+        self.total_throttling = 0
+        self.total_falhas = 0
+        self.latencias = deque(maxlen=5000)
+    
+    def _baldes_modelo(self, model_id):
+        if model_id not in self._baldes:
+            rpm, tpm = self.limites.get(model_id, LIMITE_PADRAO)
+            self._baldes[model_id] = (BaldeTokens(rpm * self.escala), BaldeTokens(tpm * self.escala))
+        return self._baldes[model_id]
+    
+    def _fila_modelo(self, model_id):
+        if model_id not in self._filas:
+            self._filas[model_id] = ([], threading.Condition(self._trava))
+        return self._filas[model_id]
+    
+    def adquirir(self, model_id, tokens, chegada, max_espera=None):
+        """
+        Bloqueia até haver cota e ser a vez desta requisição na fila do modelo
+        max_espera: segundos; estourando, levanta TimeoutError sem consumir cota
+        """
+        entrada = (chegada, next(self._sequencia))
+        prazo = None if max_espera is None else time.monotonic() + max_espera
+        with self._trava:
+            fila, condicao = self._fila_modelo(model_id)
+            heapq.heappush(fila, entrada)
+            self.pico_fila = max(self.pico_fila, self._profundidade())
+            try:
+                while True:
+                    restante = None if prazo is None else prazo - time.monotonic()
+                    if restante is not None and restante <= 0:
+                        raise TimeoutError(f"Sem cota para {model_id} em {max_espera}s")
+                    if fila[0] is entrada:
+                        balde_req, balde_tok = self._baldes_modelo(model_id)
+                        agora = time.monotonic()
+                        espera = max(balde_req.espera_para(1, agora),
+                                     balde_tok.espera_para(tokens, agora))
+                        if espera == 0:
+                            balde_req.consumir(1)
+                            balde_tok.consumir(tokens)
+                            return
+                        condicao.wait(timeout=espera if restante is None else min(espera, restante))
+                    else:
+                        condicao.wait(timeout=restante)
+            finally:
+                fila.remove(entrada)
+                heapq.heapify(fila)
+                condicao.notify_all()
+    
+    def _profundidade(self):
+        return sum(len(fila) for fila, _ in self._filas.values())
+    
+    def registrar_uso(self, model_id, diferenca_tokens):
+        """Corrige o balde de tokens com o uso real (real - estimado)"""
+        with self._trava:
+            self._baldes_modelo(model_id)[1].consumir(diferenca_tokens)
+    
+    def _ajustar_taxa(self, model_id, fator):
+        with self._trava:
+            for balde in self._baldes_modelo(model_id):
+                balde.ajustar_taxa(fator)
+    
+    def executar(self, model_id, func, tokens_estimados=1000, contar_tokens=None, max_espera=None):
+        """
+        Executa func() respeitando os limites do modelo
+        ThrottlingException é retentada com backoff exponencial + jitter;
+        esgotadas as tentativas, o último erro é relançado.
+        
+        contar_tokens(resultado) → tokens reais, para corrigir a estimativa
+        max_espera: teto (s) de espera na fila por tentativa; para chamadas
+                    opcionais, que preferem desistir a segurar a requisição
+        """
+        chegada = time.monotonic()
+        with self._trava:
+            self.total_requisicoes += 1
+        
+        for tentativa in range(self.max_tentativas):
+            try:
+                self.adquirir(model_id, tokens_estimados, chegada, max_espera)
+            except TimeoutError:
+                with self._trava:
+                    self.total_falhas += 1
+                raise
+            try:
+                resultado = func()
+            except Exception as erro:
+                if not eh_throttling(erro) or tentativa == self.max_tentativas - 1:
+                    with self._trava:
+                        self.total_falhas += 1
+                        if eh_throttling(erro):
+                            self.total_throttling += 1
+                    raise
+                with self._trava:
+                    self.total_throttling += 1
+                    self.total_retentativas += 1
+                self._ajustar_taxa(model_id, FATOR_REDUCAO)
+                teto = min(self.espera_maxima, self.espera_base * (2 ** tentativa))
+                time.sleep(random.uniform(0, teto))
+                continue
+            
+            self._ajustar_taxa(model_id, FATOR_RECUPERACAO)
+            if contar_tokens is not None:
+                self.registrar_uso(model_id, contar_tokens(resultado) - tokens_estimados)
+            with self._trava:
+                self.latencias.append(time.monotonic() - chegada)
+            return resultado
+    
+    def estatisticas(self):
+        """Retorna métricas de fila, retentativas e latência ponta a ponta"""
+        with self._trava:
+            latencias = list(self.latencias)
+            return {
+                'fila_atual': self._profundidade(),
+                'pico_fila': self.pico_fila,
+                'requisicoes': self.total_requisicoes,
+                'retentativas': self.total_retentativas,
+                'throttling': self.total_throttling,
+                'falhas': self.total_falhas,
+                'latencia_p50': percentil(latencias, 50),
+                'latencia_p95': percentil(latencias, 95),
+                'latencia_p99': percentil(latencias, 99),
+            }
+    
+    def mostrar_estatisticas(self):
+        """Exibe métricas do limitador"""
+        stats = self.estatisticas()
+        print(f"🚦 Limitador: fila {stats['fila_atual']} (pico {stats['pico_fila']}) | "
+              f"{stats['retentativas']} retentativas | {stats['throttling']} throttling | "
+              f"{stats['falhas']} falhas")
+        print(f"⏱️  Latência ponta a ponta: p50 {stats['latencia_p50'] * 1000:.0f} ms | "
+              f"p95 {stats['latencia_p95'] * 1000:.0f} ms | p99 {stats['latencia_p99'] * 1000:.0f} ms")
+
+# Limitador compartilhado pelos bots do processo
+limitador_taxa_padrao = LimitadorTaxa()
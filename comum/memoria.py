@@ -0,0 +1,298 @@
+"""
+Memória de conversa com janela deslizante + resumo incremental
+
+- As últimas JANELA_TURNOS trocas (pergunta + resposta) vão literais
+- As trocas mais antigas são dobradas num resumo (modelo barato via Bedrock
+  ou resumo local extrativo, sem rede)
+- Teto rígido de tokens por requisição: se ainda assim passar, o resumo e
+  depois as mensagens mais antigas são truncados
+- Duas saídas:
+    mensagens()  → lista "messages" da Messages API (ChatbotMeteora)
+    como_texto() → bloco de histórico para o prompt aumentado dos bots RAG
+- contextualizar(): perguntas de seguimento curtas ("Quanto custa?",
+  "E no mês anterior?") herdam o assunto da última pergunta completa,
+  para que a busca no banco encontre o que o cliente está falando.
+  Seguimento = marcador de referência ("e ...", "nesse", "anterior"...) ou,
+  se o bot passar tem_assunto, pergunta curta sem assunto próprio: "Contas
+  pendentes" depois de uma pergunta sobre receitas é assunto novo
+- Eventos (só acréscimo) para persistir a conversa (comum/sessoes.py):
+    ["t", pergunta, resposta]             troca completa
+    ["r", resumo, trocas_resumidas, n]    resumo novo; n trocas ficam na janela
+    ["l"]                                 histórico limpo
+  retirar_eventos() entrega os novos; aplicar_evento() reconstrói o estado
+
+Uma instância por conversa (não é thread-safe).
+"""
+import re
+
+from comum.empacotador_contexto import estimar_tokens
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+JANELA_TURNOS = 4          # trocas mantidas literalmente
+TETO_TOKENS = 1000         # histórico + pergunta atual, por requisição
+MAX_TOKENS_RESUMO = 250
+
+# Modelo barato para resumir (Claude 3 Haiku: ~1/3 do preço do 3.5 Haiku)
+MODELO_RESUMO = 'us.anthropic.claude-3-haiku-20240307-v1:0'
+# Sem cota do modelo em até X segundos, resume localmente (não segura o turno)
+ESPERA_MAXIMA_RESUMO = 1.0
+
+# Pergunta curta com algum destes termos (ou começando com "e") = continuação do assunto anterior
+MARCADORES_SEGUIMENTO = {
+    'esse', 'essa', 'esses', 'essas', 'isso', 'este', 'esta', 'isto', 'ele', 'ela', 'eles', 'elas',
+    'dele', 'dela', 'deles', 'delas', 'desse', 'dessa', 'disso', 'nesse', 'nessa', 'nisso',
+    'mesmo', 'mesma', 'outro', 'outra', 'outros', 'outras', 'anterior', 'seguinte', 'também',
+}
+MAX_PALAVRAS_SEGUIMENTO = 6
+
+_PALAVRA = re.compile(r'\w+')
+
+def _truncar(texto, max_tokens):
+    """Corta o texto para caber em max_tokens (estimados), marcando o corte"""
+    if estimar_tokens(texto) <= max_tokens:
+        return texto
+    if max_tokens <= 0:
+        return ""
+    fim = len(texto)
+    while fim > 0 and estimar_tokens(texto[:fim]) + 1 > max_tokens:
+        fim = int(fim * 0.85)
+    return texto[:fim].rstrip() + "…"
+
+# ============================================
+# RESUMIDORES
+# ============================================
+def _primeira_frase(texto, limite=160):
+    texto = " ".join(texto.split())
+    corte = re.search(r'[.!?](\s|$)', texto)
+    frase = texto[:corte.end()] if corte else texto
+    return frase[:limite].rstrip() + ("…" if len(frase) > limite else "")
+
+def resumir_local(resumo, trocas, max_tokens=MAX_TOKENS_RESUMO):
+    """
+    Resumo extrativo sem rede: uma linha por troca (pergunta + 1ª frase da resposta)
+    Estourando max_tokens, descarta as linhas mais antigas do resumo
+    """
+    linhas = [linha for linha in resumo.split("\n") if linha]
+    for pergunta, resposta in trocas:
+        linhas.append(f"- Cliente: {_primeira_frase(pergunta, 120)} → Assistente: {_primeira_frase(resposta)}")
+    while len(linhas) > 1 and estimar_tokens("\n".join(linhas)) > max_tokens:
+        linhas.pop(0)
+    return _truncar("\n".join(linhas), max_tokens)
+
+class ResumidorBedrock:
+    """Resume com um modelo barato; qualquer falha cai no resumo local"""
+
+    def __init__(self, client=None, model_id=MODELO_RESUMO):
+        self.client = client   # None = cliente compartilhado (comum/clientes.py)
+        self.model_id = model_id
+        self._invocador = None
+
+    def __call__(self, resumo, trocas, max_tokens=MAX_TOKENS_RESUMO):
+        from comum.bedrock import InvocadorBedrock, montar_corpo
+
+        if self._invocador is None:
+            self._invocador = InvocadorBedrock(self.model_id, client=self.client, texto_padrao="",
+                                               max_espera=ESPERA_MAXIMA_RESUMO)
+        novas = "\n".join(f"Cliente: {pergunta}\nAssistente: {resposta}" for pergunta, resposta in trocas)
+        corpo = montar_corpo(
+            f"RESUMO ATUAL:\n{resumo or '(vazio)'}\n\nNOVAS MENSAGENS:\n{novas}",
+            system=("Atualize o resumo de uma conversa de atendimento. Mantenha produtos, valores, "
+                    "empresas, períodos e decisões do cliente. Responda só com o resumo, em tópicos curtos."),
+            max_tokens=max_tokens,
+            temperature=0,
+        )
+        try:
+            texto = self._invocador.invocar(corpo).texto.strip()
+        except Exception:
+            texto = ""
+        return _truncar(texto, max_tokens) if texto else resumir_local(resumo, trocas, max_tokens)
+
+# ============================================
+# MEMÓRIA
+# ============================================
+class MemoriaConversa:
+    """Janela de trocas recentes + resumo das antigas, com teto de tokens"""
+
+    def __init__(self, janela_turnos=JANELA_TURNOS, teto_tokens=TETO_TOKENS,
+                 max_tokens_resumo=MAX_TOKENS_RESUMO, resumidor=None, tem_assunto=None):
+        self.janela_turnos = janela_turnos
+        self.teto_tokens = teto_tokens
+        self.max_tokens_resumo = max_tokens_resumo
+        self.resumidor = resumidor or resumir_local
+        # tem_assunto(pergunta): a pergunta diz do que trata (intenção, entidade,
+        # produto)? None = só os marcadores de referência indicam seguimento
+        self.tem_assunto = tem_assunto
+        self._zerar()
+        self._eventos = []
+
+    def limpar(self):
+        self._zerar()
+        self._eventos.append(["l"])
+
+    def _zerar(self):
+        self.resumo = ""
+        self.trocas = []          # [(pergunta, resposta)] dentro da janela
+        self.pendente = None      # pergunta atual, ainda sem resposta
+        self.assunto = ""         # última pergunta completa (para contextualizar)
+        self.trocas_resumidas = 0
+        self.compactacoes = 0
+        self.tokens_literais = 0      # todas as trocas desde o início, sem resumir
+        self.tokens_sem_memoria = 0   # quanto custaria mandar o histórico literal a cada requisição
+        self.tokens_enviados = 0
+
+    # ----- escrita -----
+    def adicionar(self, role, content):
+        """Mesma interface do histórico antigo: 'user' abre a troca, 'assistant' fecha"""
+        if role == 'user':
+            self.pendente = content
+            return
+        self._acrescentar_troca(self.pendente or "", content)
+        self._eventos.append(["t", self.pendente or "", content])
+        self.pendente = None
+        if self._compactar():
+            self._eventos.append(["r", self.resumo, self.trocas_resumidas, len(self.trocas)])
+
+    def _acrescentar_troca(self, pergunta, resposta):
+        self.trocas.append((pergunta, resposta))
+        self.tokens_literais += self._tokens(self.trocas[-1:])
+
+    def descartar_pergunta(self):
+        """Desfaz a pergunta pendente (erro na chamada ao modelo)"""
+        self.pendente = None
+
+    def _compactar(self):
+        """
+        Dobra as trocas mais antigas no resumo até caber na janela e no teto
+        Ao estourar a janela, volta para metade dela: o resumidor (que pode ser
+        uma chamada ao modelo) roda a cada ~janela/2 trocas, não a cada uma
+        """
+        excedentes = 0
+        if len(self.trocas) > self.janela_turnos:
+            excedentes = len(self.trocas) - max(1, self.janela_turnos // 2)
+        while (excedentes < len(self.trocas) - 1 and
+               self._tokens(self.trocas[excedentes:]) > self.teto_tokens - self.max_tokens_resumo):
+            excedentes += 1
+        if not excedentes:
+            return False
+        antigas, self.trocas = self.trocas[:excedentes], self.trocas[excedentes:]
+        self.resumo = self.resumidor(self.resumo, antigas, self.max_tokens_resumo)
+        self.trocas_resumidas += len(antigas)
+        self.compactacoes += 1
+        return True
+
+    # ----- persistência -----
+    def retirar_eventos(self):
+        """Eventos gerados desde a última chamada (para anexar ao armazém de sessões)"""
+        eventos, self._eventos = self._eventos, []
+        return eventos
+
+    def aplicar_evento(self, evento):
+        """Reconstrói o estado a partir de um evento salvo (sem chamar o resumidor)"""
+        tipo = evento[0]
+        if tipo == "t":
+            self._acrescentar_troca(evento[1], evento[2])
+            if not self.eh_seguimento(evento[1]):
+                self.assunto = evento[1]
+        elif tipo == "r":
+            self.resumo, self.trocas_resumidas = evento[1], evento[2]
+            self.trocas = self.trocas[len(self.trocas) - evento[3]:] if evento[3] else []
+            self.compactacoes += 1
+        elif tipo == "l":
+            self._zerar()
+
+    # ----- leitura -----
+    def _tokens(self, trocas):
+        return sum(estimar_tokens(p) + estimar_tokens(r) + 4 for p, r in trocas)
+
+    def __len__(self):
+        return len(self.trocas)
+
+    def mensagens(self):
+        """
+        "messages" da Messages API: resumo no início da 1ª mensagem do usuário
+        (mantém a alternância user/assistant), trocas da janela e a pergunta pendente
+        """
+        pergunta = _truncar(self.pendente or "", self.teto_tokens)
+        disponivel = self.teto_tokens - estimar_tokens(pergunta)
+        resumo, trocas = self._caber(disponivel)
+
+        mensagens = []
+        for p, r in trocas:
+            mensagens += [{"role": "user", "content": p}, {"role": "assistant", "content": r}]
+        if self.pendente is not None:
+            mensagens.append({"role": "user", "content": pergunta})
+        if resumo and mensagens:
+            mensagens[0] = {"role": "user", "content": f"[Resumo da conversa até aqui]\n{resumo}\n\n{mensagens[0]['content']}"}
+        self._contabilizar(mensagens, pergunta)
+        return mensagens
+
+    def como_texto(self):
+        """Bloco de histórico (sem a pergunta pendente) para o prompt aumentado"""
+        resumo, trocas = self._caber(self.teto_tokens)
+        if not resumo and not trocas:
+            return ""
+        partes = ["HISTÓRICO DA CONVERSA:"]
+        if resumo:
+            partes.append(f"Resumo: {resumo}")
+        for p, r in trocas:
+            partes.append(f"Cliente: {p}\nAssistente: {r}")
+        texto = "\n".join(partes)
+        self._contabilizar([texto], "")
+        return texto
+
+    def _caber(self, disponivel):
+        """(resumo, trocas) dentro de 'disponivel' tokens: corta o resumo, depois as trocas antigas"""
+        trocas = list(self.trocas)
+        resumo = _truncar(self.resumo, max(0, disponivel - self._tokens(trocas)))
+        while trocas and self._tokens(trocas) + estimar_tokens(resumo) > disponivel:
+            if len(trocas) == 1:
+                p, r = trocas[0]
+                trocas[0] = (_truncar(p, disponivel // 2), _truncar(r, disponivel // 2 - 4))
+                break
+            trocas.pop(0)
+        return resumo, trocas
+
+    def _contabilizar(self, enviados, pergunta):
+        textos = [m['content'] if isinstance(m, dict) else m for m in enviados]
+        self.tokens_enviados += sum(estimar_tokens(t) for t in textos)
+        self.tokens_sem_memoria += estimar_tokens(pergunta) + self.tokens_literais
+
+    # ----- perguntas de seguimento -----
+    def eh_seguimento(self, pergunta):
+        """
+        Pergunta curta com marcador de referência, ou sem assunto próprio (tem_assunto)
+        Ser curta não basta: "Contas pendentes" não continua a pergunta anterior
+        """
+        palavras = _PALAVRA.findall(pergunta.lower())
+        if not palavras or len(palavras) > MAX_PALAVRAS_SEGUIMENTO:
+            return False
+        if palavras[0] == 'e' or any(p in MARCADORES_SEGUIMENTO for p in palavras):
+            return True
+        return self.tem_assunto is not None and not self.tem_assunto(pergunta)
+
+    def contextualizar(self, pergunta):
+        """Pergunta para a busca/roteamento: seguimentos herdam o assunto anterior"""
+        if self.assunto and self.eh_seguimento(pergunta):
+            return f"{self.assunto} {pergunta}"
+        self.assunto = pergunta
+        return pergunta
+
+    # ----- estatísticas -----
+    def estatisticas(self):
+        return {
+            'trocas_na_janela': len(self.trocas),
+            'trocas_resumidas': self.trocas_resumidas,
+            'compactacoes': self.compactacoes,
+            'tokens_resumo': estimar_tokens(self.resumo),
+            'tokens_enviados': self.tokens_enviados,
+            'tokens_sem_memoria': self.tokens_sem_memoria,
+        }
+
+    def mostrar_estatisticas(self):
+        stats = self.estatisticas()
+        print(f"🧠 Memória: {stats['trocas_na_janela']}/{self.janela_turnos} trocas na janela | "
+              f"{stats['trocas_resumidas']} resumidas ({stats['tokens_resumo']} tokens de resumo) | "
+              f"teto {self.teto_tokens} tokens | histórico enviado ~{stats['tokens_enviados']:,} tokens "
+              f"(literal seria ~{stats['tokens_sem_memoria']:,})")
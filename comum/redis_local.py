@@ -0,0 +1,276 @@
+"""
+Substituto local do Redis (protocolo RESP) para desenvolvimento e testes
+
+- Servidor TCP numa thread, com o subconjunto de comandos usado pelo
+  armazém de sessões: RPUSH, LRANGE, LLEN, SET (NX/EX), GET, EXPIRE, TTL,
+  DEL, EXISTS, PING, DBSIZE, FLUSHALL (expiração preguiçosa, como no Redis)
+- Cliente mínimo com a mesma interface do redis-py para esses comandos
+  (inclusive pipeline), usado quando o pacote redis não está instalado
+- Vários processos falam com o mesmo servidor, como falariam com um Redis real
+
+Uso:
+    servidor, url = iniciar_servidor_redis_local()
+    cliente = ClienteRedisLocal(url)
+    cliente.rpush('chave', 'a', 'b'); cliente.lrange('chave', 0, -1)
+"""
+import socket
+import socketserver
+import threading
+import time
+from urllib.parse import urlparse
+
+# ============================================
+# PROTOCOLO RESP
+# ============================================
+def codificar_comando(*args):
+    partes = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode('utf-8')
+        partes.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(partes)
+
+def ler_resposta(arquivo):
+    linha = arquivo.readline()
+    if not linha:
+        raise ConnectionError("Conexão encerrada pelo servidor")
+    tipo, conteudo = linha[:1], linha[1:-2]
+    if tipo == b'+':
+        return conteudo.decode()
+    if tipo == b'-':
+        raise RuntimeError(conteudo.decode())
+    if tipo == b':':
+        return int(conteudo)
+    if tipo == b'$':
+        tamanho = int(conteudo)
+        if tamanho < 0:
+            return None
+        dados = arquivo.read(tamanho + 2)
+        return dados[:-2]
+    if tipo == b'*':
+        n = int(conteudo)
+        return None if n < 0 else [ler_resposta(arquivo) for _ in range(n)]
+    raise RuntimeError(f"Resposta RESP inválida: {linha!r}")
+
+def _ler_comando(arquivo):
+    linha = arquivo.readline()
+    if not linha:
+        return None
+    if linha[:1] != b'*':
+        return linha.split()          # comando inline (ex.: redis-cli / telnet)
+    comando = []
+    for _ in range(int(linha[1:-2])):
+        tamanho = int(arquivo.readline()[1:-2])
+        comando.append(arquivo.read(tamanho + 2)[:-2])
+    return comando
+
+def _bulk(valor):
+    return b"$-1\r\n" if valor is None else b"$%d\r\n%s\r\n" % (len(valor), valor)
+
+# ============================================
+# SERVIDOR
+# ============================================
+class _Handler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        super().setup()
+        # Sem Nagle: respostas de um pipeline saem em writes separados
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        while True:
+            try:
+                comando = _ler_comando(self.rfile)
+            except (ConnectionError, ValueError):
+                return
+            if not comando:
+                return
+            self.wfile.write(self.server.executar(comando))
+
+class ServidorRedisLocal(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, endereco):
+        super().__init__(endereco, _Handler)
+        self.lock = threading.Lock()
+        self.dados = {}       # chave → list[bytes] (listas) ou bytes (SET/GET)
+        self.expira = {}      # chave → instante (time.monotonic)
+        self.comandos = 0
+
+    def _viva(self, chave, agora):
+        prazo = self.expira.get(chave)
+        if prazo is not None and prazo <= agora:
+            self.dados.pop(chave, None)
+            self.expira.pop(chave, None)
+        return chave in self.dados
+
+    def executar(self, comando):
+        nome = comando[0].upper().decode()
+        args = comando[1:]
+        agora = time.monotonic()
+        with self.lock:
+            self.comandos += 1
+            if nome == 'PING':
+                return b"+PONG\r\n"
+            if nome in ('SELECT', 'CLIENT'):
+                return b"+OK\r\n"
+            if nome == 'RPUSH':
+                self._viva(args[0], agora)
+                lista = self.dados.setdefault(args[0], [])
+                lista.extend(args[1:])
+                return b":%d\r\n" % len(lista)
+            if nome == 'SET':
+                opcoes = [a.upper() for a in args[2:]]
+                if b'NX' in opcoes and self._viva(args[0], agora):
+                    return b"$-1\r\n"
+                self.dados[args[0]] = args[1]
+                self.expira.pop(args[0], None)
+                if b'EX' in opcoes:
+                    self.expira[args[0]] = agora + int(args[2 + opcoes.index(b'EX') + 1])
+                return b"+OK\r\n"
+            if nome == 'GET':
+                return _bulk(self.dados[args[0]] if self._viva(args[0], agora) else None)
+            if nome in ('LRANGE', 'LLEN'):
+                lista = self.dados[args[0]] if self._viva(args[0], agora) else []
+                if nome == 'LLEN':
+                    return b":%d\r\n" % len(lista)
+                inicio, fim = int(args[1]), int(args[2])
+                fim = len(lista) if fim == -1 else fim + 1
+                itens = lista[inicio:fim]
+                return b"*%d\r\n" % len(itens) + b"".join(_bulk(v) for v in itens)
+            if nome == 'EXPIRE':
+                if not self._viva(args[0], agora):
+                    return b":0\r\n"
+                self.expira[args[0]] = agora + int(args[1])
+                return b":1\r\n"
+            if nome == 'TTL':
+                if not self._viva(args[0], agora):
+                    return b":-2\r\n"
+                prazo = self.expira.get(args[0])
+                return b":-1\r\n" if prazo is None else b":%d\r\n" % int(prazo - agora)
+            if nome in ('DEL', 'EXISTS'):
+                total = sum(1 for chave in args if self._viva(chave, agora))
+                if nome == 'DEL':
+                    for chave in args:
+                        self.dados.pop(chave, None)
+                        self.expira.pop(chave, None)
+                return b":%d\r\n" % total
+            if nome == 'DBSIZE':
+                return b":%d\r\n" % sum(1 for chave in list(self.dados) if self._viva(chave, agora))
+            if nome == 'FLUSHALL':
+                self.dados.clear()
+                self.expira.clear()
+                return b"+OK\r\n"
+        return f"-ERR unknown command '{nome}'\r\n".encode()
+
+def iniciar_servidor_redis_local(porta=0):
+    """Sobe o servidor numa thread daemon. Retorna (servidor, url)"""
+    servidor = ServidorRedisLocal(('127.0.0.1', porta))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"redis://127.0.0.1:{servidor.server_address[1]}/0"
+
+# ============================================
+# CLIENTE
+# ============================================
+def _comando_set(chave, valor, nx=False, ex=None):
+    comando = ('SET', chave, valor)
+    if nx:
+        comando += ('NX',)
+    if ex is not None:
+        comando += ('EX', ex)
+    return comando
+
+class _Pipeline:
+    """Acumula comandos e envia tudo de uma vez (uma ida e volta)"""
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.comandos = []
+
+    def __getattr__(self, nome):
+        def _enfileirar(*args):
+            self.comandos.append((nome.upper(),) + args)
+            return self
+        return _enfileirar
+
+    def set(self, chave, valor, nx=False, ex=None):
+        self.comandos.append(_comando_set(chave, valor, nx, ex))
+        return self
+
+    def execute(self):
+        comandos, self.comandos = self.comandos, []
+        return self.cliente.executar_varios(comandos)
+
+class ClienteRedisLocal:
+    """Cliente RESP mínimo (thread-safe) com a interface do redis-py usada aqui"""
+
+    def __init__(self, url="redis://127.0.0.1:6379/0", timeout=5):
+        partes = urlparse(url)
+        self.endereco = (partes.hostname or '127.0.0.1', partes.port or 6379)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._arquivo = None
+
+    def _conectar(self):
+        self._sock = socket.create_connection(self.endereco, timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._arquivo = self._sock.makefile('rb')
+
+    def _fechar(self):
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._arquivo = None
+
+    def executar_varios(self, comandos):
+        """Envia os comandos em lote e lê as respostas (reconecta uma vez se a conexão caiu)"""
+        dados = b"".join(codificar_comando(*c) for c in comandos)
+        with self._lock:
+            for tentativa in range(2):
+                try:
+                    if self._sock is None:
+                        self._conectar()
+                    self._sock.sendall(dados)
+                    return [ler_resposta(self._arquivo) for _ in comandos]
+                except (ConnectionError, OSError):
+                    self._fechar()
+                    if tentativa:
+                        raise
+
+    def executar(self, *args):
+        return self.executar_varios([args])[0]
+
+    def pipeline(self, transaction=False):
+        return _Pipeline(self)
+
+    def ping(self):
+        return self.executar('PING') == 'PONG'
+
+    def rpush(self, chave, *valores):
+        return self.executar('RPUSH', chave, *valores)
+
+    def lrange(self, chave, inicio, fim):
+        return self.executar('LRANGE', chave, inicio, fim)
+
+    def set(self, chave, valor, nx=False, ex=None):
+        return self.executar(*_comando_set(chave, valor, nx, ex))
+
+    def get(self, chave):
+        return self.executar('GET', chave)
+
+    def llen(self, chave):
+        return self.executar('LLEN', chave)
+
+    def expire(self, chave, segundos):
+        return self.executar('EXPIRE', chave, segundos)
+
+    def ttl(self, chave):
+        return self.executar('TTL', chave)
+
+    def delete(self, *chaves):
+        return self.executar('DEL', *chaves)
+
+    def close(self):
+        with self._lock:
+            self._fechar()
@@ -0,0 +1,246 @@
+"""
+Roteamento de modelos pela complexidade da pergunta
+
+Nem toda pergunta precisa do mesmo modelo: "Oi!" não justifica o preço de
+uma análise de tendência. Cada requisição ganha um nível e vai para o modelo
+mais barato que atende a qualidade mínima dele:
+    simples   saudação, agradecimento, despedida          → Nova Micro
+    consulta  uma busca pontual (receita, imposto, folha)  → Claude 3 Haiku
+    analise   vários períodos: comparar, tendência, evolução → Claude 3.5 Haiku
+- Resposta de baixa confiança (vazia, cortada por max_tokens, "não tenho
+  certeza"...) ou erro: a mesma requisição sobe para o próximo modelo
+- No streaming o texto já foi entregue: só erro ou stream vazio antes do
+  primeiro trecho sobem de modelo; a baixa confiança fica registrada
+- Latência (p50/p95), chamadas, escalonamentos e custo por modelo, com os
+  preços de cada um (comum/bedrock.py, PRECOS_MODELOS)
+
+Uso:
+    roteador = RoteadorModelos(cache=CacheRespostas())
+    resposta = roteador.invocar(corpo, classificar(pergunta))   # Resposta(..., modelo)
+    roteador.mostrar_estatisticas()
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import deque, namedtuple
+
+from comum.bedrock import InvocadorBedrock, precos_modelo
+from comum.concorrencia import limitador_padrao
+from comum.limitador_taxa import percentil
+
+# ============================================
+# NÍVEIS E MODELOS
+# ============================================
+SIMPLES = 'simples'
+CONSULTA = 'consulta'
+ANALISE = 'analise'
+
+NIVEIS = [SIMPLES, CONSULTA, ANALISE]
+
+Modelo = namedtuple('Modelo', ['nome', 'model_id', 'qualidade'])
+
+# qualidade: 1 (conversa curta) a 4 (análise longa e cuidadosa)
+MODELOS = [
+    Modelo('Nova Micro', 'us.amazon.nova-micro-v1:0', 1),
+    Modelo('Claude 3 Haiku', 'us.anthropic.claude-3-haiku-20240307-v1:0', 2),
+    Modelo('Claude 3.5 Haiku', 'us.anthropic.claude-3-5-haiku-20241022-v1:0', 3),
+    Modelo('Claude Sonnet 4.5', 'us.anthropic.claude-sonnet-4-5-20250929-v1:0', 4),
+]
+
+QUALIDADE_MINIMA = {SIMPLES: 1, CONSULTA: 2, ANALISE: 3}
+MAX_ESCALONAMENTOS = 1   # quantos modelos acima do escolhido podem ser tentados
+
+# ============================================
+# CLASSIFICAÇÃO
+# ============================================
+SAUDACOES = [r'oi+', r'ola', r'ei', r'e ai', r'bom dia', r'boa tarde', r'boa noite', r'tudo bem',
+             r'tudo bom', r'obrigad[oa]', r'muito obrigad[oa]', r'valeu', r'tchau', r'ate logo',
+             r'ate mais', r'ok', r'beleza', r'hello', r'hi', r'thanks']
+
+MARCADORES_ANALISE = [r'compar\w*', r'tendencias?', r'evoluc\w*', r'crescimento', r'varia\w*',
+                      r'versus', r'vs', r'historico', r'sazonal\w*', r'projec\w*',
+                      r'ano a ano', r'mes a mes', r'ultim[oa]s \d+', r'(?:19|20)\d\d (?:a|e|ate) (?:19|20)\d\d']
+
+_SAUDACAO = re.compile(r'(?:\b(?:' + '|'.join(SAUDACOES) + r')\b[\s,!.?]*)+')
+_ANALISE = re.compile(r'\b(?:' + '|'.join(MARCADORES_ANALISE) + r')\b')
+
+def _normalizar(texto):
+    texto = " ".join(texto.lower().split())
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+def classificar(pergunta):
+    """Nível da pergunta: SIMPLES (só saudação), ANALISE (vários períodos) ou CONSULTA"""
+    texto = _normalizar(pergunta)
+    if not texto or _SAUDACAO.fullmatch(texto):
+        return SIMPLES
+    if _ANALISE.search(texto):
+        return ANALISE
+    return CONSULTA
+
+# ============================================
+# CONFIANÇA DA RESPOSTA
+# ============================================
+MIN_CARACTERES = 20
+MARCADORES_INCERTEZA = [r'nao tenho certeza', r'nao sei', r'nao consigo', r'nao e possivel determinar',
+                        r'nao tenho (?:acesso|informac\w*)', r'como (?:um )?modelo de linguagem',
+                        r"i'?m not sure", r"i don'?t know"]
+
+_INCERTEZA = re.compile(r'\b(?:' + '|'.join(MARCADORES_INCERTEZA) + r')\b')
+
+def confianca_baixa(texto, parada=None):
+    """Resposta que não deve ser entregue se houver modelo melhor disponível"""
+    if parada == 'max_tokens':
+        return True
+    texto = (texto or "").strip()
+    if len(texto) < MIN_CARACTERES:
+        return True
+    return _INCERTEZA.search(_normalizar(texto[:400])) is not None
+
+# ============================================
+# ROTEADOR
+# ============================================
+class RoteadorModelos:
+    """Escolhe o modelo mais barato para o nível e escala quando a resposta não convence"""
+
+    def __init__(self, client=None, cache=None, modelos=None, qualidade_minima=None,
+                 max_escalonamentos=MAX_ESCALONAMENTOS, limitador=None):
+        # Do mais barato ao mais caro (saída pesa mais que entrada no custo típico)
+        self.modelos = sorted(modelos or MODELOS,
+                              key=lambda m: precos_modelo(m.model_id)['input'] + precos_modelo(m.model_id)['output'])
+        self.qualidade_minima = qualidade_minima or QUALIDADE_MINIMA
+        self.max_escalonamentos = max_escalonamentos
+        self.limitador = limitador or limitador_padrao
+        self._invocadores = {m.model_id: InvocadorBedrock(m.model_id, client=client, cache=cache,
+                                                          limitador=self.limitador, texto_padrao="")
+                             for m in self.modelos}
+
+        # Estatísticas
+        self._lock = threading.Lock()
+        self._latencias = {m.model_id: deque(maxlen=5000) for m in self.modelos}
+        self._contadores = {m.model_id: {'chamadas': 0, 'escalonamentos': 0, 'falhas': 0, 'baixa_confianca': 0}
+                            for m in self.modelos}
+        self._por_nivel = {nivel: 0 for nivel in NIVEIS}
+
+    def candidatos(self, nivel):
+        """Modelos que atendem o nível, do mais barato; o 1º responde e os demais são a escada"""
+        minimo = self.qualidade_minima.get(nivel, self.qualidade_minima[CONSULTA])
+        aptos = [m for m in self.modelos if m.qualidade >= minimo]
+        return aptos[:1 + self.max_escalonamentos]
+
+    def modelo_de(self, nivel):
+        return self.candidatos(nivel)[0]
+
+    def _registrar(self, modelo, latencia, contador=None):
+        with self._lock:
+            self._contadores[modelo.model_id]['chamadas'] += 1
+            self._latencias[modelo.model_id].append(latencia)
+            if contador:
+                self._contadores[modelo.model_id][contador] += 1
+
+    def _contar_nivel(self, nivel):
+        with self._lock:
+            self._por_nivel[nivel] = self._por_nivel.get(nivel, 0) + 1
+
+    def invocar(self, corpo, nivel=CONSULTA):
+        """Resposta do modelo mais barato apto; baixa confiança ou erro tenta o seguinte"""
+        self._contar_nivel(nivel)
+        candidatos = self.candidatos(nivel)
+        for i, modelo in enumerate(candidatos):
+            ultimo = i == len(candidatos) - 1
+            inicio = time.perf_counter()
+            try:
+                resposta = self._invocadores[modelo.model_id].invocar(corpo)
+            except Exception:
+                self._registrar(modelo, time.perf_counter() - inicio, 'falhas')
+                if ultimo:
+                    raise
+                continue
+            if not ultimo and confianca_baixa(resposta.texto, resposta.parada):
+                self._registrar(modelo, time.perf_counter() - inicio, 'escalonamentos')
+                continue
+            self._registrar(modelo, time.perf_counter() - inicio)
+            return resposta
+
+    def invocar_stream(self, corpo, nivel=CONSULTA):
+        """Trechos do modelo mais barato apto; sobe de modelo só antes do primeiro trecho"""
+        self._contar_nivel(nivel)
+        candidatos = self.candidatos(nivel)
+        for i, modelo in enumerate(candidatos):
+            ultimo = i == len(candidatos) - 1
+            inicio = time.perf_counter()
+            gerador = self._invocadores[modelo.model_id].invocar_stream(corpo)
+            try:
+                primeiro = next(gerador, None)
+            except Exception:
+                self._registrar(modelo, time.perf_counter() - inicio, 'falhas')
+                if ultimo:
+                    raise
+                continue
+            if primeiro is None and not ultimo:
+                self._registrar(modelo, time.perf_counter() - inicio, 'escalonamentos')
+                continue
+
+            trechos = []
+            parada = None
+            if primeiro is not None:
+                trechos.append(primeiro)
+                yield primeiro
+                while True:
+                    try:
+                        trecho = next(gerador)
+                    except StopIteration as fim:
+                        parada = fim.value   # stop_reason devolvido pelo invocador
+                        break
+                    trechos.append(trecho)
+                    yield trecho
+            baixa = confianca_baixa("".join(trechos), parada)
+            self._registrar(modelo, time.perf_counter() - inicio, 'baixa_confianca' if baixa else None)
+            return
+
+    async def ainvocar(self, corpo, nivel=CONSULTA):
+        """invocar() numa thread do limitador de concorrência"""
+        return await self.limitador.executar(self.invocar, corpo, nivel)
+
+    async def ainvocar_stream(self, corpo, nivel=CONSULTA):
+        """invocar_stream() consumido numa thread; os trechos chegam ao event loop"""
+        async for trecho in self.limitador.iterar(self.invocar_stream, corpo, nivel):
+            yield trecho
+
+    def estatisticas(self):
+        """Por modelo: chamadas, latência, escalonamentos e custo; e pedidos por nível"""
+        modelos = {}
+        with self._lock:
+            por_nivel = dict(self._por_nivel)
+            for modelo in self.modelos:
+                latencias = list(self._latencias[modelo.model_id])
+                uso = self._invocadores[modelo.model_id].uso.estatisticas()
+                modelos[modelo.nome] = {
+                    **self._contadores[modelo.model_id],
+                    'latencia_p50_ms': percentil(latencias, 50) * 1000,
+                    'latencia_p95_ms': percentil(latencias, 95) * 1000,
+                    'tokens_in': uso['tokens_in'] + uso['cache_leitura'] + uso['cache_escrita'],
+                    'tokens_out': uso['tokens_out'],
+                    'custo': uso['custo'],
+                }
+        return {
+            'por_nivel': por_nivel,
+            'modelos': modelos,
+            'custo_total': sum(m['custo'] for m in modelos.values()),
+        }
+
+    def mostrar_estatisticas(self):
+        """Exibe a distribuição por nível e o uso de cada modelo"""
+        stats = self.estatisticas()
+        print("\n" + "=" * 80)
+        print("🧭 ROTEAMENTO DE MODELOS")
+        print("=" * 80)
+        print("📊 Pedidos por nível: " + " | ".join(f"{nivel} {qtd}" for nivel, qtd in stats['por_nivel'].items()))
+        for nome, m in stats['modelos'].items():
+            if not m['chamadas']:
+                continue
+            print(f"🤖 {nome:<18} {m['chamadas']:>5} chamadas | p50 {m['latencia_p50_ms']:>6.0f} ms | "
+                  f"p95 {m['latencia_p95_ms']:>6.0f} ms | ↑ {m['escalonamentos']} | ✗ {m['falhas']} | "
+                  f"${m['custo']:.6f}")
+        print(f"💰 Custo total: ${stats['custo_total']:.6f}")
+        print("=" * 80 + "\n")
@@ -0,0 +1,226 @@
+"""
+Servidor HTTP/1.1 mínimo para aplicações ASGI (quando o uvicorn não está instalado)
+
+- asyncio puro: keep-alive, corpo por Content-Length, respostas em partes
+  (more_body=True) saem com Transfer-Encoding: chunked, como no SSE
+- Pre-fork: o socket é aberto uma vez e N processos worker aceitam conexões
+  nele; o kernel distribui as conexões entre os workers
+- Só o necessário para servir os bots localmente e nos benchmarks: sem TLS,
+  HTTP/2, WebSocket ou corpo de requisição chunked
+
+Uso:
+    servir(app, porta=8000, workers=4)
+"""
+import asyncio
+import os
+import signal
+import socket
+import sys
+from http import HTTPStatus
+
+# ============================================
+# CONFIGURAÇÕES PADRÃO
+# ============================================
+MAX_CABECALHO = 64 * 1024
+MAX_CORPO = 1024 * 1024
+TIMEOUT_OCIOSO = 75.0      # segundos de keep-alive sem nova requisição
+
+class _RequisicaoInvalida(Exception):
+    pass
+
+# ============================================
+# CONEXÃO
+# ============================================
+async def _ler_requisicao(reader):
+    """(método, caminho, query, versão, cabeçalhos, corpo) ou None se o cliente fechou"""
+    try:
+        bruto = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), TIMEOUT_OCIOSO)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise _RequisicaoInvalida("Cabeçalho grande demais")
+
+    linhas = bruto[:-4].split(b"\r\n")
+    try:
+        metodo, alvo, versao = linhas[0].decode('latin-1').split(" ", 2)
+    except ValueError:
+        raise _RequisicaoInvalida("Linha de requisição inválida")
+    cabecalhos = []
+    for linha in linhas[1:]:
+        nome, _, valor = linha.partition(b":")
+        cabecalhos.append((nome.strip().lower(), valor.strip()))
+
+    tamanho = int(dict(cabecalhos).get(b"content-length", b"0") or 0)
+    if tamanho > MAX_CORPO:
+        raise _RequisicaoInvalida("Corpo grande demais")
+    corpo = await reader.readexactly(tamanho) if tamanho else b""
+    caminho, _, query = alvo.partition("?")
+    return metodo.upper(), caminho, query, versao, cabecalhos, corpo
+
+async def _atender_conexao(app, reader, writer):
+    servidor = writer.get_extra_info('sockname')
+    cliente = writer.get_extra_info('peername')
+    try:
+        while True:
+            try:
+                requisicao = await _ler_requisicao(reader)
+            except _RequisicaoInvalida as e:
+                mensagem = str(e).encode('utf-8')
+                writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: %d\r\nConnection: close\r\n\r\n%s"
+                             % (len(mensagem), mensagem))
+                await writer.drain()
+                return
+            if requisicao is None:
+                return
+            metodo, caminho, query, versao, cabecalhos, corpo = requisicao
+            conexao = dict(cabecalhos).get(b"connection", b"").lower()
+            manter = conexao != b"close" and (versao == "HTTP/1.1" or conexao == b"keep-alive")
+
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0', 'spec_version': '2.3'},
+                'http_version': versao.split("/")[-1],
+                'method': metodo,
+                'scheme': 'http',
+                'path': caminho,
+                'raw_path': caminho.encode('latin-1'),
+                'query_string': query.encode('latin-1'),
+                'root_path': '',
+                'headers': cabecalhos,
+                'client': cliente[:2] if cliente else None,
+                'server': servidor[:2] if servidor else None,
+            }
+            resposta = _Resposta(writer, manter)
+            recebido = False
+            desconectado = asyncio.Event()
+
+            async def receive():
+                nonlocal recebido
+                if not recebido:
+                    recebido = True
+                    return {'type': 'http.request', 'body': corpo, 'more_body': False}
+                await desconectado.wait()
+                return {'type': 'http.disconnect'}
+
+            try:
+                await app(scope, receive, resposta.send)
+            except ConnectionError:
+                return
+            except Exception as e:
+                print(f"❌ Erro na aplicação ASGI: {e}", file=sys.stderr)
+                if not resposta.iniciada:
+                    await resposta.send({'type': 'http.response.start', 'status': 500,
+                                         'headers': [(b'content-type', b'text/plain')]})
+                    await resposta.send({'type': 'http.response.body', 'body': b'Erro interno'})
+                return
+            finally:
+                desconectado.set()
+            if not resposta.concluida:
+                return
+            if not manter:
+                return
+    finally:
+        writer.close()
+
+class _Resposta:
+    """Traduz as mensagens http.response.* em bytes HTTP/1.1"""
+
+    def __init__(self, writer, manter):
+        self.writer = writer
+        self.manter = manter
+        self.status = 200
+        self.cabecalhos = []
+        self.iniciada = False
+        self.chunked = False
+        self.concluida = False
+
+    def _cabecalho(self, extras):
+        try:
+            frase = HTTPStatus(self.status).phrase
+        except ValueError:
+            frase = ""
+        linhas = [f"HTTP/1.1 {self.status} {frase}".encode('latin-1')]
+        linhas += [nome + b": " + valor for nome, valor in self.cabecalhos + extras]
+        if not self.manter:
+            linhas.append(b"connection: close")
+        return b"\r\n".join(linhas) + b"\r\n\r\n"
+
+    async def send(self, mensagem):
+        if mensagem['type'] == 'http.response.start':
+            self.status = mensagem['status']
+            self.cabecalhos = [(bytes(n).lower(), bytes(v)) for n, v in mensagem.get('headers', [])]
+            return
+        if mensagem['type'] != 'http.response.body':
+            return
+        corpo = mensagem.get('body', b"")
+        mais = mensagem.get('more_body', False)
+        if not self.iniciada:
+            self.iniciada = True
+            tem_tamanho = any(nome == b"content-length" for nome, _ in self.cabecalhos)
+            if mais and not tem_tamanho:
+                self.chunked = True
+                self.writer.write(self._cabecalho([(b"transfer-encoding", b"chunked")]))
+            else:
+                extras = [] if tem_tamanho else [(b"content-length", str(len(corpo)).encode())]
+                self.writer.write(self._cabecalho(extras))
+        if self.chunked:
+            if corpo:
+                self.writer.write(b"%x\r\n%s\r\n" % (len(corpo), corpo))
+            if not mais:
+                self.writer.write(b"0\r\n\r\n")
+        else:
+            self.writer.write(corpo)
+        await self.writer.drain()
+        if not mais:
+            self.concluida = True
+
+# ============================================
+# WORKERS
+# ============================================
+def _rodar_worker(app, sock):
+    async def _principal():
+        servidor = await asyncio.start_server(lambda r, w: _atender_conexao(app, r, w),
+                                              sock=sock, limit=MAX_CABECALHO)
+        async with servidor:
+            await servidor.serve_forever()
+    try:
+        asyncio.run(_principal())
+    except KeyboardInterrupt:
+        pass
+
+def servir(app, host='127.0.0.1', porta=8000, workers=1):
+    """Serve 'app' em host:porta com N processos worker (bloqueia até Ctrl+C/SIGTERM)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, porta))
+    sock.listen(1024)
+    sock.setblocking(False)
+    print(f"🌐 Servindo em http://{host}:{sock.getsockname()[1]} com {workers} worker(s)", flush=True)
+
+    if workers <= 1:
+        _rodar_worker(app, sock)
+        return
+
+    filhos = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            _rodar_worker(app, sock)
+            os._exit(0)
+        filhos.append(pid)
+
+    def _encerrar(*_):
+        for pid in filhos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, _encerrar)
+    try:
+        for pid in filhos:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        _encerrar()
+        for pid in filhos:
+            os.waitpid(pid, 0)
@@ -0,0 +1,358 @@
+"""
+Armazém de sessões de conversa: qualquer worker atende qualquer turno
+
+O estado da conversa (memória + contadores de custo) sai do processo e vai
+para um armazém compartilhado, chaveado pelo ID da sessão:
+- Escrita só por acréscimo: cada turno anexa seus eventos (troca, resumo,
+  uso de tokens); nada é reescrito, então o custo por turno não cresce com
+  o tamanho da conversa
+- Leitura incremental: o worker que já tem a sessão em memória só lê os
+  eventos novos (ler_novos(id, posicao)); a posição guarda a geração da
+  sessão, trocada sempre que ela expira e é recriada, então um offset de
+  uma sessão antiga nunca pula os eventos da nova
+- Expiração por TTL, renovada a cada escrita
+- Serialização compacta: um evento = um array JSON sem espaços
+
+Backends (por URL, ou SESSOES_URL no ambiente):
+    memoria://             dict em memória (um processo só)
+    sqlite:///sessoes.db   SQLite em WAL, compartilhado entre processos
+    redis://host:6379/0    lista por sessão (RPUSH/LRANGE/EXPIRE) + chave
+                           da geração; sem o pacote redis, usa o cliente de
+                           comum/redis_local.py
+
+Uso:
+    armazem = ArmazemSessoes('sqlite:///sessoes.db')
+    armazem.anexar(id_sessao, [["t", "Oi", "Olá!"]])
+    eventos = armazem.carregar(id_sessao)
+    novos, posicao, reiniciou = armazem.ler_novos(id_sessao, posicao)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+# ============================================
+# CONFIGURAÇÕES PADRÃO
+# ============================================
+TTL_SESSAO = 24 * 3600                 # sessão some após 1 dia sem turnos
+URL_PADRAO = os.environ.get('SESSOES_URL', 'memoria://')
+PREFIXO_CHAVE = 'sessao:'              # chaves no Redis
+SUFIXO_GERACAO = ':geracao'            # chave da geração da sessão no Redis
+LIMPEZA_A_CADA = 500                   # escritas entre varreduras de sessões expiradas
+
+def serializar(evento):
+    return json.dumps(evento, separators=(',', ':'), ensure_ascii=False)
+
+def desserializar(dados):
+    return json.loads(dados)
+
+def nova_geracao():
+    """Identifica uma encarnação da sessão (muda quando ela expira e é recriada)"""
+    return uuid.uuid4().hex
+
+# ============================================
+# BACKENDS
+# ============================================
+class _BackendMemoria:
+    """dict id_sessao -> [expira_em, [eventos serializados], geração]"""
+
+    def __init__(self):
+        self.sessoes = {}
+
+    def anexar(self, id_sessao, dados, expira_em, agora):
+        sessao = self.sessoes.get(id_sessao)
+        if sessao is None or sessao[0] <= agora:
+            sessao = self.sessoes[id_sessao] = [expira_em, [], nova_geracao()]
+        sessao[0] = expira_em
+        sessao[1].extend(dados)
+        return len(sessao[1])
+
+    def carregar(self, id_sessao, a_partir_de, agora):
+        sessao = self.sessoes.get(id_sessao)
+        if sessao is None or sessao[0] <= agora:
+            return None, []
+        return sessao[2], sessao[1][a_partir_de:]
+
+    def apagar(self, id_sessao):
+        self.sessoes.pop(id_sessao, None)
+
+    def remover_expiradas(self, agora):
+        expiradas = [id_sessao for id_sessao, (expira_em, _, _) in self.sessoes.items() if expira_em <= agora]
+        for id_sessao in expiradas:
+            del self.sessoes[id_sessao]
+        return len(expiradas)
+
+    def tamanho(self):
+        return len(self.sessoes)
+
+class _BackendSQLite:
+    """
+    Eventos numa tabela só de INSERT (ordem pelo rowid) + tabela de sessões
+    com a expiração, a contagem de eventos e a geração; WAL deixa leitores e
+    o escritor de outros processos trabalharem ao mesmo tempo
+    """
+
+    def __init__(self, caminho):
+        self.conn = sqlite3.connect(caminho, check_same_thread=False, timeout=30,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessoes (
+            id_sessao TEXT PRIMARY KEY,
+            expira_em REAL NOT NULL,
+            eventos INTEGER NOT NULL,
+            geracao TEXT NOT NULL DEFAULT ''
+        ) WITHOUT ROWID
+        ''')
+        # Armazéns criados antes da geração: ganham a coluna
+        colunas = {linha[1] for linha in self.conn.execute('PRAGMA table_info(sessoes)')}
+        if 'geracao' not in colunas:
+            self.conn.execute("ALTER TABLE sessoes ADD COLUMN geracao TEXT NOT NULL DEFAULT ''")
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS eventos_sessao (
+            id INTEGER PRIMARY KEY,
+            id_sessao TEXT NOT NULL,
+            evento TEXT NOT NULL
+        )
+        ''')
+        self.conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_eventos_sessao
+        ON eventos_sessao(id_sessao, id)
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_sessoes_expira ON sessoes(expira_em)')
+
+    def anexar(self, id_sessao, dados, expira_em, agora):
+        # IMMEDIATE: pega o lock de escrita já no início (sem deadlock de upgrade entre processos)
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute('SELECT expira_em FROM sessoes WHERE id_sessao = ?', (id_sessao,)).fetchone()
+            if row is not None and row[0] <= agora:
+                self._apagar(id_sessao)
+            self.conn.executemany('INSERT INTO eventos_sessao (id_sessao, evento) VALUES (?, ?)',
+                                  [(id_sessao, d) for d in dados])
+            self.conn.execute('''
+            INSERT INTO sessoes (id_sessao, expira_em, eventos, geracao) VALUES (?, ?, ?, ?)
+            ON CONFLICT(id_sessao) DO UPDATE SET
+                expira_em = excluded.expira_em,
+                eventos = eventos + excluded.eventos
+            ''', (id_sessao, expira_em, len(dados), nova_geracao()))
+            total = self.conn.execute('SELECT eventos FROM sessoes WHERE id_sessao = ?', (id_sessao,)).fetchone()[0]
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        return total
+
+    def carregar(self, id_sessao, a_partir_de, agora):
+        # Geração e eventos do mesmo snapshot (a sessão pode ser recriada entre as consultas)
+        self.conn.execute('BEGIN')
+        try:
+            row = self.conn.execute('SELECT expira_em, geracao FROM sessoes WHERE id_sessao = ?',
+                                    (id_sessao,)).fetchone()
+            if row is None or row[0] <= agora:
+                return None, []
+            return row[1], [evento for (evento,) in self.conn.execute('''
+            SELECT evento FROM eventos_sessao WHERE id_sessao = ?
+            ORDER BY id LIMIT -1 OFFSET ?
+            ''', (id_sessao, a_partir_de))]
+        finally:
+            self.conn.execute('COMMIT')
+
+    def _apagar(self, id_sessao):
+        self.conn.execute('DELETE FROM eventos_sessao WHERE id_sessao = ?', (id_sessao,))
+        self.conn.execute('DELETE FROM sessoes WHERE id_sessao = ?', (id_sessao,))
+
+    def apagar(self, id_sessao):
+        self.conn.execute('BEGIN IMMEDIATE')
+        self._apagar(id_sessao)
+        self.conn.execute('COMMIT')
+
+    def remover_expiradas(self, agora):
+        self.conn.execute('BEGIN IMMEDIATE')
+        self.conn.execute('''
+        DELETE FROM eventos_sessao WHERE id_sessao IN (
+            SELECT id_sessao FROM sessoes WHERE expira_em <= ?
+        )
+        ''', (agora,))
+        removidas = self.conn.execute('DELETE FROM sessoes WHERE expira_em <= ?', (agora,)).rowcount
+        self.conn.execute('COMMIT')
+        return removidas
+
+    def tamanho(self):
+        return self.conn.execute('SELECT COUNT(*) FROM sessoes').fetchone()[0]
+
+class _BackendRedis:
+    """
+    Uma lista por sessão; RPUSH + EXPIRE no mesmo pipeline (uma ida e volta)
+    A geração fica numa chave à parte, criada com SET NX antes do RPUSH e
+    expirando 1s antes da lista: lista recriada sempre tem geração nova
+    (no pior caso a geração muda com a lista viva, e o leitor relê tudo)
+    """
+
+    def __init__(self, url):
+        try:
+            import redis
+            self.cliente = redis.Redis.from_url(url)
+        except ImportError:
+            from comum.redis_local import ClienteRedisLocal
+            self.cliente = ClienteRedisLocal(url)
+
+    def anexar(self, id_sessao, dados, expira_em, agora):
+        chave = PREFIXO_CHAVE + id_sessao
+        ttl = max(2, int(expira_em - agora))
+        pipe = self.cliente.pipeline(transaction=False)
+        pipe.set(chave + SUFIXO_GERACAO, nova_geracao(), nx=True, ex=ttl - 1)
+        pipe.rpush(chave, *dados)
+        pipe.expire(chave, ttl)
+        pipe.expire(chave + SUFIXO_GERACAO, ttl - 1)
+        _, total, _, _ = pipe.execute()
+        return total
+
+    def carregar(self, id_sessao, a_partir_de, agora):
+        chave = PREFIXO_CHAVE + id_sessao
+        while True:
+            # Geração lida antes e depois: se mudou no meio, a lista pode ser de outra encarnação
+            pipe = self.cliente.pipeline(transaction=False)
+            pipe.get(chave + SUFIXO_GERACAO)
+            pipe.lrange(chave, a_partir_de, -1)
+            pipe.get(chave + SUFIXO_GERACAO)
+            antes, dados, depois = pipe.execute()
+            if antes == depois:
+                geracao = antes.decode('utf-8') if antes is not None else None
+                return geracao, [d.decode('utf-8') for d in dados]
+
+    def apagar(self, id_sessao):
+        self.cliente.delete(PREFIXO_CHAVE + id_sessao, PREFIXO_CHAVE + id_sessao + SUFIXO_GERACAO)
+
+    def remover_expiradas(self, agora):
+        return 0   # o próprio Redis expira as chaves
+
+    def tamanho(self):
+        return None
+
+def criar_backend(url):
+    partes = urlparse(url)
+    if partes.scheme == 'memoria':
+        return _BackendMemoria()
+    if partes.scheme == 'sqlite':
+        # sqlite:///relativo.db e sqlite:////caminho/absoluto.db (como no SQLAlchemy)
+        return _BackendSQLite(url[len('sqlite:///'):] or ':memory:')
+    if partes.scheme in ('redis', 'rediss'):
+        return _BackendRedis(url)
+    raise ValueError(f"Backend de sessões desconhecido: {url}")
+
+# ============================================
+# ARMAZÉM DE SESSÕES
+# ============================================
+class ArmazemSessoes:
+    """Log de eventos por sessão com TTL e contadores de escrita/leitura (thread-safe)"""
+
+    def __init__(self, url=None, ttl_segundos=TTL_SESSAO):
+        self.url = url or URL_PADRAO
+        self.ttl_segundos = ttl_segundos
+        self._backend = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        # Estatísticas
+        self.escritas = 0
+        self.leituras = 0
+        self.eventos_gravados = 0
+        self.eventos_lidos = 0
+        self.bytes_gravados = 0
+        self.tempo_escrita = 0.0
+        self.tempo_leitura = 0.0
+        self.expiradas = 0
+
+    @property
+    def backend(self):
+        """Aberto no primeiro uso e de novo após um fork (conexões não atravessam processos)"""
+        if self._pid != os.getpid():
+            self._backend = criar_backend(self.url)
+            self._pid = os.getpid()
+        return self._backend
+
+    def anexar(self, id_sessao, eventos):
+        """Acrescenta eventos ao fim da sessão e renova o TTL; retorna o total de eventos dela"""
+        if not eventos:
+            return None
+        dados = [serializar(evento) for evento in eventos]
+        with self._lock:
+            inicio = time.perf_counter()
+            agora = time.time()
+            total = self.backend.anexar(id_sessao, dados, agora + self.ttl_segundos, agora)
+            self.escritas += 1
+            if self.escritas % LIMPEZA_A_CADA == 0:
+                self.expiradas += self.backend.remover_expiradas(agora)
+            self.tempo_escrita += time.perf_counter() - inicio
+            self.eventos_gravados += len(dados)
+            self.bytes_gravados += sum(len(d.encode('utf-8')) for d in dados)
+        return total
+
+    def carregar(self, id_sessao, a_partir_de=0):
+        """Eventos da sessão a partir do n-ésimo ([] se não existe ou expirou)"""
+        with self._lock:
+            inicio = time.perf_counter()
+            _, dados = self.backend.carregar(id_sessao, a_partir_de, time.time())
+            self.tempo_leitura += time.perf_counter() - inicio
+            self.leituras += 1
+            self.eventos_lidos += len(dados)
+        return [desserializar(d) for d in dados]
+
+    def ler_novos(self, id_sessao, posicao=None):
+        """
+        Leitura incremental: posicao é a devolvida pela chamada anterior (None = do início)
+        Retorna (eventos, nova posição, reiniciou); reiniciou=True quando a sessão
+        expirou e foi recriada desde a última leitura: os eventos vêm do início e o
+        estado montado com os anteriores deve ser descartado
+        """
+        geracao, lidos = posicao or (None, 0)
+        with self._lock:
+            inicio = time.perf_counter()
+            agora = time.time()
+            atual, dados = self.backend.carregar(id_sessao, lidos, agora)
+            reiniciou = atual != geracao and lidos > 0
+            if reiniciou:
+                atual, dados = self.backend.carregar(id_sessao, 0, agora)
+                lidos = 0
+            self.tempo_leitura += time.perf_counter() - inicio
+            self.leituras += 1
+            self.eventos_lidos += len(dados)
+        return [desserializar(d) for d in dados], (atual, lidos + len(dados)), reiniciou
+
+    @staticmethod
+    def avancar(posicao, n_eventos):
+        """Posição depois de anexar n_eventos próprios (a geração é conferida na próxima leitura)"""
+        geracao, lidos = posicao or (None, 0)
+        return geracao, lidos + n_eventos
+
+    def apagar(self, id_sessao):
+        with self._lock:
+            self.backend.apagar(id_sessao)
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'backend': urlparse(self.url).scheme,
+                'sessoes': self.backend.tamanho(),
+                'escritas': self.escritas,
+                'leituras': self.leituras,
+                'eventos_gravados': self.eventos_gravados,
+                'eventos_lidos': self.eventos_lidos,
+                'bytes_por_evento': self.bytes_gravados / self.eventos_gravados if self.eventos_gravados else 0.0,
+                'escrita_ms': self.tempo_escrita / self.escritas * 1000 if self.escritas else 0.0,
+                'leitura_ms': self.tempo_leitura / self.leituras * 1000 if self.leituras else 0.0,
+                'expiradas': self.expiradas,
+            }
+
+    def mostrar_estatisticas(self):
+        stats = self.estatisticas()
+        sessoes = f"{stats['sessoes']} sessões | " if stats['sessoes'] is not None else ""
+        print(f"💾 Sessões ({stats['backend']}): {sessoes}{stats['escritas']} escritas "
+              f"({stats['escrita_ms']:.2f}ms), {stats['leituras']} leituras ({stats['leitura_ms']:.2f}ms) | "
+              f"{stats['eventos_gravados']} eventos, ~{stats['bytes_por_evento']:.0f} bytes/evento | "
+              f"TTL {self.ttl_segundos}s")
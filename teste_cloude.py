@@ -1,43 +1,30 @@
-import boto3
-import json
+import os
+import sys
 
-# Cliente Bedrock Runtime
-client = boto3.client(
-    service_name='bedrock-runtime',
-    region_name='us-east-2'
-)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comum.bedrock import InvocadorBedrock, montar_corpo
 
 # Claude Sonnet 4.5 (Inference Profile)
 claude_model_id = 'us.anthropic.claude-sonnet-4-5-20250929-v1:0'
 
+# Invocador Bedrock (cliente criado na primeira chamada, não no import)
+invocador = InvocadorBedrock(claude_model_id, texto_padrao='Resposta não encontrada')
+
 # Configuração da requisição (Messages API)
-claude_config = json.dumps({
-    "anthropic_version": "bedrock-2023-05-31",
-    "max_tokens": 500,  # Aumentado para evitar resposta cortada
-    "temperature": 0.5,
-    "messages": [
-        {
-            "role": "user",
-            "content": "Quais são as melhores opções de sandálias para uma caminhada na praia? Forneça uma resposta detalhada e bem formatada."
-        }
-    ]
-})
-
-# Invocação do modelo
-response = client.invoke_model(
-    body=claude_config,
-    modelId=claude_model_id,
-    accept="application/json",
-    contentType="application/json"
+claude_config = montar_corpo(
+    "Quais são as melhores opções de sandálias para uma caminhada na praia? Forneça uma resposta detalhada e bem formatada.",
+    max_tokens=500,  # Aumentado para evitar resposta cortada
+    temperature=0.5
 )
 
-# Tratamento da resposta usando dicionário Python
-resposta = json.loads(response['body'].read().decode('utf-8'))
+def main():
+    # Invocação do modelo e extração do texto da resposta (Claude 3+ usa 'content')
+    completion = invocador.invocar(claude_config).texto
 
-# Extração do texto da resposta (Claude 3+ usa 'content')
-completion = resposta.get('content', [{}])[0].get('text', 'Resposta não encontrada')
+    # Formatação da resposta
+    resposta_formatada = f"Resposta:\n{completion}\n"
 
-# Formatação da resposta
-resposta_formatada = f"Resposta:\n{completion}\n"
+    print(resposta_formatada)
 
-print(resposta_formatada)
\ No newline at end of file
+if __name__ == "__main__":
+    main()